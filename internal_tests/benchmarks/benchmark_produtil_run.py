@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+"""
+Program Name: benchmark_produtil_run.py
+Contact(s): George McCabe
+Abstract: Measure the time it takes to run a trivial executable with
+ produtil.run compared to subprocess.run to show the overhead that
+ produtil adds to every command that METplus runs
+History Log:  Initial version
+Usage: benchmark_produtil_run.py [-n <iterations>] [-e <executable>]
+Parameters: -n number of times to run each command (default 50)
+            -e executable to run (default true)
+Input Files: None
+Output Files: None
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                os.pardir, os.pardir)))
+
+from produtil.run import exe, run, runstr
+
+def run_subprocess(executable):
+    """!Run executable with subprocess as a baseline"""
+    return subprocess.run([executable]).returncode
+
+def run_produtil(executable):
+    """!Run executable the way CommandRunner runs non-MET commands"""
+    return run(exe(executable))
+
+def run_produtil_capture(executable):
+    """!Run executable and capture its output through a pipe"""
+    runstr(exe(executable))
+    return 0
+
+def time_calls(function, executable, iterations):
+    """!Call function iterations times and return the mean seconds per call"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        assert function(executable) == 0
+    return (time.perf_counter() - start) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', dest='iterations', type=int, default=50)
+    parser.add_argument('-e', dest='executable', default='true')
+    args = parser.parse_args()
+
+    results = [
+        ('subprocess.run', time_calls(run_subprocess, args.executable,
+                                      args.iterations)),
+        ('produtil run', time_calls(run_produtil, args.executable,
+                                    args.iterations)),
+        ('produtil runstr', time_calls(run_produtil_capture, args.executable,
+                                       args.iterations)),
+    ]
+
+    baseline = results[0][1]
+    print(f"{args.iterations} runs of {args.executable}")
+    print(f"{'method':<18}{'ms per command':>16}{'overhead (ms)':>16}")
+    for name, seconds in results:
+        print(f"{name:<18}{seconds * 1000:>16.2f}"
+              f"{(seconds - baseline) * 1000:>16.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+"""
+Program Name: benchmark_string_template_substitution.py
+Contact(s): George McCabe
+Abstract: Compare the time it takes to fill in and parse filename templates
+ using compiled templates against reading the template on every call
+History Log:  Initial version
+Usage: benchmark_string_template_substitution.py [-n <iterations>]
+Parameters: -n number of times to call each function (default 20000)
+Input Files: None
+Output Files: None
+"""
+
+import os
+import sys
+import re
+import argparse
+import datetime
+from timeit import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                os.pardir, os.pardir)))
+
+from metplus.util import time_util
+from metplus.util.config import string_template_substitution as sts
+
+TEMPLATES = [
+    ('{init?fmt=%Y%m%d%H}/gfs.t{init?fmt=%H}z.pgrb2.0p25.f{lead?fmt=%3H}',
+     '2019020112/gfs.t12z.pgrb2.0p25.f024'),
+    ('{valid?fmt=%Y%m%d}/prepbufr.gdas.{valid?fmt=%Y%m%d%H?shift=-30}.nr',
+     '20190202/prepbufr.gdas.2019020212.nr'),
+    ('ST4.{valid?fmt=%Y%m%d%H}.{level?fmt=%HH}h',
+     'ST4.2019020212.06h'),
+]
+
+TIME_INFO = {'init': datetime.datetime(2019, 2, 1, 12),
+             'valid': datetime.datetime(2019, 2, 2, 12),
+             'lead': 86400,
+             'level': 21600}
+
+def fill_uncompiled(template, **kwargs):
+    """!Fill in template by reading the tags on each call"""
+    match_list = re.findall(r'\{(.+?)\}', template)
+    return sts.find_and_replace_tags_in_template(match_list, template, kwargs)
+
+def parse_uncompiled(template, filepath):
+    """!Parse file path by reading the template on each call"""
+    match_dict, valid_shift = sts.populate_match_dict(template, filepath)
+    if match_dict is None:
+        return None
+    output_dict = sts.populate_output_dict(match_dict, valid_shift)
+    return time_util.ti_calculate(output_dict)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', dest='iterations', type=int, default=20000)
+    iterations = parser.parse_args().iterations
+
+    results = {'fill': [0, 0], 'parse': [0, 0]}
+    for template, filepath in TEMPLATES:
+        # make sure both methods give the same answer
+        assert (fill_uncompiled(template, **TIME_INFO) ==
+                sts.do_string_sub(template, **TIME_INFO))
+        assert (parse_uncompiled(template, filepath) ==
+                sts.parse_template(template, filepath))
+
+        results['fill'][0] += timeit(
+            lambda: fill_uncompiled(template, **TIME_INFO),
+            number=iterations)
+        results['fill'][1] += timeit(
+            lambda: sts.do_string_sub(template, **TIME_INFO),
+            number=iterations)
+        results['parse'][0] += timeit(
+            lambda: parse_uncompiled(template, filepath),
+            number=iterations)
+        results['parse'][1] += timeit(
+            lambda: sts.parse_template(template, filepath),
+            number=iterations)
+
+    print(f"{len(TEMPLATES)} templates, {iterations} calls each")
+    print(f"{'function':<10}{'uncompiled (s)':>16}{'compiled (s)':>16}"
+          f"{'speedup':>10}")
+    for name, (uncompiled, compiled) in results.items():
+        print(f"{name:<10}{uncompiled:>16.3f}{compiled:>16.3f}"
+              f"{uncompiled / compiled:>9.1f}x")
+
+if __name__ == '__main__':
+    main()
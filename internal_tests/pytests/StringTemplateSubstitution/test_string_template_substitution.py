@@ -1,12 +1,15 @@
 #!/usr/bin/env python
 
 import pytest
+import re
 import logging
 import datetime
 
 from metplus.util import do_string_sub, parse_template
 from metplus.util import get_tags,format_one_time_item, format_hms
 from metplus.util import add_to_dict, populate_match_dict, get_fmt_info
+from metplus.util import get_compiled_template
+from metplus.util import find_and_replace_tags_in_template
 
 def test_cycle_hour():
     cycle_string = 0
@@ -583,4 +586,68 @@ def test_do_string_sub_skip_missing_tags():
     templ = "{init?fmt=%Y%m%d%H}_{missing_tag?fmt=%H}_f{lead?fmt=%2H}"
     expected_filename = "2017060400_{missing_tag?fmt=%H}_f06"
     filename = do_string_sub(templ, init=init_string, lead=lead_string, skip_missing_tags=True)
-    assert(filename == expected_filename)
\ No newline at end of file
+    assert(filename == expected_filename)
+
+def test_do_string_sub_skip_missing_tags_all_missing():
+    templ = "file_{missing_tag?fmt=%H}.nc"
+    filename = do_string_sub(templ, skip_missing_tags=True)
+    assert(filename == templ)
+
+def test_get_compiled_template_cached():
+    templ = "{init?fmt=%Y%m%d%H}_f{lead?fmt=%3H}"
+    assert(get_compiled_template(templ) is get_compiled_template(templ))
+
+@pytest.mark.parametrize(
+    'template, filepath', [
+        ('file.{valid?fmt=%Y%m%d%H}.out', 'file.2019020112.out'),
+        ('file.{valid?fmt=%Y%m%d%H}.out', 'file.2019020112.other'),
+        ('file.{init?fmt=%Y%m%d%H}.f{lead?fmt=%H}.out', 'file.2019020112.f123.out'),
+        ('file.{init?fmt=%Y%m%d%H}.f{lead?fmt=%3H}.out', 'file.2019020112.f003.out'),
+        ('file.{init?fmt=%Y%m%d%H}.f{lead?fmt=%3H}.out', 'file.2019020112.f03.out'),
+        ('{valid?fmt=%Y%m%d}/file.{valid?fmt=%Y%m%d%H?shift=-30}.out',
+         '20190201/file.2019020112.out'),
+        ('{valid?fmt=%Y%m%d}/file.{valid?fmt=%Y%m%d%H}.out',
+         '20190202/file.2019020112.out'),
+        ('{valid?fmt=%Y%j%H}_{valid?fmt=%b}', '201903212_Feb'),
+        ('{init?fmt=%Y%m%d%H?shift=-30}.out', 'other.out'),
+        ('{init?fmt=%Y%m%d%H?shift=-30}.out', '2019020112.out'),
+        ('file.{valid?fmt=%Y%m%d%H?shift=-30}.{valid?fmt=%Y?shift=60}.out',
+         'file.2019020112.2019.out'),
+        ('file.nc', 'file.nc'),
+        ('file.{valid?fmt=%Y%m%d%H}.{misc?fmt=%s}', 'file.2019020112.abc'),
+    ]
+)
+def test_compiled_template_parse(template, filepath):
+    compiled = get_compiled_template(template)
+    try:
+        expected = populate_match_dict(template, filepath)
+    except TypeError:
+        with pytest.raises(TypeError):
+            compiled.populate_match_dict(filepath)
+        return
+
+    assert(compiled.populate_match_dict(filepath) == expected)
+
+@pytest.mark.parametrize(
+    'template', [
+        'file.{valid?fmt=%Y%m%d%H}.out',
+        '{init?fmt=%Y%m%d%H}/f{lead?fmt=%3H}_{init?fmt=%Y%m%d%H}.nc',
+        '{valid?fmt=%Y%m%d%H?shift=-1H}_{valid?fmt=%H?truncate=3H}',
+        '{model}_{lead}_{level?fmt=%H}',
+        'no_tags.nc',
+    ]
+)
+def test_compiled_template_fill(template):
+    kwargs = {'init': datetime.datetime(2019, 2, 1, 12),
+              'valid': datetime.datetime(2019, 2, 1, 13),
+              'lead': 3600,
+              'level': 7200,
+              'model': 'GFS'}
+    match_list = re.findall(r'\{(.+?)\}', template)
+    if match_list:
+        expected = find_and_replace_tags_in_template(match_list, template,
+                                                     kwargs)
+    else:
+        expected = template
+
+    assert(get_compiled_template(template).fill(**kwargs) == expected)
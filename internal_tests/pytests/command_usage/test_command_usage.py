@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import csv
+import json
+import datetime
+from collections import namedtuple
+
+import pytest
+
+import produtil
+
+from metplus.util import met_util as util
+from metplus.util import command_usage
+from metplus.util.config import config_metplus
+from metplus.wrappers.command_runner import CommandRunner
+
+#@pytest.fixture
+def metplus_config():
+    """! Create a METplus configuration object that can be
+    manipulated/modified to
+         reflect different paths, directories, values, etc. for individual
+         tests.
+    """
+    try:
+        if 'JLOGFILE' in os.environ:
+            produtil.setup.setup(send_dbn=False, jobname='CommandUsage',
+                                 jlogfile=os.environ['JLOGFILE'])
+        else:
+            produtil.setup.setup(send_dbn=False, jobname='CommandUsage')
+        produtil.log.postmsg('command_usage test is starting')
+
+        # Read in the configuration object CONFIG
+        config = config_metplus.setup(util.baseinputconfs)
+        logger = util.get_logger(config)
+        return config
+
+    except Exception as e:
+        produtil.log.jlogger.critical(
+            'command_usage test failed: %s' % (str(e),), exc_info=True)
+        sys.exit(2)
+
+FakeRusage = namedtuple('FakeRusage', ['ru_utime', 'ru_stime', 'ru_maxrss',
+                                       'ru_inblock', 'ru_oublock'])
+
+START_TIME = datetime.datetime(2020, 1, 1, 12)
+
+def test_get_rusage_info():
+    rusage_list = [FakeRusage(1.5, 0.5, 2048, 10, 20),
+                   FakeRusage(0.5, 0.25, 4096, 1, 2)]
+    info = command_usage.get_rusage_info(rusage_list)
+    assert info == {'user_seconds': 2.0,
+                    'sys_seconds': 0.75,
+                    'max_rss_kb': 4096,
+                    'read_bytes': 11 * 512,
+                    'write_bytes': 22 * 512}
+    assert command_usage.get_rusage_info(None) == {}
+
+def test_record_command():
+    command_usage.clear_command_records()
+    command_info = {'wrapper': 'GridStat', 'init': '20200101000000',
+                    'lead': 10800, 'field': 'TMP/P500', 'valid': None}
+    record = command_usage.record_command('grid_stat a b c', 'grid_stat',
+                                          START_TIME, 2.5, 0,
+                                          [FakeRusage(2, 0.5, 1024, 0, 8)],
+                                          command_info)
+    assert command_usage.get_command_records() == [record]
+    assert record['wrapper'] == 'GridStat'
+    assert record['executable'] == 'grid_stat'
+    assert record['start'] == '20200101120000'
+    assert record['lead'] == 10800
+    assert record['valid'] == ''
+    assert record['wall_seconds'] == 2.5
+    assert record['write_bytes'] == 8 * 512
+
+    # wrapper is set to executable name if it is not provided
+    record = command_usage.record_command('ncdump file', 'ncdump',
+                                          START_TIME, 0.1, 1)
+    assert record['wrapper'] == 'ncdump'
+    assert record['user_seconds'] == ''
+    assert command_usage.get_command_record_count() == 2
+    command_usage.clear_command_records()
+
+@pytest.mark.parametrize(
+    'filename', [
+        'command_usage.jsonl',
+        'command_usage.csv',
+    ]
+)
+def test_write_command_usage(tmp_path, filename):
+    config = metplus_config()
+    command_usage.clear_command_records()
+    usage_file = os.path.join(str(tmp_path), 'logs', filename)
+    config.set('config', 'COMMAND_USAGE_FILE', usage_file)
+
+    # nothing is written if no commands were run
+    assert command_usage.write_command_usage(config) is None
+
+    command_usage.record_command('slow', 'slow', START_TIME, 5, 0,
+                                 [FakeRusage(4, 1, 1024, 0, 0)])
+    command_usage.record_command('fast', 'fast', START_TIME, 1, 2)
+    assert command_usage.write_command_usage(config) == usage_file
+
+    with open(usage_file, 'r') as file_handle:
+        if filename.endswith('.csv'):
+            records = list(csv.DictReader(file_handle))
+            assert list(records[0].keys()) == command_usage.USAGE_FIELDS
+            assert records[0]['user_seconds'] == '4'
+            assert records[1]['exit_status'] == '2'
+        else:
+            records = [json.loads(line) for line in file_handle]
+            assert records[0]['user_seconds'] == 4
+            assert records[1]['exit_status'] == 2
+
+    assert [record['command'] for record in records] == ['slow', 'fast']
+    command_usage.clear_command_records()
+
+def test_run_cmd_records_usage():
+    config = metplus_config()
+    command_usage.clear_command_records()
+    config.set('config', 'DO_NOT_RUN_EXE', False)
+    runner = CommandRunner(config, logger=config.logger)
+
+    command_info = {'wrapper': 'Example', 'init': '20200101000000'}
+    ret, _ = runner.run_cmd('sh -c "exit 3"', ismetcmd=False,
+                            command_info=command_info)
+    assert ret == 3
+
+    records = command_usage.get_command_records()
+    assert len(records) == 1
+    assert records[0]['wrapper'] == 'Example'
+    assert records[0]['executable'] == 'sh'
+    assert records[0]['exit_status'] == 3
+    assert records[0]['wall_seconds'] >= 0
+    assert records[0]['max_rss_kb'] > 0
+    command_usage.clear_command_records()
+
+def test_submit_cmd_records_usage():
+    config = metplus_config()
+    command_usage.clear_command_records()
+    config.set('config', 'DO_NOT_RUN_EXE', False)
+    runner = CommandRunner(config, logger=config.logger, workers=2)
+
+    jobs = [runner.submit_cmd(f'sh -c "sleep 0.2; exit {status}"',
+                              ismetcmd=False,
+                              command_info={'wrapper': 'Example'})
+            for status in (0, 3)]
+    jobs.append(runner.submit_cmd(None))
+    assert runner.wait_for_cmds(jobs) == [0, 3, 0]
+
+    records = command_usage.get_command_records()
+    assert sorted(record['exit_status'] for record in records) == [0, 3]
+    assert all(record['wrapper'] == 'Example' for record in records)
+    assert all(record['wall_seconds'] >= 0.2 for record in records)
+    command_usage.clear_command_records()
+    runner.job_pool.shutdown()
+
+def test_submit_cmd_log_output(tmp_path):
+    config = metplus_config()
+    command_usage.clear_command_records()
+    log_file = os.path.join(tmp_path, 'metplus.log')
+    config.set('config', 'DO_NOT_RUN_EXE', False)
+    config.set('config', 'LOG_METPLUS', log_file)
+    config.set('config', 'LOG_MET_OUTPUT_TO_METPLUS', True)
+    runner = CommandRunner(config, logger=config.logger, workers=2)
+
+    cmds = [f'sh -c "echo {name}-start; sleep {seconds}; echo {name}-end"'
+            for name, seconds in (('first', 0.3), ('second', 0.1))]
+    jobs = [runner.submit_cmd(cmd, app_name='example') for cmd in cmds]
+    assert runner.wait_for_cmds(jobs) == [0, 0]
+
+    # output of each command follows the command even though they ran
+    # at the same time
+    with open(log_file, 'r') as file_handle:
+        log_text = file_handle.read()
+    for cmd, name in zip(cmds, ('first', 'second')):
+        assert (f"COMMAND:\n{cmd}\n\nMET OUTPUT:\n"
+                f"{name}-start\n{name}-end\n") in log_text
+
+    assert os.listdir(tmp_path) == ['metplus.log']
+    command_usage.clear_command_records()
+    runner.job_pool.shutdown()
@@ -233,3 +233,46 @@ def test_getint(input_value, default, result):
     except ValueError:
         if result is None:
             assert(True)
+
+def test_getraw_cache():
+    conf = metplus_config()
+    conf.set('config', 'CURRENT_FCST_NAME', 'TMP')
+    conf.set('config', 'TEST_NAME', '{CURRENT_FCST_NAME}_{TEST_EXTRA}')
+    conf.set('dir', 'TEST_EXTRA', 'dir_extra')
+    conf.set('config', 'TEST_TEMPLATE', '{TEST_NAME}/{valid?fmt=%Y%m%d}')
+
+    assert(conf.getraw('config', 'TEST_TEMPLATE')
+           == 'TMP_dir_extra/{valid?fmt=%Y%m%d}')
+    assert(('config', 'TEST_TEMPLATE') in conf._raw_cache)
+
+    # value is resolved again if a referenced variable is changed
+    conf.set('config', 'CURRENT_FCST_NAME', 'APCP')
+    assert(('config', 'TEST_TEMPLATE') not in conf._raw_cache)
+    assert(conf.getraw('config', 'TEST_TEMPLATE')
+           == 'APCP_dir_extra/{valid?fmt=%Y%m%d}')
+
+    # variable added to a section that is searched first is used
+    conf.set('config', 'TEST_EXTRA', 'config_extra')
+    assert(conf.getraw('config', 'TEST_TEMPLATE')
+           == 'APCP_config_extra/{valid?fmt=%Y%m%d}')
+
+    # unrelated variable does not remove the value from the cache
+    conf.set('config', 'TEST_OTHER', 'other')
+    assert(('config', 'TEST_TEMPLATE') in conf._raw_cache)
+
+def test_getraw_cache_env_and_default():
+    conf = metplus_config()
+    os.environ['TEST_GETRAW_ENV'] = 'env1'
+    conf.set('config', 'TEST_GETRAW', '{ENV[TEST_GETRAW_ENV]}')
+    assert(conf.getraw('config', 'TEST_GETRAW') == 'env1')
+
+    # value is resolved again if a referenced environment variable changes
+    os.environ['TEST_GETRAW_ENV'] = 'env2'
+    assert(conf.getraw('config', 'TEST_GETRAW') == 'env2')
+    del os.environ['TEST_GETRAW_ENV']
+
+    # default values are not cached
+    assert(conf.getraw('config', 'TEST_GETRAW_UNSET', 'default1')
+           == 'default1')
+    assert(conf.getraw('config', 'TEST_GETRAW_UNSET', 'default2')
+           == 'default2')
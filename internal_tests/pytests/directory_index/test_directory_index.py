@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import os
+import datetime
+import pytest
+
+from metplus.util import directory_index
+
+TEMPLATE = '{valid?fmt=%Y%m%d}/file_{valid?fmt=%H}.nc'
+
+def to_seconds(time_string):
+    return int(datetime.datetime.strptime(time_string,
+                                          '%Y%m%d%H').strftime('%s'))
+
+def create_files(data_dir, time_strings):
+    for time_string in time_strings:
+        file_dir = os.path.join(data_dir, time_string[:8])
+        if not os.path.exists(file_dir):
+            os.makedirs(file_dir)
+        open(os.path.join(file_dir, f'file_{time_string[8:]}.nc'), 'w').close()
+
+def touch_dir(path, offset):
+    """! Set modification time of directory so changes are detected even if
+         the file system does not have fine time resolution"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + offset))
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory_index.clear_directory_index_cache()
+    data_dir = os.path.join(tmp_path, 'data')
+    create_files(data_dir, ['2020010100', '2020010106', '2020010200'])
+    # file that does not match the template
+    open(os.path.join(data_dir, '20200101', 'README'), 'w').close()
+    yield data_dir
+    directory_index.clear_directory_index_cache()
+
+@pytest.mark.parametrize(
+    'lower, upper, expected_files', [
+        ('2020010100', '2020010100', ['20200101/file_00.nc']),
+        ('2020010101', '2020010105', []),
+        ('2020010100', '2020010200', ['20200101/file_00.nc',
+                                      '20200101/file_06.nc',
+                                      '20200102/file_00.nc']),
+        ('2020010103', '2020010300', ['20200101/file_06.nc',
+                                      '20200102/file_00.nc']),
+    ]
+)
+def test_find(data_dir, lower, upper, expected_files):
+    index = directory_index.get_directory_index(data_dir, TEMPLATE)
+    found = index.find(to_seconds(lower), to_seconds(upper))
+    assert [item[1] for item in found] == [os.path.join(data_dir, item)
+                                           for item in expected_files]
+
+def test_index_is_cached(data_dir):
+    index = directory_index.get_directory_index(data_dir, TEMPLATE)
+    assert directory_index.get_directory_index(data_dir, TEMPLATE) is index
+    assert not index.refresh()
+
+    # a different template builds a different index
+    other = directory_index.get_directory_index(data_dir,
+                                                '{valid?fmt=%Y%m%d}/*')
+    assert other is not index
+
+def test_refresh_new_files(data_dir):
+    index = directory_index.get_directory_index(data_dir, TEMPLATE)
+    assert len(index.times) == 3
+
+    # add file to existing directory and new directory
+    create_files(data_dir, ['2020010112', '2020010300'])
+    touch_dir(os.path.join(data_dir, '20200101'), 1000)
+    touch_dir(data_dir, 1000)
+
+    index = directory_index.get_directory_index(data_dir, TEMPLATE)
+    found = index.find(to_seconds('2020010112'), to_seconds('2020010300'))
+    assert [item[1] for item in found] == [
+        os.path.join(data_dir, '20200101/file_12.nc'),
+        os.path.join(data_dir, '20200102/file_00.nc'),
+        os.path.join(data_dir, '20200103/file_00.nc'),
+    ]
+
+def test_save_and_load(data_dir, tmp_path):
+    index_dir = os.path.join(tmp_path, 'index')
+    index = directory_index.get_directory_index(data_dir, TEMPLATE,
+                                                index_dir=index_dir)
+    index_path = index.get_index_path(index_dir)
+    assert os.path.exists(index_path)
+
+    # read index from disk and check that files are not parsed again
+    directory_index.clear_directory_index_cache()
+    loaded = directory_index.DirectoryIndex(data_dir, TEMPLATE)
+    loaded.load(index_dir)
+    loaded._get_valid_seconds = None
+    assert not loaded.refresh()
+    assert loaded.times == index.times
+    assert loaded.paths == index.paths
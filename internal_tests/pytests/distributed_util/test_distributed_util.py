@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import datetime
+
+import pytest
+
+import produtil
+import produtil.mpi_impl
+
+from metplus.util import met_util as util
+from metplus.util import distributed_util
+from metplus.util import command_usage
+from metplus.util.config import config_metplus
+
+#@pytest.fixture
+def metplus_config():
+    """! Create a METplus configuration object that can be
+    manipulated/modified to
+         reflect different paths, directories, values, etc. for individual
+         tests.
+    """
+    try:
+        if 'JLOGFILE' in os.environ:
+            produtil.setup.setup(send_dbn=False, jobname='DistributedUtil',
+                                 jlogfile=os.environ['JLOGFILE'])
+        else:
+            produtil.setup.setup(send_dbn=False, jobname='DistributedUtil')
+        produtil.log.postmsg('distributed_util test is starting')
+
+        # Read in the configuration object CONFIG
+        config = config_metplus.setup(util.baseinputconfs)
+        logger = util.get_logger(config)
+        return config
+
+    except Exception as e:
+        produtil.log.jlogger.critical(
+            'distributed_util test failed: %s' % (str(e),), exc_info=True)
+        sys.exit(2)
+
+class FakeWrapper:
+    """! Minimal wrapper that records the run times and leads it was called
+         with and reports an error for every other run time. Instances are
+         created by the task groups from the class name, so the constructor
+         takes the same arguments as the METplus wrappers"""
+    def __init__(self, config, logger):
+        self.config = config
+        self.logger = logger
+        self.name = self.__class__.__name__
+        self.errors = 0
+        self.isOK = True
+        self.all_commands = []
+
+    def clear(self):
+        pass
+
+    def wait_for_commands(self):
+        return True
+
+    def run_at_time(self, input_dict):
+        run_time = input_dict['valid'].strftime('%Y%m%d%H')
+        lead = self.config.getstr('config', 'LEAD_SEQ', '')
+        command = f"{self.name} {run_time} {lead}".rstrip()
+        self.config.logger.info(f"{command} running on {os.getpid()}")
+        self.all_commands.append(command)
+        command_usage.record_command(command, self.name,
+                                     input_dict['valid'], 0, 0)
+        if int(run_time) % 2:
+            self.errors += 1
+
+class FakeAWrapper(FakeWrapper):
+    pass
+
+class FakeBWrapper(FakeWrapper):
+    pass
+
+def set_loop_config(config, num_workers=2):
+    config.set('config', 'LOOP_BY', 'VALID')
+    config.set('config', 'VALID_TIME_FMT', '%Y%m%d%H')
+    config.set('config', 'VALID_BEG', '2020010100')
+    config.set('config', 'VALID_END', '2020010105')
+    config.set('config', 'VALID_INCREMENT', '1H')
+    config.set('config', 'LOOP_EXECUTOR', 'distributed')
+    config.set('config', 'DISTRIBUTED_LAUNCHER', 'local')
+    config.set('config', 'LOOP_EXECUTOR_WORKERS', num_workers)
+
+@pytest.fixture
+def task_module_path(monkeypatch):
+    """! Allow the task groups to import the fake wrappers from this file"""
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    python_path = os.environ.get('PYTHONPATH', '')
+    monkeypatch.setenv('PYTHONPATH', f'{test_dir}:{python_path}')
+
+@pytest.mark.parametrize(
+    'num_tasks, num_groups, expected_sizes', [
+        (6, 2, [3, 3]),
+        (7, 3, [3, 2, 2]),
+        (2, 4, [1, 1]),
+        (5, 1, [5]),
+    ]
+)
+def test_partition_tasks(num_tasks, num_groups, expected_sizes):
+    task_list = list(range(num_tasks))
+    groups = distributed_util.partition_tasks(task_list, num_groups)
+    assert [len(group) for group in groups] == expected_sizes
+    # tasks keep their order and index across groups
+    assert [item for group in groups for item in group] == [
+        (index, index) for index in range(num_tasks)
+    ]
+
+def test_time_dict_json():
+    input_dict = {'now': datetime.datetime(2020, 1, 1, 12, 30, 15),
+                  'valid': datetime.datetime(2020, 2, 1)}
+    json_dict = distributed_util.time_dict_to_json(input_dict)
+    assert json_dict == {'now': '20200101123015Z', 'valid': '20200201000000Z'}
+    assert distributed_util.time_dict_from_json(json_dict) == input_dict
+
+@pytest.mark.parametrize(
+    'lead_seq, split_leads, expected_leads', [
+        ('0, 3, 6', True, [0, 10800, 21600]),
+        ('0, 3, 6', False, [None]),
+        ('1m', True, [None]),
+    ]
+)
+def test_get_task_list(lead_seq, split_leads, expected_leads):
+    config = metplus_config()
+    config.set('config', 'LEAD_SEQ', lead_seq)
+    config.set('config', 'DISTRIBUTED_SPLIT_LEADS', split_leads)
+    time_list = [{'valid': datetime.datetime(2020, 1, 1, hour)}
+                 for hour in range(2)]
+    task_list = distributed_util.get_task_list(config, time_list)
+    assert task_list == [(input_dict, lead) for input_dict in time_list
+                         for lead in expected_leads]
+
+def test_get_launcher():
+    config = metplus_config()
+    config.set('config', 'DISTRIBUTED_LAUNCHER', 'local')
+    assert distributed_util.get_launcher(config) == ('local', None)
+
+    config.set('config', 'DISTRIBUTED_LAUNCHER', 'ssh')
+    assert distributed_util.get_launcher(config) == (None, None)
+
+def test_get_group_runner_srun():
+    config = metplus_config()
+    mpi_impl = produtil.mpi_impl.get_mpi('srun', force=True)
+    runner = distributed_util.get_group_runner(config, 'srun', mpi_impl,
+                                               'group.json')
+    args = list(runner.args())
+    assert args[:5] == ['srun', '--nodes=1', '--ntasks=1', '--exclusive',
+                        '--export=ALL']
+    assert args[5] == sys.executable
+    assert args[6].endswith('run_metplus_tasks.py')
+    assert args[7] == 'group.json'
+
+@pytest.mark.parametrize(
+    'split_leads', [
+        False,
+        True,
+    ]
+)
+def test_run_times_distributed(task_module_path, split_leads):
+    config = metplus_config()
+    set_loop_config(config, num_workers=3)
+    config.set('config', 'LEAD_SEQ', '0, 3')
+    config.set('config', 'DISTRIBUTED_SPLIT_LEADS', split_leads)
+    processes = [FakeAWrapper(config, config.logger),
+                 FakeBWrapper(config, config.logger)]
+    command_usage.clear_command_records()
+
+    util.loop_over_times_and_call(config, processes)
+
+    run_times = [f'20200101{hour:02d}' for hour in range(6)]
+    leads = ['0S', '10800S'] if split_leads else ['0, 3']
+    for process in processes:
+        # errors are counted for each task with an odd hour
+        assert process.errors == 3 * len(leads)
+        assert process.all_commands == [
+            f'{process.name} {run_time} {lead}'
+            for run_time in run_times for lead in leads
+        ]
+
+    # check that commands run by the task groups are recorded
+    recorded = [record['command']
+                for record in command_usage.get_command_records()]
+    assert recorded == [f'{process.name} {run_time} {lead}'
+                        for run_time in run_times for lead in leads
+                        for process in processes]
+    command_usage.clear_command_records()
+
+    # check that log output for each task was merged in order and that
+    # the tasks ran in more than one process
+    log_lines = []
+    pids = set()
+    with open(config.getstr('config', 'LOG_METPLUS'), 'r') as log_file:
+        for line in log_file:
+            if 'running on' not in line:
+                continue
+            log_lines.append(line.split('INFO: ')[1].split(' running on')[0])
+            pids.add(line.strip().split()[-1])
+    assert log_lines == recorded
+    assert len(pids) == 3
+
+def test_run_times_distributed_failed_group(task_module_path, monkeypatch):
+    config = metplus_config()
+    set_loop_config(config, num_workers=2)
+    monkeypatch.setattr(distributed_util, 'TASK_SCRIPT',
+                        os.path.join(config.getdir('TMP_DIR'), 'missing.py'))
+    processes = [FakeAWrapper(config, config.logger)]
+
+    util.loop_over_times_and_call(config, processes)
+
+    # each task that did not report results is counted as an error
+    assert processes[0].errors == 6
+    assert not processes[0].all_commands
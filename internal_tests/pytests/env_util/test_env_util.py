@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import datetime
+
+import pytest
+
+import produtil
+
+from metplus.util import met_util as util
+from metplus.util.env_util import WrapperEnvironment, format_copyable_env
+from metplus.util.config import config_metplus
+from metplus.wrappers.command_builder import CommandBuilder
+
+#@pytest.fixture
+def metplus_config():
+    """! Create a METplus configuration object that can be
+    manipulated/modified to
+         reflect different paths, directories, values, etc. for individual
+         tests.
+    """
+    try:
+        if 'JLOGFILE' in os.environ:
+            produtil.setup.setup(send_dbn=False, jobname='EnvUtil',
+                                 jlogfile=os.environ['JLOGFILE'])
+        else:
+            produtil.setup.setup(send_dbn=False, jobname='EnvUtil')
+        produtil.log.postmsg('env_util test is starting')
+
+        # Read in the configuration object CONFIG
+        config = config_metplus.setup(util.baseinputconfs)
+        logger = util.get_logger(config)
+        return config
+
+    except Exception as e:
+        produtil.log.jlogger.critical(
+            'env_util test failed: %s' % (str(e),), exc_info=True)
+        sys.exit(2)
+
+class FakeWrapper(CommandBuilder):
+    def __init__(self, config):
+        self.app_name = 'fake'
+        super().__init__(config, config.logger)
+
+def test_wrapper_environment_layers():
+    base = {'PATH': '/bin', 'HOME': '/home/user'}
+    env = WrapperEnvironment(base)
+    env['MODEL'] = 'GFS'
+    env['PATH'] = '/usr/bin'
+
+    # base dictionary is not changed
+    assert base == {'PATH': '/bin', 'HOME': '/home/user'}
+    assert dict(env.overlay) == {'MODEL': 'GFS', 'PATH': '/usr/bin'}
+    assert env.to_dict() == {'PATH': '/usr/bin', 'HOME': '/home/user',
+                             'MODEL': 'GFS'}
+    assert sorted(env) == ['HOME', 'MODEL', 'PATH']
+    assert len(env) == 3
+
+    del env['HOME']
+    assert 'HOME' not in env
+    assert env.get('HOME') is None
+    with pytest.raises(KeyError):
+        del env['HOME']
+
+    env['HOME'] = '/tmp'
+    assert env['HOME'] == '/tmp'
+
+def test_wrapper_environment_copy():
+    env = WrapperEnvironment({'PATH': '/bin'})
+    env['MODEL'] = 'GFS'
+    env_copy = env.copy()
+    env_copy['MODEL'] = 'NAM'
+    env_copy['JOB'] = 'job1'
+
+    assert env['MODEL'] == 'GFS'
+    assert 'JOB' not in env
+    assert env_copy.to_dict() == {'PATH': '/bin', 'MODEL': 'NAM',
+                                  'JOB': 'job1'}
+
+@pytest.mark.parametrize(
+    'shell, expected', [
+        ('bash', 'export A="1"; export B="say \\"hi\\""; '),
+        ('csh', 'setenv A "1"; setenv B "say "\\""hi"\\"""; '),
+    ]
+)
+def test_get_copyable(shell, expected):
+    env = WrapperEnvironment({'A': '1', 'C': '3'})
+    env['B'] = 'say "hi"'
+    assert env.get_copyable(['B', 'A'], shell) == expected
+    assert format_copyable_env(env, ['A', 'B'], shell) == expected
+
+    # text is updated when a variable changes
+    env['A'] = '2'
+    assert env.get_copyable(['A'], shell).startswith(
+        'export A="2"' if shell == 'bash' else 'setenv A "2"'
+    )
+
+def test_wrapper_env_not_shared():
+    config = metplus_config()
+    config.env = {'SHARED': 'value'}
+    wrapper_a = FakeWrapper(config)
+    wrapper_b = FakeWrapper(config)
+    wrapper_a.add_env_var('ONLY_A', 1)
+
+    assert wrapper_a.env['ONLY_A'] == '1'
+    assert 'ONLY_A' not in wrapper_b.env
+    assert 'ONLY_A' not in config.env
+    assert wrapper_b.env['SHARED'] == 'value'
+
+def test_set_user_environment():
+    config = metplus_config()
+    if not config.has_section('user_env_vars'):
+        config.add_section('user_env_vars')
+    config.set('user_env_vars', 'STATIC_VAR', 'static')
+    config.set('user_env_vars', 'TIME_VAR', 'file_{init?fmt=%Y%m%d%H}')
+    wrapper = FakeWrapper(config)
+
+    static_values, time_templates = wrapper.get_user_env_templates()
+    assert static_values['STATIC_VAR'] == 'static'
+    assert list(time_templates) == ['TIME_VAR']
+
+    for hour in (0, 6):
+        init = datetime.datetime(2020, 1, 1, hour)
+        wrapper.set_user_environment({'init': init})
+        assert wrapper.env['STATIC_VAR'] == 'static'
+        assert wrapper.env['TIME_VAR'] == f'file_20200101{hour:02d}'
+
+    copyable = wrapper.get_env_copy()
+    assert 'export STATIC_VAR="static";' in copyable
+    assert 'export TIME_VAR="file_2020010106";' in copyable
+
+def test_set_user_environment_config_reference():
+    config = metplus_config()
+    if not config.has_section('user_env_vars'):
+        config.add_section('user_env_vars')
+    config.set('user_env_vars', 'MY_FIELD', '{CURRENT_FCST_NAME}')
+    wrapper = FakeWrapper(config)
+
+    for name in ('TMP', 'HGT'):
+        config.set('config', 'CURRENT_FCST_NAME', name)
+        wrapper.set_user_environment()
+        assert wrapper.env['MY_FIELD'] == name
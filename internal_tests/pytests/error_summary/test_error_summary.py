@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+
+import pytest
+
+import produtil
+
+from metplus.util import met_util as util
+from metplus.util import error_summary
+from metplus.util.config import config_metplus
+from metplus.wrappers.command_builder import CommandBuilder
+
+#@pytest.fixture
+def metplus_config():
+    """! Create a METplus configuration object that can be
+    manipulated/modified to
+         reflect different paths, directories, values, etc. for individual
+         tests.
+    """
+    try:
+        if 'JLOGFILE' in os.environ:
+            produtil.setup.setup(send_dbn=False, jobname='ErrorSummary',
+                                 jlogfile=os.environ['JLOGFILE'])
+        else:
+            produtil.setup.setup(send_dbn=False, jobname='ErrorSummary')
+        produtil.log.postmsg('error_summary test is starting')
+
+        # Read in the configuration object CONFIG
+        config = config_metplus.setup(util.baseinputconfs)
+        logger = util.get_logger(config)
+        return config
+
+    except Exception as e:
+        produtil.log.jlogger.critical(
+            'error_summary test failed: %s' % (str(e),), exc_info=True)
+        sys.exit(2)
+
+class FakeWrapper(CommandBuilder):
+    def __init__(self, config):
+        self.app_name = 'fake'
+        super().__init__(config, config.logger)
+
+    def report_missing(self, run_time):
+        self.log_error(f'Could not find input file for {run_time}')
+        return sys._getframe().f_lineno - 1
+
+def get_caller_line():
+    return error_summary.get_caller_location()
+
+@pytest.mark.parametrize(
+    'message, template', [
+        ('Could not find file /d/20200101_00/f006.nc',
+         'Could not find file /d/#_#/f#.nc'),
+        ('No numbers here', 'No numbers here'),
+    ]
+)
+def test_get_message_template(message, template):
+    assert error_summary.get_message_template(message) == template
+
+def test_get_caller_location():
+    file_name, line_number = get_caller_line()
+    assert file_name == 'test_error_summary.py'
+    assert line_number == sys._getframe().f_lineno - 2
+
+def test_record_error():
+    error_summary.clear_error_records()
+    for run_time in ('2020010100', '2020010106', '2020010112'):
+        error_summary.record_error('GridStat', f'Missing file for {run_time}',
+                                   'grid_stat_wrapper.py', 100)
+    error_summary.record_error('GridStat', 'Other error',
+                               'grid_stat_wrapper.py', 200)
+    error_summary.record_error('PCPCombine', 'Missing file for 2020010100',
+                               'pcp_combine_wrapper.py', 50)
+
+    records = error_summary.get_error_records()
+    assert len(records) == 3
+    assert records[0]['count'] == 3
+    assert records[0]['template'] == 'Missing file for #'
+    assert records[0]['first_message'] == 'Missing file for 2020010100'
+    assert records[0]['last_message'] == 'Missing file for 2020010112'
+
+    report = error_summary.get_error_report()
+    assert list(report.keys()) == ['GridStat', 'PCPCombine']
+    assert report['GridStat']['total'] == 4
+    assert [record['count'] for record in report['GridStat']['errors']] == [3, 1]
+    assert report['PCPCombine']['total'] == 1
+    error_summary.clear_error_records()
+
+def test_error_records_since():
+    error_summary.clear_error_records()
+    error_summary.record_error('GridStat', 'Missing file for 1', 'a.py', 1)
+    counts = error_summary.get_error_counts()
+
+    # errors reported by a task after the counts were read
+    error_summary.record_error('GridStat', 'Missing file for 2', 'a.py', 1)
+    error_summary.record_error('GridStat', 'Other error', 'a.py', 2)
+    records = error_summary.get_error_records_since(counts)
+    assert [(record['template'], record['count']) for record in records] == [
+        ('Missing file for #', 1), ('Other error', 1),
+    ]
+
+    # add records as if they were reported by a worker process
+    error_summary.clear_error_records()
+    error_summary.record_error('GridStat', 'Missing file for 1', 'a.py', 1)
+    error_summary.add_error_records(json.loads(json.dumps(records)))
+    report = error_summary.get_error_report()
+    assert report['GridStat']['total'] == 3
+    first_error = report['GridStat']['errors'][0]
+    assert first_error['count'] == 2
+    assert first_error['first_message'] == 'Missing file for 1'
+    assert first_error['last_message'] == 'Missing file for 2'
+    error_summary.clear_error_records()
+
+def test_log_error():
+    config = metplus_config()
+    wrapper = FakeWrapper(config)
+    error_summary.clear_error_records()
+    line_number = wrapper.report_missing('2020010100')
+    wrapper.report_missing('2020010106')
+    assert wrapper.errors == 2
+    assert not wrapper.isOK
+
+    records = error_summary.get_error_records()
+    assert len(records) == 1
+    assert records[0]['wrapper'] == 'Fake'
+    assert records[0]['file'] == 'test_error_summary.py'
+    assert records[0]['line'] == line_number
+    assert records[0]['count'] == 2
+    error_summary.clear_error_records()
+
+def test_write_error_summary(tmp_path):
+    config = metplus_config()
+    error_summary.clear_error_records()
+    summary_file = os.path.join(str(tmp_path), 'errors', 'summary.json')
+    config.set('config', 'ERROR_SUMMARY_FILE', summary_file)
+
+    # nothing is written if no errors were reported
+    assert error_summary.write_error_summary(config) is None
+    assert not os.path.exists(summary_file)
+
+    error_summary.record_error('GridStat', 'Missing file for 1', 'a.py', 1)
+    error_summary.record_error('GridStat', 'Missing file for 2', 'a.py', 1)
+    assert error_summary.write_error_summary(config) == summary_file
+    with open(summary_file, 'r') as file_handle:
+        report = json.load(file_handle)
+
+    assert report['GridStat']['total'] == 2
+    assert report['GridStat']['errors'][0]['template'] == 'Missing file for #'
+    error_summary.clear_error_records()
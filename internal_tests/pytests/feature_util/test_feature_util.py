@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import os
+
+import pytest
+
+from metplus.util import feature_util
+
+FILTER_HEADER = ('VERSION AMODEL BMODEL STORM_ID BASIN CYCLONE STORM_NAME '
+                 'INIT LEAD VALID ALAT ALON BLAT BLON\n')
+FILTER_ROW = ('V9.0 GFSO BEST {storm_id} ML 0104 NA 20141214_000000 '
+              '{lead} 20141214_{hour}0000 21.7 -38.9 21.8 -38.8\n')
+
+def write_filter_file(filter_filename, rows):
+    with open(filter_filename, 'w') as file_handle:
+        file_handle.write(FILTER_HEADER)
+        for storm_id, lead in rows:
+            file_handle.write(FILTER_ROW.format(storm_id=storm_id,
+                                                lead=lead,
+                                                hour=lead[0:2]))
+
+def test_get_storm_rows(tmp_path):
+    filter_filename = os.path.join(str(tmp_path), 'filter_20141214_00.tcst')
+    write_filter_file(filter_filename, [('ML1221072014', '000000'),
+                                        ('ML1200942014', '000000'),
+                                        ('ML1221072014', '060000'),
+                                        ('ML1200942014', '060000'),
+                                        ('ML1201002014', '000000')])
+
+    header, storm_rows = feature_util.get_storm_rows(filter_filename)
+    assert header == FILTER_HEADER.split()
+
+    # storm ids are sorted and rows are kept in the order they were read
+    assert list(storm_rows) == ['ML1200942014',
+                                'ML1201002014',
+                                'ML1221072014']
+    lead_index = header.index('LEAD')
+    assert ([row[lead_index] for row in storm_rows['ML1221072014']]
+            == ['000000', '060000'])
+    assert len(storm_rows['ML1201002014']) == 1
+    assert all(row[header.index('STORM_ID')] == storm_id
+               for storm_id, rows in storm_rows.items()
+               for row in rows)
+
+@pytest.mark.parametrize(
+    'file_contents', [
+        None,
+        '',
+    ]
+)
+def test_get_storm_rows_no_data(tmp_path, file_contents):
+    filter_filename = os.path.join(str(tmp_path), 'filter_20141214_00.tcst')
+    if file_contents is not None:
+        with open(filter_filename, 'w') as file_handle:
+            file_handle.write(file_contents)
+
+    assert feature_util.get_storm_rows(filter_filename) == ([], {})
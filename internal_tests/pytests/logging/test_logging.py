@@ -6,6 +6,7 @@ import os
 import pytest
 
 from metplus.util import met_util as util
+from metplus.util import log_util
 from metplus.util.config import config_metplus
 
 #
@@ -91,3 +92,99 @@ def test_logfile_exists():
 
 
 
+
+
+@pytest.mark.parametrize(
+    'async_write, handler_class', [
+        (True, log_util.QueuedFileHandler),
+        (False, logging.FileHandler),
+    ]
+)
+def test_create_log_handler(tmp_path, async_write, handler_class):
+    config = get_test_config()
+    config.set('config', 'LOG_ASYNC_WRITE', async_write)
+    log_file = os.path.join(str(tmp_path), 'test.log')
+    handler = log_util.create_log_handler(config, log_file,
+                                          logging.Formatter('%(message)s'))
+    try:
+        assert isinstance(handler, handler_class)
+        assert handler.baseFilename == log_file
+        # file is created when the handler is created
+        assert os.path.exists(log_file)
+    finally:
+        handler.close()
+
+
+def test_queued_log_handler(tmp_path):
+    log_file = os.path.join(str(tmp_path), 'queued.log')
+    handler = log_util.QueuedFileHandler(log_file)
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger = logging.getLogger('test_queued_log_handler')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    try:
+        values = ['first']
+        logger.info('value is %s', values)
+        # changing the argument after logging does not change the message
+        values.append('second')
+        for index in range(5):
+            logger.debug('line %d', index)
+        try:
+            raise ValueError('bad value')
+        except ValueError:
+            logger.exception('caught error')
+
+        log_util.flush_log_handlers(logger)
+        with open(log_file, 'r') as file_handle:
+            lines = file_handle.read().splitlines()
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+    assert lines[0] == "INFO: value is ['first']"
+    assert lines[1:6] == [f'DEBUG: line {index}' for index in range(5)]
+    assert lines[6] == 'ERROR: caught error'
+    assert lines[-1] == 'ValueError: bad value'
+
+
+class FlushCountHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.flush_count = 0
+
+    def emit(self, record):
+        pass
+
+    def flush(self):
+        self.flush_count += 1
+
+
+@pytest.mark.parametrize(
+    'propagate, expected_count', [
+        (True, 1),
+        (False, 0),
+    ]
+)
+def test_flush_log_handlers_parent(propagate, expected_count):
+    # wrapper loggers use the handlers of the parent logger
+    parent_logger = logging.getLogger('test_flush_parent')
+    parent_logger.propagate = False
+    handler = FlushCountHandler()
+    parent_logger.addHandler(handler)
+    logger = logging.getLogger('test_flush_parent.Wrapper')
+    logger.propagate = propagate
+    try:
+        log_util.flush_log_handlers(logger)
+    finally:
+        parent_logger.removeHandler(handler)
+
+    assert handler.flush_count == expected_count
+
+
+def test_is_debug_enabled():
+    logger = logging.getLogger('test_is_debug_enabled')
+    logger.setLevel(logging.INFO)
+    assert not log_util.is_debug_enabled(logger)
+    logger.setLevel(logging.DEBUG)
+    assert log_util.is_debug_enabled(logger)
@@ -13,6 +13,7 @@ import produtil
 
 from metplus.util import met_util as util
 from metplus.util import time_util
+from metplus.util.field_plan import FieldPlan
 from metplus.util.config import config_metplus
 
 #@pytest.fixture
@@ -640,6 +641,45 @@ def test_remove_staged_files():
 def test_is_plotter_in_process_list(process_list, has_plotter):
     assert(util.is_plotter_in_process_list(process_list) == has_plotter)
 
+# test that field information is read once and the template tags
+# in the names, levels, and options are filled in for each run time
+def test_field_plan_get_var_list():
+    conf = metplus_config()
+    conf.set('config', 'BOTH_VAR1_NAME', "APCP_{lead?fmt=%HH}")
+    conf.set('config', 'BOTH_VAR1_LEVELS', "A{lead?fmt=%HH}, A24")
+    conf.set('config', 'BOTH_VAR1_THRESH', "gt12.7, ge25.4")
+    conf.set('config', 'FCST_VAR1_OPTIONS', "init_time = \"{init?fmt=%Y%m%d}\"")
+    conf.set('config', 'BOTH_VAR2_NAME', "TMP")
+    conf.set('config', 'BOTH_VAR2_LEVELS', "P500")
+
+    field_plan = FieldPlan(conf)
+
+    # changes to the config after the plan is created are not read
+    conf.set('config', 'BOTH_VAR2_NAME', "HGT")
+
+    for lead in [3, 6]:
+        input_dict = {'init': datetime.datetime(2019, 2, 1, 0),
+                      'lead_hours': lead}
+        time_info = time_util.ti_calculate(input_dict)
+        var_list = field_plan.get_var_list(time_info)
+        assert(len(var_list) == 3)
+        assert(var_list[0]['fcst_name'] == f'APCP_{lead:02d}')
+        assert(var_list[0]['obs_level'] == f'A{lead:02d}')
+        assert(var_list[1]['fcst_level'] == 'A24')
+        assert(var_list[1]['fcst_thresh'] == ['gt12.7', 'ge25.4'])
+        assert(var_list[0]['fcst_extra'] == 'init_time = "20190201";')
+        assert(var_list[0]['obs_extra'] == '')
+        assert(var_list[2]['fcst_name'] == 'TMP')
+        assert(var_list[2]['index'] == '2')
+
+        # modifying the list does not change the plan
+        var_list[1]['fcst_thresh'].append('gt0')
+
+    # result matches reading the config each time
+    conf.set('config', 'BOTH_VAR2_NAME', "TMP")
+    assert(field_plan.get_var_list(time_info) ==
+           util.parse_var_list(conf, time_info))
+
 # test that if wrapper specific field info is specified, it only gets
 # values from that list. All generic values should be read if no
 # wrapper specific field info variables are specified
@@ -231,3 +231,13 @@ def test_mtd_single():
            single_list[1] == os.path.join(fcst_dir,'20170510', '20170510_i03_f002_HRRRTLE_PHPT.grb2') and
            single_list[2] == os.path.join(fcst_dir,'20170510', '20170510_i03_f003_HRRRTLE_PHPT.grb2')
            )
+
+def test_mtd_commands_not_concurrent():
+    config = metplus_config()
+    config.set('config', 'MTD_CONV_THRESH', '>=10')
+    config.set('config', 'MTD_CONV_RADIUS', '15')
+    config.set('config', 'COMMAND_RUNNER_WORKERS', 4)
+    mw = MTDWrapper(config, config.logger)
+
+    # file lists are shared by commands so they must run one at a time
+    assert(mw.c_dict['COMMAND_RUNNER_WORKERS'] == 1)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import pytest
+
+import produtil
+
+from metplus.util import met_util as util
+from metplus.util import output_reuse
+from metplus.util.config import config_metplus
+from metplus.wrappers.command_builder import CommandBuilder
+
+#@pytest.fixture
+def metplus_config():
+    """! Create a METplus configuration object that can be
+    manipulated/modified to
+         reflect different paths, directories, values, etc. for individual
+         tests.
+    """
+    try:
+        if 'JLOGFILE' in os.environ:
+            produtil.setup.setup(send_dbn=False, jobname='OutputReuse',
+                                 jlogfile=os.environ['JLOGFILE'])
+        else:
+            produtil.setup.setup(send_dbn=False, jobname='OutputReuse')
+        produtil.log.postmsg('output_reuse test is starting')
+
+        # Read in the configuration object CONFIG
+        config = config_metplus.setup(util.baseinputconfs)
+        logger = util.get_logger(config)
+        return config
+
+    except Exception as e:
+        produtil.log.jlogger.critical(
+            'output_reuse test failed: %s' % (str(e),), exc_info=True)
+        sys.exit(2)
+
+class CopyWrapper(CommandBuilder):
+    """! Wrapper that copies an input file to an output file"""
+    def __init__(self, config, input_path, output_path):
+        self.app_name = 'copy'
+        self.input_path = input_path
+        self.output_path = output_path
+        super().__init__(config, config.logger)
+
+    def get_command(self):
+        return f'cp {self.input_path} {self.output_path}'
+
+    def run_copy(self):
+        self.infiles.append(self.input_path)
+        self.set_output_path(self.output_path)
+        return self.build()
+
+def write_file(path, text):
+    with open(path, 'w') as file_handle:
+        file_handle.write(text)
+
+def test_get_task_key(tmp_path):
+    input_path = str(tmp_path / 'input.txt')
+    config_path = str(tmp_path / 'Config')
+    write_file(input_path, 'data')
+    write_file(config_path, 'config')
+
+    def get_key(output_path, env=None):
+        return output_reuse.get_task_key(
+            f'app {input_path} {output_path} -config {config_path}',
+            output_path, config_files=[config_path], env=env
+        )
+
+    key = get_key(str(tmp_path / 'out1.nc'), {'MODEL': 'GFS'})
+
+    # key does not depend on output path
+    assert get_key(str(tmp_path / 'out2.nc'), {'MODEL': 'GFS'}) == key
+
+    # key changes if the environment changes
+    assert get_key(str(tmp_path / 'out1.nc'), {'MODEL': 'NAM'}) != key
+
+    # key changes if the MET config file changes
+    write_file(config_path, 'new config')
+    new_key = get_key(str(tmp_path / 'out1.nc'), {'MODEL': 'GFS'})
+    assert new_key != key
+
+    # key changes if the input file changes
+    write_file(input_path, 'new data')
+    assert get_key(str(tmp_path / 'out1.nc'), {'MODEL': 'GFS'}) != new_key
+
+    # output cannot be reused if an input is a directory
+    assert output_reuse.get_task_key(f'app {tmp_path} out.nc', 'out.nc') is None
+
+def test_get_task_key_checksum(tmp_path):
+    input_path = str(tmp_path / 'input.txt')
+    write_file(input_path, 'data')
+    command = f'app {input_path} out.nc'
+    key = output_reuse.get_task_key(command, 'out.nc', use_checksum=True)
+
+    # rewriting the input with the same contents keeps the same key
+    os.utime(input_path, ns=(0, 0))
+    assert output_reuse.get_task_key(command, 'out.nc',
+                                     use_checksum=True) == key
+
+@pytest.mark.parametrize(
+    'command, env', [
+        ('app PYTHON_NUMPY out.nc -field \'name="read.py data.nc";\'', None),
+        ('app fcst.nc out.nc', {'FCST_FIELD': 'file_type=PYTHON_XARRAY;'}),
+        ('ascii2nc "read.py obs.txt" out.nc -format python', None),
+    ]
+)
+def test_get_task_key_python_embedding(command, env):
+    # data read by a python embedding script cannot be identified
+    assert output_reuse.get_task_key(command, 'out.nc', env=env) is None
+
+def test_get_task_key_file_list(tmp_path):
+    input_path = str(tmp_path / 'input.txt')
+    list_path = str(tmp_path / 'list.txt')
+    write_file(input_path, 'data')
+    write_file(list_path, f'file_list\n{input_path}\n')
+    command = f'app {list_path} out.nc'
+    key = output_reuse.get_task_key(command, 'out.nc')
+
+    # writing the file list again with the same contents keeps the same key
+    os.utime(list_path, ns=(0, 0))
+    write_file(list_path, f'file_list\n{input_path}\n')
+    assert output_reuse.get_task_key(command, 'out.nc') == key
+
+    # key changes if a listed file changes
+    write_file(input_path, 'new data')
+    assert output_reuse.get_task_key(command, 'out.nc') != key
+
+    # output cannot be reused if a listed file uses python embedding
+    write_file(list_path, 'file_list\nPYTHON_NUMPY\n')
+    assert output_reuse.get_task_key(command, 'out.nc') is None
+
+def test_save_and_restore(tmp_path):
+    reuse_dir = str(tmp_path / 'reuse')
+    output_path = str(tmp_path / 'a' / 'out.nc')
+    other_path = str(tmp_path / 'b' / 'out.nc')
+    os.makedirs(os.path.dirname(output_path))
+    write_file(output_path, 'output')
+
+    task = output_reuse.OutputReuseTask(reuse_dir, 'abcdef', output_path,
+                                        'app out.nc')
+    assert not task.restore()
+    assert task.save()
+    assert task.restore()
+
+    # output is restored if it was removed
+    os.remove(output_path)
+    assert task.restore()
+    with open(output_path, 'r') as file_handle:
+        assert file_handle.read() == 'output'
+
+    # output is restored to a different output path with the same key
+    other_task = output_reuse.OutputReuseTask(reuse_dir, 'abcdef',
+                                              other_path, 'app out.nc')
+    assert other_task.restore()
+    assert os.path.exists(other_path)
+
+def test_build_reuses_output(tmp_path):
+    config = metplus_config()
+    config.set('dir', 'OUTPUT_REUSE_DIR', str(tmp_path / 'reuse'))
+    input_path = str(tmp_path / 'input.txt')
+    output_path = str(tmp_path / 'output.txt')
+    write_file(input_path, 'data')
+
+    wrapper = CopyWrapper(config, input_path, output_path)
+    assert wrapper.run_copy()
+    assert len(wrapper.all_commands) == 1
+    assert os.path.exists(output_path)
+
+    # command is skipped if nothing has changed
+    wrapper.clear()
+    assert wrapper.run_copy()
+    assert len(wrapper.all_commands) == 1
+
+    # command is run again if the input file changes
+    write_file(input_path, 'new data')
+    wrapper.clear()
+    assert wrapper.run_copy()
+    assert len(wrapper.all_commands) == 2
+    with open(output_path, 'r') as file_handle:
+        assert file_handle.read() == 'new data'
+
+    # another wrapper writing to a different path reuses the output
+    other_path = str(tmp_path / 'other' / 'output.txt')
+    other_wrapper = CopyWrapper(config, input_path, other_path)
+    other_wrapper.env['OUTPUT'] = other_path
+    wrapper.env['OUTPUT'] = output_path
+    wrapper.clear()
+    assert wrapper.run_copy()
+    assert len(wrapper.all_commands) == 3
+
+    assert other_wrapper.run_copy()
+    assert not other_wrapper.all_commands
+    with open(other_path, 'r') as file_handle:
+        assert file_handle.read() == 'new data'
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import datetime
+import pytest
+
+import produtil
+
+from metplus.util import met_util as util
+from metplus.util import parallel_util
+from metplus.util import command_usage
+from metplus.util import log_util
+from metplus.util import path_cache
+from metplus.util.config import config_metplus
+
+#@pytest.fixture
+def metplus_config():
+    """! Create a METplus configuration object that can be
+    manipulated/modified to
+         reflect different paths, directories, values, etc. for individual
+         tests.
+    """
+    try:
+        if 'JLOGFILE' in os.environ:
+            produtil.setup.setup(send_dbn=False, jobname='ParallelUtil',
+                                 jlogfile=os.environ['JLOGFILE'])
+        else:
+            produtil.setup.setup(send_dbn=False, jobname='ParallelUtil')
+        produtil.log.postmsg('parallel_util test is starting')
+
+        # Read in the configuration object CONFIG
+        config = config_metplus.setup(util.baseinputconfs)
+        logger = util.get_logger(config)
+        return config
+
+    except Exception as e:
+        produtil.log.jlogger.critical(
+            'parallel_util test failed: %s' % (str(e),), exc_info=True)
+        sys.exit(2)
+
+class FakeWrapper:
+    """! Minimal wrapper that records the run times it was called with
+         and reports an error for every other run time"""
+    def __init__(self, config, name):
+        self.config = config
+        self.name = name
+        self.errors = 0
+        self.isOK = True
+        self.all_commands = []
+
+    def clear(self):
+        pass
+
+    def wait_for_commands(self):
+        return True
+
+    def run_at_time(self, input_dict):
+        run_time = input_dict['valid'].strftime('%Y%m%d%H')
+        self.config.logger.info(f"{self.name} running at {run_time}")
+        self.all_commands.append(f"{self.name} {run_time}")
+        command_usage.record_command(f"{self.name} {run_time}", self.name,
+                                     input_dict['valid'], 0, 0)
+        if int(run_time) % 2:
+            self.errors += 1
+
+def set_loop_config(config, executor, num_workers=2):
+    config.set('config', 'LOOP_BY', 'VALID')
+    config.set('config', 'VALID_TIME_FMT', '%Y%m%d%H')
+    config.set('config', 'VALID_BEG', '2020010100')
+    config.set('config', 'VALID_END', '2020010105')
+    config.set('config', 'VALID_INCREMENT', '1H')
+    config.set('config', 'LOOP_EXECUTOR', executor)
+    config.set('config', 'LOOP_EXECUTOR_WORKERS', num_workers)
+
+@pytest.mark.parametrize(
+    'executor, is_valid', [
+        ('serial', True),
+        ('SERIAL', True),
+        ('process_pool', True),
+        ('thread_pool', False),
+    ]
+)
+def test_get_loop_executor(executor, is_valid):
+    config = metplus_config()
+    config.set('config', 'LOOP_EXECUTOR', executor)
+    result = parallel_util.get_loop_executor(config)
+    if is_valid:
+        assert result == executor.lower()
+    else:
+        assert result is None
+
+@pytest.mark.parametrize(
+    'num_workers, expected_result', [
+        (4, 4),
+        (1, 1),
+        (0, os.cpu_count()),
+        (-1, os.cpu_count()),
+    ]
+)
+def test_get_num_workers(num_workers, expected_result):
+    config = metplus_config()
+    config.set('config', 'LOOP_EXECUTOR_WORKERS', num_workers)
+    assert parallel_util.get_num_workers(config) == expected_result
+
+@pytest.mark.skipif(not parallel_util.can_fork(),
+                    reason='Process pool requires fork')
+@pytest.mark.parametrize(
+    'executor', [
+        'serial',
+        'process_pool',
+    ]
+)
+def test_loop_over_times_and_call_executor(executor):
+    config = metplus_config()
+    set_loop_config(config, executor)
+    processes = [FakeWrapper(config, 'FakeA'),
+                 FakeWrapper(config, 'FakeB')]
+    command_usage.clear_command_records()
+
+    util.loop_over_times_and_call(config, processes)
+
+    run_times = [f'20200101{hour:02d}' for hour in range(6)]
+    for process in processes:
+        assert process.errors == 3
+        assert process.all_commands == [f'{process.name} {run_time}'
+                                        for run_time in run_times]
+
+    # check that commands run in worker processes are recorded
+    recorded = [record['command']
+                for record in command_usage.get_command_records()]
+    assert recorded == [f'{process.name} {run_time}'
+                        for run_time in run_times
+                        for process in processes]
+    command_usage.clear_command_records()
+
+    # check that log output for each run time was written in order
+    # the logger may have multiple handlers that write to the same file,
+    # and each handler writes its output in batches, so check that the
+    # expected lines follow the last time the first run time was logged
+    log_util.flush_log_handlers(config.logger)
+    log_lines = []
+    with open(config.getstr('config', 'LOG_METPLUS'), 'r') as log_file:
+        for line in log_file:
+            if 'running at' not in line:
+                continue
+            log_lines.append(line[line.index('Fake'):].strip())
+
+    expected_lines = []
+    for run_time in run_times:
+        for process in processes:
+            expected_lines.append(f'{process.name} running at {run_time}')
+
+    start = len(log_lines) - log_lines[::-1].index(expected_lines[0]) - 1
+    remaining_lines = iter(log_lines[start:])
+    assert all(line in remaining_lines for line in expected_lines)
+
+@pytest.mark.skipif(not parallel_util.can_fork(),
+                    reason='Process pool requires fork')
+def test_start_process_pool_nested():
+    # check that stopping a pool that was started while another
+    # pool is running restores the processes of the first pool
+    config = metplus_config()
+    outer_processes = [FakeWrapper(config, 'FakeA')]
+    inner_processes = [FakeWrapper(config, 'FakeB')]
+    outer_pool = parallel_util.start_process_pool(config, outer_processes, 1)
+    inner_pool = parallel_util.start_process_pool(config, inner_processes, 1)
+    assert parallel_util._WORKER_PROCESSES is inner_processes
+    parallel_util.stop_process_pool(*inner_pool)
+    assert parallel_util._WORKER_PROCESSES is outer_processes
+    parallel_util.stop_process_pool(*outer_pool)
+    assert parallel_util._WORKER_CONFIG is None
+    assert parallel_util._WORKER_PROCESSES == []
+
+def fail_at_first_time(config, processes, input_dict):
+    if input_dict['valid'].hour == 0:
+        raise ValueError('bad run time')
+
+@pytest.mark.skipif(not parallel_util.can_fork(),
+                    reason='Process pool requires fork')
+def test_run_times_in_process_pool_error():
+    # check that the error from a run time is raised after the remaining
+    # run times are cancelled
+    config = metplus_config()
+    processes = [FakeWrapper(config, 'FakeA')]
+    time_list = [{'valid': datetime.datetime(2020, 1, 1, hour)}
+                 for hour in range(4)]
+    with pytest.raises(ValueError, match='bad run time'):
+        parallel_util.run_times_in_process_pool(config, processes, time_list,
+                                                fail_at_first_time, 1)
+    assert parallel_util._WORKER_PROCESSES == []
+
+def do_nothing(config, processes, input_dict):
+    pass
+
+def test_run_in_worker_invalidates_path_cache():
+    # files found to be missing by an earlier task in the same worker
+    # must be checked again because other workers may have written them
+    config = metplus_config()
+    processes = [FakeWrapper(config, 'FakeA')]
+    cache = path_cache.get_path_cache(config)
+    generation = cache.generation
+    pool = parallel_util.start_process_pool(config, processes, 1)
+    try:
+        parallel_util.run_in_worker(do_nothing, [0], (None,), None)
+        assert cache.generation > generation
+    finally:
+        parallel_util.stop_process_pool(*pool)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import os
+import pytest
+
+from metplus.util import path_cache
+
+def touch_dir(path, offset):
+    """! Set modification time of directory so changes are detected even if
+         the file system does not have fine time resolution"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + offset))
+
+def set_old_mtime(path):
+    """! Set modification time of directory to an hour ago so it is not
+         read again because it was recently modified"""
+    stat = os.stat(path)
+    old_mtime = stat.st_mtime_ns - 3600 * 10**9
+    os.utime(path, ns=(stat.st_atime_ns, old_mtime))
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data_dir = os.path.join(tmp_path, 'data')
+    os.makedirs(os.path.join(data_dir, 'subdir'))
+    open(os.path.join(data_dir, 'file.nc'), 'w').close()
+    os.symlink(os.path.join(data_dir, 'file.nc'),
+               os.path.join(data_dir, 'link.nc'))
+    os.symlink(os.path.join(data_dir, 'missing.nc'),
+               os.path.join(data_dir, 'broken.nc'))
+    set_old_mtime(data_dir)
+    return data_dir
+
+@pytest.mark.parametrize(
+    'filename', [
+        'file.nc',
+        'link.nc',
+        'broken.nc',
+        'subdir',
+        'missing.nc',
+        'missing.nc.gz',
+        'missing_dir/file.nc',
+        'file.nc/file.nc',
+    ]
+)
+def test_path_cache_matches_os_path(data_dir, filename):
+    cache = path_cache.PathCache()
+    path = os.path.join(data_dir, filename)
+    assert cache.isfile(path) == os.path.isfile(path)
+    assert cache.isdir(path) == os.path.isdir(path)
+    assert cache.exists(path) == os.path.exists(path)
+
+def test_path_cache_reads_dir_once(data_dir):
+    cache = path_cache.PathCache()
+    for filename in ['file.nc', 'file.nc.gz', 'file.nc.bz2', 'file.nc.zip']:
+        cache.isfile(os.path.join(data_dir, filename))
+
+    assert cache.reads == 1
+    assert cache.misses == 1
+    assert cache.hits == 3
+
+    # directory is not read again if it has not been modified
+    cache.invalidate()
+    assert cache.isfile(os.path.join(data_dir, 'file.nc'))
+    assert cache.reads == 1
+    assert cache.hits == 4
+
+def test_path_cache_invalidate(data_dir):
+    cache = path_cache.PathCache()
+    new_file = os.path.join(data_dir, 'new.nc')
+    assert not cache.isfile(new_file)
+
+    open(new_file, 'w').close()
+    touch_dir(data_dir, 10**9)
+
+    # snapshot is used until the cache is invalidated
+    assert not cache.isfile(new_file)
+    cache.invalidate()
+    assert cache.isfile(new_file)
+    assert cache.reads == 2
+
+def test_path_cache_missing_dir(data_dir):
+    cache = path_cache.PathCache()
+    new_dir = os.path.join(data_dir, 'new_dir')
+    new_file = os.path.join(new_dir, 'file.nc')
+    assert not cache.isfile(new_file)
+    assert not cache.isfile(os.path.join(new_dir, 'file.nc.gz'))
+    assert cache.reads == 0
+
+    os.makedirs(new_dir)
+    open(new_file, 'w').close()
+    cache.invalidate()
+    assert cache.isfile(new_file)
+
+def test_path_cache_ttl(data_dir):
+    cache = path_cache.PathCache(ttl=1)
+    new_file = os.path.join(data_dir, 'new.nc')
+    assert not cache.isfile(new_file)
+
+    open(new_file, 'w').close()
+    touch_dir(data_dir, 10**9)
+
+    # expire snapshot without waiting
+    for snapshot in cache.dirs.values():
+        snapshot['checked'] -= 2
+
+    assert cache.isfile(new_file)
+
+def test_get_path_cache():
+    path_cache.clear_path_cache()
+    cache = path_cache.get_path_cache()
+    assert cache is path_cache.get_path_cache()
+    generation = cache.generation
+    path_cache.invalidate_path_cache()
+    assert cache.generation == generation + 1
+    path_cache.clear_path_cache()
+    assert path_cache.get_path_cache() is not cache
+    path_cache.clear_path_cache()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import os
+
+import pytest
+
+from metplus.wrappers.cyclone_plotter_wrapper import read_track_data
+from metplus.wrappers.cyclone_plotter_wrapper import get_track_extent
+
+HEADER = ('VERSION AMODEL BMODEL STORM_ID BASIN CYCLONE STORM_NAME INIT LEAD '
+          'VALID ALAT ALON BLAT BLON AMSLP BMSLP')
+
+ROWS = [
+    # matches model and init time
+    'V9.0 GFSO BEST ML022015 ML 02 NA 20150301_120000 000000 '
+    '20150301_120000 21.7 -38.9 21.8 -38.8 NA NA',
+    # different model
+    'V9.0 OFCL BEST ML022015 ML 02 NA 20150301_120000 000000 '
+    '20150301_120000 21.7 -38.9 21.8 -38.8 NA NA',
+    # different init hour, valid time contains requested init
+    'V9.0 GFSO BEST ML022015 ML 02 NA 20150301_000000 120000 '
+    '20150301_120000 22.1 -37.5 NA NA NA NA',
+    # missing lat
+    'V9.0 GFSO BEST ML032015 ML 03 NA 20150301_120000 060000 '
+    '20150301_180000 NA -30.0 NA NA NA NA',
+    # matches model and init time
+    'V9.0 GFSO BEST ML032015 ML 03 NA 20150301_120000 060000 '
+    '20150301_180000 -15.2 150.5 NA NA NA NA',
+]
+
+def test_read_track_data(tmp_path):
+    track_file = os.path.join(str(tmp_path), 'track.tcst')
+    with open(track_file, 'w') as file_handle:
+        file_handle.write('\n'.join([HEADER] + ROWS) + '\n')
+
+    track_data = read_track_data(track_file, '20150301', '12', 'GFSO')
+    assert track_data['STORM_ID'] == ['ML022015', 'ML032015']
+    assert track_data['LEAD'] == ['000000', '060000']
+    assert track_data['VALID'] == ['20150301_120000', '20150301_180000']
+    assert track_data['ALAT'] == ['21.7', '-15.2']
+    assert track_data['ALON'] == ['-38.9', '150.5']
+    assert track_data['AMODEL'] == ['GFSO', 'GFSO']
+
+@pytest.mark.parametrize(
+    'init_date, init_hr, model, expected_storms', [
+        ('20150301', '00', 'GFSO', ['ML022015']),
+        ('20150301', '12', 'OFCL', ['ML022015']),
+        ('20150301', '18', 'GFSO', []),
+        ('20150302', '12', 'GFSO', []),
+    ]
+)
+def test_read_track_data_filter(tmp_path, init_date, init_hr, model,
+                                expected_storms):
+    track_file = os.path.join(str(tmp_path), 'track.tcst')
+    with open(track_file, 'w') as file_handle:
+        file_handle.write('\n'.join([HEADER] + ROWS) + '\n')
+
+    track_data = read_track_data(track_file, init_date, init_hr, model)
+    assert track_data['STORM_ID'] == expected_storms
+
+@pytest.mark.parametrize(
+    'lons, lats, expected_extent', [
+        # margin of 5% of the range on each side
+        ([-40, 60], [10, 30], (-45, 65, 9, 31)),
+        # one degree margin around a single point
+        ([20], [-15], (19, 21, -16, -14)),
+        # limited to the whole globe
+        ([-179, 179], [-89, 89], (-180, 180, -90, 90)),
+        # no points
+        ([], [], (-180, 180, -90, 90)),
+    ]
+)
+def test_get_track_extent(lons, lats, expected_extent):
+    extent = get_track_extent(lons, lats, (-180, 180, -90, 90))
+    assert extent == pytest.approx(expected_extent)
@@ -11,6 +11,7 @@ import produtil.setup
 
 from metplus.util.config import config_metplus
 from metplus.wrappers.make_plots_wrapper import MakePlotsWrapper
+from metplus.wrappers.make_plots_wrapper import run_plotting_scripts
 from metplus.util import met_util as util
 
 #
@@ -179,3 +180,36 @@ def test_create_c_dict():
                                     +'/logs/master_metplus.log.'
                                     +mp.config.getstr('config',
                                                       'LOG_TIMESTAMP'))
+
+def test_run_plotting_scripts(tmp_path):
+    # Independently test that plotting scripts are run
+    # in the current process with the environment
+    # variables for the settings and that failures
+    # are reported without affecting the next script
+    scripts_dir = str(tmp_path)
+    output_file = os.path.join(scripts_dir, 'output.txt')
+    good_script = os.path.join(scripts_dir, 'plot_good.py')
+    with open(good_script, 'w') as file_handle:
+        file_handle.write("import os\n"
+                          "with open(os.environ['OUTPUT_FILE'], 'a') as f:\n"
+                          "    f.write(os.environ['FCST_LEAD'] + '\\n')\n")
+    exit_script = os.path.join(scripts_dir, 'plot_exit.py')
+    with open(exit_script, 'w') as file_handle:
+        file_handle.write("exit(1)\n")
+    error_script = os.path.join(scripts_dir, 'plot_error.py')
+    with open(error_script, 'w') as file_handle:
+        file_handle.write("raise ValueError('bad value')\n")
+    plot_env = {'OUTPUT_FILE': output_file, 'FCST_LEAD': '24'}
+    # Test 1
+    failed_scripts = run_plotting_scripts(scripts_dir,
+                                          [good_script, exit_script,
+                                           error_script, good_script],
+                                          plot_env)
+    assert(len(failed_scripts) == 2)
+    assert(failed_scripts[0] == (exit_script, 'exited with code 1'))
+    assert(failed_scripts[1][0] == error_script)
+    assert('bad value' in failed_scripts[1][1])
+    with open(output_file, 'r') as file_handle:
+        assert(file_handle.read() == '24\n24\n')
+    # environment is restored after scripts are run
+    assert('OUTPUT_FILE' not in os.environ)
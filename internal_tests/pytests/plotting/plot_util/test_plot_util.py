@@ -477,6 +477,71 @@ def get_clevels():
     test_clevels = plot_util.get_clevels(data)
     assert(test_clevels == expected_clevels)
 
+def test_read_stat_file(tmp_path):
+    # Independently test reading a MET .stat file
+    # into a dataframe, reusing the parsed columns, and
+    # getting the line type columns for expected dates
+    met_version = '8.1'
+    stat_file = os.path.join(str(tmp_path), 'test_dump_row.stat')
+    header = ('VERSION MODEL DESC FCST_LEAD FCST_VALID_BEG FCST_VALID_END '
+              'OBS_LEAD OBS_VALID_BEG OBS_VALID_END FCST_VAR FCST_UNITS '
+              'FCST_LEV OBS_VAR OBS_UNITS OBS_LEV OBTYPE VX_MASK '
+              'INTERP_MTHD INTERP_PNTS FCST_THRESH OBS_THRESH COV_THRESH '
+              'ALPHA LINE_TYPE TOTAL FBAR OBAR FOBAR FFBAR OOBAR MAE\n')
+    line = ('V8.1 MODEL_TEST NA 240000 {date} {date} 000000 {date} {date} '
+            'HGT gpm P500 HGT NA P500 gfsanl NHX NEAREST 1 NA NA NA NA '
+            'SL1L2 3600 {fbar} 5525.66493 30615218.26089 30615764.49722 '
+            '30614724.90979 5.06746\n')
+    with open(stat_file, 'w') as file_handle:
+        file_handle.write(header)
+        file_handle.write(line.format(date='20190101_000000', fbar=1.5))
+        file_handle.write(line.format(date='20190103_000000', fbar=3.5))
+        file_handle.write(line.format(date='20190101_000000', fbar=9.9))
+    # Test 1
+    stat_file_data = plot_util.read_stat_file(logger, stat_file,
+                                              met_version)
+    assert(len(stat_file_data) == 3)
+    assert(stat_file_data['LINE_TYPE'][0] == 'SL1L2')
+    assert(stat_file_data['FCST_UNITS'][0] == 'gpm')
+    assert(stat_file_data['OBS_UNITS'][0] == 'NA')
+    assert(stat_file_data['FBAR'].tolist() == [1.5, 3.5, 9.9])
+    stat_cache_file = plot_util.get_stat_file_cache_path(stat_file)
+    assert(os.path.exists(stat_cache_file))
+    # Test 2
+    # read from cache file written by another script
+    plot_util._STAT_FILE_CACHE.clear()
+    test_stat_file_data = plot_util.read_stat_file(logger, stat_file,
+                                                   met_version)
+    assert(test_stat_file_data.columns.tolist()
+           == stat_file_data.columns.tolist())
+    assert(test_stat_file_data['FCST_VALID_BEG'].tolist()
+           == stat_file_data['FCST_VALID_BEG'].tolist())
+    assert(test_stat_file_data['FBAR'].tolist() == [1.5, 3.5, 9.9])
+    assert(test_stat_file_data['OBS_UNITS'][0] == 'NA')
+    # Test 3
+    expected_stat_file_dates = ['20190101_000000', '20190102_000000',
+                                '20190103_000000']
+    model_data_index = pd.MultiIndex.from_product(
+            [['MODEL_TEST'], expected_stat_file_dates],
+            names=['model_plot_name', 'dates']
+    )
+    stat_file_line_type_columns = (
+        plot_util.get_stat_file_line_type_columns(logger, met_version,
+                                                  'SL1L2')
+    )
+    model_data = plot_util.get_stat_file_data_by_date(
+        test_stat_file_data, model_data_index, stat_file_line_type_columns
+    )
+    assert(model_data.columns.tolist() == stat_file_line_type_columns)
+    assert(model_data.loc[('MODEL_TEST', '20190101_000000')]['FBAR'] == 1.5)
+    assert(np.isnan(model_data.loc[('MODEL_TEST', '20190102_000000')]['FBAR']))
+    assert(model_data.loc[('MODEL_TEST', '20190103_000000')]['FBAR'] == 3.5)
+    # Test 4
+    # modified file is parsed again
+    with open(stat_file, 'w') as file_handle:
+        file_handle.write(header)
+    assert(plot_util.read_stat_file(logger, stat_file, met_version) is None)
+
 def test_calculate_average():
     # Independently test getting the average
     # of a data array based on method
@@ -714,6 +779,59 @@ def test_calculate_ci():
                                         stat, average_method, randx)
     assert(test_intvl == expected_intvl)
 
+def test_calculate_monte_carlo_scores():
+    # Independently test that the resampled averages computed
+    # all at once match computing each resample separately
+    # and do not depend on the chunk size
+    np.random.seed(0)
+    dates = ['20190101_000000', '20190102_000000', '20190103_000000',
+             '20190104_000000']
+    columns = [ 'TOTAL', 'FBAR', 'OBAR', 'FOBAR', 'FFBAR', 'OOBAR', 'MAE' ]
+    modelA_values = pd.DataFrame(
+        np.random.rand(4, 7),
+        index=pd.MultiIndex.from_product([['MODEL_TESTA'], dates],
+                                         names=['model_plot_name', 'dates']),
+        columns=columns
+    )
+    modelB_values = pd.DataFrame(
+        np.random.rand(4, 7),
+        index=pd.MultiIndex.from_product([['MODEL_TESTB'], dates],
+                                         names=['model_plot_name', 'dates']),
+        columns=columns
+    )
+    total_days = 4
+    stat = 'bias'
+    ntests = 20
+    randx = np.random.rand(ntests, total_days)
+    swap_mask = plot_util.get_monte_carlo_swap_mask(randx, ntests,
+                                                     total_days)
+    assert(swap_mask.shape == (ntests, total_days))
+    assert((swap_mask == (randx >= 0.5)).all())
+    modelA_bias = (modelA_values['FBAR'] - modelA_values['OBAR']).values
+    modelB_bias = (modelB_values['FBAR'] - modelB_values['OBAR']).values
+    for average_method in ['MEAN', 'MEDIAN']:
+        scores_rand1, scores_rand2 = plot_util.calculate_monte_carlo_scores(
+            logger, modelB_values, modelA_values, total_days, stat,
+            average_method, randx, ntests, chunk_size=7
+        )
+        test_scores_rand1, test_scores_rand2 = (
+            plot_util.calculate_monte_carlo_scores(
+                logger, modelB_values, modelA_values, total_days, stat,
+                average_method, randx, ntests, chunk_size=ntests
+            )
+        )
+        assert((scores_rand1 == test_scores_rand1).all())
+        assert((scores_rand2 == test_scores_rand2).all())
+        for ntest in range(ntests):
+            rand1_bias = np.where(swap_mask[ntest], modelA_bias, modelB_bias)
+            rand2_bias = np.where(swap_mask[ntest], modelB_bias, modelA_bias)
+            if average_method == 'MEAN':
+                assert(scores_rand1[ntest] == np.ma.mean(rand1_bias))
+                assert(scores_rand2[ntest] == np.ma.mean(rand2_bias))
+            else:
+                assert(scores_rand1[ntest] == np.ma.median(rand1_bias))
+                assert(scores_rand2[ntest] == np.ma.median(rand2_bias))
+
 def test_get_stat_plot_name():
     # Independently test getting the
     # a more formalized statistic name
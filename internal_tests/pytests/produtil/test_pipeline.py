@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import time
+
+import pytest
+
+import produtil.pipeline
+from produtil.run import exe, run, runstr, runrusage
+
+@pytest.fixture(params=['pidfd', 'polling'])
+def child_exit_method(request, monkeypatch):
+    """! Run each test with pidfd wakeup (if available) and with
+         polling for child exit"""
+    if request.param == 'polling':
+        monkeypatch.setattr(produtil.pipeline, 'open_pidfd',
+                            lambda pid, logger=None: None)
+    return request.param
+
+def test_runstr_output(child_exit_method):
+    assert runstr(exe('echo')['hello']) == 'hello\n'
+
+def test_runstr_large_output(child_exit_method):
+    output = runstr(exe('sh')['-c', 'head -c 3000000 /dev/zero | tr "\\0" a'])
+    assert output == 'a' * 3000000
+
+def test_runstr_input_string(child_exit_method):
+    instr = 'line\n' * 500000
+    assert runstr(exe('cat') << instr) == instr
+
+def test_runstr_pipeline(child_exit_method):
+    assert runstr(exe('echo')['a b c'] | exe('tr')['a', 'z']) == 'z b c\n'
+
+@pytest.mark.parametrize(
+    'command, expected_status', [
+        ('exit 0', 0),
+        ('exit 7', 7),
+        ('kill -9 $$', -9),
+    ]
+)
+def test_run_exit_status(child_exit_method, command, expected_status):
+    assert run(exe('sh')['-c', command]) == expected_status
+
+def test_runrusage(child_exit_method):
+    status, rusage_list = runrusage(exe('echo')['a'] | exe('cat'))
+    assert status == 0
+    assert len(rusage_list) == 2
+    assert all(usage.ru_maxrss > 0 for usage in rusage_list)
+
+def test_run_latency(child_exit_method):
+    # commands used to wait for the next poll of the child processes and
+    # for output pipes to be closed two seconds after the processes exited
+    start = time.perf_counter()
+    for _ in range(5):
+        run(exe('true'))
+        runstr(exe('echo')['hello'])
+    assert time.perf_counter() - start < 2
+
+def test_runstr_output_after_silence(monkeypatch):
+    # output written just before a child exits is read even if the child
+    # was silent for more than two seconds. Slow down each check for
+    # exited processes so the output arrives while the child is reaped
+    monkeypatch.setattr(produtil.pipeline, 'open_pidfd',
+                        lambda pid, logger=None: None)
+    real_wait4 = produtil.pipeline.os.wait4
+
+    def slow_wait4(pid, options):
+        time.sleep(0.15)
+        return real_wait4(pid, options)
+
+    monkeypatch.setattr(produtil.pipeline.os, 'wait4', slow_wait4)
+    output = runstr(exe('sh')['-c', 'sleep 2.3; echo hello-output'])
+    assert output == 'hello-output\n'
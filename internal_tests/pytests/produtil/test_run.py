@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import time
+import concurrent.futures
+
+import pytest
+
+from produtil.run import exe, runbg, waitprocs, JobPool
+
+def test_job_pool_runs_concurrently():
+    start = time.perf_counter()
+    with JobPool(3) as pool:
+        jobs = [pool.submit(exe('sh')['-c', f'sleep 0.5; echo {index}'],
+                            capture=True)
+                for index in range(6)]
+        assert pool.wait(jobs)
+    # 6 jobs of 0.5 seconds with 3 at a time
+    assert time.perf_counter() - start < 2
+    assert [job.poll() for job in jobs] == [0] * 6
+    assert [job.out for job in jobs] == [f'{index}\n' for index in range(6)]
+    assert all(job.wall_seconds >= 0.5 for job in jobs)
+    assert all(len(job.rusage()) == 1 for job in jobs)
+
+def test_job_pool_max_jobs():
+    with JobPool(1) as pool:
+        first = pool.submit(exe('sleep')['0.5'])
+        second = pool.submit(exe('true'))
+        # second job cannot start until first job finishes
+        assert second.wait(timeout=0.2) is None
+        assert not second.done()
+        assert second.result() == 0
+        assert first.done()
+
+    with pytest.raises(ValueError):
+        JobPool(0)
+
+def test_runbg_exit_status():
+    job = runbg(exe('sh')['-c', 'exit 7'])
+    assert job.result(timeout=5) == 7
+    assert job.poll() == 7
+    assert not job.timed_out
+    assert not job.cancelled
+
+def test_runbg_timeout():
+    start = time.perf_counter()
+    job = runbg(exe('sleep')['10'], timeout=0.2)
+    assert job.wait() < 0
+    assert job.timed_out
+    assert time.perf_counter() - start < 5
+
+def test_cancel_running_job():
+    job = runbg(exe('sleep')['10'])
+    assert not waitprocs(job, timeout=0.2)
+    assert job.cancel()
+    assert job.wait(timeout=5) < 0
+    assert job.cancelled
+    # cannot cancel a job that is finished
+    assert not job.cancel()
+
+def test_cancel_queued_job():
+    with JobPool(1) as pool:
+        first = pool.submit(exe('sleep')['0.5'])
+        second = pool.submit(exe('true'))
+        assert second.cancel()
+        assert second.poll() is None
+        with pytest.raises(concurrent.futures.CancelledError):
+            second.result()
+        assert first.result() == 0
+
+def test_waitprocs():
+    jobs = [runbg(exe('true')), runbg(exe('sh')['-c', 'exit 2'])]
+    assert waitprocs(jobs, timeout=5)
+    assert [job.poll() for job in jobs] == [0, 2]
@@ -85,6 +85,17 @@ run_pytest_and_check metplus_check
 run_pytest_and_check grid_stat
 run_pytest_and_check logging
 run_pytest_and_check met_util
+run_pytest_and_check parallel_util
+run_pytest_and_check distributed_util
+run_pytest_and_check task_graph
+run_pytest_and_check directory_index
+run_pytest_and_check staging
+run_pytest_and_check path_cache
+run_pytest_and_check startup_util
+run_pytest_and_check command_usage
+run_pytest_and_check error_summary
+run_pytest_and_check env_util
+run_pytest_and_check output_reuse
 run_pytest_and_check mtd
 run_pytest_and_check pcp_combine -c ./test1.conf
 run_pytest_and_check stat_analysis -c ./test_stat_analysis.conf
@@ -94,7 +105,9 @@ run_pytest_and_check regrid_data_plane
 run_pytest_and_check point2grid 
 run_pytest_and_check time_util
 run_pytest_and_check series_lead
+run_pytest_and_check feature_util
 run_pytest_and_check pb2nc -c ./conf1
+run_pytest_and_check produtil test_pipeline.py test_run.py
 
 #cd $script_dir/extract_tiles
 #python ./run_precondition.py >/dev/null 2>&1
@@ -108,6 +121,7 @@ if [ -z "$METPLUS_DISABLE_PLOT_WRAPPERS" ]; then
     run_pytest_and_check plotting/stat_analysis -c ./test_stat_analysis.conf
     run_pytest_and_check plotting/make_plots -c ./test_make_plots.conf
     run_pytest_and_check plotting/plot_util
+    run_pytest_and_check plotting/cyclone_plotter
 else
     echo WARNING: Skipping plotting tests. Unset METPLUS_DISABLE_PLOT_WRAPPERS to run them.
 fi
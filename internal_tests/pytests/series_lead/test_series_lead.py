@@ -14,6 +14,7 @@ from metplus.util.config import config_metplus
 from metplus.wrappers.pb2nc_wrapper import PB2NCWrapper
 from metplus.util import met_util as util
 from metplus.util import feature_util
+from metplus.util import netcdf_util
 
 # --------------------TEST CONFIGURATION and FIXTURE SUPPORT -------------
 #
@@ -73,3 +74,25 @@ def test_retrieve_var_name_levels():
     print(f"ACTUAL: {actual_vars}")
     print(f"EXPECTED: {expected_vars}")
     assert(actual_vars == expected_vars)
+
+def test_get_series_cnt_min_max(tmp_path):
+    netCDF4 = pytest.importorskip('netCDF4')
+    import numpy
+
+    nc_file = os.path.join(tmp_path, 'series_F006_TMP_Z2.nc')
+    with netCDF4.Dataset(nc_file, 'w') as dataset:
+        dataset.createDimension('lat', 2)
+        dataset.createDimension('lon', 3)
+        total = dataset.createVariable('series_cnt_TOTAL', 'f4',
+                                       ('lat', 'lon'), fill_value=-9999.)
+        total[:] = numpy.array([[1, 5, 31], [-9999., 2, 3]])
+        rmse = dataset.createVariable('series_cnt_RMSE', 'f4',
+                                      ('lat', 'lon'), fill_value=-9999.)
+        rmse[:] = numpy.full((2, 3), -9999.)
+        other = dataset.createVariable('other', 'f4', ('lat', 'lon'))
+        other[:] = numpy.zeros((2, 3))
+
+    netcdf_util.clear_series_cnt_cache()
+    min_max = netcdf_util.get_series_cnt_min_max(nc_file)
+    assert(min_max == {'TOTAL': (1.0, 31.0), 'RMSE': None})
+    assert(netcdf_util.get_series_cnt_min_max(nc_file) is min_max)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import gzip
+import bz2
+import zipfile
+import pytest
+
+import produtil
+
+from metplus.util import met_util as util
+from metplus.util import staging
+from metplus.util import path_cache
+from metplus.util.config import config_metplus
+
+#@pytest.fixture
+def metplus_config():
+    """! Create a METplus configuration object that can be
+    manipulated/modified to
+         reflect different paths, directories, values, etc. for individual
+         tests.
+    """
+    try:
+        if 'JLOGFILE' in os.environ:
+            produtil.setup.setup(send_dbn=False, jobname='Staging',
+                                 jlogfile=os.environ['JLOGFILE'])
+        else:
+            produtil.setup.setup(send_dbn=False, jobname='Staging')
+        produtil.log.postmsg('staging test is starting')
+
+        # Read in the configuration object CONFIG
+        config = config_metplus.setup(util.baseinputconfs)
+        logger = util.get_logger(config)
+        return config
+
+    except Exception as e:
+        produtil.log.jlogger.critical(
+            'staging test failed: %s' % (str(e),), exc_info=True)
+        sys.exit(2)
+
+CONTENT = b'0123456789' * 100000
+
+def write_compressed(filename, ext):
+    if ext == '.gz':
+        with gzip.open(filename + ext, 'wb') as out_file:
+            out_file.write(CONTENT)
+    elif ext == '.bz2':
+        with bz2.open(filename + ext, 'wb') as out_file:
+            out_file.write(CONTENT)
+    elif ext == '.zip':
+        with zipfile.ZipFile(filename + ext, 'w') as out_file:
+            out_file.writestr(os.path.basename(filename), CONTENT)
+
+@pytest.mark.parametrize(
+    'ext', [
+        '.gz',
+        '.bz2',
+        '.zip',
+    ]
+)
+def test_decompress_file(tmp_path, ext):
+    filename = os.path.join(tmp_path, 'testfile.txt')
+    write_compressed(filename, ext)
+    outpath = os.path.join(tmp_path, 'out', 'testfile.txt')
+    os.makedirs(os.path.dirname(outpath))
+    staging.decompress_file(filename + ext, ext, outpath)
+    with open(outpath, 'rb') as in_file:
+        assert in_file.read() == CONTENT
+
+    # temporary file should be removed
+    assert os.listdir(os.path.dirname(outpath)) == ['testfile.txt']
+
+def test_staging_cache_evict(tmp_path):
+    paths = []
+    for index in range(4):
+        path = os.path.join(tmp_path, f'file{index}')
+        with open(path, 'wb') as out_file:
+            out_file.write(b'x' * 100)
+        paths.append(path)
+
+    cache = staging.StagingCache(250)
+    staging.start_run_time()
+    cache.use(paths[0])
+    cache.use(paths[1])
+    staging.start_run_time()
+    # file 0 was used again by current run time so file 1 is removed
+    cache.use(paths[0])
+    cache.use(paths[2])
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1])
+    assert os.path.exists(paths[2])
+    assert cache.total_size == 200
+
+    # files used by the current run time are kept even if above max size
+    cache.use(paths[3])
+    assert all([os.path.exists(path) for path in (paths[0], paths[2], paths[3])])
+    assert cache.total_size == 300
+
+def test_staging_cache_evict_path_cache(tmp_path):
+    paths = []
+    for index in range(2):
+        path = os.path.join(tmp_path, f'file{index}')
+        with open(path, 'wb') as out_file:
+            out_file.write(b'x' * 100)
+        paths.append(path)
+
+    path_cache.clear_path_cache()
+    paths_found = path_cache.get_path_cache()
+    assert paths_found.isfile(paths[0])
+
+    cache = staging.StagingCache(150)
+    staging.start_run_time()
+    cache.use(paths[0])
+    staging.start_run_time()
+    cache.use(paths[1])
+
+    # removed file should not be found in the path cache
+    assert not os.path.exists(paths[0])
+    assert not paths_found.isfile(paths[0])
+    path_cache.clear_path_cache()
+
+def test_prefetch_file(tmp_path):
+    config = metplus_config()
+    config.set('dir', 'STAGING_DIR', os.path.join(tmp_path, 'stage'))
+    config.set('config', 'STAGING_PREFETCH_WORKERS', 2)
+    filename = os.path.join(tmp_path, 'input', 'testfile.txt')
+    os.makedirs(os.path.dirname(filename))
+    write_compressed(filename, '.gz')
+
+    staging.prefetch_file(filename + '.gz', config)
+    outpath = util.preprocess_file(filename, None, config)
+    staging.shutdown_prefetch()
+
+    assert outpath == config.getdir('STAGING_DIR') + filename
+    with open(outpath, 'rb') as in_file:
+        assert in_file.read() == CONTENT
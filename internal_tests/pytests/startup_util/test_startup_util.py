@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+
+import pytest
+
+import produtil
+
+from metplus.util import met_util as util
+from metplus.util import startup_util
+from metplus.util.config import config_metplus
+
+#@pytest.fixture
+def metplus_config():
+    """! Create a METplus configuration object that can be
+    manipulated/modified to
+         reflect different paths, directories, values, etc. for individual
+         tests.
+    """
+    try:
+        if 'JLOGFILE' in os.environ:
+            produtil.setup.setup(send_dbn=False, jobname='test ',
+                                 jlogfile=os.environ['JLOGFILE'])
+        else:
+            produtil.setup.setup(send_dbn=False, jobname='test ')
+        produtil.log.postmsg('startup_util test is starting')
+
+        # Read in the configuration object CONFIG
+        config = config_metplus.setup(util.baseinputconfs)
+        logger = util.get_logger(config)
+        return config
+
+    except Exception as e:
+        produtil.log.jlogger.critical(
+            'startup_util test failed: %s' % (str(e),), exc_info=True)
+        sys.exit(2)
+
+def test_get_validation_key(tmp_path):
+    config = metplus_config()
+    met_config_file = os.path.join(str(tmp_path), 'GridStatConfig_wrapped')
+    with open(met_config_file, 'w') as file_handle:
+        file_handle.write('model = "${MODEL}";\n')
+    config.set('config', 'GRID_STAT_CONFIG_FILE', met_config_file)
+
+    key = startup_util.get_validation_key(config)
+    assert key == startup_util.get_validation_key(config)
+
+    # variables that change each run do not change the key
+    config.set('config', 'CLOCK_TIME', '20001231235959')
+    config.set('config', 'LOG_TIMESTAMP', '20001231235959')
+    assert key == startup_util.get_validation_key(config)
+
+    # modifying a MET config file changes the key
+    stat = os.stat(met_config_file)
+    os.utime(met_config_file, ns=(stat.st_atime_ns,
+                                  stat.st_mtime_ns + 10**9))
+    met_key = startup_util.get_validation_key(config)
+    assert met_key != key
+
+    # changing a config variable changes the key
+    config.set('config', 'MODEL', 'NEW_MODEL')
+    assert startup_util.get_validation_key(config) != met_key
+
+def test_validation_cache_file(tmp_path):
+    config = metplus_config()
+    config.set('dir', 'VALIDATION_CACHE_DIR', '')
+    assert startup_util.get_validation_cache_file(config) is None
+
+    cache_dir = os.path.join(str(tmp_path), 'validation_cache')
+    config.set('dir', 'VALIDATION_CACHE_DIR', cache_dir)
+    cache_file = startup_util.get_validation_cache_file(config)
+    key = startup_util.get_validation_key(config)
+    assert cache_file == os.path.join(cache_dir, f'{key}.json')
+    assert not os.path.exists(cache_file)
+
+    assert startup_util.write_validation_cache(config, cache_file)
+    assert os.listdir(cache_dir) == [f'{key}.json']
+
+def test_record_startup_step():
+    startup_util.start_startup_profile()
+    startup_util.record_startup_step('Step 1')
+    startup_util.record_startup_step('Step 2')
+    steps = startup_util.get_startup_profile()
+    assert [name for name, _ in steps] == ['Step 1', 'Step 2']
+    assert all(seconds >= 0 for _, seconds in steps)
+
+    startup_util.start_startup_profile()
+    assert not startup_util.get_startup_profile()
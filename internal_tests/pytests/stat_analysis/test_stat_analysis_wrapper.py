@@ -804,3 +804,48 @@ def test_get_level_list(data_type, config_list, expected_list):
     saw = StatAnalysisWrapper(config, config.logger)
 
     assert(saw.get_level_list(data_type) == expected_list)
+
+def test_get_job_groups():
+    # Independently test that jobs that write the same output
+    # file are put in the same group in their original order
+    job_list = [
+        {'JOB': 'job0', 'DUMP_ROW_FILENAME': 'a.stat'},
+        {'JOB': 'job1', 'DUMP_ROW_FILENAME': 'b.stat'},
+        {'JOB': 'job2', 'OUT_STAT_FILENAME': 'c.stat'},
+        {'JOB': 'job3', 'DUMP_ROW_FILENAME': 'a.stat'},
+        {'JOB': 'job4', 'DUMP_ROW_FILENAME': 'd.stat',
+         'OUT_STAT_FILENAME': 'c.stat'},
+        {'JOB': 'job5', 'DUMP_ROW_FILENAME': 'b.stat',
+         'OUT_STAT_FILENAME': 'd.stat'},
+        {'JOB': 'job6'},
+    ]
+    job_groups = StatAnalysisWrapper.get_job_groups(job_list)
+    assert([[job['JOB'] for job in job_group] for job_group in job_groups]
+           == [['job0', 'job3'],
+               ['job1', 'job2', 'job4', 'job5'],
+               ['job6']])
+
+def test_run_stat_analysis_job_workers():
+    # Test that running jobs concurrently gives the same
+    # commands in the same order as running them serially
+    job_list = []
+    for index in range(4):
+        job_list.append({'LOOKIN_DIR': f'/lookin/{index}',
+                         'JOB': f'-job filter -dump_row /out/{index}.stat',
+                         'DUMP_ROW_FILENAME': f'/out/{index}.stat'})
+
+    all_commands = {}
+    for job_workers in ['1', '2']:
+        config = metplus_config()
+        config.set('config', 'STAT_ANALYSIS_JOB_WORKERS', job_workers)
+        config.set('config', 'DO_NOT_RUN_EXE', True)
+        st = StatAnalysisWrapper(config, config.logger)
+        st.add_env_var('BEFORE_JOBS', 'value')
+        st.run_stat_analysis_job(job_list)
+        assert(not st.errors)
+        assert(st.env['BEFORE_JOBS'] == 'value')
+        assert('JOB' not in st.env)
+        all_commands[job_workers] = st.all_commands
+
+    assert(len(all_commands['1']) == 4)
+    assert(all_commands['1'] == all_commands['2'])
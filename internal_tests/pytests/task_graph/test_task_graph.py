@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import pytest
+
+import produtil
+
+from metplus.util import met_util as util
+from metplus.util import parallel_util
+from metplus.util import task_graph
+from metplus.util.config import config_metplus
+
+#@pytest.fixture
+def metplus_config():
+    """! Create a METplus configuration object that can be
+    manipulated/modified to
+         reflect different paths, directories, values, etc. for individual
+         tests.
+    """
+    try:
+        if 'JLOGFILE' in os.environ:
+            produtil.setup.setup(send_dbn=False, jobname='TaskGraph',
+                                 jlogfile=os.environ['JLOGFILE'])
+        else:
+            produtil.setup.setup(send_dbn=False, jobname='TaskGraph')
+        produtil.log.postmsg('task_graph test is starting')
+
+        # Read in the configuration object CONFIG
+        config = config_metplus.setup(util.baseinputconfs)
+        logger = util.get_logger(config)
+        return config
+
+    except Exception as e:
+        produtil.log.jlogger.critical(
+            'task_graph test failed: %s' % (str(e),), exc_info=True)
+        sys.exit(2)
+
+class FakeWrapper:
+    """! Minimal wrapper that processes one run time at a time"""
+    def __init__(self, config, name):
+        self.config = config
+        self.name = name
+        self.errors = 0
+        self.isOK = True
+        self.all_commands = []
+
+    def clear(self):
+        pass
+
+    def wait_for_commands(self):
+        return True
+
+    def run_at_time(self, input_dict):
+        run_time = input_dict['valid'].strftime('%Y%m%d%H')
+        self.config.logger.info(f"{self.name} running at {run_time}")
+        self.all_commands.append(f"{self.name} {run_time}")
+
+class FakeSeriesWrapper(FakeWrapper):
+    """! Minimal wrapper that loops over all run times itself"""
+    def run_all_times(self):
+        self.config.logger.info(f"{self.name} running at all")
+        self.all_commands.append(f"{self.name} all")
+        self.errors += 1
+
+def set_loop_config(config, num_workers=2):
+    config.set('config', 'LOOP_ORDER', 'dag')
+    config.set('config', 'LOOP_BY', 'VALID')
+    config.set('config', 'VALID_TIME_FMT', '%Y%m%d%H')
+    config.set('config', 'VALID_BEG', '2020010100')
+    config.set('config', 'VALID_END', '2020010102')
+    config.set('config', 'VALID_INCREMENT', '1H')
+    config.set('config', 'LOOP_EXECUTOR_WORKERS', num_workers)
+
+def get_processes(config):
+    return [FakeWrapper(config, 'FakeA'),
+            FakeWrapper(config, 'FakeB'),
+            FakeSeriesWrapper(config, 'FakeC'),
+            FakeWrapper(config, 'FakeD')]
+
+def get_log_lines(config):
+    """! Get lines from log file that were written by the fake wrappers.
+         Skip repeated lines that are written if the logger has multiple
+         handlers that write to the same file"""
+    log_lines = []
+    with open(config.getstr('config', 'LOG_METPLUS'), 'r') as log_file:
+        for line in log_file:
+            if 'running at' not in line:
+                continue
+            line = line[line.index('Fake'):].strip()
+            if not log_lines or log_lines[-1] != line:
+                log_lines.append(line)
+    return log_lines
+
+def test_build_task_graph():
+    config = metplus_config()
+    set_loop_config(config)
+    processes = get_processes(config)
+    time_list = util.get_run_time_list(config)
+    tasks = task_graph.build_task_graph(processes, time_list)
+
+    # 3 times for A, B, and D, 1 task for C
+    assert len(tasks) == 10
+    labels = [task.label for task in tasks]
+    assert labels[0] == 'Fake(valid 202001010000)'
+    assert labels[6] == 'FakeSeries(all times)'
+
+    # A has no dependencies, B depends on A at the same time
+    for index in range(3):
+        assert tasks[index].depends_on == []
+        assert tasks[index + 3].depends_on == [index]
+
+    # C depends on all of B, D depends on C
+    assert tasks[6].depends_on == [3, 4, 5]
+    for index in range(7, 10):
+        assert tasks[index].depends_on == [6]
+
+    critical_path = task_graph.get_critical_path(tasks)
+    assert [task.index for task in critical_path] == [0, 3, 6, 7]
+
+def test_dry_run():
+    config = metplus_config()
+    set_loop_config(config)
+    config.set('config', 'LOOP_DAG_DRY_RUN', True)
+    processes = get_processes(config)
+    assert task_graph.run_processes_as_task_graph(config, processes)
+    for process in processes:
+        assert process.all_commands == []
+
+@pytest.mark.skipif(not parallel_util.can_fork(),
+                    reason='Process pool requires fork')
+@pytest.mark.parametrize(
+    'num_workers', [
+        1,
+        3,
+    ]
+)
+def test_run_task_graph(num_workers):
+    config = metplus_config()
+    set_loop_config(config, num_workers)
+    processes = get_processes(config)
+
+    assert task_graph.run_processes_as_task_graph(config, processes)
+
+    run_times = [f'20200101{hour:02d}' for hour in range(3)]
+    for process in processes:
+        if process.name == 'FakeC':
+            assert process.all_commands == ['FakeC all']
+            assert process.errors == 1
+        else:
+            assert sorted(process.all_commands) == [f'{process.name} {run_time}'
+                                                    for run_time in run_times]
+            assert process.errors == 0
+
+    # check that each task ran after the tasks it depends on
+    log_lines = get_log_lines(config)[-10:]
+    index_c = log_lines.index('FakeC running at all')
+    for run_time in run_times:
+        index_a = log_lines.index(f'FakeA running at {run_time}')
+        index_b = log_lines.index(f'FakeB running at {run_time}')
+        index_d = log_lines.index(f'FakeD running at {run_time}')
+        assert index_a < index_b < index_c < index_d
@@ -5,3 +5,17 @@ from .config.config_launcher import *
 from .config.config_metplus import *
 from .config.string_template_substitution import *
 from .feature_util import *
+from .parallel_util import *
+from .distributed_util import *
+from .task_graph import *
+from .directory_index import *
+from .staging import *
+from .path_cache import *
+from .netcdf_util import *
+from .field_plan import *
+from .startup_util import *
+from .command_usage import *
+from .log_util import *
+from .env_util import *
+from .error_summary import *
+from .output_reuse import *
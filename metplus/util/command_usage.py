@@ -0,0 +1,238 @@
+"""
+Program Name: command_usage.py
+Contact(s): George McCabe
+Abstract: Record the wall time and resources used by each command that is
+ run and write a summary of all of the commands at the end of the run
+History Log:  Initial version
+Usage: Called by CommandRunner and post_run_cleanup in met_util
+Parameters: None
+Input Files: N/A
+Output Files: Command usage summary set with COMMAND_USAGE_FILE
+"""
+
+import os
+import csv
+import json
+import datetime
+
+'''!@namespace command_usage
+@brief Record time and resources used by each command that is run
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus wrappers
+@endcode
+'''
+
+# number of bytes in a block reported by getrusage for ru_inblock and
+# ru_oublock
+BLOCK_SIZE = 512
+
+# names of the items in each record in the order they are written to CSV
+USAGE_FIELDS = [
+    'start',
+    'wrapper',
+    'executable',
+    'init',
+    'valid',
+    'lead',
+    'field',
+    'exit_status',
+    'wall_seconds',
+    'user_seconds',
+    'sys_seconds',
+    'max_rss_kb',
+    'read_bytes',
+    'write_bytes',
+    'command',
+]
+
+# list of dictionaries containing information about each command that was
+# run. Commands run in worker processes are added when the worker finishes
+_COMMAND_USAGE = []
+
+def get_rusage_info(rusage_list):
+    """!Combine the resource usage of each process that was started to run a
+        command, i.e. each process in a pipeline
+        Args:
+            @param rusage_list list of resource.struct_rusage objects from
+             os.wait4 or None if resource usage is not available
+            @returns dictionary with user and system CPU seconds, maximum
+             resident set size in kilobytes, and bytes read and written or
+             an empty dictionary if resource usage is not available
+    """
+    if not rusage_list:
+        return {}
+
+    return {
+        'user_seconds': sum(usage.ru_utime for usage in rusage_list),
+        'sys_seconds': sum(usage.ru_stime for usage in rusage_list),
+        'max_rss_kb': max(usage.ru_maxrss for usage in rusage_list),
+        'read_bytes': sum(usage.ru_inblock
+                          for usage in rusage_list) * BLOCK_SIZE,
+        'write_bytes': sum(usage.ru_oublock
+                           for usage in rusage_list) * BLOCK_SIZE,
+    }
+
+def record_command(command, executable, start_time, wall_seconds,
+                   exit_status, rusage_list=None, command_info=None):
+    """!Add information about a command that finished running
+        Args:
+            @param command full command that was run
+            @param executable name of the application that was run
+            @param start_time datetime object when the command started
+            @param wall_seconds number of seconds the command took to run
+            @param exit_status exit status of the command
+            @param rusage_list list of resource.struct_rusage objects for
+             the processes that were run or None if not available
+            @param command_info optional dictionary with the wrapper name,
+             init, valid, lead, and field used to identify the command
+            @returns dictionary that was recorded
+    """
+    record = {field: '' for field in USAGE_FIELDS}
+    if command_info:
+        record.update({key: value for key, value in command_info.items()
+                       if key in USAGE_FIELDS and value is not None})
+
+    record.update({
+        'start': start_time.strftime('%Y%m%d%H%M%S'),
+        'executable': executable,
+        'exit_status': exit_status,
+        'wall_seconds': round(wall_seconds, 6),
+        'command': command,
+    })
+    record.update(get_rusage_info(rusage_list))
+    if not record['wrapper']:
+        record['wrapper'] = executable
+
+    _COMMAND_USAGE.append(record)
+    return record
+
+def get_command_records():
+    """!Get information about the commands that have been run
+        @returns list of dictionaries for each command
+    """
+    return list(_COMMAND_USAGE)
+
+def get_command_record_count():
+    """!Get the number of commands that have been recorded
+        @returns number of records
+    """
+    return len(_COMMAND_USAGE)
+
+def get_command_records_since(count):
+    """!Get the records that were added after a given number of records,
+        i.e. the commands that were run by a task in a worker process
+        Args:
+            @param count value from get_command_record_count before the task ran
+            @returns list of dictionaries for each command
+    """
+    return _COMMAND_USAGE[count:]
+
+def add_command_records(records):
+    """!Add records from commands that were run in a worker process
+        Args:
+            @param records list of dictionaries from get_command_records_since
+    """
+    _COMMAND_USAGE.extend(records)
+
+def clear_command_records():
+    """!Remove all of the records for this run"""
+    _COMMAND_USAGE.clear()
+
+def write_command_usage(config):
+    """!Write information about each command that was run to the file set
+        by COMMAND_USAGE_FILE. If the file ends with .csv, a CSV file with a
+        header line is written. Otherwise each command is written as a JSON
+        object on its own line.
+        Args:
+            @param config METplusConfig object
+            @returns path to file that was written or None if no file was
+             written
+    """
+    usage_file = config.getstr('config', 'COMMAND_USAGE_FILE', '')
+    if not usage_file or not _COMMAND_USAGE:
+        return None
+
+    try:
+        parent_dir = os.path.dirname(usage_file)
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+
+        with open(usage_file, 'w', newline='') as file_handle:
+            if usage_file.endswith('.csv'):
+                writer = csv.DictWriter(file_handle, fieldnames=USAGE_FIELDS)
+                writer.writeheader()
+                writer.writerows(_COMMAND_USAGE)
+            else:
+                for record in _COMMAND_USAGE:
+                    file_handle.write(json.dumps(record) + '\n')
+    except OSError as err:
+        config.logger.warning(f"Could not write command usage file "
+                              f"{usage_file}: {err}")
+        return None
+
+    config.logger.info(f"Wrote usage of {len(_COMMAND_USAGE)} commands to "
+                       f"{usage_file}")
+    return usage_file
+
+def log_slowest_commands(config):
+    """!Write a table of the commands that took the longest to run to the
+        log. The number of commands is set with COMMAND_USAGE_TOP_N.
+        Args:
+            @param config METplusConfig object
+    """
+    top_n = config.getint('config', 'COMMAND_USAGE_TOP_N', 10)
+    if not top_n or top_n < 0 or not _COMMAND_USAGE:
+        return
+
+    slowest = sorted(_COMMAND_USAGE, key=lambda record: record['wall_seconds'],
+                     reverse=True)[:top_n]
+    total_seconds = sum(record['wall_seconds'] for record in _COMMAND_USAGE)
+
+    config.logger.info(f"Ran {len(_COMMAND_USAGE)} commands in "
+                       f"{datetime.timedelta(seconds=round(total_seconds))}. "
+                       f"Slowest {len(slowest)} commands:")
+
+    header = ('Wall(s)', 'User(s)', 'Sys(s)', 'MaxRSS(MB)', 'Exit',
+              'Wrapper', 'Init', 'Lead', 'Field')
+    rows = [header]
+    for record in slowest:
+        max_rss = record['max_rss_kb']
+        rows.append((
+            f"{record['wall_seconds']:.2f}",
+            _format_seconds(record['user_seconds']),
+            _format_seconds(record['sys_seconds']),
+            f"{max_rss / 1024:.1f}" if max_rss != '' else '',
+            str(record['exit_status']),
+            str(record['wrapper']),
+            str(record['init']),
+            str(record['lead']),
+            str(record['field']),
+        ))
+
+    widths = [max(len(row[index]) for row in rows)
+              for index in range(len(header))]
+    for row in rows:
+        config.logger.info('  ' + '  '.join(value.ljust(width)
+                                            for value, width
+                                            in zip(row, widths)).rstrip())
+
+def _format_seconds(seconds):
+    """!Format a number of seconds for the slowest commands table
+        Args:
+            @param seconds number of seconds or empty string if not available
+            @returns formatted string
+    """
+    if seconds == '':
+        return ''
+
+    return f"{seconds:.2f}"
+
+def log_command_usage_summary(config):
+    """!Write the slowest commands to the log and write the information
+        about all of the commands to the file set by COMMAND_USAGE_FILE
+        Args:
+            @param config METplusConfig object
+    """
+    log_slowest_commands(config)
+    write_command_usage(config)
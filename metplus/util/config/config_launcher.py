@@ -416,6 +416,13 @@ class METplusConfig(ProdConfig):
         # set interpolation to None so you can supply filename template
         # that contain % to config.set
         conf = ConfigParser(strict=False, inline_comment_prefixes=(';',), interpolation=None) if (conf is None) else conf
+
+        # values returned by getraw keyed by (section, option) and the
+        # keys of the cached values that reference each variable name.
+        # set before calling parent constructor in case it sets values
+        self._raw_cache = {}
+        self._raw_dependents = {}
+
         super().__init__(conf)
         self._cycle = None
         self._logger = logging.getLogger('metplus')
@@ -447,17 +454,111 @@ class METplusConfig(ProdConfig):
         throw a wide variety of exceptions if sanity checks fail."""
         logger = self.log('sanity.checker')
 
+    def set(self, section, key, value):
+        """!Overrides method in ProdConfig to remove cached getraw values
+            that reference the variable that is set
+            @param section section of config
+            @param key name of config variable
+            @param value value to set
+        """
+        with self:
+            super().set(section, key, value)
+            self._invalidate_raw_cache(str(key))
+
+    def set_options(self, section, **kwargs):
+        """!Overrides method in ProdConfig to clear cached getraw values"""
+        with self:
+            super().set_options(section, **kwargs)
+            self._clear_raw_cache()
+
+    def read(self, source):
+        """!Overrides method in ProdConfig to clear cached getraw values"""
+        with self:
+            super().read(source)
+            self._clear_raw_cache()
+            return self
+
+    def readfp(self, source):
+        """!Overrides method in ProdConfig to clear cached getraw values"""
+        with self:
+            super().readfp(source)
+            self._clear_raw_cache()
+            return self
+
+    def readstr(self, string):
+        """!Overrides method in ProdConfig to clear cached getraw values"""
+        with self:
+            super().readstr(string)
+            self._clear_raw_cache()
+            return self
+
+    def _invalidate_raw_cache(self, name):
+        """!Remove cached getraw values that reference a variable
+            @param name name of config variable that changed
+        """
+        for cache_key in self._raw_dependents.pop(name, ()):
+            self._raw_cache.pop(cache_key, None)
+
+    def _clear_raw_cache(self):
+        """!Remove all cached getraw values"""
+        self._raw_cache.clear()
+        self._raw_dependents.clear()
+
     # override get methods to perform additional error checking
     def getraw(self, sec, opt, default='', count=0):
         """ parse parameter and replace any existing parameters
             referenced with the value (looking in same section, then
             config, dir, and os environment)
-            returns raw string, preserving {valid?fmt=%Y} blocks
+            returns raw string, preserving {valid?fmt=%Y} blocks.
+            The value is cached until a variable that it references is
+            changed with set or an environment variable that it references
+            is changed
+            Args:
+                @param sec: Section in the conf file to look for variable
+                @param opt: Variable to interpret
+                @param default: Default value to use if config is not set
+                @param count: Counter used to stop recursion to prevent infinite
+            Returns:
+                Raw string or empty string if function calls itself too many times
+        """
+        if count:
+            return self._getraw(sec, opt, default, count, set(), {})
+
+        with self:
+            cache_key = (sec, opt)
+            cached = self._raw_cache.get(cache_key)
+            if cached is not None:
+                value, env_values = cached
+                if all(os.environ.get(name) == env_value
+                       for name, env_value in env_values):
+                    return value
+
+            # names of variables referenced by the value and
+            # values of environment variables referenced by the value
+            references = {opt}
+            env_values = {}
+            value = self._getraw(sec, opt, default, count, references,
+                                 env_values)
+
+            # do not cache default values because the default can change
+            if self.has_option(sec, opt):
+                self._raw_cache[cache_key] = (value,
+                                              tuple(env_values.items()))
+                for name in references:
+                    self._raw_dependents.setdefault(name, set()).add(cache_key)
+
+            return value
+
+    def _getraw(self, sec, opt, default, count, references, env_values):
+        """!Replace parameters referenced in a value. Called by getraw
             Args:
                 @param sec: Section in the conf file to look for variable
                 @param opt: Variable to interpret
                 @param default: Default value to use if config is not set
                 @param count: Counter used to stop recursion to prevent infinite
+                @param references: set to add names of referenced variables
+                @param env_values: dictionary to add values of referenced
+                 environment variables
             Returns:
                 Raw string or empty string if function calls itself too many times
         """
@@ -474,17 +575,23 @@ class METplusConfig(ProdConfig):
                 start_idx = index
             elif character == "}":
                 var_name = in_template[start_idx+1:index]
+                references.add(var_name)
                 var = None
                 if self.has_option(sec, var_name):
-                    var = self.getraw(sec, var_name, default, count)
+                    var = self._getraw(sec, var_name, default, count,
+                                       references, env_values)
                 elif self.has_option('config', var_name):
-                    var = self.getraw('config', var_name, default, count)
+                    var = self._getraw('config', var_name, default, count,
+                                       references, env_values)
                 elif self.has_option('dir', var_name):
-                    var = self.getraw('dir', var_name, default, count)
+                    var = self._getraw('dir', var_name, default, count,
+                                       references, env_values)
                 elif self.has_option('filename_templates', var_name):
-                    var = self.getraw('filename_templates', var_name, default, count)
+                    var = self._getraw('filename_templates', var_name, default, count,
+                                       references, env_values)
                 elif var_name[0:3] == "ENV":
                     var = os.environ.get(var_name[4:-1])
+                    env_values[var_name[4:-1]] = var
 
                 if var is None:
                     out_template += in_template[start_idx:index+1]
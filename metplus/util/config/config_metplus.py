@@ -46,6 +46,7 @@ def usage(filename=None, logger=None):
 Usage: %s [ -c /path/to/additional/file.conf]...[] [options]
     -c|--config <arg0>      Specify custom configuration file to use
     -h|--help               Display this usage statement
+    --profile-startup       Log the time spent in each step of the startup
 
 Optional arguments: [options]
 section.option=value -- override conf options on the command line
@@ -85,7 +86,8 @@ def setup(baseinputconfs, filename=None, logger=None):
     short_opts = "c:h"
     # Note: r: runtime= option is not being used. remove it ?
     long_opts = ["config=",
-                 "help"]
+                 "help",
+                 "profile-startup"]
 
     # All command line input, get options and arguments
     try:
@@ -101,6 +103,7 @@ def setup(baseinputconfs, filename=None, logger=None):
 
     opts_conf_files = list()
     opts_conf_file = None
+    profile_startup = False
     for k, v in opts:
         if k in ('-c', '--config'):
             opts_conf_files.extend(v.split(","))
@@ -108,6 +111,8 @@ def setup(baseinputconfs, filename=None, logger=None):
             if logger:
                 logger.info('Help, printing Usage statement')
             usage(filename=filename)
+        elif k == '--profile-startup':
+            profile_startup = True
         else:
             assert False, "UNHANDLED OPTION"
 
@@ -144,6 +149,10 @@ def setup(baseinputconfs, filename=None, logger=None):
     # save list of user configuration files in a variable
     conf.set('config', 'METPLUS_CONFIG_FILES', ','.join(opts_conf_list))
 
+    # log time spent in each startup step if requested
+    if profile_startup:
+        conf.set('config', 'PROFILE_STARTUP', True)
+
     logger.info('Completed METplus configuration setup.')
 
     return conf
@@ -14,6 +14,7 @@ Condition codes: Varies
 
 import re
 import datetime
+from functools import lru_cache
 from dateutil.relativedelta import relativedelta
 
 from .. import time_util
@@ -34,6 +35,9 @@ INIT_STRING = "init"
 DA_INIT_STRING = "da_init"
 OFFSET_STRING = "offset"
 
+# maximum number of compiled templates to keep in memory
+TEMPLATE_CACHE_SIZE = 1024
+
 LENGTH_DICT = {'Y': 4,
                'm': 2,
                'd': 2,
@@ -368,35 +372,7 @@ def do_string_sub(tmpl, skip_missing_tags=False, **kwargs):
                      of the track data, such as experiment name or some other descriptor
     """
 
-    # The . matches any single character except newline, and the
-    # following + matches 1 or more occurrence of preceding expression.
-    # The ? after the .+ makes it a lazy match so that it stops
-    # after the first "}" instead of continuing to match as many
-    # characters as possible
-
-    # findall searches through the string and finds all non-overlapping
-    # matches and returns the group
-    # match_list is a list with the contents being the data between the
-    # curly braces
-    match_list = re.findall(r'\{(.+?)\}', tmpl)
-
-    # finditer gets the start and end indices
-    # Iterate over each match to get the starting and ending indices
-    matches = re.finditer(r'\{(.+?)\}', tmpl)
-    match_start_end_list = []
-    for match in matches:
-        match_start_end_list.append((match.start(), match.end()))
-
-    if len(match_list) == 0:
-        return tmpl
-
-    if len(match_list) != len(match_start_end_list):
-        # Log and exit
-        raise TypeError("match_list and match_start_end_list should " +
-                        "have the same length for template: " +
-                        tmpl)
-
-    return find_and_replace_tags_in_template(match_list, tmpl, kwargs, skip_missing_tags)
+    return get_compiled_template(tmpl).fill(skip_missing_tags, **kwargs)
 
 def find_and_replace_tags_in_template(match_list, tmpl, kwargs, skip_missing_tags=False):
     """! Loop through tags from template and replace them with the correct time values
@@ -468,25 +444,7 @@ def parse_template(template, filepath, logger=None):
              @param filepath path to examine
              @returns time_info dictionary with time information if successful, None if not"""
 
-    match_dict, valid_shift = populate_match_dict(template, filepath, logger)
-    if match_dict is None:
-        return None
-
-    # combine common items and get datetime
-    output_dict = populate_output_dict(match_dict, valid_shift)
-
-    if not output_dict:
-        if logger:
-            logger.debug(f"Could not extract enough time information from {filepath}")
-        else:
-            print(f"DEBUG: Could not extract enough time information from {filepath}")
-
-        return None
-
-    # fill in the rest of the time info dictionary items with ti_calculate
-    time_info = time_util.ti_calculate(output_dict)
-
-    return time_info
+    return get_compiled_template(template).parse(filepath, logger)
 
 def populate_match_dict(template, filepath, logger=None):
     """! Use template to extract time information from filepath, add each value to a dictionary.
@@ -850,3 +808,328 @@ def add_offset_matches_to_output_dict(match_dict, output_dict):
             offset = int(value)
 
     output_dict['offset_hours'] = offset
+
+class CompiledTemplate:
+    """!Filename template that has been split into tags once so it can be
+        filled in or used to parse file paths many times without reading the
+        template again. Use get_compiled_template to get an instance so that
+        templates that are used repeatedly are only compiled once.
+    """
+    def __init__(self, template):
+        self.template = template
+
+        # list of tuples containing the text before a tag and the tag info
+        # the last item contains the text after the last tag and None
+        self._fill_parts = self._compile_fill()
+
+        # text before the first tag, text after the last tag, and
+        # list of steps to extract time info from each tag. If the template
+        # cannot be compiled, the original functions are used to parse
+        self._parse_info = None
+        try:
+            self._parse_info = self._compile_parse()
+        except (ValueError, TypeError):
+            pass
+
+    def _compile_fill(self):
+        """!Find all tags in template, i.e. {init?fmt=%Y%m%d}
+            @returns list of tuples containing text before each tag and the
+             tag information
+        """
+        parts = []
+        last_end = 0
+        for match in re.finditer(r'\{(.+?)\}', self.template):
+            split_string = match.group(1).split(FORMATTING_DELIMITER)
+            fmt_indices = [idx for idx, item in enumerate(split_string)
+                           if item.startswith(FORMAT_STRING)]
+            has_shift = any([item.startswith(SHIFT_STRING)
+                             for item in split_string])
+            has_truncate = any([item.startswith(TRUNCATE_STRING)
+                                for item in split_string])
+            tag_info = (match.group(0), split_string, fmt_indices,
+                        has_shift, has_truncate)
+            parts.append((self.template[last_end:match.start()], tag_info))
+            last_end = match.end()
+
+        parts.append((self.template[last_end:], None))
+        return parts
+
+    @property
+    def has_tags(self):
+        """!True if the template contains any tags to fill in"""
+        return len(self._fill_parts) > 1
+
+    def fill(self, skip_missing_tags=False, **kwargs):
+        """!Substitute values into the template. See do_string_sub for
+            details on the supported tags and arguments
+            Args:
+                @param skip_missing_tags if True, leave tags that do not have
+                 a value in kwargs unchanged instead of raising TypeError
+                @param kwargs values to substitute for each tag
+                @returns string with tags replaced with values
+        """
+        if not self.has_tags:
+            return self.template
+
+        output = []
+        for text, tag_info in self._fill_parts:
+            output.append(text)
+            if tag_info is None:
+                continue
+
+            tag, split_string, fmt_indices, has_shift, has_truncate = tag_info
+
+            # split_string[0] holds the key (e.g. "init", "valid", etc)
+            if split_string[0] not in kwargs:
+                # if skip_missing_tags is True, leave template tag if key was not found
+                if skip_missing_tags:
+                    output.append(tag)
+                    continue
+
+                # otherwise log and exit
+                raise TypeError("The key " + split_string[0] +
+                                " was not passed to do_string_sub " +
+                                " for template: " + self.template)
+
+            # if shift or truncate is set, get that value before formatting
+            shift_seconds = 0
+            if has_shift:
+                shift_seconds = get_seconds_from_template(split_string,
+                                                          SHIFT_STRING,
+                                                          kwargs)
+            truncate_seconds = 0
+            if has_truncate:
+                truncate_seconds = get_seconds_from_template(split_string,
+                                                             TRUNCATE_STRING,
+                                                             kwargs)
+
+            # No formatting or length is requested
+            if not fmt_indices:
+                value = kwargs[split_string[0]]
+                if isinstance(value, int):
+                    value = f"{value}S"
+                output.append(value)
+                continue
+
+            # format times appropriately
+            for idx in fmt_indices:
+                value = handle_format_delimiter(split_string,
+                                                idx,
+                                                shift_seconds,
+                                                truncate_seconds,
+                                                kwargs)
+            output.append(value)
+
+        return ''.join(output)
+
+    def _compile_parse(self):
+        """!Read text before, between, and after the tags and the format
+            information for each tag
+            @returns tuple of text before tags, text after tags, and list of
+             tag info or None if no tags were found
+        """
+        # get the text before any tags, between tags, and after any tags
+        match = re.match(r'([^{]*)({.*})([^}]*)', self.template)
+        if not match:
+            return None
+
+        pre_text, all_tags, post_text = match.groups()
+        tags = []
+        for tag_content, extra_text in re.findall(r'{(.*?)}([^{]*)', all_tags):
+            # identifier is time type, i.e. valid, init, lead, etc.
+            # sections is a list of key=values, i.e. fmt=%Y or shift=30
+            identifier, *sections = tag_content.split('?')
+            steps = []
+            for section in sections:
+                element_name, element_value = section.split('=')
+                if element_name == FORMAT_STRING:
+                    steps.append((FORMAT_STRING,
+                                  self._compile_fmt(element_value,
+                                                    identifier)))
+                elif element_name == SHIFT_STRING:
+                    # don't allow shift on any identifier except valid
+                    # error is raised when the tag is reached while parsing
+                    if identifier != VALID_STRING:
+                        msg = 'Cannot apply a shift to template ' + \
+                              'item {} when processing inexact '.format(identifier) + \
+                              'times. Only {} is accepted'.format(VALID_STRING)
+                        steps.append(('error', msg))
+                        continue
+
+                    # convert time string (i.e. 3600S, 60M, 1H, etc.) to seconds
+                    shift = int(time_util.get_seconds_from_string(element_value,
+                                                                  default_unit='S'))
+                    steps.append((SHIFT_STRING, shift))
+
+            tags.append((steps, extra_text))
+
+        return pre_text, post_text, tags
+
+    @staticmethod
+    def _compile_fmt(fmt, identifier):
+        """!Get the length of each item in a format, i.e. %Y%m%d. See
+            get_fmt_info for more information.
+            Args:
+                @param fmt formatting values from template tag, i.e. %Y%m%d
+                @param identifier tag name, i.e. 'init' or 'lead'
+                @returns list of tuples containing the match dictionary key,
+                 number of characters to extract (None if the number of digits
+                 varies), and number of extra characters after the item, or
+                 None if the format cannot be used to parse a file path
+        """
+        items = []
+        for time_number, time_letters in re.findall(r'%\.?(\d*)([^%]+)', fmt):
+            time_letter = time_letters[0]
+            if time_letter not in LENGTH_DICT.keys():
+                return None
+
+            new_len = LENGTH_DICT.get(time_letter)
+
+            match_len = re.match(r'([' + time_letter + ']+)(.*)', time_letters)
+            if not match_len:
+                return None
+
+            time_letter_count = len(match_len.group(1))
+            extra_len = len(match_len.group(2))
+            if time_letter_count > 1:
+                if time_number:
+                    return None
+
+                new_len = time_letter_count
+
+            elif time_number and int(time_number) != new_len:
+                new_len = int(time_number)
+
+            # lead or level hours use all of the digits that are found
+            if time_letters == 'H' and identifier in ('lead', 'level'):
+                new_len = None
+
+            items.append((identifier + '+' + time_letter, new_len, extra_len))
+
+        return items
+
+    def populate_match_dict(self, filepath, logger=None):
+        """!Extract time information from filepath. See populate_match_dict
+            Args:
+                @param filepath path to examine, i.e. file.20190201.ext
+                @param logger optional logger to output debug information
+                @returns tuple of match dictionary and valid shift value or
+                 (None, None) if could not extract time info
+        """
+        if self._parse_info is None:
+            return populate_match_dict(self.template, filepath, logger)
+
+        pre_text, post_text, tags = self._parse_info
+
+        # check if text before and after tags matches template and strip off from file path
+        filepath = check_pre_text(filepath, pre_text, logger)
+        filepath = check_post_text(filepath, post_text, logger)
+        if filepath is None:
+            return None, None
+
+        match_dict = {}
+        valid_shift = 0
+        for steps, extra_text in tags:
+            fmt_len = 0
+            for step_type, step_value in steps:
+                if step_type == FORMAT_STRING:
+                    fmt_len = self._parse_fmt(step_value, filepath, match_dict)
+                    if fmt_len is None:
+                        if logger:
+                            logger.debug("Could not determine length of formatted text")
+                        return None, None
+
+                elif step_type == SHIFT_STRING:
+                    # if shift has been set before (other than 0) and
+                    # this shift differs, raise exception
+                    if valid_shift not in (0, step_value):
+                        raise TypeError('Found multiple shifts for valid time' +
+                                        '{} differs from {}'
+                                        .format(step_value, valid_shift))
+                    valid_shift = step_value
+
+                else:
+                    raise TypeError(step_value)
+
+            # if length of formatted text is longer than remaining text in file path
+            if fmt_len > len(filepath):
+                if logger:
+                    logger.debug("Length of formatted text is longer than remaining text in file path")
+                return None, None
+
+            # strip off length of formatted text from filepath and
+            # check that any extra text matches the filepath
+            filepath = check_pre_text(filepath[fmt_len:], extra_text, logger)
+            if filepath is None:
+                return None, None
+
+        return match_dict, valid_shift
+
+    @staticmethod
+    def _parse_fmt(items, filepath, match_dict):
+        """!Add time information from file path to match dictionary
+            Args:
+                @param items list of compiled format items from _compile_fmt
+                @param filepath rest of text from filename that can be parsed
+                @param match_dict dictionary of extracted information
+                @returns number of characters processed from the file path or
+                 None if information could not be extracted
+        """
+        if items is None:
+            return None
+
+        length = 0
+        for key, new_len, extra_len in items:
+            # if lead or level hours, look forward until non-digit is found
+            if new_len is None:
+                new_len = 0
+                while new_len < len(filepath) and filepath[new_len].isdigit():
+                    new_len += 1
+
+            length += new_len + extra_len
+
+            if not add_to_dict(key, match_dict, filepath, new_len):
+                return None
+
+            filepath = filepath[new_len+extra_len:]
+
+        return length
+
+    def parse(self, filepath, logger=None):
+        """!Extract time information from path using the template
+            Args:
+                @param filepath path to examine
+                @param logger optional logger to output debug information
+                @returns time_info dictionary with time information if
+                 successful, None if not
+        """
+        match_dict, valid_shift = self.populate_match_dict(filepath, logger)
+        if match_dict is None:
+            return None
+
+        # combine common items and get datetime
+        output_dict = populate_output_dict(match_dict, valid_shift)
+
+        if not output_dict:
+            if logger:
+                logger.debug(f"Could not extract enough time information from {filepath}")
+            else:
+                print(f"DEBUG: Could not extract enough time information from {filepath}")
+
+            return None
+
+        # fill in the rest of the time info dictionary items with ti_calculate
+        time_info = time_util.ti_calculate(output_dict)
+
+        return time_info
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def get_compiled_template(template):
+    """!Get compiled version of a template. The most recently used templates
+        are kept so a template is only compiled once even if it is used to
+        fill in or parse many file paths
+        Args:
+            @param template filename template, i.e. file.{valid?fmt=%Y%m%d}.ext
+            @returns CompiledTemplate object
+    """
+    return CompiledTemplate(template)
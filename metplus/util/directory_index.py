@@ -0,0 +1,246 @@
+"""
+Program Name: directory_index.py
+Contact(s): George McCabe
+Abstract: Index of files under a directory sorted by the valid time
+ extracted from each file path using a filename template
+History Log:  Initial version
+Usage: Called by CommandBuilder.find_file_in_window
+Parameters: None
+Input Files: N/A
+Output Files: N/A
+"""
+
+import os
+import json
+import hashlib
+from bisect import bisect_left, bisect_right
+
+from .met_util import get_time_from_file
+
+'''!@namespace directory_index
+@brief Cache of file valid times used to find files within a time window
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus wrappers
+@endcode
+'''
+
+# indices that have already been built in this run keyed by directory
+# and template so each directory is only parsed once
+_INDEX_CACHE = {}
+
+class DirectoryIndex:
+    """!List of files under a directory sorted by valid time. The
+        modification time of each directory is stored so the index can
+        be updated by only reading the directories that have changed since
+        the index was last built, i.e. if a wrapper earlier in the
+        PROCESS_LIST wrote new files.
+    """
+    def __init__(self, data_dir, template, logger=None):
+        self.data_dir = data_dir
+        self.template = template
+        self.logger = logger
+
+        # relative directory path -> dictionary containing mtime of the
+        # directory, subdirectories, and valid time (in seconds) of each file
+        # (None if time information could not be extracted from the file)
+        self.dirs = {}
+
+        # valid times (in seconds) sorted in increasing order and the
+        # relative path of the file for each time
+        self.times = []
+        self.paths = []
+
+    def refresh(self):
+        """!Read any directories that are new or have been modified since
+            they were last read and update the sorted list of files
+            @returns True if the index changed, False if not
+        """
+        changed = False
+        found_dirs = set()
+        dirs_to_check = ['']
+        while dirs_to_check:
+            rel_dir = dirs_to_check.pop()
+            full_dir = os.path.join(self.data_dir, rel_dir)
+            try:
+                mtime = os.stat(full_dir).st_mtime_ns
+            except OSError:
+                continue
+
+            found_dirs.add(rel_dir)
+            dir_info = self.dirs.get(rel_dir)
+            if dir_info is None or dir_info['mtime'] != mtime:
+                dir_info = self._read_dir(rel_dir, mtime, dir_info)
+                self.dirs[rel_dir] = dir_info
+                changed = True
+
+            dirs_to_check.extend(dir_info['subdirs'])
+
+        # remove directories that no longer exist
+        for rel_dir in set(self.dirs) - found_dirs:
+            del self.dirs[rel_dir]
+            changed = True
+
+        if changed:
+            self._sort()
+
+        return changed
+
+    def _read_dir(self, rel_dir, mtime, old_info=None):
+        """!Get list of files and subdirectories in a directory and extract
+            the valid time from any files that were not already read
+            Args:
+                @param rel_dir directory relative to the data directory
+                @param mtime modification time of the directory
+                @param old_info previous information about the directory or
+                 None if it has not been read before
+                @returns dictionary of directory information
+        """
+        old_files = old_info['files'] if old_info else {}
+        files = {}
+        subdirs = []
+        with os.scandir(os.path.join(self.data_dir, rel_dir)) as entries:
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name)
+                if entry.is_dir():
+                    # do not follow symbolic links to directories to be
+                    # consistent with os.walk
+                    if not entry.is_symlink():
+                        subdirs.append(rel_path)
+                    continue
+
+                if entry.name in old_files:
+                    files[entry.name] = old_files[entry.name]
+                else:
+                    files[entry.name] = self._get_valid_seconds(rel_path)
+
+        return {'mtime': mtime, 'subdirs': sorted(subdirs), 'files': files}
+
+    def _get_valid_seconds(self, rel_path):
+        """!Extract the valid time from a file path using the template
+            Args:
+                @param rel_path path relative to the data directory
+                @returns valid time in seconds or None if it could not be read
+        """
+        file_time_info = get_time_from_file(rel_path, self.template,
+                                            self.logger)
+        if file_time_info is None:
+            return None
+
+        return int(file_time_info['valid'].strftime("%s"))
+
+    def _sort(self):
+        """!Build the list of files sorted by valid time. Files with the same
+            valid time are sorted by relative path
+        """
+        entries = []
+        for rel_dir, dir_info in self.dirs.items():
+            for filename, valid_seconds in dir_info['files'].items():
+                if valid_seconds is None:
+                    continue
+                entries.append((valid_seconds,
+                                os.path.join(rel_dir, filename)))
+
+        entries.sort()
+        self.times = [entry[0] for entry in entries]
+        self.paths = [entry[1] for entry in entries]
+
+    def find(self, lower_limit, upper_limit):
+        """!Get files with a valid time within a range
+            Args:
+                @param lower_limit earliest valid time in seconds to include
+                @param upper_limit latest valid time in seconds to include
+                @returns list of tuples containing the valid time in seconds
+                 and full path of each file, sorted by valid time
+        """
+        start = bisect_left(self.times, lower_limit)
+        end = bisect_right(self.times, upper_limit)
+        return [(self.times[index],
+                 os.path.join(self.data_dir, self.paths[index]))
+                for index in range(start, end)]
+
+    def get_index_path(self, index_dir):
+        """!Get path to file used to save the index to disk
+            Args:
+                @param index_dir directory to write index files
+                @returns path to index file
+        """
+        key = f'{os.path.abspath(self.data_dir)}\n{self.template}'
+        filename = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(index_dir, f'{filename}.json')
+
+    def load(self, index_dir):
+        """!Read index from disk if it exists and was created for the same
+            directory and template. Directories that have changed since the
+            index was written are read again by refresh.
+            Args:
+                @param index_dir directory containing index files
+        """
+        index_path = self.get_index_path(index_dir)
+        if not os.path.exists(index_path):
+            return
+
+        try:
+            with open(index_path, 'r') as index_file:
+                saved = json.load(index_file)
+        except (OSError, ValueError):
+            if self.logger:
+                self.logger.warning(f"Could not read index file: {index_path}")
+            return
+
+        if (saved.get('data_dir') != os.path.abspath(self.data_dir) or
+                saved.get('template') != self.template):
+            return
+
+        self.dirs = saved.get('dirs', {})
+        self._sort()
+        if self.logger:
+            self.logger.debug(f"Read index of {self.data_dir} from "
+                              f"{index_path}")
+
+    def save(self, index_dir):
+        """!Write index to disk so it can be used by a later run
+            Args:
+                @param index_dir directory to write index files
+        """
+        index_path = self.get_index_path(index_dir)
+        if not os.path.exists(index_dir):
+            os.makedirs(index_dir, exist_ok=True)
+
+        # write to a temporary file and rename so that another process
+        # reading the index will never see a partially written file
+        tmp_path = f'{index_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as index_file:
+            json.dump({'data_dir': os.path.abspath(self.data_dir),
+                       'template': self.template,
+                       'dirs': self.dirs}, index_file)
+        os.replace(tmp_path, index_path)
+
+def get_directory_index(data_dir, template, index_dir=None, logger=None):
+    """!Get index of files under a directory that match a template. The
+        index is built the first time it is requested and updated on later
+        calls if any directories have been modified.
+        Args:
+            @param data_dir directory to search
+            @param template filename template relative to data_dir
+            @param index_dir optional directory to read/write the index so it
+             can be reused by later runs
+            @param logger optional logger to write messages
+            @returns DirectoryIndex object
+    """
+    key = (os.path.abspath(data_dir), template)
+    index = _INDEX_CACHE.get(key)
+    if index is None:
+        index = DirectoryIndex(data_dir, template, logger)
+        if index_dir:
+            index.load(index_dir)
+        _INDEX_CACHE[key] = index
+
+    if index.refresh() and index_dir:
+        index.save(index_dir)
+
+    return index
+
+def clear_directory_index_cache():
+    """!Remove all indices that have been built in this run"""
+    _INDEX_CACHE.clear()
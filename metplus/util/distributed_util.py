@@ -0,0 +1,475 @@
+"""
+Program Name: distributed_util.py
+Contact(s): George McCabe
+Abstract: Run METplus wrappers for many run times on the nodes that are
+ allocated to a batch job
+History Log:  Initial version
+Usage: Called by loop_over_times_and_call in met_util. Each group of tasks
+ is run by ush/run_metplus_tasks.py
+Parameters: None
+Input Files: METplus configuration written to TMP_DIR
+Output Files: Task logs and results in TMP_DIR that are merged into the
+ METplus log and removed
+"""
+
+import os
+import sys
+import json
+import shutil
+import datetime
+from functools import reduce
+from importlib import import_module
+
+import produtil.run
+import produtil.mpi_impl
+from produtil.run import exe, mpiserial, JobPool
+
+from . import parallel_util
+from . import path_cache
+from . import time_util
+
+'''!@namespace distributed_util
+@brief Utility to run METplus wrappers over many run times on many nodes
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus time looping functions
+@endcode
+'''
+
+# options for DISTRIBUTED_LAUNCHER config variable
+VALID_LAUNCHERS = ['auto', 'srun', 'mpiserial', 'local']
+
+# script that runs a group of tasks on a node
+TASK_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, os.pardir, 'ush',
+                           'run_metplus_tasks.py')
+
+def get_launcher(config):
+    """!Read DISTRIBUTED_LAUNCHER from the config and find the produtil MPI
+        implementation used to start the task groups. If the launcher is
+        auto, srun is used if running in a SLURM allocation, mpiserial is
+        used if another MPI implementation is detected, and the task groups
+        are run on this node otherwise.
+        Args:
+            @param config METplusConfig object to query
+            @returns tuple of the launcher name and the
+             produtil.mpi_impl implementation object (None if running
+             locally) or (None, None) if the launcher is invalid or not
+             available
+    """
+    launcher = config.getstr('config', 'DISTRIBUTED_LAUNCHER', 'auto').lower()
+    if launcher not in VALID_LAUNCHERS:
+        config.logger.error(f"Invalid DISTRIBUTED_LAUNCHER: {launcher}. "
+                            f"Options are {', '.join(VALID_LAUNCHERS)}")
+        return None, None
+
+    if launcher == 'local':
+        return launcher, None
+
+    try:
+        if launcher == 'srun':
+            mpi_impl = produtil.mpi_impl.get_mpi('srun', logger=config.logger)
+        else:
+            mpi_impl = produtil.mpi_impl.get_mpi(logger=config.logger)
+    except Exception as err:
+        # detection raises an exception if srun or scontrol is not found
+        config.logger.error(f"Could not use DISTRIBUTED_LAUNCHER "
+                            f"{launcher}: {err}")
+        return None, None
+
+    if launcher == 'auto':
+        if mpi_impl.name() == 'srun':
+            launcher = 'srun'
+        elif mpi_impl.can_run_mpi():
+            launcher = 'mpiserial'
+        else:
+            return 'local', None
+
+    if launcher == 'mpiserial' and not mpi_impl.can_run_mpi():
+        config.logger.error("DISTRIBUTED_LAUNCHER = mpiserial requires an "
+                            "MPI implementation but none was found")
+        return None, None
+
+    return launcher, mpi_impl
+
+def get_task_list(config, time_list):
+    """!Get list of tasks to run. Each task is a run time and a forecast
+        lead if DISTRIBUTED_SPLIT_LEADS is True, or a run time and None to
+        run all forecast leads if not. Leads are not split if any lead in
+        the list cannot be converted to seconds, i.e. months or years.
+        Args:
+            @param config METplusConfig object to query
+            @param time_list list of time dictionaries to process
+            @returns list of tuples containing a time dictionary and the
+             forecast lead in seconds or None
+    """
+    if not config.getbool('config', 'DISTRIBUTED_SPLIT_LEADS', False):
+        return [(input_dict, None) for input_dict in time_list]
+
+    # import here to avoid circular import with met_util
+    from .met_util import get_lead_sequence
+
+    task_list = []
+    for input_dict in time_list:
+        leads = [time_util.ti_get_seconds_from_relativedelta(lead)
+                 for lead in get_lead_sequence(config, input_dict)]
+        if not leads or None in leads:
+            config.logger.warning("Cannot split forecast leads into "
+                                  "separate tasks. Running all leads for "
+                                  "each run time together")
+            return [(input_dict, None) for input_dict in time_list]
+
+        task_list.extend([(input_dict, lead) for lead in leads])
+
+    return task_list
+
+def get_num_task_groups(config, launcher, num_tasks):
+    """!Get number of groups to split the tasks into. Each group is run on
+        its own node (srun), MPI rank (mpiserial), or process (local).
+        Args:
+            @param config METplusConfig object to query
+            @param launcher name of launcher from get_launcher
+            @param num_tasks number of tasks to run
+            @returns number of task groups (at least 1, at most num_tasks)
+    """
+    num_groups = config.getint('config', 'LOOP_EXECUTOR_WORKERS', 0)
+    if num_groups is None:
+        num_groups = 1
+    elif num_groups <= 0:
+        if launcher == 'srun':
+            num_groups = int(os.environ.get('SLURM_JOB_NUM_NODES',
+                                            os.environ.get('SLURM_NNODES',
+                                                           1)))
+        elif launcher == 'mpiserial':
+            try:
+                num_groups = produtil.mpi_impl.mpi_impl_base.guess_total_tasks(
+                    logger=config.logger
+                )
+            except KeyError:
+                num_groups = os.cpu_count() or 1
+        else:
+            num_groups = os.cpu_count() or 1
+
+    return max(1, min(num_groups, num_tasks))
+
+def partition_tasks(task_list, num_groups):
+    """!Split the tasks into groups of consecutive tasks that have nearly
+        the same size so that consecutive run times are processed on the
+        same node
+        Args:
+            @param task_list list of tasks to split
+            @param num_groups number of groups to create
+            @returns list of lists of (task index, task) tuples
+    """
+    groups = []
+    group_size, extra = divmod(len(task_list), num_groups)
+    start = 0
+    for group_index in range(num_groups):
+        end = start + group_size + (1 if group_index < extra else 0)
+        groups.append([(index, task_list[index])
+                       for index in range(start, end)])
+        start = end
+
+    return [group for group in groups if group]
+
+def time_dict_to_json(input_dict):
+    """!Convert a time dictionary to a dictionary that can be written to
+        JSON. datetime values are converted to strings ending in Z.
+        Args:
+            @param input_dict time dictionary containing now and init or valid
+            @returns dictionary that can be written to JSON
+    """
+    return {key: value.strftime('%Y%m%d%H%M%SZ')
+            if isinstance(value, datetime.datetime) else value
+            for key, value in input_dict.items()}
+
+def time_dict_from_json(json_dict):
+    """!Convert a dictionary created by time_dict_to_json back into a time
+        dictionary
+        Args:
+            @param json_dict dictionary read from JSON
+            @returns time dictionary
+    """
+    input_dict = {}
+    for key, value in json_dict.items():
+        if isinstance(value, str) and value.endswith('Z'):
+            try:
+                value = datetime.datetime.strptime(value, '%Y%m%d%H%M%SZ')
+            except ValueError:
+                pass
+        input_dict[key] = value
+
+    return input_dict
+
+def run_times_distributed(config, processes, time_list):
+    """!Run all processes for each run time on the nodes allocated to the
+        batch job. The run times (and forecast leads if
+        DISTRIBUTED_SPLIT_LEADS is True) are split into groups of
+        consecutive tasks and each group is run by a separate METplus
+        process started with the launcher set by DISTRIBUTED_LAUNCHER. Log
+        output from each task is added to the METplus log file in task order
+        and the error counts, commands that were run, and command usage
+        from each task are added to the wrapper instances in this process.
+        A task that does not report its results, i.e. because the node it
+        was running on failed, is counted as an error.
+        Args:
+            @param config METplusConfig object
+            @param processes list of wrapper instances to run
+            @param time_list list of input time dictionaries to process
+            @returns True if the tasks were run, False if the launcher is
+             not available
+    """
+    launcher, mpi_impl = get_launcher(config)
+    if launcher is None:
+        return False
+
+    task_list = get_task_list(config, time_list)
+    num_groups = get_num_task_groups(config, launcher, len(task_list))
+    groups = partition_tasks(task_list, num_groups)
+
+    config.logger.info(f"Running {len(task_list)} tasks in {len(groups)} "
+                       f"groups using {launcher} launcher")
+
+    work_dir = os.path.join(config.getdir('TMP_DIR'),
+                            f'distributed_{os.getpid()}')
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        group_files = write_task_groups(config, processes, groups, work_dir)
+        runners = [get_group_runner(config, launcher, mpi_impl, group_file)
+                   for group_file in group_files]
+
+        if launcher == 'mpiserial':
+            _run_mpiserial(config, mpi_impl, groups, runners, group_files,
+                           processes)
+        else:
+            _run_job_steps(config, groups, runners, group_files, processes)
+    finally:
+        # tasks on other nodes may have written files
+        path_cache.invalidate_path_cache()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return True
+
+def write_task_groups(config, processes, groups, work_dir):
+    """!Write the configuration and a file for each group of tasks that
+        contains the wrappers to run, the tasks, and where to write the log
+        output and results of each task
+        Args:
+            @param config METplusConfig object
+            @param processes list of wrapper instances to run
+            @param groups list of task groups from partition_tasks
+            @param work_dir directory to write files
+            @returns list of paths to the file for each group
+    """
+    config_file = os.path.join(work_dir, 'metplus.conf')
+    with open(config_file, 'w') as file_handle:
+        config.write(file_handle)
+
+    process_classes = [(process.__class__.__module__,
+                        process.__class__.__name__)
+                       for process in processes]
+
+    group_files = []
+    for group_index, group in enumerate(groups):
+        tasks = []
+        for task_index, (input_dict, lead) in group:
+            tasks.append({
+                'index': task_index,
+                'time_info': time_dict_to_json(input_dict),
+                'lead_seconds': lead,
+                'log': get_task_file(work_dir, task_index, 'log'),
+                'result': get_task_file(work_dir, task_index, 'json'),
+            })
+
+        group_file = os.path.join(work_dir, f'group_{group_index:06d}.json')
+        with open(group_file, 'w') as file_handle:
+            json.dump({'config_file': config_file,
+                       'processes': process_classes,
+                       'tasks': tasks}, file_handle)
+        group_files.append(group_file)
+
+    return group_files
+
+def get_task_file(work_dir, task_index, extension):
+    """!Get path to the log or result file for a task
+        Args:
+            @param work_dir directory to write files
+            @param task_index unique index of the task
+            @param extension file extension, log or json
+            @returns path to file
+    """
+    return os.path.join(work_dir, f'task_{task_index:06d}.{extension}')
+
+def get_group_runner(config, launcher, mpi_impl, group_file):
+    """!Get the command to run a group of tasks
+        Args:
+            @param config METplusConfig object
+            @param launcher name of launcher from get_launcher
+            @param mpi_impl produtil.mpi_impl implementation or None
+            @param group_file path to file describing the group of tasks
+            @returns produtil.prog.Runner. If the launcher is srun, the
+             command is run as a job step on its own node
+    """
+    runner = exe(sys.executable)[os.path.abspath(TASK_SCRIPT), group_file]
+    if launcher == 'srun':
+        srun_args = ['--nodes=1', '--ntasks=1', '--exclusive', '--export=ALL']
+        return exe(mpi_impl.srun_path)[srun_args + list(runner.args())]
+    return runner
+
+def _run_job_steps(config, groups, runners, group_files, processes):
+    """!Run each group of tasks as a separate process on this node or as a
+        separate srun job step and add the results from each task after its
+        group finishes
+        Args:
+            @param config METplusConfig object
+            @param groups list of task groups from partition_tasks
+            @param runners list of produtil Runner objects for each group
+            @param group_files list of paths to the file for each group
+            @param processes list of wrapper instances
+    """
+    with JobPool(len(runners), logger=config.logger) as job_pool:
+        jobs = [job_pool.submit(runner) for runner in runners]
+        try:
+            for group_file, group, job in zip(group_files, groups, jobs):
+                status = job.result()
+                if status != 0:
+                    config.logger.error(f"Task group {group_file} exited "
+                                        f"with status {status}")
+                gather_task_results(config, processes, group_file)
+        except:
+            job_pool.cancel_all()
+            raise
+
+def _run_mpiserial(config, mpi_impl, groups, runners, group_files,
+                   processes):
+    """!Run the groups of tasks as ranks of a single MPI program using the
+        mpiserial program and add the results from each task
+        Args:
+            @param config METplusConfig object
+            @param mpi_impl produtil.mpi_impl implementation
+            @param groups list of task groups from partition_tasks
+            @param runners list of produtil Runner objects for each group
+            @param group_files list of paths to the file for each group
+            @param processes list of wrapper instances
+    """
+    ranks = reduce(lambda ranks, rank: ranks + rank,
+                   [mpiserial(runner) for runner in runners])
+    status = produtil.run.run(produtil.run.mpirun(ranks, mpiimpl=mpi_impl),
+                              logger=config.logger)
+    if status != 0:
+        config.logger.error(f"MPI program running {len(groups)} task groups "
+                            f"exited with status {status}")
+
+    for group_file in group_files:
+        gather_task_results(config, processes, group_file)
+
+def gather_task_results(config, processes, group_file):
+    """!Add the log output and results of each task in a group. Each task
+        that did not write its results is counted as an error for the first
+        process.
+        Args:
+            @param config METplusConfig object
+            @param processes list of wrapper instances
+            @param group_file path to file describing the group of tasks
+    """
+    with open(group_file, 'r') as file_handle:
+        tasks = json.load(file_handle)['tasks']
+
+    all_indices = list(range(len(processes)))
+    for task in tasks:
+        parallel_util.merge_task_log(config, task['log'])
+
+        if not os.path.exists(task['result']):
+            config.logger.error("No results were reported for task "
+                                f"{task['index']} at {task['time_info']}")
+            processes[0].errors += 1
+            continue
+
+        with open(task['result'], 'r') as file_handle:
+            result = json.load(file_handle)
+
+        if result.get('fatal'):
+            config.logger.error(f"Task {task['index']} failed: "
+                                f"{result['fatal']}")
+            processes[0].errors += 1
+            continue
+
+        parallel_util.add_worker_results(processes, all_indices,
+                                         (result['processes'],
+                                          result['usage'],
+                                          result['errors']))
+
+def run_task_group(group_file):
+    """!Run a group of tasks in this process. Called on a node that was
+        allocated to the batch job by ush/run_metplus_tasks.py. The wrappers
+        are initialized from the configuration written by the process that
+        started the tasks. Each task writes its log output to a separate
+        file and writes a JSON file containing the number of errors, commands
+        that were run, and isOK value of each wrapper and the command usage
+        records.
+        Args:
+            @param group_file path to file describing the group of tasks
+            @returns 0 if all tasks wrote their results, 1 if not
+    """
+    # import here to avoid circular import with met_util
+    from .met_util import check_user_environment, get_logger
+    from .config.config_launcher import load
+
+    with open(group_file, 'r') as file_handle:
+        group = json.load(file_handle)
+
+    config = load(group['config_file'])
+
+    # write log output that is not part of a task to the first task log
+    config.set('config', 'LOG_METPLUS', group['tasks'][0]['log'])
+    get_logger(config)
+    check_user_environment(config)
+    config.env = os.environ.copy()
+
+    processes = []
+    for module_name, class_name in group['processes']:
+        process_class = getattr(import_module(module_name), class_name)
+        processes.append(process_class(config,
+                                       config.log(class_name.replace('Wrapper',
+                                                                     ''))))
+
+    parallel_util.set_worker_processes(config, processes)
+    all_indices = list(range(len(processes)))
+
+    return_code = 0
+    for task in group['tasks']:
+        input_dict = time_dict_from_json(task['time_info'])
+        try:
+            results, usage, errors = parallel_util.run_in_worker(
+                _run_task, all_indices, (input_dict, task['lead_seconds']),
+                task['log']
+            )
+            result = {'processes': results, 'usage': usage,
+                      'errors': errors}
+        except Exception as err:
+            result = {'fatal': str(err)}
+            return_code = 1
+
+        result_file = task['result']
+        with open(f'{result_file}.tmp', 'w') as file_handle:
+            json.dump(result, file_handle)
+        os.replace(f'{result_file}.tmp', result_file)
+
+    return return_code
+
+def _run_task(config, processes, input_dict, lead_seconds):
+    """!Run all processes for a run time, only processing a single forecast
+        lead if lead_seconds is set
+        Args:
+            @param config METplusConfig object
+            @param processes list of wrapper instances to run
+            @param input_dict time dictionary containing now and init or valid
+            @param lead_seconds forecast lead to process in seconds or None
+    """
+    # import here to avoid circular import with met_util
+    from .met_util import run_processes_at_time
+
+    if lead_seconds is not None:
+        config.set('config', 'LEAD_SEQ', f'{lead_seconds}S')
+
+    run_processes_at_time(config, processes, input_dict)
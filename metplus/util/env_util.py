@@ -0,0 +1,148 @@
+"""
+Program Name: env_util.py
+Contact(s): George McCabe
+Abstract: Environment used to run the commands for a wrapper. The
+ environment that METplus was started with is copied once and the
+ variables that the wrapper sets are kept in a separate layer
+History Log:  Initial version
+Usage: Used by CommandBuilder to hold the environment variables
+Parameters: None
+Input Files: N/A
+Output Files: N/A
+"""
+
+from types import MappingProxyType
+from collections.abc import MutableMapping
+
+'''!@namespace env_util
+@brief Environment variables used to run the commands for a wrapper
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus wrappers
+@endcode
+'''
+
+class WrapperEnvironment(MutableMapping):
+    """!Dictionary of environment variables made of a base layer that is
+        not modified and a layer that holds the variables that were set or
+        changed. Copying the environment only copies the changed variables,
+        so a copy can be made for each task or job cheaply. The text used
+        to log the variables in a format that can be copied into a shell is
+        only built when it is requested and is kept until a variable changes.
+    """
+    def __init__(self, base=None, overlay=None, removed=None):
+        """!Create environment
+            Args:
+                @param base dictionary of the environment to start with. It
+                 is copied unless it is already a read-only mapping that was
+                 created by another WrapperEnvironment
+                @param overlay dictionary of variables that were set
+                @param removed set of names in base that were removed
+        """
+        if not isinstance(base, MappingProxyType):
+            base = MappingProxyType(dict(base or {}))
+        self._base = base
+        self._overlay = dict(overlay or {})
+        self._removed = set(removed or ())
+        self._copyable_cache = {}
+
+    def __getitem__(self, key):
+        if key in self._overlay:
+            return self._overlay[key]
+        if key in self._removed:
+            raise KeyError(key)
+        return self._base[key]
+
+    def __setitem__(self, key, value):
+        if key in self._overlay and self._overlay[key] == value:
+            return
+        self._overlay[key] = value
+        self._removed.discard(key)
+        self._copyable_cache.clear()
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._overlay.pop(key, None)
+        if key in self._base:
+            self._removed.add(key)
+        self._copyable_cache.clear()
+
+    def __contains__(self, key):
+        if key in self._overlay:
+            return True
+        return key in self._base and key not in self._removed
+
+    def __iter__(self):
+        yield from self._overlay
+        for key in self._base:
+            if key not in self._overlay and key not in self._removed:
+                yield key
+
+    def __len__(self):
+        return len(self.to_dict())
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(base={len(self._base)} items, '
+                f'overlay={self._overlay!r})')
+
+    @property
+    def overlay(self):
+        """!Read-only view of the variables that were set"""
+        return MappingProxyType(self._overlay)
+
+    def copy(self):
+        """!Copy the environment. The base layer is shared with the copy.
+            @returns new WrapperEnvironment
+        """
+        return WrapperEnvironment(self._base, self._overlay, self._removed)
+
+    def to_dict(self):
+        """!Combine the layers into a dictionary that can be passed to a
+            command that is run
+            @returns new dictionary of all variables
+        """
+        env = dict(self._base)
+        env.update(self._overlay)
+        for key in self._removed:
+            env.pop(key, None)
+        return env
+
+    def get_copyable(self, names, shell='bash'):
+        """!Get the commands to set environment variables in a shell so they
+            can be copied into a terminal to run a command manually
+            Args:
+                @param names names of the variables to include
+                @param shell shell to format commands for, bash or csh
+                @returns string of commands separated by semi-colons
+        """
+        key = (frozenset(names), shell)
+        if key not in self._copyable_cache:
+            self._copyable_cache[key] = format_copyable_env(self, key[0],
+                                                            shell)
+        return self._copyable_cache[key]
+
+def format_copyable_env(env, names, shell='bash'):
+    """!Format environment variables as commands to set them in a shell
+        Args:
+            @param env dictionary of environment variables
+            @param names names of the variables to include
+            @param shell shell to format commands for, bash or csh
+            @returns string of commands separated by semi-colons
+    """
+    out = ""
+    for var in sorted(names):
+        if shell == 'csh':
+            # TODO: Complex environment variables that have special characters
+            # like { or } will not be copyable in csh until modifications are
+            # made to the formatting of the setenv calls
+            clean_env = env[var].replace('"', '"\\""')
+            line = 'setenv ' + var + ' "' + clean_env + '"'
+        else:
+            # insert escape characters to allow export command to be copyable
+            clean_env = env[var].replace('"', r'\"').replace(r'\\"', r'\\\"')
+            line = 'export ' + var + '="' + clean_env + '"'
+
+        out += line + '; '
+
+    return out
@@ -0,0 +1,215 @@
+"""
+Program Name: error_summary.py
+Contact(s): George McCabe
+Abstract: Record the errors reported by each wrapper, combining errors
+ that only differ by the run time or other numbers into one entry with a
+ count, and write a summary of the errors at the end of the run
+History Log:  Initial version
+Usage: Called by CommandBuilder.log_error and post_run_cleanup in met_util
+Parameters: None
+Input Files: N/A
+Output Files: Error summary set with ERROR_SUMMARY_FILE
+"""
+
+import os
+import re
+import sys
+import json
+
+'''!@namespace error_summary
+@brief Record errors reported by the wrappers and summarize them
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus wrappers
+@endcode
+'''
+
+# maximum number of different errors to list in the log for each wrapper
+MAX_ERRORS_TO_LOG = 20
+
+# numbers in an error message, i.e. times, forecast leads, and indices,
+# that are replaced so errors that only differ by time are combined
+NUMBER_REGEX = re.compile(r'\d+')
+
+# dictionary of errors that were reported, keyed by wrapper, file, line
+# number, and message template. Errors reported in worker processes are
+# added when the worker finishes
+_ERROR_RECORDS = {}
+
+def get_caller_location(depth=1):
+    """!Get the file and line number of a function that called the function
+        that calls this function. Only the frame that is needed is read
+        instead of building the full stack with the source code lines.
+        Args:
+            @param depth number of frames above the calling function to use.
+             1 is the function that called the function that called this
+            @returns tuple of the file name (without directory) and line
+             number
+    """
+    frame = sys._getframe(depth + 1)
+    return os.path.basename(frame.f_code.co_filename), frame.f_lineno
+
+def get_message_template(message):
+    """!Replace the numbers in an error message so that the same error that
+        is reported for different run times is only listed once
+        Args:
+            @param message error message
+            @returns message with each number replaced with #
+    """
+    return NUMBER_REGEX.sub('#', message)
+
+def record_error(wrapper, message, file_name, line_number):
+    """!Add an error to the summary
+        Args:
+            @param wrapper name of the wrapper that reported the error
+            @param message error message
+            @param file_name name of the file where the error was reported
+            @param line_number line number where the error was reported
+            @returns dictionary for the error that was updated
+    """
+    template = get_message_template(message)
+    key = (wrapper, file_name, line_number, template)
+    record = _ERROR_RECORDS.get(key)
+    if record is None:
+        record = {
+            'wrapper': wrapper,
+            'file': file_name,
+            'line': line_number,
+            'template': template,
+            'count': 0,
+            'first_message': message,
+        }
+        _ERROR_RECORDS[key] = record
+
+    record['count'] += 1
+    record['last_message'] = message
+    return record
+
+def get_error_records():
+    """!Get information about the errors that have been reported
+        @returns list of dictionaries for each error
+    """
+    return [dict(record) for record in _ERROR_RECORDS.values()]
+
+def get_error_counts():
+    """!Get the number of times each error has been reported so that the
+        errors reported by a task in a worker process can be found
+        @returns dictionary of the count of each error
+    """
+    return {key: record['count'] for key, record in _ERROR_RECORDS.items()}
+
+def get_error_records_since(error_counts):
+    """!Get the errors that were reported after get_error_counts was called,
+        i.e. the errors reported by a task in a worker process
+        Args:
+            @param error_counts value from get_error_counts before the task
+             ran
+            @returns list of dictionaries for each error with the number of
+             times the error was reported since then
+    """
+    records = []
+    for key, record in _ERROR_RECORDS.items():
+        count = record['count'] - error_counts.get(key, 0)
+        if count > 0:
+            records.append(dict(record, count=count))
+
+    return records
+
+def add_error_records(records):
+    """!Add errors that were reported in a worker process
+        Args:
+            @param records list of dictionaries from get_error_records_since
+    """
+    for new_record in records:
+        key = (new_record['wrapper'], new_record['file'], new_record['line'],
+               new_record['template'])
+        record = _ERROR_RECORDS.get(key)
+        if record is None:
+            _ERROR_RECORDS[key] = dict(new_record)
+            continue
+
+        record['count'] += new_record['count']
+        record['last_message'] = new_record['last_message']
+
+def clear_error_records():
+    """!Remove all of the errors for this run"""
+    _ERROR_RECORDS.clear()
+
+def get_error_report():
+    """!Get the errors that were reported grouped by wrapper
+        @returns dictionary where the key is the wrapper name and the value
+         is a dictionary with the total number of errors and a list of the
+         errors sorted by the number of times they were reported
+    """
+    report = {}
+    for record in _ERROR_RECORDS.values():
+        wrapper_report = report.setdefault(record['wrapper'],
+                                           {'total': 0, 'errors': []})
+        wrapper_report['total'] += record['count']
+        wrapper_report['errors'].append(dict(record))
+
+    for wrapper_report in report.values():
+        wrapper_report['errors'].sort(key=lambda record: record['count'],
+                                      reverse=True)
+
+    return report
+
+def log_error_summary(config):
+    """!Write the errors reported by each wrapper to the log, listing errors
+        that were reported more than once with the number of times
+        Args:
+            @param config METplusConfig object
+    """
+    report = get_error_report()
+    for wrapper, wrapper_report in report.items():
+        errors = wrapper_report['errors']
+        total = wrapper_report['total']
+        config.logger.info(f"{wrapper} reported {total} "
+                           f"error{'s' if total != 1 else ''} "
+                           f"({len(errors)} different):")
+        for record in errors[:MAX_ERRORS_TO_LOG]:
+            message = record['first_message']
+            if record['count'] > 1:
+                message = f"{record['template']} [{record['count']} times]"
+            config.logger.info(f"  ({record['file']}:{record['line']}) "
+                               f"{message}")
+
+        if len(errors) > MAX_ERRORS_TO_LOG:
+            config.logger.info(f"  ...and {len(errors) - MAX_ERRORS_TO_LOG} "
+                               "more")
+
+def write_error_summary(config):
+    """!Write the errors reported by each wrapper to the JSON file set by
+        ERROR_SUMMARY_FILE
+        Args:
+            @param config METplusConfig object
+            @returns path to file that was written or None if no file was
+             written
+    """
+    summary_file = config.getstr('config', 'ERROR_SUMMARY_FILE', '')
+    if not summary_file or not _ERROR_RECORDS:
+        return None
+
+    try:
+        parent_dir = os.path.dirname(summary_file)
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+
+        with open(summary_file, 'w') as file_handle:
+            json.dump(get_error_report(), file_handle, indent=2)
+    except OSError as err:
+        config.logger.warning(f"Could not write error summary file "
+                              f"{summary_file}: {err}")
+        return None
+
+    config.logger.info(f"Wrote error summary to {summary_file}")
+    return summary_file
+
+def report_errors(config):
+    """!Write the errors reported by each wrapper to the log and to the file
+        set by ERROR_SUMMARY_FILE
+        Args:
+            @param config METplusConfig object
+    """
+    log_error_summary(config)
+    write_error_summary(config)
@@ -0,0 +1,197 @@
+"""
+Program Name: field_plan.py
+Contact(s): George McCabe
+Abstract: Field information read from the [FCST/OBS/BOTH/ENS]_VAR<n>
+ configuration variables once so it can be filled in for each run time
+History Log:  Initial version
+Usage: Called by parse_var_list in met_util and CommandBuilder
+Parameters: None
+Input Files: N/A
+Output Files: N/A
+"""
+
+import datetime
+
+from .config.string_template_substitution import do_string_sub
+from .met_util import validate_field_info_configs, find_var_name_indices
+from .met_util import get_raw_var_items, format_var_extra
+
+'''!@namespace field_plan
+@brief Parsed field information that is filled in for each run time
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus wrappers
+@endcode
+'''
+
+class FieldPlan:
+    """!Field information read from the VAR<n> configuration variables. The
+        config is searched for the variables and the variables are checked
+        once when the plan is created. get_var_list only fills in the
+        template tags in the names, levels, and options for a run time.
+    """
+    def __init__(self, config, data_type=None, met_tool=None):
+        """!Read field information from the config
+            Args:
+                @param config METplusConfig object
+                @param data_type data type to find. Can be FCST, OBS, or ENS.
+                 If not set, get FCST/OBS/BOTH
+                @param met_tool optional name of MET tool to look for wrapper
+                 specific var items
+        """
+        self.config = config
+        self.data_type = data_type
+
+        # set to False if the field information is invalid so that
+        # get_var_list returns an empty list
+        self.is_valid = True
+
+        # list of tuples containing the index and a dictionary where the key
+        # is the lower case data type and the value is a tuple of the
+        # name, levels, thresholds, and extra options before substitution
+        self.fields = []
+
+        self._read_fields(met_tool)
+
+    def _read_fields(self, met_tool):
+        """!Find the VAR<n> variables and read the values
+            Args:
+                @param met_tool optional name of MET tool to look for wrapper
+                 specific var items
+        """
+        data_type = self.data_type
+
+        # validate configs again in case wrapper is not running from master_metplus
+        # this does not need to be done if parsing a specific data type, i.e. ENS or FCST
+        if data_type is None:
+            if not validate_field_info_configs(self.config)[0]:
+                self.is_valid = False
+                return
+        elif data_type == 'BOTH':
+            self.config.logger.error("Cannot request BOTH explicitly in parse_var_list")
+            self.is_valid = False
+            return
+
+        # check if *_<MET-tool>_VAR<n>_NAME exists, if so, use that instead of generic
+        data_types_and_indices = {}
+
+        # if using wrapper specific field info, use_met_tool will be set to handle them
+        use_met_tool = None
+        if met_tool:
+            data_types_and_indices = find_var_name_indices(self.config,
+                                                           data_type,
+                                                           met_tool)
+
+        if not data_types_and_indices:
+            data_types_and_indices = find_var_name_indices(self.config,
+                                                           data_type)
+        # if found wrapper specific fields, pass the MET tool name to get_raw_var_items
+        else:
+            use_met_tool = met_tool
+
+        fields = []
+        for index in data_types_and_indices:
+
+            # if specific data type is requested, only get that type
+            if data_type:
+                items = get_raw_var_items(self.config, data_type, index,
+                                          met_tool=use_met_tool)
+                if not items[0]:
+                    continue
+
+                fields.append((index, {data_type.lower(): items}))
+                continue
+
+            # if FCST and OBS or BOTH are used, get and set both of them
+            f_items = get_raw_var_items(self.config, 'FCST', index,
+                                        met_tool=use_met_tool)
+            o_items = get_raw_var_items(self.config, 'OBS', index,
+                                        met_tool=use_met_tool)
+
+            # if number of levels are not equal, return an empty list
+            if len(f_items[1]) != len(o_items[1]):
+                self.is_valid = False
+                return
+
+            if not o_items[0] and not f_items[0]:
+                continue
+
+            if not o_items[0] or not f_items[0]:
+                self.is_valid = False
+                return
+
+            fields.append((index, {'fcst': f_items, 'obs': o_items}))
+
+        # sort by index (as a string) to match previous behavior
+        self.fields = sorted(fields, key=lambda field: field[0])
+
+    def get_var_list(self, time_info=None):
+        """!Get list of dictionaries containing information about each
+            field with template tags filled in for a run time
+            Args:
+                @param time_info time dictionary used for string substitution.
+                 If not set, only {now} can be used in the templates
+                @returns list of dictionaries with field information
+        """
+        if not self.is_valid:
+            return []
+
+        # if time_info is not passed in, set 'now' to CLOCK_TIME
+        # NOTE: any attempt to use string template substitution with an item other than
+        #  'now' will fail if time_info is not passed into parse_var_list
+        if time_info is None:
+            time_info = {
+                'now': datetime.datetime.strptime(
+                    self.config.getstr('config', 'CLOCK_TIME'),
+                    '%Y%m%d%H%M%S'
+                )
+            }
+
+        var_list = []
+        for index, items_by_type in self.fields:
+            filled = {}
+            for data_type_lower, items in items_by_type.items():
+                filled[data_type_lower] = _fill_var_items(items, time_info)
+
+            for level_index in range(len(next(iter(filled.values()))[1])):
+                var_dict = {}
+                for data_type_lower, (name, levels, thresh,
+                                      extra) in filled.items():
+                    var_dict[f"{data_type_lower}_name"] = name
+                    var_dict[f"{data_type_lower}_level"] = levels[level_index]
+                    var_dict[f"{data_type_lower}_thresh"] = list(thresh)
+                    var_dict[f"{data_type_lower}_extra"] = extra
+                var_dict['index'] = index
+                var_list.append(var_dict)
+
+        return var_list
+
+def _fill_template(template, time_info):
+    """!Substitute time information into a value if it contains tags
+        Args:
+            @param template value that may contain template tags
+            @param time_info time dictionary used for string substitution
+            @returns value with tags filled in
+    """
+    if '{' not in template:
+        return template
+
+    return do_string_sub(template, **time_info)
+
+def _fill_var_items(items, time_info):
+    """!Substitute time information into the name, levels, and extra options
+        Args:
+            @param items tuple of name, levels, thresholds, and extra options
+             from get_raw_var_items
+            @param time_info time dictionary used for string substitution
+            @returns tuple of name, levels, thresholds, and extra options
+    """
+    name, levels, thresh, extra = items
+    name = _fill_template(name, time_info)
+    levels = [_fill_template(level, time_info) for level in levels]
+    if extra is None:
+        extra = ''
+    else:
+        extra = format_var_extra(_fill_template(extra, time_info))
+
+    return name, levels, thresh, extra
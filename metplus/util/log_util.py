@@ -0,0 +1,287 @@
+"""
+Program Name: log_util.py
+Contact(s): George McCabe
+Abstract: Write METplus log output to file from a background thread so
+ that logging does not block the wrappers while they wait for the disk
+History Log:  Initial version
+Usage: Called by get_logger in met_util and by parallel_util
+Parameters: None
+Input Files: N/A
+Output Files: METplus log file
+"""
+
+import os
+import copy
+import queue
+import logging
+import weakref
+import threading
+
+'''!@namespace log_util
+@brief Utility to write log output to files from a background thread
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus logging setup
+@endcode
+'''
+
+# maximum number of records that are written to a log file before it is
+# flushed. The files are also flushed when there are no more records waiting
+LOG_BATCH_SIZE = 1000
+
+# number of seconds to wait for the background writer to write the records
+# that were sent before a flush request before giving up
+FLUSH_TIMEOUT = 60
+
+# file handlers that have been created in this process
+_BATCH_HANDLERS = weakref.WeakSet()
+
+class BatchFileHandler(logging.Handler):
+    """!Handler that collects formatted records and writes them to a file
+        with a single write call when it is flushed. The file is opened
+        without a buffer in append mode so a process that is forked while
+        the background writer is running does not inherit a buffer or a
+        lock from the parent.
+    """
+    def __init__(self, filename, mode='a', encoding='utf-8'):
+        super().__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self.encoding = encoding
+        flags = os.O_WRONLY | os.O_CREAT
+        flags |= os.O_TRUNC if mode == 'w' else os.O_APPEND
+        self.fd = os.open(self.baseFilename, flags, 0o666)
+        self.pending = []
+        _BATCH_HANDLERS.add(self)
+
+    def emit(self, record):
+        try:
+            self.pending.append(self.format(record) + '\n')
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if not self.pending or self.fd is None:
+                return
+            data = ''.join(self.pending).encode(self.encoding,
+                                                'backslashreplace')
+            self.pending = []
+            while data:
+                data = data[os.write(self.fd, data):]
+        except OSError:
+            pass
+        finally:
+            self.release()
+
+    def close(self):
+        self.acquire()
+        try:
+            self.flush()
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+        finally:
+            self.release()
+        super().close()
+
+class _FlushRequest:
+    """!Item sent to the background writer to find out when all of the
+        records that were sent before it have been written and flushed
+    """
+    def __init__(self):
+        self.done = threading.Event()
+
+class LogWriter:
+    """!Background thread that writes log records to files for all of the
+        QueuedFileHandler objects in this process. Records are formatted
+        and written in the order they were sent, and each file is flushed
+        once after each batch instead of after every record.
+    """
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def send(self, target, record):
+        """!Send a record to be written by the background thread
+            Args:
+                @param target BatchFileHandler to write the record
+                @param record logging.LogRecord to write
+        """
+        self._start()
+        self.queue.put((target, record))
+
+    def flush(self):
+        """!Wait until all of the records that have been sent are written
+            and flushed to disk. If the background thread is not running,
+            the records are written from the calling thread.
+        """
+        if not self._is_alive():
+            self._write_batch(block=False)
+            return
+
+        request = _FlushRequest()
+        self.queue.put((None, request))
+        if not request.done.wait(FLUSH_TIMEOUT):
+            logging.getLogger('metplus').warning(
+                "Timed out waiting for log output to be written"
+            )
+
+    def _is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _start(self):
+        if self._is_alive():
+            return
+
+        with self.lock:
+            if self._is_alive():
+                return
+            self.thread = threading.Thread(target=self._run,
+                                           name='METplusLogWriter',
+                                           daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            self._write_batch(block=True)
+
+    def _write_batch(self, block):
+        """!Write the records that are waiting, then flush each file that
+            was written and signal any flush requests that were read
+            Args:
+                @param block if True, wait for the first record to arrive
+        """
+        targets = []
+        requests = []
+        for index in range(LOG_BATCH_SIZE):
+            try:
+                item = self.queue.get(block=(block and index == 0))
+            except queue.Empty:
+                break
+
+            target, record = item
+            if target is None:
+                requests.append(record)
+                continue
+
+            target.handle(record)
+            if target not in targets:
+                targets.append(target)
+
+        for target in targets:
+            target.flush()
+
+        for request in requests:
+            request.done.set()
+
+# writer shared by all queued handlers in this process
+_LOG_WRITER = LogWriter()
+
+def _reset_log_writer():
+    """!Replace the writer in a forked child process. The background thread
+        is not copied to the child, and records that were waiting in the
+        queue or were not written yet are written by the parent process.
+    """
+    global _LOG_WRITER
+    _LOG_WRITER = LogWriter()
+    for handler in list(_BATCH_HANDLERS):
+        handler.pending = []
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_log_writer)
+
+class QueuedFileHandler(logging.Handler):
+    """!Log handler that sends records to the background writer instead of
+        writing them to the file from the thread that logged them. The
+        message is built from its arguments before it is sent so that the
+        values logged are not affected by changes made afterwards.
+    """
+    def __init__(self, filename, mode='a'):
+        super().__init__()
+        self.target = BatchFileHandler(filename, mode=mode)
+        self.baseFilename = self.target.baseFilename
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        """!Copy record and replace the message arguments and exception
+            information with text so it can be formatted later
+            Args:
+                @param record logging.LogRecord to prepare
+                @returns copy of record
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                formatter = self.formatter or logging.Formatter()
+                record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            _LOG_WRITER.send(self.target, self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        _LOG_WRITER.flush()
+
+    def close(self):
+        self.flush()
+        self.target.close()
+        super().close()
+
+def create_log_handler(config, log_file, formatter=None):
+    """!Create a handler that writes to a log file. If LOG_ASYNC_WRITE is
+        True, the records are written to the file by a background thread.
+        Args:
+            @param config METplusConfig object to query
+            @param log_file path to the log file to append to
+            @param formatter logging.Formatter to apply or None
+            @returns logging.Handler object
+    """
+    if config.getbool('config', 'LOG_ASYNC_WRITE', True):
+        handler = QueuedFileHandler(log_file, mode='a')
+    else:
+        handler = logging.FileHandler(log_file, mode='a')
+
+    if formatter:
+        handler.setFormatter(formatter)
+
+    return handler
+
+def flush_log_handlers(logger):
+    """!Wait for log output that was sent to the handlers of a logger to be
+        written to disk. Call before a command or another process appends to
+        the same log file so the output stays in order. The handlers of
+        the parent loggers are also flushed if the logger passes records to
+        them, i.e. the wrapper loggers that use the handlers of the metplus
+        logger.
+        Args:
+            @param logger logger to flush
+    """
+    while logger is not None:
+        for handler in logger.handlers:
+            handler.flush()
+
+        if not logger.propagate:
+            break
+        logger = logger.parent
+
+def is_debug_enabled(logger):
+    """!Check if debug log messages will be written so that expensive debug
+        output is only built when it is needed
+        Args:
+            @param logger logger to check
+            @returns True if DEBUG messages will be handled
+    """
+    return logger.isEnabledFor(logging.DEBUG)
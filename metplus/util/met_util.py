@@ -7,9 +7,6 @@ import errno
 import time
 import calendar
 import re
-import gzip
-import bz2
-import zipfile
 import struct
 import getpass
 from os import stat
@@ -29,6 +26,15 @@ from .config.string_template_substitution import get_tags
 from . import time_util as time_util
 from .config import config_metplus
 from . import metplus_check
+from . import parallel_util
+from . import distributed_util
+from . import task_graph
+from . import staging
+from . import path_cache
+from . import command_usage
+from . import startup_util
+from . import log_util
+from . import error_summary
 
 """!@namespace met_util
  @brief Provides  Utility functions for METplus.
@@ -108,8 +114,25 @@ def pre_run_setup(filename, app_name):
 
     logger.info(f"Log file: {config.getstr('config', 'LOG_METPLUS')}")
 
-    # validate configuration variables
-    isOK_A, isOK_B, isOK_C, isOK_D, all_sed_cmds = validate_configuration_variables(config)
+    startup_util.record_startup_step('Read configuration')
+
+    # skip validation if a previous run validated the same configuration
+    validation_cache_file = startup_util.get_validation_cache_file(config)
+    if validation_cache_file and os.path.isfile(validation_cache_file):
+        logger.info("Configuration was validated by a previous run. "
+                    "Skipping validation. Remove the following file to "
+                    f"validate again: {validation_cache_file}")
+        set_current_var_defaults(config)
+        check_user_environment(config)
+        isOK_A = isOK_B = isOK_C = isOK_D = True
+        all_sed_cmds = []
+    else:
+        # validate configuration variables
+        isOK_A, isOK_B, isOK_C, isOK_D, all_sed_cmds = validate_configuration_variables(config)
+        if (validation_cache_file and
+                isOK_A and isOK_B and isOK_C and isOK_D):
+            startup_util.write_validation_cache(config, validation_cache_file)
+
     if not (isOK_A and isOK_B and isOK_C and isOK_D):
         # if any sed commands were generated, write them to the sed file
         if all_sed_cmds:
@@ -148,6 +171,8 @@ def pre_run_setup(filename, app_name):
 
     config.env = os.environ.copy()
 
+    startup_util.record_startup_step('Validate configuration')
+
     return config
 
 def run_metplus(config, process_list):
@@ -172,6 +197,9 @@ def run_metplus(config, process_list):
 
             processes.append(command_builder)
 
+        startup_util.record_startup_step('Initialize wrappers')
+        startup_util.log_startup_profile(config)
+
         # check if all processes initialized correctly
         allOK = True
         for process in processes:
@@ -190,13 +218,18 @@ def run_metplus(config, process_list):
         if loop_order == "processes":
             for process in processes:
                 process.run_all_times()
+                process.wait_for_commands()
 
         elif loop_order == "times":
             loop_over_times_and_call(config, processes)
 
+        elif loop_order == "dag":
+            if not task_graph.run_processes_as_task_graph(config, processes):
+                return 1
+
         else:
             logger.error("Invalid LOOP_ORDER defined. " + \
-                         "Options are processes, times")
+                         "Options are processes, times, dag")
             return 1
 
        # compute total number of errors that occurred and output results
@@ -218,6 +251,18 @@ def run_metplus(config, process_list):
 
 def post_run_cleanup(config, app_name, total_errors):
     logger = config.logger
+
+    # wait for any input files that are still being prefetched
+    staging.shutdown_prefetch()
+
+    path_cache.log_path_cache_summary(logger)
+
+    # report the slowest commands and write usage of all commands to a file
+    command_usage.log_command_usage_summary(config)
+
+    # summarize the errors reported by each wrapper
+    error_summary.report_errors(config)
+
     # scrub staging directory if requested
     if config.getbool('config', 'SCRUB_STAGING_DIR', False) and\
        os.path.exists(config.getdir('STAGING_DIR')):
@@ -573,12 +618,12 @@ def handle_deprecated(old, alt, depr_info, conf, all_sed_cmds, w_list, e_list):
                         all_sed_cmds.append(f"sed -i 's|^{old}|{alt}|g' {config_file}")
                         all_sed_cmds.append(f"sed -i 's|{{{old}}}|{{{alt}}}|g' {config_file}")
 
-def check_for_deprecated_met_config(config):
-    sed_cmds = []
-    all_good = True
-
-    # set CURRENT_* METplus variables in case they are referenced in a
-    # METplus config variable and not already set
+def set_current_var_defaults(config):
+    """!Set CURRENT_* METplus variables in case they are referenced in a
+        METplus config variable and not already set
+        Args:
+            @param config METplusConfig object
+    """
     current_vars = ['CURRENT_FCST_NAME',
                     'CURRENT_OBS_NAME',
                     'CURRENT_FCST_LEVEL',
@@ -588,6 +633,12 @@ def check_for_deprecated_met_config(config):
         if not config.has_option('config', current_var):
             config.set('config', current_var, '')
 
+def check_for_deprecated_met_config(config):
+    sed_cmds = []
+    all_good = True
+
+    set_current_var_defaults(config)
+
     # check if *_CONFIG_FILE if set in the METplus config file and check for
     # deprecated environment variables in those files
     met_config_keys = [key for key in config.keys('config') if key.endswith('CONFIG_FILE')]
@@ -906,6 +957,59 @@ def get_start_end_interval_times(config):
 
 def loop_over_times_and_call(config, processes):
     """!Loop over all run times and call wrappers listed in config"""
+    time_list = get_run_time_list(config)
+    if time_list is None:
+        return None
+
+    if not isinstance(processes, list):
+        processes = [processes]
+
+    loop_executor = parallel_util.get_loop_executor(config)
+    if loop_executor is None:
+        return None
+
+    if loop_executor == 'distributed':
+        if distributed_util.run_times_distributed(config, processes,
+                                                  time_list):
+            return
+
+        config.logger.warning("Could not run times with LOOP_EXECUTOR = "
+                              "distributed. Running run times serially")
+
+    if loop_executor == 'process_pool' and len(time_list) > 1:
+        num_workers = min(parallel_util.get_num_workers(config),
+                          len(time_list))
+        if not parallel_util.can_fork():
+            config.logger.warning("LOOP_EXECUTOR = process_pool is not "
+                                  "supported on this platform. Running "
+                                  "run times serially")
+        elif num_workers > 1:
+            parallel_util.run_times_in_process_pool(config, processes,
+                                                    time_list,
+                                                    run_processes_at_time,
+                                                    num_workers)
+            return
+
+    for index, input_dict in enumerate(time_list):
+        staging.start_run_time()
+
+        # files may have been added since the last run time
+        path_cache.invalidate_path_cache()
+
+        # start decompressing input files for the next run time
+        if index + 1 < len(time_list):
+            staging.prefetch_inputs(config, processes, time_list[index + 1])
+
+        run_processes_at_time(config, processes, input_dict)
+
+def get_run_time_list(config):
+    """!Get list of time dictionaries to process from the [INIT/VALID]
+        start, end, and increment values set in the config
+        Args:
+            @param config METplusConfig object to query
+            @returns list of dictionaries containing now and init or valid
+             time or None if time information could not be read
+    """
     clock_time_obj = datetime.datetime.strptime(config.getstr('config', 'CLOCK_TIME'),
                                                 '%Y%m%d%H%M%S')
     use_init = is_loop_by_init(config)
@@ -916,30 +1020,47 @@ def loop_over_times_and_call(config, processes):
         config.logger.error("Could not get [INIT/VALID] time information from configuration file")
         return None
 
+    time_list = []
     while loop_time <= end_time:
-        run_time = loop_time.strftime("%Y%m%d%H%M")
-        config.logger.info("****************************************")
-        config.logger.info("* Running METplus")
+        input_dict = {}
+        input_dict['now'] = clock_time_obj
+
         if use_init:
-            config.logger.info("*  at init time: " + run_time)
+            input_dict['init'] = loop_time
         else:
-            config.logger.info("*  at valid time: " + run_time)
-        config.logger.info("****************************************")
-        if not isinstance(processes, list):
-            processes = [processes]
-        for process in processes:
-            input_dict = {}
-            input_dict['now'] = clock_time_obj
+            input_dict['valid'] = loop_time
 
-            if use_init:
-                input_dict['init'] = loop_time
-            else:
-                input_dict['valid'] = loop_time
+        time_list.append(input_dict)
+        loop_time += time_interval
 
-            process.clear()
-            process.run_at_time(input_dict)
+    return time_list
 
-        loop_time += time_interval
+def run_processes_at_time(config, processes, input_dict):
+    """!Call run_at_time for each process for a single run time
+        Args:
+            @param config METplusConfig object
+            @param processes list of wrapper instances to run
+            @param input_dict time dictionary containing now and init or valid
+    """
+    if 'init' in input_dict:
+        time_type = 'init'
+    else:
+        time_type = 'valid'
+
+    run_time = input_dict[time_type].strftime("%Y%m%d%H%M")
+    config.logger.info("****************************************")
+    config.logger.info("* Running METplus")
+    config.logger.info(f"*  at {time_type} time: " + run_time)
+    config.logger.info("****************************************")
+    for process in processes:
+        process.clear()
+        # pass a copy so wrappers that add items to the time dictionary
+        # do not modify it for the next process
+        process.run_at_time(dict(input_dict))
+
+        # wait for commands that were run in the background so the next
+        # process can read their output
+        process.wait_for_commands()
 
 def get_lead_sequence(config, input_dict=None):
     """!Get forecast lead list from LEAD_SEQ or compute it from INIT_SEQ.
@@ -1311,9 +1432,11 @@ def get_logger(config, sublog=None):
         # set up the filehandler and the formatter, etc.
         # The default matches the oformat log.py formatter of produtil
         # So terminal output will now match log files.
+        # Records are written to the file by a background thread unless
+        # LOG_ASYNC_WRITE is False
         formatter = config_metplus.METplusLogFormatter(config)
-        file_handler = logging.FileHandler(metpluslog, mode='a')
-        file_handler.setFormatter(formatter)
+        file_handler = log_util.create_log_handler(config, metpluslog,
+                                                   formatter)
         logger.addHandler(file_handler)
 
     # set add the logger to the config
@@ -2347,6 +2470,32 @@ def get_var_items(config, data_type, index, time_info, met_tool=None):
             @returns tuple containing name, level, thresh, extra values if found. If not found
                4 empty strings are returned.
     """
+    name, levels, thresh, extra = get_raw_var_items(config, data_type, index,
+                                                    met_tool=met_tool)
+    if not name:
+        return '', '', '', ''
+
+    name = do_string_sub(name, **time_info)
+    levels = [do_string_sub(level, **time_info) for level in levels]
+    if extra is None:
+        extra = ''
+    else:
+        extra = format_var_extra(do_string_sub(extra, **time_info))
+
+    return name, levels, thresh, extra
+
+def get_raw_var_items(config, data_type, index, met_tool=None):
+    """!Get configuration variables for given data type and index without
+        substituting any template tags
+        Args:
+            @param config: METplusConfig object
+            @param data_type: type of data to find, i.e. FCST, OBS, BOTH, or ENS
+            @param index: index of variable, i.e. _VAR<index>_NAME
+            @param met_tool: optional name of MET tool to look for wrapper specific items
+            @returns tuple containing name, list of levels, list of thresholds,
+               and extra options (None if not set). If not found or invalid,
+               an empty name is returned.
+    """
 
     # build string to search for BOTH items, using MET tool name if provided
     # do the same for data_type, i.e. FCST
@@ -2368,23 +2517,17 @@ def get_var_items(config, data_type, index, time_info, met_tool=None):
     elif config.has_option('config', f"{data_type_var}{index}_NAME"):
         search_name = f"{data_type_var}{index}_NAME"
     else:
-        return '', '', '', ''
+        return '', [], [], None
 
-    name = do_string_sub(config.getraw('config', search_name),
-                         **time_info)
+    name = config.getraw('config', search_name)
 
     # get levels if available
-    levels = []
     if data_type in ['FCST', 'OBS'] and config.has_option('config', f"{both_var}{index}_LEVELS"):
         search_levels = f"{both_var}{index}_LEVELS"
     else:
         search_levels = f"{data_type_var}{index}_LEVELS"
 
-    levels = []
-    for level in getlist(config.getraw('config', search_levels, '')):
-        subbed_level = do_string_sub(level,
-                                     **time_info)
-        levels.append(subbed_level)
+    levels = getlist(config.getraw('config', search_levels, ''))
 
     # if no levels are found, add an empty string
     if not levels:
@@ -2403,10 +2546,10 @@ def get_var_items(config, data_type, index, time_info, met_tool=None):
         thresh = getlist(config.getstr('config', search_thresh))
         if not validate_thresholds(thresh):
             config.logger.error(f"  Update {search_thresh} to match this format")
-            return '', '', '', ''
+            return '', [], [], None
 
     # get extra options if available
-    extra = ""
+    extra = None
     if data_type in ['FCST', 'OBS'] and config.has_option('config', f"{both_var}{index}_OPTIONS"):
         search_extra = f"{both_var}{index}_OPTIONS"
     elif config.has_option('config', f"{data_type_var}{index}_OPTIONS"):
@@ -2415,17 +2558,22 @@ def get_var_items(config, data_type, index, time_info, met_tool=None):
         search_extra = None
 
     if search_extra:
-        extra = do_string_sub(config.getraw('config', search_extra),
-                              **time_info)
-
-        # split up each item by semicolon, then add a semicolon to the end of each item
-        # to avoid errors where the user forgot to add a semicolon at the end
-        # use list(filter(None to remove empty strings from list
-        extra_list = list(filter(None, extra.split(';')))
-        extra = f"{'; '.join(extra_list)};"
+        extra = config.getraw('config', search_extra)
 
     return name, levels, thresh, extra
 
+def format_var_extra(extra):
+    """!Format extra field options so each item ends with a semicolon
+        Args:
+            @param extra: extra options string, i.e. GRIB_lvl_typ = 105
+            @returns formatted string, i.e. GRIB_lvl_typ = 105;
+    """
+    # split up each item by semicolon, then add a semicolon to the end of each item
+    # to avoid errors where the user forgot to add a semicolon at the end
+    # use list(filter(None to remove empty strings from list
+    extra_list = list(filter(None, extra.split(';')))
+    return f"{'; '.join(extra_list)};"
+
 def find_var_name_indices(config, data_type, met_tool=None):
 
     regex_string = ''
@@ -2449,7 +2597,9 @@ def find_var_name_indices(config, data_type, met_tool=None):
 
 def parse_var_list(config, time_info=None, data_type=None, met_tool=None):
     """ read conf items and populate list of dictionaries containing
-    information about each variable to be compared
+    information about each variable to be compared. The config is searched
+    each time this is called. Wrappers should use
+    CommandBuilder.get_field_plan to only read the field information once.
         Args:
             @param config: METplusConfig object
             @param time_info: time object for string sub, optional
@@ -2458,121 +2608,10 @@ def parse_var_list(config, time_info=None, data_type=None, met_tool=None):
         Returns:
             list of dictionaries with variable information
     """
+    # only import when needed because field_plan imports from this module
+    from .field_plan import FieldPlan
 
-    # validate configs again in case wrapper is not running from master_metplus
-    # this does not need to be done if parsing a specific data type, i.e. ENS or FCST
-    if data_type is None:
-        if not validate_field_info_configs(config)[0]:
-            return []
-    elif data_type == 'BOTH':
-        config.logger.error("Cannot request BOTH explicitly in parse_var_list")
-        return []
-
-    # if time_info is not passed in, set 'now' to CLOCK_TIME
-    # NOTE: any attempt to use string template substitution with an item other than
-    #  'now' will fail if time_info is not passed into parse_var_list
-    if time_info is None:
-        time_info = { 'now' : datetime.datetime.strptime(config.getstr('config', 'CLOCK_TIME'),
-                                                         '%Y%m%d%H%M%S') }
-
-    # var_list is a list containing an list of dictionaries
-    var_list = []
-
-    # check if *_<MET-tool>_VAR<n>_NAME exists, if so, use that instead of generic
-    data_types_and_indices = {}
-
-    # if using wrapper specific field info, use_met_tool will be set to handle them
-    use_met_tool = None
-    if met_tool:
-        data_types_and_indices = find_var_name_indices(config, data_type, met_tool)
-
-    if not data_types_and_indices:
-        data_types_and_indices = find_var_name_indices(config, data_type)
-    # if found wrapper specific fields, pass the MET tool name to get_var_items
-    else:
-        use_met_tool = met_tool
-
-    # loop over all possible variables and add them to list
-    for index, data_type_list in data_types_and_indices.items():
-
-        # if specific data type is requested, only get that type
-        if data_type:
-            data_type_lower = data_type.lower()
-            name, levels, thresh, extra = get_var_items(config, data_type, index, time_info,
-                                                        met_tool=use_met_tool)
-
-            if not name:
-                continue
-
-            for level in levels:
-                var_dict = {f"{data_type_lower}_name": name,
-                            f"{data_type_lower}_level": level,
-                            f"{data_type_lower}_thresh": thresh,
-                            f"{data_type_lower}_extra": extra,
-                            'index': index,
-                            }
-                var_list.append(var_dict)
-
-        # if FCST and OBS or BOTH are used, get and set both of them
-        else:
-            f_name, f_levels, f_thresh, f_extra = get_var_items(config, 'FCST', index,
-                                                                time_info,
-                                                                met_tool=use_met_tool)
-            o_name, o_levels, o_thresh, o_extra = get_var_items(config, 'OBS', index,
-                                                                time_info,
-                                                                met_tool=use_met_tool)
-
-            # if number of levels are not equal, return an empty list
-            if len(f_levels) != len(o_levels):
-                return []
-
-            if not o_name and not f_name:
-                continue
-
-            if not o_name or not f_name:
-                return []
-
-            for f_level, o_level in zip(f_levels, o_levels):
-                var_dict = {"fcst_name": f_name,
-                            "fcst_level": f_level,
-                            "fcst_thresh": f_thresh,
-                            "fcst_extra": f_extra,
-                            "obs_name": o_name,
-                            "obs_level": o_level,
-                            "obs_thresh": o_thresh,
-                            "obs_extra": o_extra,
-                            'index': index,
-                            }
-                var_list.append(var_dict)
-
-
-    # extra debugging information used for developer debugging only
-    '''
-    for v in var_list:
-        config.logger.debug(f"VAR{v['index']}:")
-        if 'fcst_name' in v.keys():
-            config.logger.debug(" fcst_name:"+v['fcst_name'])
-            config.logger.debug(" fcst_level:"+v['fcst_level'])
-        if 'fcst_thresh' in v.keys():
-            config.logger.debug(" fcst_thresh:"+str(v['fcst_thresh']))
-        if 'fcst_extra' in v.keys():
-            config.logger.debug(" fcst_extra:"+v['fcst_extra'])
-        if 'obs_name' in v.keys():
-            config.logger.debug(" obs_name:"+v['obs_name'])
-            config.logger.debug(" obs_level:"+v['obs_level'])
-        if 'obs_thresh' in v.keys():
-            config.logger.debug(" obs_thresh:"+str(v['obs_thresh']))
-        if 'obs_extra' in v.keys():
-            config.logger.debug(" obs_extra:"+v['obs_extra'])
-        if 'ens_name' in v.keys():
-            config.logger.debug(" ens_name:"+v['ens_name'])
-            config.logger.debug(" ens_level:"+v['ens_level'])
-        if 'ens_thresh' in v.keys():
-            config.logger.debug(" ens_thresh:"+str(v['ens_thresh']))
-        if 'ens_extra' in v.keys():
-            config.logger.debug(" ens_extra:"+v['ens_extra'])
-    '''
-    return sorted(var_list, key=lambda x: x['index'])
+    return FieldPlan(config, data_type, met_tool).get_var_list(time_info)
 
 def split_level(level):
     level_type = ""
@@ -2748,7 +2787,10 @@ def preprocess_file(filename, data_type, config, allow_dir=False):
     if not filename:
         return None
 
-    if allow_dir and os.path.isdir(filename):
+    # check if paths exist using cached directory listings
+    paths = path_cache.get_path_cache(config)
+
+    if allow_dir and paths.isdir(filename):
         return filename
 
     # if using python embedding for input, return the keyword
@@ -2757,7 +2799,7 @@ def preprocess_file(filename, data_type, config, allow_dir=False):
 
     stage_dir = config.getdir('STAGING_DIR')
 
-    if os.path.isfile(filename):
+    if paths.isfile(filename):
         # if filename provided ends with a valid compression extension,
         # remove the extension and call function again so the
         # file will be uncompressed properly. This is done so that
@@ -2773,7 +2815,7 @@ def preprocess_file(filename, data_type, config, allow_dir=False):
                 stagefile = stage_dir + filename[:-3]+"nc"
             else:
                 stagefile = stage_dir + filename+".nc"
-            if os.path.isfile(stagefile):
+            if paths.isfile(stagefile):
                 return stagefile
             # if it does not exist, run GempakToCF and return staged nc file
             # Create staging area if it does not exist
@@ -2799,47 +2841,12 @@ def preprocess_file(filename, data_type, config, allow_dir=False):
         return filename
 
     # nc file requested and the Gempak equivalent exists
-    if os.path.isfile(filename[:-2]+'grd'):
+    if paths.isfile(filename[:-2]+'grd'):
         return preprocess_file(filename[:-2]+'grd', data_type, config)
 
     # if file exists in the staging area, return that path
-    outpath = stage_dir + filename
-    if os.path.isfile(outpath):
-        return outpath
-
-    # Create staging area if it does not exist
-    outdir = os.path.dirname(outpath)
-    if not os.path.exists(outdir):
-        os.makedirs(outdir, mode=0o0775)
-
-    # uncompress gz, bz2, or zip file
-    if os.path.isfile(filename+".gz"):
-        if config.logger:
-            config.logger.debug("Uncompressing gz file to {}".format(outpath))
-        with gzip.open(filename+".gz", 'rb') as infile:
-            with open(outpath, 'wb') as outfile:
-                outfile.write(infile.read())
-                infile.close()
-                outfile.close()
-                return outpath
-    elif os.path.isfile(filename+".bz2"):
-        if config.logger:
-            config.logger.debug("Uncompressing bz2 file to {}".format(outpath))
-        with open(filename+".bz2", 'rb') as infile:
-            with open(outpath, 'wb') as outfile:
-                outfile.write(bz2.decompress(infile.read()))
-                infile.close()
-                outfile.close()
-                return outpath
-    elif os.path.isfile(filename+".zip"):
-        if config.logger:
-            config.logger.debug("Uncompressing zip file to {}".format(outpath))
-        with zipfile.ZipFile(filename+".zip") as z:
-            with open(outpath, 'wb') as f:
-                f.write(z.read(os.path.basename(filename)))
-                return outpath
-
-    return None
+    # otherwise uncompress gz, bz2, or zip file into the staging area
+    return staging.stage_file(filename, config)
 
 def run_stand_alone(filename, app_name):
     """ Used to allow MET tool wrappers to be run without using
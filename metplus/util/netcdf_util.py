@@ -0,0 +1,83 @@
+"""
+Program Name: netcdf_util.py
+Contact(s): George McCabe
+Abstract: Read summary values from NetCDF files without calling NCO tools
+History Log:  Initial version
+Usage: Called by SeriesByLeadWrapper
+Parameters: None
+Input Files: NetCDF files
+Output Files: N/A
+"""
+
+import os
+
+'''!@namespace netcdf_util
+@brief Utility to compute statistics from variables in NetCDF files
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus wrappers
+@endcode
+'''
+
+# prefix of variables written by series_analysis that contain statistics
+SERIES_CNT_PREFIX = 'series_cnt_'
+
+# NetCDF file path -> tuple of file modification time and size and
+# dictionary of statistic name -> (min, max)
+_SERIES_CNT_CACHE = {}
+
+def netcdf_available():
+    """!Check if the Python packages needed to read NetCDF files are installed
+        @returns True if netCDF4 and numpy can be imported, False if not
+    """
+    try:
+        import netCDF4
+        import numpy
+    except ImportError:
+        return False
+
+    return True
+
+def get_series_cnt_min_max(nc_file):
+    """!Get the minimum and maximum value of each series_cnt_<STAT> variable
+        in a file written by series_analysis. The file is opened once and all
+        of the variables are read. The result is kept so that reading the
+        same file again does not open it unless it has been modified.
+        Values that are set to the fill value are ignored.
+        Args:
+            @param nc_file path to NetCDF file
+            @returns dictionary where the key is the statistic name, i.e.
+             TOTAL or RMSE, and the value is a tuple of the min and max or
+             None if the variable only contains fill values
+    """
+    file_stat = os.stat(nc_file)
+    file_key = (file_stat.st_mtime_ns, file_stat.st_size)
+    cached = _SERIES_CNT_CACHE.get(nc_file)
+    if cached is not None and cached[0] == file_key:
+        return cached[1]
+
+    # only import if needed so these packages are not required to run METplus
+    import netCDF4
+    import numpy
+
+    min_max = {}
+    with netCDF4.Dataset(nc_file, 'r') as dataset:
+        for name, variable in dataset.variables.items():
+            if not name.startswith(SERIES_CNT_PREFIX):
+                continue
+
+            # values are returned as a masked array with fill values masked
+            values = numpy.ma.masked_invalid(variable[:])
+            if values.count() == 0:
+                min_max[name[len(SERIES_CNT_PREFIX):]] = None
+                continue
+
+            min_max[name[len(SERIES_CNT_PREFIX):]] = (float(values.min()),
+                                                      float(values.max()))
+
+    _SERIES_CNT_CACHE[nc_file] = (file_key, min_max)
+    return min_max
+
+def clear_series_cnt_cache():
+    """!Remove all values read from NetCDF files"""
+    _SERIES_CNT_CACHE.clear()
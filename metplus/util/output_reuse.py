@@ -0,0 +1,384 @@
+"""
+Program Name: output_reuse.py
+Contact(s): George McCabe
+Abstract: Skip commands whose output was already created from the same
+ command, input files, MET config file, and environment, and share the
+ output of identical commands between use cases
+History Log:  Initial version
+Usage: Called by CommandBuilder.build
+Parameters: None
+Input Files: N/A
+Output Files: Manifest and stored output files under OUTPUT_REUSE_DIR
+"""
+
+import os
+import json
+import shlex
+import shutil
+import hashlib
+
+from .met_util import PYTHON_EMBEDDING_TYPES
+
+'''!@namespace output_reuse
+@brief Reuse output of commands that were already run with the same inputs
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus wrappers
+@endcode
+'''
+
+# number of bytes to read from a file at a time to compute a checksum
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+
+# text that replaces the output path in the command and environment so
+# that the same task writing to different output paths has the same key
+OUTPUT_PLACEHOLDER = '{OUTPUT_PATH}'
+
+# environment variables that do not change the output of a command
+IGNORED_ENV_VARS = ['MET_TMP_DIR']
+
+# first line of the files written by CommandBuilder.write_list_file that
+# contain a list of input files
+FILE_LIST_HEADER = 'file_list'
+
+# names of the subdirectories of OUTPUT_REUSE_DIR
+MANIFEST_DIR = 'manifest'
+OBJECTS_DIR = 'objects'
+
+def get_file_checksum(path):
+    """!Compute the SHA-256 checksum of the contents of a file
+        Args:
+            @param path file to read
+            @returns hexadecimal checksum
+    """
+    checksum = hashlib.sha256()
+    with open(path, 'rb') as file_handle:
+        for chunk in iter(lambda: file_handle.read(CHECKSUM_CHUNK_SIZE), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+def get_file_identity(path, use_checksum=False):
+    """!Get information used to tell if a file has changed
+        Args:
+            @param path file to check
+            @param use_checksum if True, use the checksum of the contents
+             instead of the modification time
+            @returns dictionary with size and mtime or checksum of the file
+             or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+        if use_checksum:
+            return {'size': stat.st_size, 'sha256': get_file_checksum(path)}
+    except OSError:
+        return None
+
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+def read_file_list(path):
+    """!Read the input files listed in a file list, i.e. a file written by
+        CommandBuilder.write_list_file that is passed to a MET tool
+        Args:
+            @param path file to read
+            @returns list of paths in the file or None if the file is not a
+             file list
+    """
+    try:
+        with open(path, 'rb') as file_handle:
+            header = file_handle.readline(len(FILE_LIST_HEADER) + 2)
+            if header.strip() != FILE_LIST_HEADER.encode('utf-8'):
+                return None
+            lines = file_handle.read().decode('utf-8', 'replace').splitlines()
+    except OSError:
+        return None
+
+    return [line.strip() for line in lines if line.strip()]
+
+def uses_python_embedding(args, env=None):
+    """!Check if a command reads its input with a Python embedding script.
+        The data read by the script cannot be identified, so the output of
+        the command cannot be reused.
+        Args:
+            @param args list of command line arguments or file list entries
+            @param env optional dictionary of environment variables that
+             were set by the wrapper, i.e. the field information
+            @returns True if Python embedding is used, False if not
+    """
+    values = list(args) + [str(value) for value in (env or {}).values()]
+    for value in values:
+        if any(keyword in value for keyword in PYTHON_EMBEDDING_TYPES):
+            return True
+
+    # ASCII2NC reads point observations with a script using -format python
+    for index, arg in enumerate(args[:-1]):
+        if arg == '-format' and args[index + 1] == 'python':
+            return True
+
+    return False
+
+def _get_input_identity(path, use_checksum):
+    """!Get information used to tell if an input file has changed. The
+        files listed in a file list are identified instead of the file list
+        so that a file list that is written again for each run with the same
+        contents does not prevent the output from being reused.
+        Args:
+            @param path absolute path of the input file
+            @param use_checksum if True, use the checksum of the contents
+             instead of the modification time
+            @returns identity of the file or None if the input cannot be
+             identified, i.e. a file list that contains a directory or
+             Python embedding input
+    """
+    listed_paths = read_file_list(path)
+    if listed_paths is None:
+        return get_file_identity(path, use_checksum)
+
+    if uses_python_embedding(listed_paths):
+        return None
+
+    listed = []
+    for listed_path in listed_paths:
+        if os.path.isdir(listed_path):
+            return None
+        listed.append([listed_path,
+                       get_file_identity(listed_path, use_checksum)])
+
+    return {'file_list': listed}
+
+def get_task_key(command, output_path, input_paths=None, config_files=None,
+                 env=None, use_checksum=False):
+    """!Compute the key that identifies the output of a command. Each
+        argument of the command and each input path that is a file is
+        identified by its size and modification time or checksum, including
+        the files listed in a file list, and the contents of the MET config
+        files are always read.
+        Args:
+            @param command command that writes the output
+            @param output_path path to the output file
+            @param input_paths optional list of input files that are not
+             in the command, i.e. files read from a file list
+            @param config_files optional list of MET config files
+            @param env optional dictionary of environment variables that
+             were set by the wrapper
+            @param use_checksum if True, identify input files by checksum
+             instead of modification time
+            @returns hexadecimal key or None if the inputs cannot be
+             identified, i.e. an input is a directory or is read by a Python
+             embedding script
+    """
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        args = command.split()
+
+    if uses_python_embedding(args, env):
+        return None
+
+    output_abspath = os.path.abspath(output_path)
+    config_paths = set(os.path.abspath(path) for path in config_files or [])
+    inputs = {}
+    for arg in args + list(input_paths or []):
+        path = os.path.abspath(arg)
+        if path == output_abspath or path in config_paths or path in inputs:
+            continue
+
+        if os.path.isdir(path):
+            return None
+
+        if os.path.isfile(path):
+            identity = _get_input_identity(path, use_checksum)
+            if identity is None:
+                return None
+            inputs[path] = identity
+
+    configs = {}
+    for path in sorted(config_paths):
+        try:
+            configs[path] = get_file_checksum(path)
+        except OSError:
+            return None
+
+    env_items = {}
+    for name, value in (env or {}).items():
+        if name in IGNORED_ENV_VARS:
+            continue
+        env_items[name] = str(value).replace(output_path, OUTPUT_PLACEHOLDER)
+
+    task_info = {
+        'command': command.replace(output_path, OUTPUT_PLACEHOLDER),
+        'inputs': inputs,
+        'configs': configs,
+        'env': env_items,
+    }
+    text = json.dumps(task_info, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _link_or_copy(source, destination):
+    """!Hard link a file to a new path or copy the file if a link cannot be
+        created, i.e. the paths are on different file systems. The file is
+        written to a temporary path and renamed so that another process never
+        sees a partially written file.
+        Args:
+            @param source file to link or copy
+            @param destination path to write
+    """
+    tmp_path = f'{destination}.{os.getpid()}.tmp'
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copy2(source, tmp_path)
+
+    os.replace(tmp_path, destination)
+
+class OutputReuseTask:
+    """!Output of a command that can be reused if the same command was
+        already run with the same inputs. A manifest entry keyed by the
+        task key records the output that was created, and a hard link or
+        copy of the output is kept so it can be restored to a different
+        output path, i.e. by another use case that runs the same command.
+    """
+    def __init__(self, reuse_dir, key, output_path, command, logger=None):
+        self.reuse_dir = reuse_dir
+        self.key = key
+        self.output_path = output_path
+        self.command = command
+        self.logger = logger
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.reuse_dir, MANIFEST_DIR, self.key[:2],
+                            f'{self.key}.json')
+
+    @property
+    def object_path(self):
+        return os.path.join(self.reuse_dir, OBJECTS_DIR, self.key[:2],
+                            self.key)
+
+    def read_manifest(self):
+        """!Read the manifest entry for this task
+            @returns dictionary of the entry or None if it does not exist or
+             could not be read
+        """
+        try:
+            with open(self.manifest_path, 'r') as manifest_file:
+                entry = json.load(manifest_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            if self.logger:
+                self.logger.warning("Could not read output reuse manifest: "
+                                    f"{self.manifest_path}")
+            return None
+
+        if entry.get('key') != self.key:
+            return None
+
+        return entry
+
+    def restore(self):
+        """!Check if the output of this task was already created. If the
+            output file exists and has not changed since it was created, it
+            is used as it is. Otherwise the stored copy of the output is
+            linked or copied to the output path.
+            @returns True if the output is available and the command does
+             not need to run, False if not
+        """
+        entry = self.read_manifest()
+        if entry is not None:
+            output_info = entry['output']
+            if get_file_identity(self.output_path) == output_info:
+                if self.logger:
+                    self.logger.info("Output is up to date, skipping "
+                                     f"command: {self.output_path}")
+                return True
+
+            if get_file_identity(self.object_path) == output_info:
+                parent_dir = os.path.dirname(self.output_path)
+                if parent_dir:
+                    os.makedirs(parent_dir, exist_ok=True)
+                _link_or_copy(self.object_path, self.output_path)
+                if self.logger:
+                    self.logger.info("Reusing output of identical command "
+                                     f"run by {entry['output_path']}: "
+                                     f"{self.output_path}")
+                return True
+
+        # remove an output file that shares its contents with the stored
+        # copy so the command does not change the stored copy
+        try:
+            if os.stat(self.output_path).st_nlink > 1:
+                os.remove(self.output_path)
+        except OSError:
+            pass
+
+        return False
+
+    def save(self):
+        """!Store the output of this task after the command succeeded and
+            write the manifest entry so it can be reused
+            @returns True if the output was stored, False if not
+        """
+        if not os.path.isfile(self.output_path):
+            return False
+
+        try:
+            os.makedirs(os.path.dirname(self.object_path), exist_ok=True)
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            _link_or_copy(self.output_path, self.object_path)
+
+            entry = {
+                'key': self.key,
+                'command': self.command,
+                'output_path': self.output_path,
+                'output': get_file_identity(self.object_path),
+            }
+
+            # write to a temporary file and rename so that another process
+            # reading the manifest will never see a partially written file
+            tmp_path = f'{self.manifest_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as manifest_file:
+                json.dump(entry, manifest_file)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as err:
+            if self.logger:
+                self.logger.warning("Could not store output for reuse "
+                                    f"{self.output_path}: {err}")
+            return False
+
+        return True
+
+def get_reuse_task(reuse_dir, command, output_path, input_paths=None,
+                   config_files=None, env=None, use_checksum=False,
+                   logger=None):
+    """!Get the reusable output of a command
+        Args:
+            @param reuse_dir directory to write the manifest and stored
+             output files. If empty, output is not reused
+            @param command command that writes the output
+            @param output_path path to the output file
+            @param input_paths optional list of input files that are not
+             in the command
+            @param config_files optional list of MET config files
+            @param env optional dictionary of environment variables that
+             were set by the wrapper
+            @param use_checksum if True, identify input files by checksum
+             instead of modification time
+            @param logger optional logger to write messages
+            @returns OutputReuseTask or None if the output cannot be reused
+    """
+    if not reuse_dir or not output_path or os.path.isdir(output_path):
+        return None
+
+    key = get_task_key(command, output_path, input_paths, config_files, env,
+                       use_checksum)
+    if key is None:
+        if logger:
+            logger.debug("Cannot reuse output because an input is a "
+                         "directory or is read by a Python embedding "
+                         f"script: {output_path}")
+        return None
+
+    return OutputReuseTask(reuse_dir, key, output_path, command, logger)
@@ -0,0 +1,349 @@
+"""
+Program Name: parallel_util.py
+Contact(s): George McCabe
+Abstract: Run METplus wrappers for many run times concurrently
+History Log:  Initial version
+Usage: Called by loop_over_times_and_call in met_util
+Parameters: None
+Input Files: N/A
+Output Files: N/A
+"""
+
+import os
+import shutil
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from . import path_cache
+from . import command_usage
+from . import log_util
+from . import error_summary
+
+'''!@namespace parallel_util
+@brief Utility to run METplus wrappers over many run times at once
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus time looping functions
+@endcode
+'''
+
+# options for LOOP_EXECUTOR config variable
+VALID_LOOP_EXECUTORS = ['serial', 'process_pool', 'distributed']
+
+# config object and wrapper instances used by the worker processes.
+# These are set before the process pool is created so each forked worker
+# inherits its own copy of the wrappers instead of pickling them
+_WORKER_CONFIG = None
+_WORKER_PROCESSES = []
+
+# values of the variables above before each pool that is currently running
+# was started, so a pool started by a wrapper inside a worker process does
+# not affect the tasks that the worker runs afterwards
+_PREVIOUS_WORKER_STATE = []
+
+def get_loop_executor(config):
+    """!Read LOOP_EXECUTOR from the config and check that it is valid
+        Args:
+            @param config METplusConfig object to query
+            @returns name of executor (lower-case) or None if invalid
+    """
+    executor = config.getstr('config', 'LOOP_EXECUTOR', 'serial').lower()
+    if executor not in VALID_LOOP_EXECUTORS:
+        config.logger.error(f"Invalid LOOP_EXECUTOR: {executor}. Options are "
+                            f"{', '.join(VALID_LOOP_EXECUTORS)}")
+        return None
+
+    return executor
+
+def get_num_workers(config, config_name='LOOP_EXECUTOR_WORKERS', default=0):
+    """!Get number of workers to use to run tasks concurrently. A value
+        of 0 or less uses the number of CPUs available on the machine.
+        Args:
+            @param config METplusConfig object to query
+            @param config_name name of [config] variable to read
+            @param default value to use if variable is not set
+            @returns number of workers (always at least 1)
+    """
+    num_workers = config.getint('config', config_name, default)
+    if num_workers is None:
+        return 1
+
+    if num_workers <= 0:
+        num_workers = os.cpu_count() or 1
+
+    return num_workers
+
+def can_fork():
+    """!Check if worker processes can be started by forking the current
+        process. Forking is required so that workers inherit the wrapper
+        instances that have already been initialized
+        @returns True if fork start method is available, False if not
+    """
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+def run_times_in_process_pool(config, processes, time_list, run_function,
+                              num_workers, task_description='run times'):
+    """!Call run_function for each run time using a pool of worker processes.
+        Each worker gets its own copy of the wrapper instances. Log output
+        from each run time is written to a temporary file and appended to the
+        METplus log in run time order so the log is ordered the same way it
+        would be if the times were run serially. Error counts and the
+        commands that were run are added back to the wrapper instances in
+        this process so that totals are reported the same way. The time and
+        resources used by each command are also added to the command usage
+        summary in this process.
+        Args:
+            @param config METplusConfig object
+            @param processes list of wrapper instances to run
+            @param time_list list of input time dictionaries to process
+            @param run_function function that takes config, processes, and
+             a time dictionary and runs all processes for that time
+            @param num_workers maximum number of worker processes
+            @param task_description description of the items in time_list
+             to use in the log message, i.e. run times
+    """
+    config.logger.info(f"Running {len(time_list)} {task_description} using "
+                       f"{num_workers} worker processes")
+
+    all_indices = list(range(len(processes)))
+    executor, task_log_dir = start_process_pool(config, processes, num_workers)
+    task_logs = [get_task_log_path(task_log_dir, index)
+                 for index, _ in enumerate(time_list)]
+    merged = 0
+    futures = []
+    try:
+        futures = [executor.submit(run_in_worker, run_function, all_indices,
+                                   (input_dict,), task_log)
+                   for input_dict, task_log in zip(time_list, task_logs)]
+
+        # handle results in run time order so logs are merged in order
+        for future, task_log in zip(futures, task_logs):
+            try:
+                results = future.result()
+            finally:
+                merge_task_log(config, task_log)
+                merged += 1
+
+            add_worker_results(processes, all_indices, results)
+
+    except:
+        # stop any run times that have not started yet and merge the logs
+        # from the run times that were still running
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+        for task_log in task_logs[merged:]:
+            merge_task_log(config, task_log)
+        raise
+    finally:
+        stop_process_pool(executor, task_log_dir)
+
+def start_process_pool(config, processes, num_workers):
+    """!Create a pool of worker processes that inherit the config and wrapper
+        instances. Also creates a directory to write temporary log files from
+        each task if logging to a file.
+        Args:
+            @param config METplusConfig object
+            @param processes list of wrapper instances used by the workers
+            @param num_workers maximum number of worker processes
+            @returns tuple of the executor and the directory to write task
+             logs or None if not logging to a file
+    """
+    global _WORKER_CONFIG, _WORKER_PROCESSES
+    _PREVIOUS_WORKER_STATE.append((_WORKER_CONFIG, _WORKER_PROCESSES))
+    _WORKER_CONFIG = config
+    _WORKER_PROCESSES = processes
+
+    task_log_dir = None
+    if config.getstr('config', 'LOG_METPLUS', ''):
+        task_log_dir = os.path.join(config.getdir('TMP_DIR'),
+                                    f'loop_executor_{os.getpid()}')
+        if not os.path.exists(task_log_dir):
+            os.makedirs(task_log_dir)
+
+    return create_process_pool(num_workers), task_log_dir
+
+def create_process_pool(num_workers):
+    """!Create a pool of worker processes that are started by forking the
+        current process. The start method is only passed to the pool if the
+        default is not fork because mp_context requires Python 3.7 or newer.
+        Args:
+            @param num_workers maximum number of worker processes
+            @returns ProcessPoolExecutor object
+    """
+    if multiprocessing.get_start_method() == 'fork':
+        return ProcessPoolExecutor(max_workers=num_workers)
+
+    return ProcessPoolExecutor(max_workers=num_workers,
+                               mp_context=multiprocessing.get_context('fork'))
+
+def stop_process_pool(executor, task_log_dir):
+    """!Wait for worker processes to finish and clean up
+        Args:
+            @param executor process pool to shut down
+            @param task_log_dir directory containing task logs or None
+    """
+    global _WORKER_CONFIG, _WORKER_PROCESSES
+    executor.shutdown(wait=True)
+
+    # worker processes may have written files
+    path_cache.invalidate_path_cache()
+    if _PREVIOUS_WORKER_STATE:
+        _WORKER_CONFIG, _WORKER_PROCESSES = _PREVIOUS_WORKER_STATE.pop()
+    else:
+        _WORKER_CONFIG = None
+        _WORKER_PROCESSES = []
+    if task_log_dir and os.path.exists(task_log_dir):
+        shutil.rmtree(task_log_dir)
+
+def set_worker_processes(config, processes):
+    """!Set the config and wrapper instances used by run_in_worker in a
+        process that was started to run tasks without a process pool, i.e.
+        on another node by distributed_util
+        Args:
+            @param config METplusConfig object
+            @param processes list of wrapper instances used by run_in_worker
+    """
+    global _WORKER_CONFIG, _WORKER_PROCESSES
+    _WORKER_CONFIG = config
+    _WORKER_PROCESSES = processes
+
+def get_task_log_path(task_log_dir, task_index):
+    """!Get path to write log output for a task
+        Args:
+            @param task_log_dir directory to write task logs or None
+            @param task_index unique index of the task
+            @returns path to task log or None if task_log_dir is not set
+    """
+    if not task_log_dir:
+        return None
+
+    return os.path.join(task_log_dir, f'task_{task_index:06d}.log')
+
+def add_worker_results(processes, process_indices, worker_results):
+    """!Add error counts, commands, and isOK status returned from a worker
+        to the wrapper instances in this process and add the usage of the
+        commands that were run and the errors that were reported to the
+        command usage and error summaries
+        Args:
+            @param processes list of all wrapper instances
+            @param process_indices indices of processes that were run
+            @param worker_results tuple returned from run_in_worker
+    """
+    results, usage_records, error_records = worker_results
+    command_usage.add_command_records(usage_records)
+    error_summary.add_error_records(error_records)
+    for index, (errors, commands, is_ok) in zip(process_indices, results):
+        process = processes[index]
+        process.errors += errors
+        process.all_commands.extend(commands)
+        if not is_ok:
+            process.isOK = False
+
+def run_in_worker(task_function, process_indices, task_args, task_log):
+    """!Run a task inside a worker process. Log output is sent to the task
+        log file if one is provided.
+        Args:
+            @param task_function function to call. It is passed the config,
+             the list of processes to run, then the items in task_args
+            @param process_indices indices of processes to pass to function
+            @param task_args tuple of additional arguments to pass to function
+            @param task_log path to write log output or None
+            @returns tuple containing a list of tuples for each process
+             with the number of errors that occurred, list of commands that
+             were run, and the isOK value of the process, a list of the
+             command usage records for the commands that were run, and a
+             list of the error summary records for the errors reported
+    """
+    config = _WORKER_CONFIG
+    processes = [_WORKER_PROCESSES[index] for index in process_indices]
+
+    # do not start another pool of workers from inside a worker
+    config.set('config', 'LOOP_EXECUTOR', 'serial')
+
+    # other workers may have written files since this worker last checked
+    # the directories, including files it found were missing
+    path_cache.invalidate_path_cache()
+
+    errors_before = [process.errors for process in processes]
+    num_commands_before = [len(process.all_commands) for process in processes]
+    num_records_before = command_usage.get_command_record_count()
+    error_counts_before = error_summary.get_error_counts()
+
+    master_log = config.getstr('config', 'LOG_METPLUS', '')
+    task_handler = None
+    if task_log:
+        task_handler, master_handlers = _redirect_log_file(config,
+                                                           master_log,
+                                                           task_log)
+        # send output from commands to task log as well
+        config.set('config', 'LOG_METPLUS', task_log)
+
+    try:
+        task_function(config, processes, *task_args)
+    except:
+        config.logger.exception("Fatal error occurred")
+        raise
+    finally:
+        if task_handler:
+            config.logger.removeHandler(task_handler)
+            task_handler.close()
+            for handler in master_handlers:
+                config.logger.addHandler(handler)
+            config.set('config', 'LOG_METPLUS', master_log)
+
+    results = []
+    for process, errors, num_commands in zip(processes, errors_before,
+                                             num_commands_before):
+        results.append((process.errors - errors,
+                        process.all_commands[num_commands:],
+                        process.isOK))
+    return (results,
+            command_usage.get_command_records_since(num_records_before),
+            error_summary.get_error_records_since(error_counts_before))
+
+def _redirect_log_file(config, master_log, task_log):
+    """!Remove file handlers that write to the METplus log file from the
+        logger and add a handler that writes to the task log instead using
+        the same formatter.
+        Args:
+            @param config METplusConfig object containing the logger to
+             modify
+            @param master_log path to METplus log file
+            @param task_log path to write log output for this task
+            @returns tuple containing the new file handler that was added to
+             the logger and the list of handlers that were removed so they
+             can be added back when the task is finished
+    """
+    logger = config.logger
+    formatter = None
+    master_handlers = []
+    master_path = os.path.abspath(master_log)
+    for handler in list(logger.handlers):
+        if getattr(handler, 'baseFilename', None) == master_path:
+            formatter = handler.formatter
+            logger.removeHandler(handler)
+            master_handlers.append(handler)
+
+    task_handler = log_util.create_log_handler(config, task_log, formatter)
+    logger.addHandler(task_handler)
+    return task_handler, master_handlers
+
+def merge_task_log(config, task_log):
+    """!Append contents of task log to METplus log file and remove task log
+        Args:
+            @param config METplusConfig object
+            @param task_log path to log file to append or None
+    """
+    if not task_log or not os.path.exists(task_log):
+        return
+
+    # flush any buffered output before appending to the log file
+    log_util.flush_log_handlers(config.logger)
+
+    master_log = config.getstr('config', 'LOG_METPLUS')
+    with open(task_log, 'r') as task_file:
+        with open(master_log, 'a') as master_file:
+            shutil.copyfileobj(task_file, master_file)
+
+    os.remove(task_log)
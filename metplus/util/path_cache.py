@@ -0,0 +1,228 @@
+"""
+Program Name: path_cache.py
+Contact(s): George McCabe
+Abstract: Cache of directory listings used to check if input files exist
+ without calling stat on each path
+History Log:  Initial version
+Usage: Called by preprocess_file in met_util, staging, and CommandBuilder
+Parameters: None
+Input Files: N/A
+Output Files: N/A
+"""
+
+import os
+import time
+
+'''!@namespace path_cache
+@brief Cache of directory listings used to check if paths exist
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus wrappers
+@endcode
+'''
+
+# types of entries stored for each name in a directory listing
+ENTRY_FILE = 'file'
+ENTRY_DIR = 'dir'
+ENTRY_OTHER = 'other'
+
+# directories modified less than this many seconds before they were read
+# are read again the next time they are checked because a file could be
+# added without changing the modification time of the directory
+RECENT_MTIME_SECONDS = 2
+
+# cache used for this run
+_PATH_CACHE = None
+
+class PathCache:
+    """!Snapshots of directory listings used to check if paths exist. Each
+        directory is read once and every path in the directory is looked up
+        in the snapshot, including paths that do not exist. Snapshots are
+        checked again after invalidate is called, i.e. after a command is
+        run or a new run time starts. When a snapshot is checked, the
+        directory is only read again if its modification time changed.
+        If a time to live (TTL) is set, snapshots are also checked when
+        they are older than that many seconds.
+    """
+    def __init__(self, ttl=0):
+        self.ttl = ttl
+
+        # directory path -> dictionary containing the modification time of
+        # the directory, the generation and time it was last checked, and
+        # the entries in the directory (None if it is not a directory)
+        self.dirs = {}
+
+        # incremented by invalidate to check all snapshots again
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.reads = 0
+
+    def invalidate(self):
+        """!Check each directory again before it is used next. Directories
+            that have not been modified are not read again.
+        """
+        self.generation += 1
+
+    def clear(self):
+        """!Remove all snapshots and reset the counters"""
+        self.dirs.clear()
+        self.hits = 0
+        self.misses = 0
+        self.reads = 0
+
+    def get_entry_type(self, path):
+        """!Get the type of entry that a path points to
+            Args:
+                @param path file or directory path to check
+                @returns ENTRY_FILE, ENTRY_DIR, ENTRY_OTHER, or None if the
+                 path does not exist
+        """
+        path = os.path.abspath(path)
+        dir_path, name = os.path.split(path)
+
+        # root directory
+        if not name:
+            return ENTRY_DIR if os.path.isdir(path) else None
+
+        entries = self._get_entries(dir_path)
+        if entries is None:
+            return None
+
+        return entries.get(name)
+
+    def isfile(self, path):
+        """!Cached version of os.path.isfile"""
+        return self.get_entry_type(path) == ENTRY_FILE
+
+    def isdir(self, path):
+        """!Cached version of os.path.isdir"""
+        return self.get_entry_type(path) == ENTRY_DIR
+
+    def exists(self, path):
+        """!Cached version of os.path.exists"""
+        return self.get_entry_type(path) is not None
+
+    def _get_entries(self, dir_path):
+        """!Get the entries in a directory from the snapshot, checking the
+            modification time of the directory and reading it again if
+            needed
+            Args:
+                @param dir_path absolute path of the directory
+                @returns dictionary where the key is the name of each entry
+                 and the value is the entry type or None if the directory
+                 does not exist
+        """
+        now = time.time()
+        snapshot = self.dirs.get(dir_path)
+        if (snapshot is not None and
+                snapshot['generation'] == self.generation and
+                (not self.ttl or now - snapshot['checked'] < self.ttl)):
+            self.hits += 1
+            return snapshot['entries']
+
+        try:
+            mtime = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if (snapshot is not None and snapshot['mtime'] == mtime and
+                not snapshot['recent']):
+            snapshot['generation'] = self.generation
+            snapshot['checked'] = now
+            self.hits += 1
+            return snapshot['entries']
+
+        self.misses += 1
+        entries = None
+        if mtime is not None:
+            entries = self._read_dir(dir_path)
+
+        recent = (mtime is not None and
+                  now - mtime / 1e9 < RECENT_MTIME_SECONDS)
+        self.dirs[dir_path] = {'mtime': mtime,
+                               'recent': recent,
+                               'generation': self.generation,
+                               'checked': now,
+                               'entries': entries}
+        return entries
+
+    def _read_dir(self, dir_path):
+        """!Read the entries in a directory
+            Args:
+                @param dir_path absolute path of the directory
+                @returns dictionary where the key is the name of each entry
+                 and the value is the entry type or None if the path is not a
+                 directory that can be read
+        """
+        self.reads += 1
+        entries = {}
+        try:
+            with os.scandir(dir_path) as dir_entries:
+                for entry in dir_entries:
+                    try:
+                        # follow symbolic links to be consistent with
+                        # os.path.isfile and os.path.isdir
+                        if entry.is_dir():
+                            entries[entry.name] = ENTRY_DIR
+                        elif entry.is_file():
+                            entries[entry.name] = ENTRY_FILE
+                        elif os.path.exists(entry.path):
+                            entries[entry.name] = ENTRY_OTHER
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+
+        return entries
+
+    def get_summary(self):
+        """!Get a message describing how often the cache was used
+            @returns string containing the hit and miss counts
+        """
+        total = self.hits + self.misses
+        hit_percent = (self.hits / total * 100) if total else 0
+        return (f"Path existence cache: {total} lookups, {self.hits} hits, "
+                f"{self.misses} misses ({hit_percent:.1f}% hit rate), "
+                f"{self.reads} directories read")
+
+def get_path_cache(config=None):
+    """!Get the path cache for this run. The TTL is read from PATH_CACHE_TTL
+        the first time the cache is requested with a config.
+        Args:
+            @param config optional METplusConfig object
+            @returns PathCache object
+    """
+    global _PATH_CACHE
+    if _PATH_CACHE is None:
+        ttl = 0
+        if config is not None:
+            ttl = config.getint('config', 'PATH_CACHE_TTL', 0)
+            if not ttl or ttl < 0:
+                ttl = 0
+        _PATH_CACHE = PathCache(ttl)
+
+    return _PATH_CACHE
+
+def invalidate_path_cache():
+    """!Check directories again before they are used next, i.e. after a
+        command that may have written files has been run
+    """
+    if _PATH_CACHE is not None:
+        _PATH_CACHE.invalidate()
+
+def log_path_cache_summary(logger):
+    """!Write the hit and miss counts of the path cache to the log
+        Args:
+            @param logger logger to write message
+    """
+    if _PATH_CACHE is None:
+        return
+
+    logger.info(_PATH_CACHE.get_summary())
+
+def clear_path_cache():
+    """!Remove the path cache for this run"""
+    global _PATH_CACHE
+    _PATH_CACHE = None
@@ -0,0 +1,340 @@
+"""
+Program Name: staging.py
+Contact(s): George McCabe
+Abstract: Decompress input files into the staging directory, prefetch
+ compressed files for upcoming run times, and limit the size of the
+ decompressed files kept in the staging directory
+History Log:  Initial version
+Usage: Called by preprocess_file and loop_over_times_and_call in met_util
+Parameters: None
+Input Files: N/A
+Output Files: N/A
+"""
+
+import os
+import gzip
+import bz2
+import shutil
+import zipfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from . import path_cache
+
+'''!@namespace staging
+@brief Utility to manage decompressed files in the staging directory
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus time looping functions and wrappers
+@endcode
+'''
+
+# number of bytes to read from a compressed file at a time
+STAGING_CHUNK_SIZE = 1024 * 1024
+
+# compression extensions in the order they are checked
+COMPRESSION_EXTENSIONS = ['.gz', '.bz2', '.zip']
+
+# lock to protect the variables below that are used by the prefetch threads
+_LOCK = threading.Lock()
+
+# staged file path -> Future for files being decompressed in the background
+_IN_PROGRESS = {}
+
+# thread pool used to decompress files for upcoming run times
+_PREFETCH_EXECUTOR = None
+
+# staging directory -> StagingCache
+_STAGING_CACHES = {}
+
+# incremented before each run time is processed so that files used by the
+# current and next run time are never removed from the staging directory
+_RUN_TIME_INDEX = 0
+
+class StagingCache:
+    """!Keep track of decompressed files in the staging directory and remove
+        the least recently used files when the total size of the files is
+        larger than the maximum size. Files used by the current run time or
+        prefetched for the next run time are not removed.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.files = OrderedDict()
+        self.total_size = 0
+
+    def use(self, path, logger=None, run_time_index=None):
+        """!Mark a staged file as used by a run time and remove older files
+            if the staging directory is too large
+            Args:
+                @param path staged file path
+                @param logger optional logger to output debug information
+                @param run_time_index index of run time that will use the
+                 file. Defaults to the current run time
+        """
+        if run_time_index is None:
+            run_time_index = _RUN_TIME_INDEX
+
+        if path in self.files:
+            self.files.move_to_end(path)
+            self.files[path][1] = max(self.files[path][1], run_time_index)
+        else:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                return
+            self.files[path] = [size, run_time_index]
+            self.total_size += size
+
+        self.evict(logger)
+
+    def evict(self, logger=None):
+        """!Remove least recently used files until the total size of the
+            staged files is less than the maximum size
+            Args:
+                @param logger optional logger to output debug information
+        """
+        if not self.max_size:
+            return
+
+        for path, (size, run_time_index) in list(self.files.items()):
+            if self.total_size <= self.max_size:
+                return
+
+            # do not remove files for the current or next run time
+            if run_time_index >= _RUN_TIME_INDEX:
+                continue
+
+            if logger:
+                logger.debug(f"Removing staged file to limit size of "
+                             f"staging directory: {path}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+            # the path cache may still list the file that was removed
+            path_cache.invalidate_path_cache()
+
+            del self.files[path]
+            self.total_size -= size
+
+def get_staging_cache(config):
+    """!Get cache of staged files for the staging directory. The maximum
+        size is read from STAGING_DIR_MAX_SIZE_MB the first time.
+        Args:
+            @param config METplusConfig object
+            @returns StagingCache object
+    """
+    stage_dir = config.getdir('STAGING_DIR')
+    cache = _STAGING_CACHES.get(stage_dir)
+    if cache is None:
+        max_size_mb = config.getint('config', 'STAGING_DIR_MAX_SIZE_MB', 0)
+        if not max_size_mb or max_size_mb < 0:
+            max_size_mb = 0
+        cache = StagingCache(max_size_mb * 1024 * 1024)
+        _STAGING_CACHES[stage_dir] = cache
+
+    return cache
+
+def start_run_time():
+    """!Mark that a new run time is starting so the files staged for earlier
+        run times can be removed if the staging directory is too large
+    """
+    global _RUN_TIME_INDEX
+    with _LOCK:
+        _RUN_TIME_INDEX += 1
+
+def find_compressed_file(filename, config=None):
+    """!Find compressed version of a file
+        Args:
+            @param filename path to file without compression extension
+            @param config optional METplusConfig object
+            @returns tuple of path to compressed file and extension or
+             (None, None) if no compressed file exists
+    """
+    paths = path_cache.get_path_cache(config)
+    for ext in COMPRESSION_EXTENSIONS:
+        if paths.isfile(filename + ext):
+            return filename + ext, ext
+
+    return None, None
+
+def decompress_file(compressed_path, ext, outpath):
+    """!Decompress a file a chunk at a time so the entire file is never read
+        into memory. Data is written to a temporary file that is renamed when
+        complete so a partially written file is never used.
+        Args:
+            @param compressed_path path to compressed file
+            @param ext compression extension, i.e. .gz, .bz2, or .zip
+            @param outpath path to write decompressed file
+    """
+    tmp_path = f'{outpath}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as outfile:
+            if ext == '.gz':
+                with gzip.open(compressed_path, 'rb') as infile:
+                    shutil.copyfileobj(infile, outfile, STAGING_CHUNK_SIZE)
+            elif ext == '.bz2':
+                with bz2.open(compressed_path, 'rb') as infile:
+                    shutil.copyfileobj(infile, outfile, STAGING_CHUNK_SIZE)
+            elif ext == '.zip':
+                member = os.path.basename(outpath)
+                with zipfile.ZipFile(compressed_path) as zip_file:
+                    with zip_file.open(member) as infile:
+                        shutil.copyfileobj(infile, outfile, STAGING_CHUNK_SIZE)
+
+        os.replace(tmp_path, outpath)
+        path_cache.invalidate_path_cache()
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def stage_file(filename, config):
+    """!Decompress a file into the staging directory if it has not already
+        been staged. If the file is being decompressed by a prefetch thread,
+        wait for it to finish instead of decompressing it again.
+        Args:
+            @param filename path to file without compression extension
+            @param config METplusConfig object
+            @returns path to staged file or None if no compressed file exists
+    """
+    outpath = config.getdir('STAGING_DIR') + filename
+
+    with _LOCK:
+        future = _IN_PROGRESS.get(outpath)
+    if future is not None:
+        try:
+            future.result()
+        except Exception:
+            # decompress the file again below to report the error
+            pass
+
+    cache = get_staging_cache(config)
+
+    # if file exists in the staging area, return that path
+    if path_cache.get_path_cache(config).isfile(outpath):
+        with _LOCK:
+            cache.use(outpath, config.logger)
+        return outpath
+
+    compressed_path, ext = find_compressed_file(filename, config)
+    if compressed_path is None:
+        return None
+
+    # Create staging area if it does not exist
+    outdir = os.path.dirname(outpath)
+    if not os.path.exists(outdir):
+        os.makedirs(outdir, mode=0o0775, exist_ok=True)
+
+    if config.logger:
+        config.logger.debug(f"Uncompressing {ext[1:]} file to {outpath}")
+
+    decompress_file(compressed_path, ext, outpath)
+    with _LOCK:
+        cache.use(outpath, config.logger)
+    return outpath
+
+def prefetch_file(filename, config):
+    """!Start decompressing a file into the staging directory in the
+        background if STAGING_PREFETCH_WORKERS is greater than 0
+        Args:
+            @param filename path to file with or without compression extension
+            @param config METplusConfig object
+    """
+    global _PREFETCH_EXECUTOR
+    num_workers = config.getint('config', 'STAGING_PREFETCH_WORKERS', 0)
+    if not num_workers or num_workers < 0:
+        return
+
+    for ext in COMPRESSION_EXTENSIONS:
+        if filename.endswith(ext):
+            filename = filename[:-len(ext)]
+            break
+
+    paths = path_cache.get_path_cache(config)
+    if paths.isfile(filename):
+        return
+
+    outpath = config.getdir('STAGING_DIR') + filename
+    if paths.isfile(outpath):
+        return
+
+    compressed_path, ext = find_compressed_file(filename, config)
+    if compressed_path is None:
+        return
+
+    with _LOCK:
+        if outpath in _IN_PROGRESS:
+            return
+
+        if _PREFETCH_EXECUTOR is None:
+            _PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=num_workers)
+
+        if config.logger:
+            config.logger.debug(f"Prefetching {compressed_path}")
+
+        future = _PREFETCH_EXECUTOR.submit(_prefetch, compressed_path, ext,
+                                           outpath, get_staging_cache(config),
+                                           config.logger)
+        _IN_PROGRESS[outpath] = future
+
+def _prefetch(compressed_path, ext, outpath, cache, logger):
+    """!Decompress file in a prefetch thread
+        Args:
+            @param compressed_path path to compressed file
+            @param ext compression extension
+            @param outpath path to write decompressed file
+            @param cache StagingCache for the staging directory
+            @param logger logger to output debug information
+    """
+    try:
+        outdir = os.path.dirname(outpath)
+        if not os.path.exists(outdir):
+            os.makedirs(outdir, mode=0o0775, exist_ok=True)
+
+        decompress_file(compressed_path, ext, outpath)
+
+        # mark as used by the next run time so it is not removed
+        # before it is needed
+        with _LOCK:
+            cache.use(outpath, logger, _RUN_TIME_INDEX + 1)
+    finally:
+        with _LOCK:
+            _IN_PROGRESS.pop(outpath, None)
+
+def prefetch_inputs(config, processes, input_dict):
+    """!Start decompressing the input files that each process will need to
+        process a run time
+        Args:
+            @param config METplusConfig object
+            @param processes list of wrapper instances
+            @param input_dict time dictionary for the run time
+    """
+    if config.getint('config', 'STAGING_PREFETCH_WORKERS', 0) <= 0:
+        return
+
+    for process in processes:
+        if not hasattr(process, 'get_prefetch_files'):
+            continue
+
+        # prefetching is only an optimization, so do not stop the run if
+        # the files for a wrapper could not be determined
+        try:
+            filenames = process.get_prefetch_files(dict(input_dict))
+        except Exception as err:
+            config.logger.debug(f"Could not get files to prefetch: {err}")
+            continue
+
+        for filename in filenames:
+            prefetch_file(filename, config)
+
+def shutdown_prefetch():
+    """!Wait for any files that are being prefetched and stop the threads"""
+    global _PREFETCH_EXECUTOR
+    with _LOCK:
+        executor = _PREFETCH_EXECUTOR
+        _PREFETCH_EXECUTOR = None
+
+    if executor is not None:
+        executor.shutdown(wait=True)
@@ -0,0 +1,197 @@
+"""
+Program Name: startup_util.py
+Contact(s): George McCabe
+Abstract: Helper functions used to reduce the time it takes to start a run,
+ including a cache of configurations that have already been validated and a
+ report of the time spent in each step of the startup
+History Log:  Initial version
+Usage: Called by pre_run_setup and run_metplus in met_util
+Parameters: None
+Input Files: MET config files set with *_CONFIG_FILE
+Output Files: Validation cache files written to VALIDATION_CACHE_DIR
+"""
+
+import os
+import json
+import time
+import hashlib
+import datetime
+
+from .config.string_template_substitution import do_string_sub
+
+'''!@namespace startup_util
+@brief Cache of validated configurations and startup time profile
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus wrappers
+@endcode
+'''
+
+# config variables that are set to a different value each run. These are
+# not used to determine if the configuration has changed since the last run
+VOLATILE_CONFIG_VARS = [
+    'CLOCK_TIME',
+    'LOG_TIMESTAMP',
+    'LOG_METPLUS',
+    'PROFILE_STARTUP',
+]
+
+# list of tuples containing the name of each startup step and the time
+# in seconds that it took to complete
+_STARTUP_STEPS = []
+
+# time that the current startup step began
+_STEP_START_TIME = time.perf_counter()
+
+def start_startup_profile(start_time=None):
+    """!Clear the startup steps that have been recorded and start timing
+        the first step
+        Args:
+            @param start_time optional value from time.perf_counter() when
+             the first step began. If not set, the current time is used
+    """
+    global _STEP_START_TIME
+    _STARTUP_STEPS.clear()
+    _STEP_START_TIME = time.perf_counter() if start_time is None else start_time
+
+def record_startup_step(name):
+    """!Record the time since the previous step ended as the time it took
+        to run a startup step
+        Args:
+            @param name description of the step that was completed
+    """
+    global _STEP_START_TIME
+    now = time.perf_counter()
+    _STARTUP_STEPS.append((name, now - _STEP_START_TIME))
+    _STEP_START_TIME = now
+
+def get_startup_profile():
+    """!Get the startup steps that have been recorded
+        @returns list of tuples containing the name of each step and the
+         number of seconds it took to complete
+    """
+    return list(_STARTUP_STEPS)
+
+def log_startup_profile(config):
+    """!Write a table of the time spent in each startup step to the log if
+        PROFILE_STARTUP is set to True, i.e. if the --profile-startup command
+        line argument was used
+        Args:
+            @param config METplusConfig object
+    """
+    if not config.getbool('config', 'PROFILE_STARTUP', False):
+        return
+
+    steps = get_startup_profile()
+    total = sum(seconds for _, seconds in steps)
+    width = max([len(name) for name, _ in steps] + [len('Total')])
+
+    config.logger.info('Startup profile:')
+    for name, seconds in steps + [('Total', total)]:
+        percent = seconds / total * 100 if total else 0
+        config.logger.info(f"  {name:<{width}} {seconds:8.3f} s "
+                           f"{percent:5.1f}%")
+
+def get_met_config_files(config):
+    """!Get the MET config files set with *_CONFIG_FILE variables, including
+        each file used with a custom loop string
+        Args:
+            @param config METplusConfig object
+            @returns sorted list of MET config file paths
+    """
+    # import here to avoid circular import with met_util
+    from .met_util import get_custom_string_list
+
+    met_config_files = set()
+    met_config_keys = [key for key in config.keys('config')
+                       if key.endswith('CONFIG_FILE')]
+    for met_config_key in met_config_keys:
+        met_tool = met_config_key.replace('_CONFIG_FILE', '')
+        met_config = config.getraw('config', met_config_key)
+        if not met_config:
+            continue
+
+        for custom_string in get_custom_string_list(config, met_tool):
+            met_config_files.add(do_string_sub(met_config,
+                                               custom=custom_string))
+
+    return sorted(met_config_files)
+
+def get_validation_key(config):
+    """!Get a hash of the configuration and the MET config files that are
+        checked when the configuration is validated. The key changes if any
+        config variable (other than the ones that change each run) or the
+        version of METplus changes, or if a MET config file is modified.
+        Args:
+            @param config METplusConfig object
+            @returns string containing the hexadecimal hash
+    """
+    settings = {}
+    for section in sorted(config.sections()):
+        settings[section] = {
+            key: config.getraw(section, key)
+            for key in sorted(config.keys(section))
+            if key not in VOLATILE_CONFIG_VARS
+        }
+
+    met_config_files = {}
+    for met_config_file in get_met_config_files(config):
+        try:
+            stat = os.stat(met_config_file)
+            met_config_files[met_config_file] = [stat.st_mtime_ns,
+                                                 stat.st_size]
+        except OSError:
+            met_config_files[met_config_file] = None
+
+    key_info = {'settings': settings,
+                'met_config_files': met_config_files}
+    key_string = json.dumps(key_info, sort_keys=True)
+    return hashlib.sha256(key_string.encode('utf-8')).hexdigest()
+
+def get_validation_cache_file(config):
+    """!Get path to the file that is written when a configuration has been
+        validated. The name of the file is the hash of the configuration.
+        Args:
+            @param config METplusConfig object
+            @returns path to cache file or None if VALIDATION_CACHE_DIR is
+             not set
+    """
+    cache_dir = config.getdir('VALIDATION_CACHE_DIR', '')
+    if not cache_dir:
+        return None
+
+    return os.path.join(cache_dir, f'{get_validation_key(config)}.json')
+
+def write_validation_cache(config, cache_file):
+    """!Write a file to the validation cache directory to note that the
+        configuration passed validation. The file is written to a temporary
+        file and renamed so that runs starting at the same time do not read
+        a partial file.
+        Args:
+            @param config METplusConfig object
+            @param cache_file path to file from get_validation_cache_file
+            @returns True if file was written, False if it could not be
+             written
+    """
+    cache_info = {
+        'METPLUS_VERSION': config.getstr('config', 'METPLUS_VERSION', ''),
+        'METPLUS_CONFIG_FILES': config.getraw('config',
+                                              'METPLUS_CONFIG_FILES'),
+        'VALIDATED': datetime.datetime.now().strftime('%Y%m%d%H%M%S'),
+    }
+
+    tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(tmp_file, 'w') as file_handle:
+            json.dump(cache_info, file_handle, indent=2)
+        os.replace(tmp_file, cache_file)
+    except OSError as err:
+        config.logger.warning(f"Could not write validation cache file "
+                              f"{cache_file}: {err}")
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        return False
+
+    config.logger.debug(f"Wrote validation cache file: {cache_file}")
+    return True
@@ -0,0 +1,293 @@
+"""
+Program Name: task_graph.py
+Contact(s): George McCabe
+Abstract: Build and run a graph of tasks from the wrappers in PROCESS_LIST
+History Log:  Initial version
+Usage: Called by run_metplus in met_util when LOOP_ORDER = dag
+Parameters: None
+Input Files: N/A
+Output Files: N/A
+"""
+
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from . import parallel_util
+from . import path_cache
+
+'''!@namespace task_graph
+@brief Utility to run wrappers as a graph of dependent tasks
+@code{.sh}
+Cannot be called directly. These are helper functions
+to be used by the METplus time looping functions
+@endcode
+'''
+
+class Task:
+    """!Single unit of work in the task graph. A task either runs one
+        wrapper for a single run time or runs one wrapper over all run times
+        if the wrapper implements its own time looping.
+    """
+    def __init__(self, index, process_index, process_name, input_dict=None):
+        self.index = index
+        self.process_index = process_index
+        self.process_name = process_name
+        self.input_dict = input_dict
+        self.depends_on = []
+        self.dependents = []
+
+    def add_dependency(self, task):
+        """!Mark that this task cannot start until another task has finished
+            Args:
+                @param task Task that must finish first
+        """
+        if task.index in self.depends_on:
+            return
+
+        self.depends_on.append(task.index)
+        task.dependents.append(self.index)
+
+    @property
+    def label(self):
+        """!Name of the task used for logging, i.e. GridStat(valid 202001010000)
+        """
+        if self.input_dict is None:
+            return f'{self.process_name}(all times)'
+
+        time_type = 'init' if 'init' in self.input_dict else 'valid'
+        run_time = self.input_dict[time_type].strftime('%Y%m%d%H%M')
+        return f'{self.process_name}({time_type} {run_time})'
+
+def get_process_name(process):
+    """!Get name of wrapper to use in task labels
+        Args:
+            @param process wrapper instance
+            @returns class name of the wrapper without Wrapper at the end
+    """
+    return process.__class__.__name__.replace('Wrapper', '')
+
+def loops_over_times(process):
+    """!Check if a wrapper implements its own loop over all run times,
+        i.e. StatAnalysis or SeriesByLead, instead of processing one run time
+        at a time with run_at_time
+        Args:
+            @param process wrapper instance
+            @returns True if wrapper overrides run_all_times, False if not
+    """
+    # import here to avoid circular import with wrappers package
+    from ..wrappers.command_builder import CommandBuilder
+
+    run_all_times = getattr(type(process), 'run_all_times', None)
+    if run_all_times is None:
+        return False
+
+    return run_all_times is not CommandBuilder.run_all_times
+
+def build_task_graph(processes, time_list):
+    """!Create a task for each wrapper and run time. Each task depends on the
+        task from the previous wrapper in the PROCESS_LIST at the same run
+        time so wrappers that read output from an earlier wrapper wait only
+        for the run times they need. Wrappers that loop over all run times
+        themselves are a single task that depends on every task from the
+        previous wrapper.
+        Args:
+            @param processes list of wrapper instances in PROCESS_LIST order
+            @param time_list list of input time dictionaries
+            @returns list of Task objects in an order that satisfies all
+             dependencies
+    """
+    tasks = []
+    previous_tasks = []
+    for process_index, process in enumerate(processes):
+        process_name = get_process_name(process)
+        if loops_over_times(process):
+            task = Task(len(tasks), process_index, process_name)
+            for previous_task in previous_tasks:
+                task.add_dependency(previous_task)
+            tasks.append(task)
+            previous_tasks = [task]
+            continue
+
+        current_tasks = []
+        for time_index, input_dict in enumerate(time_list):
+            task = Task(len(tasks), process_index, process_name,
+                        input_dict)
+            if len(previous_tasks) == 1:
+                task.add_dependency(previous_tasks[0])
+            elif previous_tasks:
+                task.add_dependency(previous_tasks[time_index])
+            tasks.append(task)
+            current_tasks.append(task)
+
+        previous_tasks = current_tasks
+
+    return tasks
+
+def get_critical_path(tasks):
+    """!Find the longest chain of dependent tasks in the graph. This is the
+        minimum number of tasks that must run one after the other no matter
+        how many workers are available.
+        Args:
+            @param tasks list of Task objects in dependency order
+            @returns list of tasks in the critical path in the order they run
+    """
+    if not tasks:
+        return []
+
+    length = {}
+    previous = {}
+    for task in tasks:
+        length[task.index] = 1
+        previous[task.index] = None
+        for dependency in task.depends_on:
+            if length[dependency] + 1 > length[task.index]:
+                length[task.index] = length[dependency] + 1
+                previous[task.index] = dependency
+
+    index = max(length, key=lambda key: (length[key], -key))
+    path = []
+    while index is not None:
+        path.append(tasks[index])
+        index = previous[index]
+
+    return list(reversed(path))
+
+def log_task_graph(config, tasks):
+    """!Log each task, the tasks it depends on, and the critical path
+        Args:
+            @param config METplusConfig object
+            @param tasks list of Task objects
+    """
+    logger = config.logger
+    logger.info(f"Task graph contains {len(tasks)} tasks")
+    for task in tasks:
+        if task.depends_on:
+            depends = ', '.join([tasks[index].label
+                                 for index in task.depends_on])
+        else:
+            depends = 'none'
+        logger.info(f"  [{task.index}] {task.label} depends on: {depends}")
+
+    critical_path = get_critical_path(tasks)
+    logger.info(f"Critical path contains {len(critical_path)} tasks: "
+                f"{' -> '.join([task.label for task in critical_path])}")
+
+def run_task_graph(config, processes, tasks, num_workers):
+    """!Run all tasks, starting each task as soon as the tasks it depends on
+        have finished. Uses a pool of worker processes if more than one
+        worker is requested, otherwise tasks are run in order.
+        Args:
+            @param config METplusConfig object
+            @param processes list of wrapper instances
+            @param tasks list of Task objects in dependency order
+            @param num_workers maximum number of tasks to run at once
+    """
+    if num_workers > 1 and not parallel_util.can_fork():
+        config.logger.warning("Running tasks concurrently is not supported "
+                              "on this platform. Running tasks serially")
+        num_workers = 1
+
+    if num_workers <= 1:
+        for task in tasks:
+            _run_task(config, [processes[task.process_index]],
+                      task.input_dict)
+        return
+
+    config.logger.info(f"Running {len(tasks)} tasks using "
+                       f"{num_workers} worker processes")
+
+    executor, task_log_dir = parallel_util.start_process_pool(config,
+                                                              processes,
+                                                              num_workers)
+    remaining = {task.index: len(task.depends_on) for task in tasks}
+    running = {}
+
+    def submit(task):
+        task_log = parallel_util.get_task_log_path(task_log_dir, task.index)
+        future = executor.submit(parallel_util.run_in_worker, _run_task,
+                                 [task.process_index], (task.input_dict,),
+                                 task_log)
+        running[future] = (task, task_log)
+
+    try:
+        for task in tasks:
+            if not task.depends_on:
+                submit(task)
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            # merge logs from tasks that finished together in task order
+            for future in sorted(done, key=lambda item: running[item][0].index):
+                task, task_log = running.pop(future)
+                try:
+                    results = future.result()
+                finally:
+                    parallel_util.merge_task_log(config, task_log)
+
+                parallel_util.add_worker_results(processes,
+                                                 [task.process_index],
+                                                 results)
+                for index in task.dependents:
+                    remaining[index] -= 1
+                    if not remaining[index]:
+                        submit(tasks[index])
+    except:
+        # stop any tasks that have not started and merge the logs from
+        # the tasks that were still running
+        for future in running:
+            future.cancel()
+        executor.shutdown(wait=True)
+        for task, task_log in running.values():
+            parallel_util.merge_task_log(config, task_log)
+        raise
+    finally:
+        parallel_util.stop_process_pool(executor, task_log_dir)
+
+def run_processes_as_task_graph(config, processes):
+    """!Build the task graph for the wrappers in PROCESS_LIST and run it.
+        If LOOP_DAG_DRY_RUN is True, log the graph and do not run anything.
+        Args:
+            @param config METplusConfig object
+            @param processes list of wrapper instances
+            @returns True on success, False if the graph could not be built
+    """
+    # import here to avoid circular import with met_util
+    from .met_util import get_run_time_list
+
+    time_list = get_run_time_list(config)
+    if time_list is None:
+        return False
+
+    tasks = build_task_graph(processes, time_list)
+    log_task_graph(config, tasks)
+
+    if config.getbool('config', 'LOOP_DAG_DRY_RUN', False):
+        config.logger.info("LOOP_DAG_DRY_RUN is True. Not running tasks")
+        return True
+
+    num_workers = parallel_util.get_num_workers(config)
+    run_task_graph(config, processes, tasks, num_workers)
+    return True
+
+def _run_task(config, processes, input_dict):
+    """!Run the wrapper for a task
+        Args:
+            @param config METplusConfig object
+            @param processes list containing the wrapper instance to run
+            @param input_dict time dictionary to process or None to run
+             over all times
+    """
+    # import here to avoid circular import with met_util
+    from .met_util import run_processes_at_time
+
+    # tasks that this task depends on may have written files since the
+    # directories were last checked
+    path_cache.invalidate_path_cache()
+
+    if input_dict is None:
+        for process in processes:
+            process.run_all_times()
+            process.wait_for_commands()
+        return
+
+    run_processes_at_time(config, processes, input_dict)
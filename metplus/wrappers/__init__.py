@@ -1,9 +1,11 @@
+import sys
 from os import environ
 from inspect import isclass
 from pkgutil import iter_modules
 from pathlib import Path
 from importlib import import_module
 from ..util.metplus_check import plot_wrappers_are_enabled
+from ..util.met_util import camel_to_underscore
 
 # these wrappers should not be imported if plotting is disabled
 plotting_wrappers = [
@@ -25,15 +27,20 @@ for module_name, attribute_name in parent_classes.items():
     attribute = getattr(module, attribute_name)
     globals()[attribute_name] = attribute
 
-# iterate through the modules in the current package
+# names of the modules in the current package
 package_dir = Path(__file__).resolve().parent
-for (_, module_name, _) in iter_modules([package_dir]):
+wrapper_modules = [module_name for (_, module_name, _)
+                   in iter_modules([package_dir])]
 
+def _import_wrapper_module(module_name):
+    """!Import a wrapper module and add the wrapper classes that it contains
+        to this package's variables
+        @param module_name name of the module in this package to import
+    """
     # skip import of plot wrappers if they are not enabled
     if not plot_wrappers_are_enabled(environ) and module_name in plotting_wrappers:
-        continue
+        return
 
-    # import the module and iterate through its attributes
     module = import_module(f"{__name__}.{module_name}")
     for attribute_name in dir(module):
         attribute = getattr(module, attribute_name)
@@ -41,3 +48,34 @@ for (_, module_name, _) in iter_modules([package_dir]):
         if isclass(attribute) and attribute_name not in globals() and attribute_name.endswith("Wrapper"):
             # Add the class to this package's variables
             globals()[attribute_name] = attribute
+
+def __getattr__(name):
+    """!Import wrapper classes the first time they are requested so that
+        only the wrappers that are used (and the packages they depend on,
+        i.e. pandas or matplotlib) are loaded, i.e. GridStatWrapper is
+        imported from grid_stat_wrapper. If the wrapper is not found in the
+        module with the matching name, all wrapper modules are imported.
+        @param name name of the wrapper class to get
+        @returns wrapper class
+    """
+    if not name.endswith("Wrapper"):
+        raise AttributeError(f"module {__name__} has no attribute {name}")
+
+    module_name = camel_to_underscore(name)
+    if module_name in wrapper_modules:
+        _import_wrapper_module(module_name)
+
+    if name not in globals():
+        for module_name in wrapper_modules:
+            _import_wrapper_module(module_name)
+
+    if name not in globals():
+        raise AttributeError(f"module {__name__} has no attribute {name}")
+
+    return globals()[name]
+
+# module __getattr__ (PEP 562) requires Python 3.7, so import all of the
+# wrapper modules when the package is loaded on older versions
+if sys.version_info < (3, 7):
+    for module_name in wrapper_modules:
+        _import_wrapper_module(module_name)
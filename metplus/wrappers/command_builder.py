@@ -14,11 +14,19 @@ import sys
 import glob
 from datetime import datetime
 from abc import ABCMeta
-from inspect import getframeinfo, stack
 
 from .command_runner import CommandRunner
 from ..util import met_util as util
 from ..util import do_string_sub, ti_calculate, get_seconds_from_string
+from ..util import get_compiled_template
+from ..util import get_directory_index
+from ..util import path_cache
+from ..util import parallel_util
+from ..util import log_util
+from ..util import error_summary
+from ..util import output_reuse
+from ..util.env_util import WrapperEnvironment
+from ..util.field_plan import FieldPlan
 
 # pylint:disable=pointless-string-statement
 '''!@namespace CommandBuilder
@@ -35,6 +43,11 @@ class CommandBuilder:
     """
     __metaclass__ = ABCMeta
 
+    # set to True in wrappers that do not read the output of the commands
+    # that they run until after the run time is processed, so that the
+    # commands can run at the same time if COMMAND_RUNNER_WORKERS > 1
+    run_commands_concurrently = False
+
     def __init__(self, config, logger):
         self.isOK = True
         self.errors = 0
@@ -49,14 +62,32 @@ class CommandBuilder:
         self.outfile = ""
         self.param = ""
         self.all_commands = []
-        self.env = os.environ.copy()
-        if hasattr(config, 'env'):
-            self.env = config.env
+
+        # environment the wrapper was started with is copied once and the
+        # variables set by the wrapper are kept in a separate layer
+        self.env = WrapperEnvironment(getattr(config, 'env', os.environ))
+
+        # field information read from the config keyed by data type and
+        # MET tool name, see get_field_plan
+        self.field_plans = {}
+
+        # time information of the run time that is being processed, used to
+        # identify the commands that are run in the command usage summary
+        self.current_time_info = None
+
         self.c_dict = self.create_c_dict()
         self.check_for_externals()
 
-        self.cmdrunner = CommandRunner(self.config, logger=self.logger,
-                                       verbose=self.c_dict['VERBOSITY'])
+        self.cmdrunner = CommandRunner(
+            self.config, logger=self.logger,
+            verbose=self.c_dict['VERBOSITY'],
+            workers=self.c_dict['COMMAND_RUNNER_WORKERS']
+        )
+
+        # commands that were submitted to run in the background by build,
+        # the command string, and output to store for reuse for each,
+        # see wait_for_commands
+        self.pending_commands = []
 
         # if env MET_TMP_DIR was not set, set it to config TMP_DIR
         if 'MET_TMP_DIR' not in self.env:
@@ -64,6 +95,26 @@ class CommandBuilder:
 
         self.clear()
 
+    def get_field_plan(self, data_type=None, met_tool=None):
+        """!Get field information read from the [FCST/OBS/BOTH/ENS]_VAR<n>
+            variables. The config is only read the first time the field
+            information is requested for a data type and MET tool. Call
+            get_var_list on the result to get the fields for a run time.
+            Args:
+                @param data_type data type to find. Can be FCST, OBS, or ENS.
+                 If not set, get FCST/OBS/BOTH
+                @param met_tool optional name of MET tool to look for wrapper
+                 specific var items
+                @returns FieldPlan object
+        """
+        key = (data_type, met_tool)
+        field_plan = self.field_plans.get(key)
+        if field_plan is None:
+            field_plan = FieldPlan(self.config, data_type, met_tool)
+            self.field_plans[key] = field_plan
+
+        return field_plan
+
     def create_c_dict(self):
         c_dict = dict()
         # set skip if output exists to False for all wrappers
@@ -88,6 +139,23 @@ class CommandBuilder:
                                 False)
             )
 
+        c_dict['FILE_WINDOW_INDEX_DIR'] = (
+            self.config.getdir('FILE_WINDOW_INDEX_DIR', '')
+        )
+
+        c_dict['OUTPUT_REUSE_DIR'] = self.config.getdir('OUTPUT_REUSE_DIR', '')
+        c_dict['OUTPUT_REUSE_CHECKSUM'] = (
+            self.config.getbool('config', 'OUTPUT_REUSE_CHECKSUM', False)
+        )
+
+        # number of commands to run at the same time
+        c_dict['COMMAND_RUNNER_WORKERS'] = 1
+        if self.run_commands_concurrently:
+            c_dict['COMMAND_RUNNER_WORKERS'] = (
+                parallel_util.get_num_workers(self.config,
+                                              'COMMAND_RUNNER_WORKERS', 1)
+            )
+
         return c_dict
 
     def clear(self):
@@ -118,27 +186,61 @@ class CommandBuilder:
         self.print_all_envs()
 
     def log_error(self, error_string):
-        caller = getframeinfo(stack()[1][0])
-        self.logger.error(f"({os.path.basename(caller.filename)}:{caller.lineno}) {error_string}")
+        file_name, line_number = error_summary.get_caller_location()
+        self.logger.error(f"({file_name}:{line_number}) {error_string}")
+        error_summary.record_error(self.__class__.__name__.replace('Wrapper', ''),
+                                   error_string, file_name, line_number)
         self.errors += 1
         self.isOK = False
 
+    def get_user_env_templates(self):
+        """!Read the [user_env_vars] section of the config and sort the
+            variables into values that can be set as they are and templates
+            that must be filled in for each run time. The values are read
+            each time because they can reference config variables that
+            change during the run, i.e. CURRENT_FCST_NAME. Reading them is
+            cheap because getraw and get_compiled_template cache their
+            results.
+            @returns tuple of a dictionary of values that do not contain any
+             template tags and a dictionary of CompiledTemplate objects
+             for values that do
+        """
+        if 'user_env_vars' not in self.config.sections():
+            self.config.add_section('user_env_vars')
+
+        static_values = {}
+        time_templates = {}
+        for env_var in self.config.keys('user_env_vars'):
+            template = get_compiled_template(
+                self.config.getraw('user_env_vars', env_var)
+            )
+            if template.has_tags:
+                time_templates[env_var] = template
+            else:
+                static_values[env_var] = template.template
+
+        return static_values, time_templates
+
     def set_user_environment(self, time_info=None):
         """!Set environment variables defined in [user_env_vars] section of config
         """
+        if time_info is not None:
+            self.current_time_info = time_info
+
+        static_values, time_templates = self.get_user_env_templates()
+        for env_var, value in static_values.items():
+            self.add_env_var(env_var, value)
+
+        if not time_templates:
+            return
+
+        # perform string substitution on each variable that contains tags
         if time_info is None:
             time_info = {'now': datetime.strptime(self.config.getstr('config', 'CLOCK_TIME'),
                                                   '%Y%m%d%H%M%S')}
 
-        if 'user_env_vars' not in self.config.sections():
-            self.config.add_section('user_env_vars')
-
-        for env_var in self.config.keys('user_env_vars'):
-            # perform string substitution on each variable
-            raw_env_var_value = self.config.getraw('user_env_vars', env_var)
-            env_var_value = do_string_sub(raw_env_var_value,
-                                          **time_info)
-            self.add_env_var(env_var, env_var_value)
+        for env_var, template in time_templates.items():
+            self.add_env_var(env_var, template.fill(**time_info))
 
     def format_regrid_to_grid(self, to_grid):
         to_grid = to_grid.strip('"')
@@ -160,7 +262,11 @@ class CommandBuilder:
                          self.format_regrid_to_grid(to_grid))
 
     def print_all_envs(self):
-        # send environment variables to logger
+        # send environment variables to logger. Skip building the output
+        # if DEBUG messages will not be written
+        if not log_util.is_debug_enabled(self.logger):
+            return
+
         self.logger.debug("ENVIRONMENT FOR NEXT COMMAND: ")
         for env_item in sorted(self.env_list):
             self.print_env_item(env_item)
@@ -249,50 +355,40 @@ class CommandBuilder:
     def print_env(self):
         """!Print all environment variables set for this application
         """
+        if not log_util.is_debug_enabled(self.logger):
+            return
+
         for env_name in self.env:
             self.logger.debug(env_name + '="' + self.env[env_name] + '"')
 
     def print_env_copy(self, var_list=None):
-        self.logger.debug(self.get_env_copy(var_list))
+        if log_util.is_debug_enabled(self.logger):
+            self.logger.debug(self.get_env_copy(var_list))
 
     def get_env_copy(self, var_list=None):
         """!Print list of environment variables that can be easily
         copied into terminal
         """
-        out = ""
         if not var_list:
             var_list = self.env_list
 
-        if 'user_env_vars' in self.config.sections():
-            for user_var in self.config.keys('user_env_vars'):
-                var_list.add(user_var)
-
+        # the text is only built again if a variable changed
+        user_vars = [name for names in self.get_user_env_templates()
+                     for name in names]
         shell = self.config.getstr('config', 'USER_SHELL', 'bash').lower()
-        for var in sorted(var_list):
-            if shell == 'csh':
-                # TODO: Complex environment variables that have special characters
-                # like { or } will not be copyable in csh until modifications are
-                # made to the formatting of the setenv calls
-                clean_env = self.env[var].replace('"', '"\\""')
-                line = 'setenv ' + var + ' "' + clean_env + '"'
-            else:
-                # insert escape characters to allow export command to be copyable
-                clean_env = self.env[var].replace('"', r'\"').replace(r'\\"', r'\\\"')
-                line = 'export ' + var + '="' + clean_env + '"'
-
-            out += line + '; '
-
-        return out
+        return self.env.get_copyable(set(var_list).union(user_vars), shell)
 
     def print_env_item(self, item):
         """!Print single environment variable in the log file
         """
-        self.logger.debug(item + "=" + self.env[item])
+        if log_util.is_debug_enabled(self.logger):
+            self.logger.debug(item + "=" + self.env[item])
 
     def print_user_env_items(self):
         """!Prints user environment variables in the log file
         """
-        for k in self.config.keys('user_env_vars') + ['MET_TMP_DIR']:
+        static_values, time_templates = self.get_user_env_templates()
+        for k in list(static_values) + list(time_templates) + ['MET_TMP_DIR']:
             self.print_env_item(k)
 
     def handle_fcst_and_obs_field(self, gen_name, fcst_name, obs_name, default=None, sec='config'):
@@ -340,6 +436,35 @@ class CommandBuilder:
         self.logger.warning('Using default values for {}'.format(gen_name))
         return default, default
 
+    def get_prefetch_files(self, input_dict):
+        """! Get list of input files that may be needed to process a run time
+             so that compressed files can be decompressed in the background
+             before they are needed. Files are found by filling in each input
+             template for each forecast lead. Templates that require values
+             other than time information are skipped.
+              Args:
+                @param input_dict time dictionary for the run time
+                @returns list of file paths
+        """
+        files = []
+        lead_seq = util.get_lead_sequence(self.config, input_dict)
+        for key, template in self.c_dict.items():
+            if not key.endswith('INPUT_TEMPLATE') or not template:
+                continue
+
+            data_dir = self.c_dict.get(key.replace('TEMPLATE', 'DIR'), '')
+            for lead in lead_seq:
+                time_info = ti_calculate(dict(input_dict, lead=lead))
+                for single_template in util.getlist(template):
+                    try:
+                        filename = do_string_sub(single_template, **time_info)
+                    except (TypeError, ValueError):
+                        continue
+
+                    files.append(os.path.join(data_dir, filename))
+
+        return files
+
     def find_model(self, time_info, var_info=None, mandatory=True, return_list=False):
         """! Finds the model file to compare
               Args:
@@ -542,7 +667,7 @@ class CommandBuilder:
 
                 return None
 
-            if os.path.isdir(processed_path):
+            if path_cache.get_path_cache(self.config).isdir(processed_path):
                 self.logger.debug(f"Found directory: {processed_path}")
             else:
                 self.logger.debug(f"Found file: {processed_path}")
@@ -563,7 +688,6 @@ class CommandBuilder:
         valid_seconds = int(datetime.strptime(valid_time, "%Y%m%d%H%M%S").strftime("%s"))
         # get time of each file, compare to valid time, save best within range
         closest_files = []
-        closest_time = 9999999
 
         # get range of times that will be considered
         valid_range_lower = self.c_dict.get(data_type + 'FILE_WINDOW_BEGIN', 0)
@@ -581,40 +705,25 @@ class CommandBuilder:
             self.log_error('Must set INPUT_DIR if looking for files within a time window')
             return None
 
-        # step through all files under input directory in sorted order
-        for dirpath, _, all_files in os.walk(data_dir):
-            for filename in sorted(all_files):
-                fullpath = os.path.join(dirpath, filename)
-
-                # remove input data directory to get relative path
-                rel_path = fullpath.replace(f'{data_dir}/', "")
-                # extract time information from relative path using template
-                file_time_info = util.get_time_from_file(rel_path, template, self.logger)
-                if file_time_info is None:
-                    continue
-
-                # get valid time and check if it is within the time range
-                file_valid_time = file_time_info['valid'].strftime("%Y%m%d%H%M%S")
-                # skip if could not extract valid time
-                if not file_valid_time:
-                    continue
-                file_valid_dt = datetime.strptime(file_valid_time, "%Y%m%d%H%M%S")
-                file_valid_seconds = int(file_valid_dt.strftime("%s"))
-                # skip if outside time range
-                if file_valid_seconds < lower_limit or file_valid_seconds > upper_limit:
-                    continue
-
-                # if only 1 file is allowed, check if file is
-                # closer to desired valid time than previous match
-                if not self.c_dict.get('ALLOW_MULTIPLE_FILES', False):
-                    diff = abs(valid_seconds - file_valid_seconds)
-                    if diff < closest_time:
-                        closest_time = diff
-                        del closest_files[:]
-                        closest_files.append(fullpath)
-                # if multiple files are allowed, get all files within range
-                else:
-                    closest_files.append(fullpath)
+        # get files in range from index of files under input directory
+        # the index is built once and reused for other run times
+        index_dir = self.c_dict.get('FILE_WINDOW_INDEX_DIR')
+        index = get_directory_index(data_dir, template,
+                                    index_dir=index_dir,
+                                    logger=self.logger)
+        files_in_range = index.find(lower_limit, upper_limit)
+
+        # if only 1 file is allowed, get file closest to desired valid time
+        # use the earlier file if two files are equally close
+        if files_in_range and not self.c_dict.get('ALLOW_MULTIPLE_FILES', False):
+            _, closest_file = min(
+                files_in_range,
+                key=lambda item: abs(valid_seconds - item[0])
+            )
+            closest_files.append(closest_file)
+        # if multiple files are allowed, get all files within range
+        else:
+            closest_files.extend([item[1] for item in files_in_range])
 
         if not closest_files:
             msg = f"Could not find {data_type}INPUT files under {data_dir} within range " +\
@@ -1018,24 +1127,129 @@ class CommandBuilder:
     # Make sure they have SET THE self.app_name in the subclasses constructor.
     # see regrid_data_plane_wrapper.py as an example of how to set.
     def build(self):
-        """!Build and run command"""
+        """!Build and run command. If the wrapper can run commands
+            concurrently and COMMAND_RUNNER_WORKERS is greater than 1, the
+            command is started in the background and True is returned
+            without waiting for it to finish. Call wait_for_commands to
+            wait for the commands and report any that failed.
+            @returns True if command succeeded or was started, False if not
+        """
         cmd = self.get_command()
         if cmd is None:
             return False
 
+        reuse_task = self.get_output_reuse_task(cmd)
+        if reuse_task is not None and reuse_task.restore():
+            return True
+
         # add command to list of all commands run
         self.all_commands.append(cmd)
 
+        if self.c_dict['COMMAND_RUNNER_WORKERS'] > 1:
+            job = self.cmdrunner.submit_cmd(cmd, self.env,
+                                            app_name=self.app_name,
+                                            copyable_env=self.get_env_copy,
+                                            command_info=self.get_command_info())
+            if job is not None:
+                self.pending_commands.append((job, cmd, reuse_task))
+            return True
+
         ret, out_cmd = self.cmdrunner.run_cmd(cmd, self.env, app_name=self.app_name,
-                                              copyable_env=self.get_env_copy())
+                                              copyable_env=self.get_env_copy,
+                                              command_info=self.get_command_info())
         if ret != 0:
-            self.log_error(f"MET command returned a non-zero return code: {cmd}")
-            self.logger.info("Check the logfile for more information on why it failed: "
-                             f"{self.config.getstr('config', 'LOG_METPLUS')}")
+            self.log_command_failure(cmd)
             return False
 
+        if reuse_task is not None:
+            reuse_task.save()
+
         return True
 
+    def get_output_reuse_task(self, cmd):
+        """!Get the output of the command that can be reused if the same
+            command was already run with the same input files, MET config
+            file, and environment. Output is only reused if OUTPUT_REUSE_DIR
+            is set and the wrapper writes a single output file.
+            Args:
+                @param cmd command that will be run
+                @returns OutputReuseTask or None if output cannot be reused
+        """
+        if not self.c_dict.get('OUTPUT_REUSE_DIR') or not self.outfile:
+            return None
+
+        config_files = [path for path in (self.param,
+                                          self.c_dict.get('CONFIG_FILE'))
+                        if path]
+        return output_reuse.get_reuse_task(
+            self.c_dict['OUTPUT_REUSE_DIR'],
+            cmd,
+            self.get_output_path(),
+            input_paths=[path for path in self.infiles
+                         if isinstance(path, str)],
+            config_files=config_files,
+            env=self.env.overlay,
+            use_checksum=self.c_dict.get('OUTPUT_REUSE_CHECKSUM', False),
+            logger=self.logger,
+        )
+
+    def wait_for_commands(self):
+        """!Wait for the commands that were started in the background by
+            build to finish and log an error for each command that failed
+            @returns True if all of the commands succeeded, False if not
+        """
+        if not self.pending_commands:
+            return True
+
+        pending_commands = self.pending_commands
+        self.pending_commands = []
+        statuses = self.cmdrunner.wait_for_cmds(
+            [job for job, _, _ in pending_commands]
+        )
+
+        success = True
+        for (_, cmd, reuse_task), ret in zip(pending_commands, statuses):
+            if ret != 0:
+                self.log_command_failure(cmd)
+                success = False
+            elif reuse_task is not None:
+                reuse_task.save()
+
+        return success
+
+    def log_command_failure(self, cmd):
+        """!Log an error for a MET command that failed
+            @param cmd command that was run
+        """
+        self.log_error(f"MET command returned a non-zero return code: {cmd}")
+        self.logger.info("Check the logfile for more information on why it failed: "
+                         f"{self.config.getstr('config', 'LOG_METPLUS')}")
+
+    def get_command_info(self):
+        """!Get information used to identify the command that is run in the
+            command usage summary, including the wrapper, run time, forecast
+            lead, and field if the wrapper is run once for each field
+            @returns dictionary with wrapper, init, valid, lead, and field
+        """
+        command_info = {'wrapper': self.app_name}
+
+        time_info = self.current_time_info
+        if time_info:
+            command_info['init'] = time_info.get('init_fmt')
+            command_info['valid'] = time_info.get('valid_fmt')
+            command_info['lead'] = time_info.get('lead_seconds')
+
+        var_info = self.c_dict.get('CURRENT_VAR_INFO')
+        if var_info and self.c_dict.get('ONCE_PER_FIELD', False):
+            for data_type in ('fcst', 'obs'):
+                name = var_info.get(f'{data_type}_name')
+                if name:
+                    level = var_info.get(f'{data_type}_level')
+                    command_info['field'] = f'{name}/{level}' if level else name
+                    break
+
+        return command_info
+
     # argument needed to match call
     # pylint:disable=unused-argument
     def run_at_time(self, input_dict):
@@ -30,28 +30,54 @@ Output Files: N/A
 # It creates a produtil Runnable object
 # It determines where to redirect the output
 #   METplus log file, MET logs, or TTY
-# It runs the Runnable object
+# It runs the Runnable object, or submits it to a pool of background
+# jobs so that several commands can run at the same time. The output of
+# a background job is sent to its own file and appended to the log when
+# the job finishes so the output of each command is kept together.
 #
 
 import os
-from produtil.run import exe, run
+import time
+import shutil
+import itertools
+from produtil.run import exe, runrusage, JobPool
 import shlex
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from ..util import path_cache
+from ..util import command_usage
+from ..util import log_util
+from ..util.env_util import WrapperEnvironment
+
+# used to name the files that hold the output of background jobs
+_OUTPUT_FILE_COUNTER = itertools.count()
 
 class CommandRunner(object):
     """! Class for Creating and Running External Programs
     """
-    def __init__(self, config, logger=None, verbose=2):
+    def __init__(self, config, logger=None, verbose=2, workers=1):
         """!Class for Creating and Running External Programs.
             It was intended to handle the MET executables but
-            can be used by other executables."""
+            can be used by other executables.
+            @param workers maximum number of commands submitted with
+             submit_cmd that can run at the same time"""
         self.logger = logger
         self.config = config
         self.verbose = verbose
+        self.workers = workers
         self.log_command_to_met_log = False
 
+        # pool of background jobs used by submit_cmd, created when the
+        # first command is submitted
+        self.job_pool = None
+
+        # information used to record the usage of each submitted command
+        # after it finishes, keyed by the produtil BackgroundJob
+        self.submitted_cmds = {}
+
     def run_cmd(self, cmd, env=None, ismetcmd = True, app_name=None, run_inshell=False,
-                log_theoutput=False, copyable_env=None, **kwargs):
+                log_theoutput=False, copyable_env=None, command_info=None,
+                **kwargs):
         """!The command cmd is a string which is converted to a produtil
         exe Runner object and than run. Output of the command may also
         be redirected to either METplus log, MET log, or TTY.
@@ -76,17 +102,184 @@ class CommandRunner(object):
             @param log_theoutput: Used only when ismetcmd=False, will redirect
             the stderr and stdout to a the METplus log file or tty.
             DO Not set to True if the command is redirecting output to a file.
+            @param copyable_env: Optional environment variables formatted so
+            they can be copied into a shell, or a function that returns them.
+            Written to the MET log file if MET output is sent to its own log.
+            @param command_info: Optional dictionary with the wrapper name,
+            init, valid, lead, and field to record with the time and
+            resources used to run the command.
             @param kwargs Other options sent to the produtil Run constructor
         """
 
         if cmd is None:
             return cmd
 
+        cmd_exe, the_exe, app_name, _ = self.get_runner(cmd, env, ismetcmd,
+                                                        app_name, run_inshell,
+                                                        log_theoutput,
+                                                        copyable_env)
+
+        ret = 0
+        # run app unless DO_NOT_RUN_EXE is set to True
+        if not self.config.getbool('config', 'DO_NOT_RUN_EXE', False):
+            # get current time to calculate total time to run command
+            start_cmd_time = datetime.now()
+            start_perf_time = time.perf_counter()
+            rusage_list = None
+
+            # run command
+            try:
+                ret, rusage_list = runrusage(cmd_exe, **kwargs)
+            except:
+                ret = -1
+            else:
+                # calculate time to run
+                end_cmd_time = datetime.now()
+                total_cmd_time = end_cmd_time - start_cmd_time
+                self.logger.debug(f'Finished running {the_exe} in {total_cmd_time}')
+
+            # record time and resources used to run the command
+            command_usage.record_command(
+                cmd, app_name or os.path.basename(the_exe), start_cmd_time,
+                time.perf_counter() - start_perf_time, ret,
+                rusage_list=rusage_list, command_info=command_info
+            )
+
+            # command may have written files that will be read later
+            path_cache.invalidate_path_cache()
+
+        return (ret, cmd)
+
+    def submit_cmd(self, cmd, env=None, ismetcmd=True, app_name=None,
+                   run_inshell=False, log_theoutput=False, copyable_env=None,
+                   command_info=None, timeout=None):
+        """!Start running a command in the background and return without
+        waiting for it to finish. The arguments are the same as run_cmd.
+        At most self.workers commands run at the same time. Commands that
+        are submitted when that many are running start in order when the
+        running commands finish. The time and resources used are recorded
+        when wait_for_cmds finds that the command finished. Output that is
+        sent to a log file is written to a separate file while the command
+        runs and appended to the log after it finishes.
+
+        Args:
+            @param timeout maximum number of seconds the command may run
+            before it is terminated, or None for no limit
+            @returns produtil.run.BackgroundJob for the command. Call
+            result() to wait for the exit status. Returns None if cmd is
+            None or DO_NOT_RUN_EXE is True
+        """
+        if cmd is None:
+            return None
+
+        cmd_exe, the_exe, app_name, log_output = (
+            self.get_runner(cmd, env, ismetcmd, app_name, run_inshell,
+                            log_theoutput, copyable_env, defer_output=True)
+        )
+
+        if self.config.getbool('config', 'DO_NOT_RUN_EXE', False):
+            return None
+
+        if self.job_pool is None:
+            self.job_pool = JobPool(max_jobs=self.workers)
+
+        job = self.job_pool.submit(cmd_exe, timeout=timeout)
+        self.submitted_cmds[job] = (cmd, app_name or os.path.basename(the_exe),
+                                    datetime.now(), command_info, log_output)
+        return job
+
+    def wait_for_cmds(self, jobs, timeout=None):
+        """!Wait for commands started with submit_cmd to finish.
+
+        Args:
+            @param jobs list of produtil.run.BackgroundJob objects from
+            submit_cmd. Items that are None are skipped
+            @param timeout maximum number of seconds to wait, or None to wait
+            until all of the commands finish
+            @returns list of exit status for each job in the same order, 0
+            if the job was None, -1 if the command could not be run or was
+            cancelled, or None if it did not finish within the timeout
+        """
+        jobs = list(jobs)
+        running = [job for job in jobs if job is not None]
+        if self.job_pool is not None and running:
+            self.job_pool.wait(running, timeout=timeout)
+
+        statuses = []
+        for job in jobs:
+            if job is None:
+                statuses.append(0)
+            elif not job.done():
+                statuses.append(None)
+            elif job.future.cancelled() or job.future.exception():
+                statuses.append(-1)
+            else:
+                status = job.poll()
+                statuses.append(-1 if status is None else status)
+
+            if job is not None and statuses[-1] is not None:
+                self.record_submitted_cmd(job, statuses[-1])
+
+        return statuses
+
+    def record_submitted_cmd(self, job, ret):
+        """!Record the time and resources used by a command that was started
+        with submit_cmd after it finished
+
+        Args:
+            @param job produtil.run.BackgroundJob for the command
+            @param ret exit status of the command
+        """
+        if job not in self.submitted_cmds:
+            return
+
+        cmd, executable, start_cmd_time, command_info, log_output = (
+            self.submitted_cmds.pop(job)
+        )
+        if log_output is not None:
+            self.append_cmd_output(*log_output)
+
+        wall_seconds = job.wall_seconds
+        if wall_seconds is None:
+            wall_seconds = 0
+        else:
+            self.logger.debug(f'Finished running {executable} in '
+                              f'{timedelta(seconds=wall_seconds)}')
+
+        command_usage.record_command(cmd, executable, start_cmd_time,
+                                     wall_seconds, ret,
+                                     rusage_list=job.rusage(),
+                                     command_info=command_info)
+
+        # command may have written files that will be read later
+        path_cache.invalidate_path_cache()
+
+    def get_runner(self, cmd, env=None, ismetcmd=True, app_name=None,
+                   run_inshell=False, log_theoutput=False, copyable_env=None,
+                   defer_output=False):
+        """!Create the produtil Runner object for a command and set up the
+        destination of its output. See run_cmd for a description of the
+        other arguments.
+
+        Args:
+            @param defer_output if True, output that would be appended to a
+            log file is sent to a separate file instead so that it is not
+            mixed with the output of other commands that run at the same
+            time. Call append_cmd_output after the command finishes.
+            @returns tuple of the Runner object, the executable that will be
+            run, the application name, and a tuple of the log file, the
+            file that the output is sent to, and the text to write before the
+            output if the output was deferred or None if it was not
+        """
         # if env not set, use os.environ
         if env is None:
             env = os.environ
+        elif isinstance(env, WrapperEnvironment):
+            env = env.to_dict()
 
         self.logger.info("COMMAND: %s" % cmd)
+        log_dest = None
+        log_output = None
 
         if ismetcmd:
 
@@ -122,22 +315,19 @@ class CommandRunner(object):
             if log_dest:
                 self.logger.debug("app_name is: %s, output sent to: %s" % (app_name, log_dest))
 
-                with open(log_dest, 'a+') as log_file_handle:
-                    # if logging MET command to its own log file, add command that was run to that log
-                    if self.log_command_to_met_log:
-                        # if environment variables were set and available, write them to MET tool log
-                        if copyable_env:
-                            log_file_handle.write("\nCOPYABLE ENVIRONMENT FOR NEXT COMMAND:\n")
-                            log_file_handle.write(f"{copyable_env}\n\n")
-                        else:
-                            log_file_handle.write('\n')
-
-                        log_file_handle.write(f"COMMAND:\n{cmd}\n\n")
-
-                    # write line to designate where MET tool output starts
-                    log_file_handle.write("MET OUTPUT:\n")
+                # the environment is read now because it may change before
+                # deferred output is written
+                header = self.get_log_header(cmd, copyable_env,
+                                             include_command=defer_output)
+                if defer_output:
+                    output_path = self.get_job_output_path(log_dest)
+                    log_output = (log_dest, output_path, header)
+                    cmd_exe = exe(the_exe)[the_args].env(**env).err2out() > output_path
+                else:
+                    with open(log_dest, 'a+') as log_file_handle:
+                        log_file_handle.write(header)
 
-                cmd_exe = exe(the_exe)[the_args].env(**env).err2out() >> log_dest
+                    cmd_exe = exe(the_exe)[the_args].env(**env).err2out() >> log_dest
             else:
                 cmd_exe = exe(the_exe)[the_args].env(**env).err2out()
 
@@ -159,7 +349,12 @@ class CommandRunner(object):
 
                 if log_theoutput:
                     log_dest = self.cmdlog_destination()
-                    cmd_exe = exe('sh')['-c', cmd].env(**env).err2out() >> log_dest
+                    if defer_output and log_dest:
+                        output_path = self.get_job_output_path(log_dest)
+                        log_output = (log_dest, output_path, '')
+                        cmd_exe = exe('sh')['-c', cmd].env(**env).err2out() > output_path
+                    else:
+                        cmd_exe = exe('sh')['-c', cmd].env(**env).err2out() >> log_dest
                 else:
                     cmd_exe = exe('sh')['-c', cmd].env(**env)
 
@@ -168,28 +363,92 @@ class CommandRunner(object):
                 the_args = shlex.split(cmd)[1:]
                 if log_theoutput:
                     log_dest = self.cmdlog_destination()
-                    cmd_exe = exe(the_exe)[the_args].env(**env).err2out() >> log_dest
+                    if defer_output and log_dest:
+                        output_path = self.get_job_output_path(log_dest)
+                        log_output = (log_dest, output_path, '')
+                        cmd_exe = exe(the_exe)[the_args].env(**env).err2out() > output_path
+                    else:
+                        cmd_exe = exe(the_exe)[the_args].env(**env).err2out() >> log_dest
                 else:
                     cmd_exe = exe(the_exe)[the_args].env(**env)
 
-        ret = 0
-        # run app unless DO_NOT_RUN_EXE is set to True
-        if not self.config.getbool('config', 'DO_NOT_RUN_EXE', False):
-            # get current time to calculate total time to run command
-            start_cmd_time = datetime.now()
+        # make sure log output is written before the command appends its
+        # output to the same log file
+        if log_dest and log_output is None:
+            log_util.flush_log_handlers(self.logger)
 
-            # run command
-            try:
-                ret = run(cmd_exe, **kwargs)
-            except:
-                ret = -1
+        return cmd_exe, the_exe, app_name, log_output
+
+    def get_log_header(self, cmd, copyable_env=None, include_command=False):
+        """!Get the text written to the log file before the output of a MET
+        command. If the output is sent to the MET tool log file, the
+        environment and command are included.
+
+        Args:
+            @param cmd command that is run
+            @param copyable_env environment variables formatted so they can
+            be copied into a shell, or a function that returns them
+            @param include_command if True, include the command even if the
+            output is sent to the METplus log file
+            @returns text to write to the log file
+        """
+        header = ''
+        # if logging MET command to its own log file, add command that was run to that log
+        if self.log_command_to_met_log:
+            # if environment variables were set and available, write them to MET tool log
+            # copyable_env may be a function so the text is
+            # only built when it is written
+            if callable(copyable_env):
+                copyable_env = copyable_env()
+            if copyable_env:
+                header += "\nCOPYABLE ENVIRONMENT FOR NEXT COMMAND:\n"
+                header += f"{copyable_env}\n\n"
             else:
-                # calculate time to run
-                end_cmd_time = datetime.now()
-                total_cmd_time = end_cmd_time - start_cmd_time
-                self.logger.debug(f'Finished running {the_exe} in {total_cmd_time}')
+                header += '\n'
 
-        return (ret, cmd)
+            header += f"COMMAND:\n{cmd}\n\n"
+        elif include_command:
+            header += f"\nCOMMAND:\n{cmd}\n\n"
+
+        # write line to designate where MET tool output starts
+        header += "MET OUTPUT:\n"
+        return header
+
+    @staticmethod
+    def get_job_output_path(log_dest):
+        """!Get a path in the same directory as a log file to send the
+        output of a background job before it is appended to the log
+
+        Args:
+            @param log_dest log file that the output will be appended to
+            @returns path to send the output
+        """
+        return (f'{log_dest}.{os.getpid()}.'
+                f'{next(_OUTPUT_FILE_COUNTER)}.tmp')
+
+    def append_cmd_output(self, log_dest, output_path, header):
+        """!Append the output of a command that finished to the log file
+        after the header and remove the file that held the output
+
+        Args:
+            @param log_dest log file to append to
+            @param output_path file that the output was sent to
+            @param header text to write before the output
+        """
+        # make sure log output is written before the command output
+        log_util.flush_log_handlers(self.logger)
+        with open(log_dest, 'ab') as log_file_handle:
+            log_file_handle.write(header.encode('utf-8'))
+            try:
+                with open(output_path, 'rb') as output_file:
+                    shutil.copyfileobj(output_file, log_file_handle)
+            except OSError:
+                pass
+
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass
 
     # TODO: Refactor seriesbylead.
     # For now we are back to running through a shell.
@@ -33,6 +33,10 @@ that reformat gridded data
     # types of climatology values that should be checked and set
     climo_types = ['MEAN', 'STDEV']
 
+    # each command writes its own output, so the commands for a run time
+    # can run at the same time
+    run_commands_concurrently = True
+
     def __init__(self, config, logger):
         # set app_name if not set by child class to allow tests to run on this wrapper
         if not hasattr(self, 'app_name'):
@@ -198,9 +202,9 @@ that reformat gridded data
         # get verification mask if available
         self.get_verification_mask(time_info)
 
-        var_list = util.parse_var_list(self.config,
-                                       time_info,
-                                       met_tool=self.app_name)
+        var_list = self.get_field_plan(
+            met_tool=self.app_name
+        ).get_var_list(time_info)
 
         if not var_list and not self.c_dict.get('VAR_LIST_OPTIONAL', False):
             self.log_error('No input fields were specified. You must set '
@@ -277,9 +281,9 @@ that reformat gridded data
               Args:
                 @param time_info dictionary containing timing information
         """
-        var_list = util.parse_var_list(self.config,
-                                       time_info,
-                                       met_tool=self.app_name)
+        var_list = self.get_field_plan(
+            met_tool=self.app_name
+        ).get_var_list(time_info)
 
         # get model from first var to compare
         model_path = self.find_model(time_info,
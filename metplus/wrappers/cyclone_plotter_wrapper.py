@@ -10,12 +10,19 @@ import datetime
 import re
 import sys
 import collections
+import json
+import hashlib
 
 # handle if module can't be loaded to run wrapper
 wrapper_cannot_run = False
 try:
+    import numpy
+    import matplotlib
     import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
     import matplotlib.ticker as mticker
+    import cartopy
     import cartopy.crs as ccrs
     import cartopy.feature as cfeature
     from cartopy.mpl.gridliner import LONGITUDE_FORMATTER, LATITUDE_FORMATTER
@@ -27,6 +34,13 @@ import produtil.setup
 from ..util import met_util as util
 from . import CommandBuilder
 
+# columns that are read from the track files
+TRACK_COLUMNS = ['AMODEL', 'STORM_ID', 'INIT', 'LEAD', 'VALID', 'ALAT', 'ALON']
+
+# images of the base layer (land, ocean, and coastlines) that have already
+# been rendered in this process. The key is from get_basemap_key
+_BASEMAP_CACHE = {}
+
 class CyclonePlotterWrapper(CommandBuilder):
     """! Generate plots of extra tropical storm forecast tracks.
         Reads input from ATCF files generated from MET TC-Pairs
@@ -50,14 +64,11 @@ class CyclonePlotterWrapper(CommandBuilder):
         self.model = self.config.getstr('config', 'CYCLONE_PLOTTER_MODEL')
         self.title = self.config.getstr('config', 'CYCLONE_PLOTTER_PLOT_TITLE')
         self.gen_ascii = self.config.getbool('config', 'CYCLONE_PLOTTER_GENERATE_TRACK_ASCII')
+        self.basemap_cache_dir = self.config.getdir('CYCLONE_PLOTTER_BASEMAP_CACHE_DIR', '')
         # Create a set to keep track of unique storm_ids for each track file.
         self.unique_storm_id = set()
         # Data structure to separate data based on storm id.
         self.storm_id_dict = {}
-        # Data/info which we want to retrieve from the track files.
-        self.columns_of_interest = ['AMODEL', 'STORM_ID', 'BASIN', 'INIT',
-                                    'LEAD', 'VALID', 'ALAT', 'ALON', 'BLAT',
-                                    'BLON', 'AMSLP', 'BMSLP']
         self.circle_marker = self.config.getint('config', 'CYCLONE_PLOTTER_CIRCLE_MARKER_SIZE')
         self.cross_marker = self.config.getint('config', 'CYCLONE_PLOTTER_CROSS_MARKER_SIZE')
         if 'DISPLAY' not in self.env:
@@ -75,209 +86,131 @@ class CyclonePlotterWrapper(CommandBuilder):
         self.create_plot()
 
     def retrieve_data(self):
-        """! Retrieve data from track files and return the min and max lon.
+        """! Retrieve data from track files and separate the track points
+            by storm id. Only the columns that are needed are read from
+            each file and the rows are filtered by init time and model
+            for the entire file at once.
             Returns:
                None
         """
         self.logger.debug("Begin retrieving data...")
-        all_tracks_list = []
-
-        # Store the data in the track list.
-        if os.path.isdir(self.input_data):
-            self.logger.debug("Generate plot for all files in the directory" +
-                              self.input_data)
-            # Get the list of all files (full file path) in this directory
-            all_init_files = util.get_files(self.input_data, ".*.tcst",
-                                            self.logger)
-
-            for init_file in all_init_files:
-                # Ignore empty files
-                if os.stat(init_file).st_size == 0:
-                    self.logger.info("Ignoring empty file {}".format(init_file))
-                    continue
-
-                # logger.info("Consider all files under directory" +
-                #  init_file + " with " + " init time (ymd): " +
-                # self.init_date + " and lead time (hh):" + self.lead_hr)
-                with open(init_file, 'r') as infile:
-                    self.logger.debug("Parsing file {}".format(init_file))
-
-                    # Extract information from the header, which is
-                    # the first line.
-                    header = infile.readline()
-                    # print("header: {}".format(header))
-                    column_indices = self.get_columns_and_indices(header)
-
-                    # For the remaining lines of this file,
-                    # retrieve information from each row:
-                    # lon, lat, init time, lead hour, valid time,
-                    # model name, mslp, and basin.
-                    # NOTE: Some of these aren't used until we fully
-                    # emulate Guang Ping's plots.
-                    for line in infile:
-                        track_dict = {}
-                        col = line.split()
-                        lat = col[column_indices['ALAT']]
-                        lon = col[column_indices['ALON']]
-                        init_time = col[column_indices['INIT']]
-                        fcst_lead_hh = \
-                            str(col[column_indices['LEAD']]).zfill(3)
-                        model_name = col[column_indices['AMODEL']]
-                        valid_time = col[column_indices['VALID']]
-                        storm_id = col[column_indices['STORM_ID']]
-
-                        # Not needed until support for regional plots
-                        # is implemented.
-                        # mslp = col[column_indices['AMSLP']]
-                        # basin = col[column_indices['BASIN']]
-
-                        # Check for NA values in lon and lat, skip to
-                        # next line in file if 'NA' is encountered.
-                        if lon == 'NA' or lat == 'NA':
-                            continue
-                        else:
-                            track_dict['lon'] = float(lon)
-                            track_dict['lat'] = float(lat)
-
-                        # If the lead hour is 'NA', skip to next line.
-                        # The track data was very likely generated with
-                        # TC-Stat set to match-pairs set to True.
-                        lead_hr = self.extract_lead_hr(fcst_lead_hh)
-                        if lead_hr == 'NA':
-                            continue
-
-                        # Check that the init date, init hour
-                        # and model name are what the user requested.
-                        init_ymd, init_hh = \
-                            self.extract_date_and_time_from_init(init_time)
-
-                        if init_ymd == self.init_date and \
-                                init_hh == self.init_hr:
-                            if model_name == self.model:
-                                # Check for the requested model,
-                                # if the model matches the requested
-                                # model name, then we have all the
-                                # necessary information to continue.
-                                # Store all data in dictionary
-                                track_dict['fcst_lead_hh'] = fcst_lead_hh
-                                track_dict['init_time'] = init_time
-                                track_dict['model_name'] = model_name
-                                track_dict['valid_time'] = valid_time
-                                track_dict['storm_id'] = storm_id
-
-                                # Identify the 'first' point of the
-                                # storm track.  If the storm id is novel, then
-                                # retrieve the date and hh from the valid time
-                                if storm_id in self.unique_storm_id:
-                                    track_dict['first_point'] = False
-                                    track_dict['valid_dd'] = ''
-                                    track_dict['valid_hh'] = ''
-                                else:
-                                    self.unique_storm_id.add(storm_id)
-                                    # Since this is the first storm_id with
-                                    # a valid value for lat and lon (ie not
-                                    # 'NA'), this is the first track point
-                                    # in the storm track and will be
-                                    # labelled with the corresponding
-                                    # date/hh z on the plot.
-                                    valid_match = \
-                                        re.match(r'[0-9]{6}([0-9]{2})_' +
-                                                 '([0-9]{2})[0-9]{4}',
-                                                 track_dict['valid_time'])
-                                    if valid_match:
-                                        valid_dd = valid_match.group(1)
-                                        valid_hh = valid_match.group(2)
-                                    else:
-                                        # Shouldn't get here if this is
-                                        # the first point of the track.
-                                        valid_dd = ''
-                                        valid_hh = ''
-                                    track_dict['first_point'] = True
-                                    track_dict['valid_dd'] = valid_dd
-                                    track_dict['valid_hh'] = valid_hh
-
-                                # Identify points based on valid time (hh).
-                                # Useful for plotting later on.
-                                valid_match = \
-                                    re.match(r'[0-9]{8}_([0-9]{2})[0-9]{4}',
-                                             track_dict['valid_time'])
-                                if valid_match:
-                                    # Since we are only interested in 00,
-                                    # 06, 12, and 18 hr times...
-                                    valid_hh = valid_match.group(1)
-
-                                if valid_hh == '00' or valid_hh == '12':
-                                    track_dict['lead_group'] = '0'
-                                elif valid_hh == '06' or valid_hh == '18':
-                                    track_dict['lead_group'] = '6'
-                                else:
-                                    # To gracefully handle any hours other
-                                    # than 0, 6, 12, or 18
-                                    track_dict['lead_group'] = ''
-
-                                all_tracks_list.append(track_dict)
-
-                                # For future work, support for MSLP when
-                                # generating regional plots-
-                                # implementation goes here...
-                                # Finishing up, do any cleaning up,
-                                # logging, etc.
-                                self.logger.info("All criteria met, " +
-                                                 "saving track data init " +
-                                                 track_dict['init_time'] +
-                                                 " lead " +
-                                                 track_dict['fcst_lead_hh'] +
-                                                 " lon " +
-                                                 str(track_dict['lon']) +
-                                                 " lat " +
-                                                 str(track_dict['lat']))
-
-                            else:
-                                # Not the requested model, move to next
-                                # row of data
-                                continue
-
-                        else:
-                            # Not the requested init ymd move to next
-                            # row of data
-                            continue
-
-                # Now separate the data based on storm id.
-                for cur_unique in self.unique_storm_id:
-                    cur_storm_list = []
-                    for cur_line in all_tracks_list:
-                        if cur_line['storm_id'] == cur_unique:
-                            cur_storm_list.append(cur_line)
-                        else:
-                            # Continue to next line in all_tracks_list
-                            continue
-
-                    # Create the storm_id_dict, which is the data
-                    # structure used to separate the storm data based on
-                    # storm id.
-                    self.storm_id_dict[cur_unique] = cur_storm_list
 
-        else:
+        if not os.path.isdir(self.input_data):
             self.log_error("{} should be a directory".format(self.input_data))
             sys.exit(1)
 
-    def get_columns_and_indices(self, header):
-        """ Parse the header for the columns of interest and store the
-            information in a dictionary where the key is the column name
-            and value is the index/column number.
-            Returns:
-                column_dict:  A dictionary containing the column name
-                              and its index
+        self.logger.debug("Generate plot for all files in the directory" +
+                          self.input_data)
+        # Get the list of all files (full file path) in this directory
+        all_init_files = util.get_files(self.input_data, ".*.tcst",
+                                        self.logger)
+
+        for init_file in all_init_files:
+            # Ignore empty files
+            if os.stat(init_file).st_size == 0:
+                self.logger.info("Ignoring empty file {}".format(init_file))
+                continue
+
+            self.logger.debug("Parsing file {}".format(init_file))
+            track_data = read_track_data(init_file,
+                                         self.init_date,
+                                         self.init_hr,
+                                         self.model)
+
+            self.logger.info(f"Found {len(track_data['INIT'])} track points"
+                             f" in {init_file} for model {self.model} "
+                             f"and init {self.init_date}_{self.init_hr}")
+
+            for row in zip(*[track_data[column] for column in TRACK_COLUMNS]):
+                track_dict = self.get_track_dict(dict(zip(TRACK_COLUMNS, row)))
+
+                # Separate the data based on storm id. The
+                # storm_id_dict is the data structure used to
+                # separate the storm data based on storm id.
+                self.storm_id_dict.setdefault(track_dict['storm_id'],
+                                              []).append(track_dict)
+
+                self.logger.debug("All criteria met, " +
+                                  "saving track data init " +
+                                  track_dict['init_time'] +
+                                  " lead " +
+                                  track_dict['fcst_lead_hh'] +
+                                  " lon " +
+                                  str(track_dict['lon']) +
+                                  " lat " +
+                                  str(track_dict['lat']))
+
+    def get_track_dict(self, row):
+        """! Create a dictionary with the information needed to plot a
+             track point from a row of track data that matches the
+             requested init time and model.
+             Args:
+               @param row dictionary where the key is the column name from
+                TRACK_COLUMNS and the value is the value from the track file
+             Returns:
+               dictionary with track point information
         """
+        storm_id = row['STORM_ID']
+        track_dict = {
+            'lon': float(row['ALON']),
+            'lat': float(row['ALAT']),
+            'fcst_lead_hh': row['LEAD'].zfill(3),
+            'init_time': row['INIT'],
+            'model_name': row['AMODEL'],
+            'valid_time': row['VALID'],
+            'storm_id': storm_id,
+        }
+
+        # Identify the 'first' point of the
+        # storm track.  If the storm id is novel, then
+        # retrieve the date and hh from the valid time
+        if storm_id in self.unique_storm_id:
+            track_dict['first_point'] = False
+            track_dict['valid_dd'] = ''
+            track_dict['valid_hh'] = ''
+        else:
+            self.unique_storm_id.add(storm_id)
+            # Since this is the first storm_id with
+            # a valid value for lat and lon (ie not
+            # 'NA'), this is the first track point
+            # in the storm track and will be
+            # labelled with the corresponding
+            # date/hh z on the plot.
+            valid_match = re.match(r'[0-9]{6}([0-9]{2})_' +
+                                   '([0-9]{2})[0-9]{4}',
+                                   track_dict['valid_time'])
+            if valid_match:
+                valid_dd = valid_match.group(1)
+                valid_hh = valid_match.group(2)
+            else:
+                # Shouldn't get here if this is
+                # the first point of the track.
+                valid_dd = ''
+                valid_hh = ''
+            track_dict['first_point'] = True
+            track_dict['valid_dd'] = valid_dd
+            track_dict['valid_hh'] = valid_hh
+
+        # Identify points based on valid time (hh).
+        # Useful for plotting later on.
+        valid_hh = ''
+        valid_match = re.match(r'[0-9]{8}_([0-9]{2})[0-9]{4}',
+                               track_dict['valid_time'])
+        if valid_match:
+            # Since we are only interested in 00,
+            # 06, 12, and 18 hr times...
+            valid_hh = valid_match.group(1)
+
+        if valid_hh == '00' or valid_hh == '12':
+            track_dict['lead_group'] = '0'
+        elif valid_hh == '06' or valid_hh == '18':
+            track_dict['lead_group'] = '6'
+        else:
+            # To gracefully handle any hours other
+            # than 0, 6, 12, or 18
+            track_dict['lead_group'] = ''
 
-        all_columns = header.split()
-        column_dict = {}
-
-        # Retrieve the index number of the column of interest in the header.
-        for col in self.columns_of_interest:
-            index = all_columns.index(col)
-            column_dict[col] = index
-        return column_dict
+        return track_dict
 
     @staticmethod
     def extract_date_and_time_from_init(init_time_str):
@@ -309,13 +242,16 @@ class CyclonePlotterWrapper(CommandBuilder):
         # Use PlateCarree projection for now
         #use central meridian for central longitude
         cm_lon = 180
-        ax = plt.axes(projection=ccrs.PlateCarree(central_longitude=cm_lon))
+        projection = ccrs.PlateCarree(central_longitude=cm_lon)
+        ax = plt.axes(projection=projection)
         # ax = plt.axes(projection=ccrs.LambertCylindrical(central_longitude=0.0))
+        ax.set_global()
+        extent = ax.get_extent(crs=projection)
 
-        # Add land, coastlines, and ocean
-        ax.add_feature(cfeature.LAND)
-        ax.coastlines()
-        ax.add_feature(cfeature.OCEAN)
+        # Add land, coastlines, and ocean. These are rendered once for each
+        # projection, extent, and size and the image is reused
+        add_basemap(ax, projection, extent, self.basemap_cache_dir,
+                    self.logger)
 
         # Add grid lines for longitude and latitude
         ax.gridlines(draw_labels=False, xlocs=[180, -180])
@@ -354,14 +290,6 @@ class CyclonePlotterWrapper(CommandBuilder):
         # set the marker, marker size, and annotation
         # before drawing the line and scatter plots.
 
-        # If requested, create an ASCII file with the tracks that are going to
-        # be plotted.  This is useful to debug or verify that what you
-        # see on the plot is what is expected.
-        ascii_track_parts = [self.init_date, '.txt']
-        ascii_track_output_name = ''.join(ascii_track_parts)
-        plot_filename = os.path.join(self.output_dir, ascii_track_output_name)
-        ascii_track_file = open(plot_filename, 'w')
-
         # Use counters to set the labels for the legend. Since we don't
         # want repetitions in the legend, do this for a select number
         # of points.
@@ -377,6 +305,10 @@ class CyclonePlotterWrapper(CommandBuilder):
         plot_filename = os.path.join(self.output_dir, ascii_track_output_name)
         ascii_track_file = open(plot_filename, 'w')
 
+        # all points that are plotted, used to zoom in on the tracks
+        track_lons = []
+        track_lats = []
+
         for cur_storm_id in self.unique_storm_id:
             # Lists used in creating each storm track.
             cyclone_points = []
@@ -451,6 +383,9 @@ class CyclonePlotterWrapper(CommandBuilder):
 
             # map.plot(x, y, color='red', linestyle='-')
 
+            track_lons.extend(lon)
+            track_lats.extend(lat)
+
             # Annotate the first point of the storm track
             for anno, adj_lon, adj_lat in zip(anno_list, lon, lat):
                 # x, y = map(adj_lon, adj_lat)
@@ -498,6 +433,8 @@ class CyclonePlotterWrapper(CommandBuilder):
                                     label="Date (dd/hhz) is the first " +
                                     "time storm was able to be tracked " +
                                     "in model")
+                        track_lons.append(0)
+                        track_lats.append(0)
                         dummy_counter += 1
                     plt.scatter(adj_lon, adj_lat, s=sz, c=colours, edgecolors=colours,
                                 facecolors=colours, marker=symbol, zorder=2)
@@ -516,6 +453,13 @@ class CyclonePlotterWrapper(CommandBuilder):
                   fancybox=True, shadow=True, scatterpoints=1,
                   prop={'size': 6})
 
+        # Zoom in on the tracks. The base layer covers the whole globe, so
+        # the axes are not autoscaled to the points that were plotted
+        track_extent = get_track_extent(track_lons, track_lats, extent,
+                                        plt.rcParams['axes.xmargin'],
+                                        plt.rcParams['axes.ymargin'])
+        ax.set_extent(track_extent, crs=projection)
+
         # Write the plot to the output directory
         out_filename_parts = [self.init_date, '.png']
         output_plot_name = ''.join(out_filename_parts)
@@ -556,3 +500,218 @@ class CyclonePlotterWrapper(CommandBuilder):
             adj_lon = lon
 
         return adj_lon
+
+def read_track_data(track_file, init_date, init_hr, model):
+    """! Read the track points for a model and init time from a track file.
+         Only the columns in TRACK_COLUMNS are kept. Lines that do not
+         contain the init date and hour anywhere in the line are skipped
+         before they are split into columns, so most of the lines in a file
+         containing many init times are never parsed. Rows with NA for the
+         lat or lon are removed.
+         Args:
+           @param track_file path to .tcst file generated by TC-Pairs
+           @param init_date init date to keep in YYYYMMDD format
+           @param init_hr init hour to keep in hh format
+           @param model name of model (AMODEL) to keep
+         Returns:
+           dictionary where the key is the column name from TRACK_COLUMNS
+            and the value is a list of the values (strings) from each row
+    """
+    track_data = {column: [] for column in TRACK_COLUMNS}
+    init_prefix = f'{init_date}_{init_hr}'
+    init_regex = re.compile(r'([0-9]{8})_([0-9]{2,3})[0-9]{4}')
+
+    with open(track_file, 'r') as infile:
+        # get index of each column from the header, which is the first line
+        header = infile.readline().split()
+        indices = [(column, header.index(column))
+                   for column in TRACK_COLUMNS]
+        model_index = header.index('AMODEL')
+        init_index = header.index('INIT')
+        lat_index = header.index('ALAT')
+        lon_index = header.index('ALON')
+
+        for line in infile:
+            if init_prefix not in line:
+                continue
+
+            columns = line.split()
+            if (columns[model_index] != model or
+                    columns[lat_index] == 'NA' or
+                    columns[lon_index] == 'NA'):
+                continue
+
+            # split the init time into YYYYMMDD and hh, i.e. 20150301_120000
+            init_match = init_regex.match(columns[init_index])
+            if not init_match or init_match.groups() != (init_date, init_hr):
+                continue
+
+            for column, index in indices:
+                track_data[column].append(columns[index])
+
+    return track_data
+
+def get_track_extent(lons, lats, extent, x_margin=0.05, y_margin=0.05):
+    """! Get the extent that fits all of the points that were plotted with
+         a margin around them, the same as the extent that is used when the
+         axes are autoscaled to the points.
+         Args:
+           @param lons list of longitudes of the points in projection
+            coordinates
+           @param lats list of latitudes of the points
+           @param extent tuple of x0, x1, y0, y1 of the whole projection.
+            The extent that is returned is limited to this extent
+           @param x_margin fraction of the longitude range to add on each side
+           @param y_margin fraction of the latitude range to add on each side
+         Returns:
+           tuple of x0, x1, y0, y1 in projection coordinates or extent if
+           there are no points
+    """
+    if not lons or not lats:
+        return tuple(extent)
+
+    x_min, x_max = min(lons), max(lons)
+    y_min, y_max = min(lats), max(lats)
+
+    # use a margin of one degree if all points have the same value
+    x_pad = (x_max - x_min) * x_margin or 1
+    y_pad = (y_max - y_min) * y_margin or 1
+    return (max(x_min - x_pad, extent[0]), min(x_max + x_pad, extent[1]),
+            max(y_min - y_pad, extent[2]), min(y_max + y_pad, extent[3]))
+
+def add_basemap(ax, projection, extent, cache_dir, logger):
+    """! Add an image of the land, ocean, and coastlines to the axes. The
+         image is rendered the first time it is needed for a projection,
+         extent, and size and reused for each plot after that.
+         Args:
+           @param ax cartopy GeoAxes to add the image to
+           @param projection cartopy projection of the axes
+           @param extent tuple of x0, x1, y0, y1 in projection coordinates
+           @param cache_dir directory to write rendered images so they can
+            be reused in later runs. If empty, images are only reused in
+            the current run
+           @param logger log object to write debug information
+    """
+    size = get_basemap_size(ax)
+    image = get_basemap_image(projection, extent, size, cache_dir, logger)
+    ax.imshow(image, origin='upper', extent=extent, transform=projection,
+              interpolation='nearest', zorder=0)
+    ax.set_extent(extent, crs=projection)
+
+def get_basemap_size(ax):
+    """! Get the size of the axes in pixels so the base layer can be
+         rendered at the resolution that it will be displayed.
+         Args:
+           @param ax cartopy GeoAxes that will display the base layer
+         Returns:
+           tuple of width and height in pixels
+    """
+    fig = ax.figure
+    ax.apply_aspect()
+    bbox = ax.get_position()
+    width = max(1, round(bbox.width * fig.get_figwidth() * fig.dpi))
+    height = max(1, round(bbox.height * fig.get_figheight() * fig.dpi))
+    return width, height
+
+def get_basemap_key(projection, extent, size):
+    """! Get a hash of the settings used to render the base layer. The key
+         changes if the projection, extent, size, or version of matplotlib
+         or cartopy changes.
+         Args:
+           @param projection cartopy projection
+           @param extent tuple of x0, x1, y0, y1 in projection coordinates
+           @param size tuple of width and height in pixels
+         Returns:
+           string containing the hexadecimal hash
+    """
+    key_info = {
+        'projection': projection.proj4_init,
+        'extent': [round(value, 6) for value in extent],
+        'size': list(size),
+        'matplotlib': matplotlib.__version__,
+        'cartopy': cartopy.__version__,
+    }
+    key_string = json.dumps(key_info, sort_keys=True)
+    return hashlib.sha256(key_string.encode('utf-8')).hexdigest()
+
+def get_basemap_image(projection, extent, size, cache_dir, logger):
+    """! Get the image of the base layer from the cache or render it if it
+         has not been rendered yet.
+         Args:
+           @param projection cartopy projection
+           @param extent tuple of x0, x1, y0, y1 in projection coordinates
+           @param size tuple of width and height in pixels
+           @param cache_dir directory to read/write rendered images or empty
+            string to only cache the image in memory
+           @param logger log object to write debug information
+         Returns:
+           RGBA image array
+    """
+    key = get_basemap_key(projection, extent, size)
+    if key in _BASEMAP_CACHE:
+        return _BASEMAP_CACHE[key]
+
+    cache_file = None
+    if cache_dir:
+        cache_file = os.path.join(cache_dir, f'basemap_{key}.png')
+
+    if cache_file and os.path.exists(cache_file):
+        logger.debug(f"Reading base layer from {cache_file}")
+        image = plt.imread(cache_file)
+    else:
+        logger.debug("Rendering base layer")
+        image = render_basemap(projection, extent, size)
+        if cache_file:
+            write_basemap_cache(image, cache_file, logger)
+
+    _BASEMAP_CACHE[key] = image
+    return image
+
+def render_basemap(projection, extent, size):
+    """! Draw the land, coastlines, and ocean on a figure that is the
+         size of the axes that will display it and return the image. A
+         separate figure is used so the current pyplot figure is not changed.
+         Args:
+           @param projection cartopy projection
+           @param extent tuple of x0, x1, y0, y1 in projection coordinates
+           @param size tuple of width and height in pixels
+         Returns:
+           RGBA image array
+    """
+    width, height = size
+    dpi = 100
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1], projection=projection)
+    ax.set_extent(extent, crs=projection)
+    ax.set_aspect('auto')
+
+    ax.add_feature(cfeature.LAND)
+    ax.coastlines()
+    ax.add_feature(cfeature.OCEAN)
+
+    canvas.draw()
+    return numpy.array(canvas.buffer_rgba())
+
+def write_basemap_cache(image, cache_file, logger):
+    """! Write an image of the base layer to the cache directory. The image
+         is written to a temporary file and renamed so that runs at the same
+         time do not read a partial file.
+         Args:
+           @param image RGBA image array
+           @param cache_file path to write
+           @param logger log object to write warnings and debug information
+    """
+    tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        plt.imsave(tmp_file, image, format='png')
+        os.replace(tmp_file, cache_file)
+    except OSError as err:
+        logger.warning(f"Could not write base layer cache file "
+                       f"{cache_file}: {err}")
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        return
+
+    logger.debug(f"Wrote base layer cache file: {cache_file}")
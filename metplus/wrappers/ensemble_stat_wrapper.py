@@ -166,10 +166,10 @@ class EnsembleStatWrapper(CompareGriddedWrapper):
         self.infiles.append(fcst_file_list)
 
         # parse var list for ENS fields
-        ensemble_var_list = util.parse_var_list(self.config, time_info, data_type='ENS')
+        ensemble_var_list = self.get_field_plan(data_type='ENS').get_var_list(time_info)
 
         # parse optional var list for FCST and/or OBS fields
-        var_list = util.parse_var_list(self.config, time_info, met_tool=self.app_name)
+        var_list = self.get_field_plan(met_tool=self.app_name).get_var_list(time_info)
 
         # if empty var list for FCST/OBS, use None as first var, else use first var in list
         if not var_list:
@@ -320,8 +320,13 @@ class EnsembleStatWrapper(CompareGriddedWrapper):
                 ens_members_path.append(fake_dir)
 
         # write file that contains list of ensemble files
+        # include custom string so each command reads its own list if
+        # commands for a custom loop list are run at the same time
         list_filename = time_info['init_fmt'] + '_' + \
-          str(time_info['lead_hours']) + '_ensemble.txt'
+          str(time_info['lead_hours'])
+        if time_info.get('custom'):
+            list_filename += '_' + time_info['custom']
+        list_filename += '_ensemble.txt'
         return self.write_list_file(list_filename, ens_members_path)
 
     def set_environment_variables(self, fcst_field, obs_field, ens_field, time_info):
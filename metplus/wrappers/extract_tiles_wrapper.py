@@ -14,6 +14,7 @@ import sys
 
 from ..util import met_util as util
 from ..util import feature_util
+from ..util import parallel_util
 from .tc_stat_wrapper import TCStatWrapper
 from . import CommandBuilder
 from ..util import time_util
@@ -50,6 +51,11 @@ class ExtractTilesWrapper(CommandBuilder):
         self.filtered_out_dir = self.config.getdir('EXTRACT_TILES_OUTPUT_DIR')
         self.tc_stat_exe = os.path.join(met_bin_dir, 'tc_stat')
 
+        # number of storms to regrid at once
+        self.num_workers = parallel_util.get_num_workers(
+            self.config, 'EXTRACT_TILES_WORKERS', 1
+        )
+
     def run_at_time(self, input_dict):
         """!Loops over loop strings and calls run_at_time_loop_string() to process data
         Args:
@@ -83,7 +89,6 @@ class ExtractTilesWrapper(CommandBuilder):
         # Do some set up
         time_info = time_util.ti_calculate(input_dict)
         init_time = time_info['init_fmt']
-        tmp_dir = self.config.getdir('TMP_DIR')
 
         self.logger.info("Begin extract tiles")
         cur_init = init_time[0:8]+"_"+init_time[8:10]
@@ -110,28 +115,24 @@ class ExtractTilesWrapper(CommandBuilder):
                                "config file settings.s")
                 sys.exit(1)
 
-        # Now get unique storm ids from the filter file,
-        # filter_yyyymmdd_hh.tcst
-        sorted_storm_ids = util.get_storm_ids(filter_name, self.logger)
+        # Now read the filter file, filter_yyyymmdd_hh.tcst, once and
+        # split the rows by storm id
+        header, storm_rows = feature_util.get_storm_rows(filter_name)
 
-        # Useful debugging info: Check for empty sorted_storm_ids, if empty,
+        # Useful debugging info: Check for empty storm_rows, if empty,
         # continue to the next time.
-        if not sorted_storm_ids:
+        if not storm_rows:
             # No storms found for init time, cur_init
             msg = "No storms were found for {} ...continue to next in list"\
               .format(cur_init)
             self.logger.debug(msg)
             return
 
-        # Process each storm in the sorted_storm_ids list
-        # Iterate over each filter file in the output directory and
-        # search for the presence of the storm id.  Store this
-        # corresponding row of data into a temporary file in the
-        # /tmp directory where each file contains information based on storm.
-        if not self.create_results_files(sorted_storm_ids, cur_init, filter_name, tmp_dir):
+        # Process the rows for each storm and create the tiles
+        if not self.create_results_files(header, storm_rows, cur_init):
             self.log_error("There was a problem with processing storms from the filtered result, "\
                     "please check your METplus config file settings or your write permissions for your "\
-                    "tmp directory.")
+                    "output directory.")
 
         util.prune_empty(self.filtered_out_dir, self.logger)
 
@@ -184,53 +185,70 @@ class ExtractTilesWrapper(CommandBuilder):
 
         return 0
 
-    def create_results_files(self, sorted_storm_ids, cur_init, filter_name, tmp_dir):
-        ''' Create the tmp files that contain filtered results- one tmp file per storm, then
-            invoke retrieve_and_regrid to create the final output as netCDF forecast and analysis (obs)
-            files.
+    def create_results_files(self, header, storm_rows, cur_init):
+        ''' Create the output directory for each storm, then invoke
+            retrieve_and_regrid_rows with the rows from the filter file for
+            each storm to create the final output as netCDF forecast and
+            analysis (obs) files. If EXTRACT_TILES_WORKERS is greater than 1,
+            storms are regridded at the same time in a pool of worker
+            processes.
 
             Args:
-                @param sorted_storm_ids:
+                @param header: list of column names from the filter file
+                @param storm_rows: dictionary where key is the storm id and
+                                   value is list of rows for the storm
                 @param cur_init: The current init time of interest
-                @param filter_name: The full file name of the filter file generated by tc stat
-                @param tmp_dir: The location of the tmp directory where these tmp files will be saved
-
-
 
             Return:
-             0 if successful in creating the tmp files (one per storm) in the tmp_dir
+             True if any storms were processed, False otherwise
         '''
-
-        processed_file = False
-        # Process each storm in the sorted_storm_ids list
-        # Iterate over each filter file in the output directory and
-        # search for the presence of the storm id.  Store this
-        # corresponding row of data into a temporary file in the
-        # /tmp/<pid> directory.
-        for cur_storm in sorted_storm_ids:
+        storm_tasks = []
+        for cur_storm, rows in storm_rows.items():
             storm_output_dir = os.path.join(self.filtered_out_dir,
                                             cur_init, cur_storm)
-            header = open(filter_name, "r").readline()
             util.mkdir_p(storm_output_dir)
-
-            tmp_filename = "filter_" + cur_init + "_" + cur_storm
-            full_tmp_filename = os.path.join(tmp_dir, tmp_filename)
-
-            storm_match_list = util.grep(cur_storm, filter_name)
-
-            # open with w+ to overwrite if it exists and create it if not
-            with open(full_tmp_filename, "w") as tmp_file:
-                # copy over header information
-                tmp_file.write(header)
-                for storm_match in storm_match_list:
-                    tmp_file.write(storm_match)
-
-            feature_util.retrieve_and_regrid(full_tmp_filename, cur_init,
-                                             cur_storm, self.filtered_out_dir,
-                                             self.config)
-
-            # remove tmp file
-            os.remove(full_tmp_filename)
-            processed_file = True
-
-        return processed_file
+            storm_tasks.append((header, rows, cur_init, cur_storm))
+
+        num_workers = min(self.num_workers, len(storm_tasks))
+        if num_workers > 1 and not parallel_util.can_fork():
+            self.logger.warning("Regridding storms concurrently is not "
+                                "supported on this platform. Running "
+                                "serially")
+            num_workers = 1
+
+        if num_workers <= 1:
+            for storm_task in storm_tasks:
+                _regrid_storm(self.config, [self], storm_task)
+        else:
+            parallel_util.run_times_in_process_pool(self.config, [self],
+                                                    storm_tasks,
+                                                    _regrid_storm,
+                                                    num_workers,
+                                                    'storms')
+
+        return bool(storm_tasks)
+
+    def regrid_storm(self, header, rows, cur_init, cur_storm):
+        """! Create the forecast and analysis tiles for a storm
+
+             Args:
+                 @param header list of column names from the filter file
+                 @param rows list of rows for the storm
+                 @param cur_init current init time of interest
+                 @param cur_storm storm id
+        """
+        self.logger.debug(f"Processing storm: {cur_storm}")
+        feature_util.retrieve_and_regrid_rows(header, rows, cur_init,
+                                              cur_storm, self.filtered_out_dir,
+                                              self.config)
+
+def _regrid_storm(config, processes, storm_task):
+    """! Create the tiles for a storm using the ExtractTilesWrapper
+
+         Args:
+             @param config METplusConfig object
+             @param processes list containing the ExtractTilesWrapper
+             @param storm_task tuple of the header, rows, init time, and
+              storm id to pass to ExtractTilesWrapper.regrid_storm
+    """
+    processes[0].regrid_storm(*storm_task)
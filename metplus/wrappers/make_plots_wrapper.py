@@ -12,13 +12,17 @@ Condition codes: 0 for success, 1 for failure
 
 import logging
 import os
+import sys
 import copy
 import re
+import runpy
 import subprocess
 import datetime
 import itertools
+import traceback
 
 from ..util import met_util as util
+from ..util import parallel_util
 from . import CommandBuilder
 
 # handle if module can't be loaded to run wrapper
@@ -213,6 +217,20 @@ class MakePlotsWrapper(CommandBuilder):
         c_dict['LOG_METPLUS'] = self.config.getstr('config', 'LOG_METPLUS')
         c_dict['LOG_LEVEL'] = self.config.getstr('config', 'LOG_LEVEL')
 
+        # run plotting scripts in a pool of python processes that import
+        # the plotting modules once instead of a new process for each script
+        c_dict['IN_PROCESS'] = self.config.getbool('config',
+                                                   'MAKE_PLOTS_IN_PROCESS',
+                                                   False)
+        if c_dict['IN_PROCESS'] and not parallel_util.can_fork():
+            self.logger.warning("MAKE_PLOTS_IN_PROCESS is not supported on "
+                                "this platform. Running each plotting script "
+                                "in a separate process")
+            c_dict['IN_PROCESS'] = False
+        c_dict['WORKERS'] = parallel_util.get_num_workers(
+            self.config, 'MAKE_PLOTS_WORKERS'
+        )
+
         # Get MET version used to run stat_analysis
         c_dict['MET_VERSION'] = str(self.get_met_version())
 
@@ -275,6 +293,10 @@ class MakePlotsWrapper(CommandBuilder):
             scripts_to_run = self.accepted_verif_lists.get(self.c_dict['VERIF_CASE'])\
                 .get(self.c_dict['VERIF_TYPE'])
 
+        # environment variables for each set of settings if running
+        # the plotting scripts in process
+        plot_tasks = []
+
         # Loop over run settings.
         for runtime_settings_dict in runtime_settings_dict_list:
             # set environment variables
@@ -296,6 +318,10 @@ class MakePlotsWrapper(CommandBuilder):
             # send environment variables to logger
             self.set_environment_variables()
 
+            if self.c_dict['IN_PROCESS']:
+                plot_tasks.append(self.env.to_dict())
+                continue
+
             for script in scripts_to_run:
                 self.plotting_script = (
                     os.path.join(self.c_dict['SCRIPTS_BASE_DIR'],
@@ -304,3 +330,129 @@ class MakePlotsWrapper(CommandBuilder):
 
                 self.build_and_run_command()
                 self.clear()
+
+        if self.c_dict['IN_PROCESS']:
+            self.run_plots_in_process(scripts_to_run, plot_tasks)
+
+    def run_plots_in_process(self, scripts_to_run, plot_tasks):
+        """! Run the plotting scripts for each set of runtime settings in a
+             pool of worker processes. Each worker imports the plotting
+             modules once and runs the scripts in the same python process.
+             The scripts for one set of settings are run in order by the
+             same worker because later scripts read files written by earlier
+             scripts. Log output from each set of settings is added to the
+             METplus log file in the order the settings were processed.
+
+             Args:
+                 scripts_to_run - list of plotting script names
+                 plot_tasks     - list of dictionaries containing the
+                                  environment variables to set for
+                                  each set of settings
+        """
+        scripts_dir = self.c_dict['SCRIPTS_BASE_DIR']
+        script_paths = [os.path.join(scripts_dir, script)
+                        for script in scripts_to_run]
+        num_workers = min(self.c_dict['WORKERS'], len(plot_tasks)) or 1
+        self.logger.info(f"Running {len(script_paths)} plotting scripts for "
+                         f"{len(plot_tasks)} sets of settings using "
+                         f"{num_workers} worker processes")
+
+        executor, task_log_dir = parallel_util.start_process_pool(
+            self.config, [self], num_workers
+        )
+        task_logs = [parallel_util.get_task_log_path(task_log_dir, index)
+                     for index, _ in enumerate(plot_tasks)]
+        try:
+            futures = []
+            for plot_env, task_log in zip(plot_tasks, task_logs):
+                # send output from plotting scripts to the task log
+                if task_log:
+                    plot_env = dict(plot_env, LOG_METPLUS=task_log)
+                futures.append(executor.submit(run_plotting_scripts,
+                                               scripts_dir, script_paths,
+                                               plot_env))
+
+            # handle results in order so logs are merged in order
+            for future, task_log in zip(futures, task_logs):
+                try:
+                    failed_scripts = future.result()
+                finally:
+                    parallel_util.merge_task_log(self.config, task_log)
+
+                for script_path, error in failed_scripts:
+                    self.log_error(f"Plotting script {script_path} "
+                                   f"failed: {error}")
+        finally:
+            parallel_util.stop_process_pool(executor, task_log_dir)
+
+def _import_plotting_modules(scripts_dir):
+    """! Import the modules used by the plotting scripts so each worker
+         process only imports them once. Modules that cannot be imported
+         are skipped so the error is reported when the script is run.
+
+         Args:
+             scripts_dir - directory containing the plotting scripts
+    """
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
+
+    try:
+        import numpy
+        import pandas
+        import matplotlib
+        matplotlib.use('agg')
+        import matplotlib.pyplot
+        import plot_util
+    except ImportError:
+        pass
+
+def run_plotting_scripts(scripts_dir, script_paths, plot_env):
+    """! Run plotting scripts in order in the current python process with
+         the environment variables that would be set if the scripts were
+         run in a separate process. The environment, python path, and open
+         figures are restored after each script so the next script is not
+         affected. Called by worker processes started by MakePlotsWrapper.
+
+         Args:
+             scripts_dir    - directory containing the plotting scripts
+             script_paths   - list of paths to plotting scripts to run
+             plot_env       - dictionary of environment variables to set
+
+         Returns:
+             failed_scripts - list of tuples containing the path and
+                              error message of each script that failed
+    """
+    _import_plotting_modules(scripts_dir)
+
+    failed_scripts = []
+    for script_path in script_paths:
+        original_env = dict(os.environ)
+        original_path = list(sys.path)
+        script_logger = logging.getLogger(plot_env.get('LOG_METPLUS', ''))
+        original_handlers = list(script_logger.handlers)
+        os.environ.clear()
+        os.environ.update(plot_env)
+        try:
+            runpy.run_path(script_path, run_name='__main__')
+        except SystemExit as err:
+            if err.code:
+                failed_scripts.append((script_path,
+                                       f"exited with code {err.code}"))
+        except Exception:
+            failed_scripts.append((script_path, traceback.format_exc()))
+        finally:
+            os.environ.clear()
+            os.environ.update(original_env)
+            sys.path[:] = original_path
+
+            # close figures that the script did not close
+            if 'matplotlib.pyplot' in sys.modules:
+                sys.modules['matplotlib.pyplot'].close('all')
+
+            # remove the log handlers that the script added
+            for handler in list(script_logger.handlers):
+                if handler not in original_handlers:
+                    script_logger.removeHandler(handler)
+                    handler.close()
+
+    return failed_scripts
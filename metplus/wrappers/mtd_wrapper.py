@@ -20,6 +20,10 @@ from . import CompareGriddedWrapper
 
 class MTDWrapper(MODEWrapper):
 
+    # file lists are named by valid time and data type, so they would be
+    # overwritten while another command is reading them
+    run_commands_concurrently = False
+
     def __init__(self, config, logger):
         self.app_name = 'mtd'
         self.app_path = os.path.join(config.getdir('MET_BIN_DIR', ''),
@@ -153,16 +157,17 @@ class MTDWrapper(MODEWrapper):
 
         # if only processing a single data set (FCST or OBS) then only read that var list and process
         if self.c_dict['SINGLE_RUN']:
-            var_list = util.parse_var_list(self.config, input_dict, self.c_dict['SINGLE_DATA_SRC'],
-                                           met_tool=self.app_name)
+            var_list = self.get_field_plan(self.c_dict['SINGLE_DATA_SRC'],
+                                           met_tool=self.app_name).get_var_list(input_dict)
             for var_info in var_list:
                 self.run_single_mode(input_dict, var_info)
 
             return
 
         # if comparing FCST and OBS data, get var list from FCST/OBS or BOTH variables
-        var_list = util.parse_var_list(self.config, input_dict,
-                                       met_tool=self.app_name)
+        var_list = self.get_field_plan(
+            met_tool=self.app_name
+        ).get_var_list(input_dict)
 
         # report error and exit if field info is not set
         if not var_list:
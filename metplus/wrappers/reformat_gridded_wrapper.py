@@ -89,7 +89,7 @@ that reformat gridded data
                     time_info['custom'] = custom_string
                     self.c_dict['CUSTOM_STRING'] = custom_string
 
-                    var_list = util.parse_var_list(self.config, time_info, data_type=to_run)
+                    var_list = self.get_field_plan(data_type=to_run).get_var_list(time_info)
                     if not var_list:
                         var_list = None
 
@@ -24,6 +24,11 @@ from ..util import do_string_sub
 '''
 
 class SeriesAnalysisWrapper(CompareGriddedWrapper):
+
+    # file lists are named by valid time and data type, so they would be
+    # overwritten while another command is reading them
+    run_commands_concurrently = False
+
     def __init__(self, config, logger):
         self.app_name = "series_analysis"
         self.app_path = os.path.join(config.getdir('MET_BIN_DIR', ''),
@@ -207,9 +212,9 @@ class SeriesAnalysisWrapper(CompareGriddedWrapper):
         """
 
         # parse var list for FCST and/or OBS fields
-        var_list = util.parse_var_list(self.config,
-                                       time_info,
-                                       met_tool=self.app_name)
+        var_list = self.get_field_plan(
+            met_tool=self.app_name
+        ).get_var_list(time_info)
 
         # loop of var list and process for each
         for var_info in var_list:
@@ -261,43 +261,29 @@ class SeriesByInitWrapper(CommandBuilder):
                 self.logger.debug(msg)
                 continue
             else:
-                # Now retrieve the files corresponding to these
-                # storm ids that resulted from filtering.
-                sorted_storm_ids = util.get_storm_ids(filter_filename,
-                                                      self.logger)
+                # Now read the filter file once and split the rows by
+                # the storm ids that resulted from filtering.
+                header, storm_rows = (
+                    feature_util.get_storm_rows(filter_filename)
+                )
 
-                # Retrieve the header from filter_filename to be used in
-                # creating the temporary files.
-                with open(filter_filename, 'r') as filter_file:
-                    header = filter_file.readline()
-
-                for cur_storm in sorted_storm_ids:
+                for cur_storm, rows in storm_rows.items():
                     msg = ("Processing storm: " +
                            cur_storm + " for file: " + filter_filename)
                     self.logger.debug(msg)
                     storm_output_dir = os.path.join(series_output_dir,
                                                     cur_init, cur_storm)
                     util.mkdir_p(storm_output_dir)
-                    util.mkdir_p(staging_dir)
-                    tmp_file = "filter_" + cur_init + "_" + cur_storm
-                    tmp_filename = os.path.join(staging_dir, tmp_file)
-                    storm_match_list = util.grep(cur_storm, filter_filename)
-                    with open(tmp_filename, "w") as tmp_file:
-                        tmp_file.write(header)
-                        for storm_match in storm_match_list:
-                            tmp_file.write(storm_match)
 
                     # Create the analysis and forecast files based
-                    # on the storms (defined in the tmp_filename created above)
+                    # on the rows for the storm.
                     # Store the analysis and forecast files in the
                     # series_output_dir.
-                    feature_util.retrieve_and_regrid(tmp_filename, cur_init,
-                                                     cur_storm,
-                                                     series_output_dir,
-                                                     self.config)
-
-                    # remove temp file
-                    os.remove(tmp_filename)
+                    feature_util.retrieve_and_regrid_rows(header, rows,
+                                                          cur_init,
+                                                          cur_storm,
+                                                          series_output_dir,
+                                                          self.config)
 
         # Check for any empty files and directories and remove them to avoid
         # any errors or performance degradation when performing
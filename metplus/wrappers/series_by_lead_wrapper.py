@@ -7,6 +7,7 @@ import glob
 from ..util import met_util as util
 from ..util import time_util
 from ..util import feature_util
+from ..util import netcdf_util
 from . import CommandBuilder
 from .tc_stat_wrapper import TCStatWrapper
 from . import RegridDataPlaneWrapper
@@ -46,12 +47,21 @@ class SeriesByLeadWrapper(CommandBuilder):
             'plot_data_plane')
 
         self.convert_exe = self.config.getexe('CONVERT')
-        self.ncap2_exe = self.config.getexe('NCAP2')
-        self.ncdump_exe = self.config.getexe('NCDUMP')
         self.rm_exe = self.config.getexe("RM")
-        if not self.convert_exe or not self.ncap2_exe or not self.ncdump_exe or not self.rm_exe:
+        if not self.convert_exe or not self.rm_exe:
             self.isOK = False
 
+        # NetCDF files are read in Python if netCDF4 is available,
+        # otherwise NCO tools are used to get the min and max values
+        self.use_nco = not netcdf_util.netcdf_available()
+        self.ncap2_exe = None
+        self.ncdump_exe = None
+        if self.use_nco:
+            self.ncap2_exe = self.config.getexe('NCAP2')
+            self.ncdump_exe = self.config.getexe('NCDUMP')
+            if not self.ncap2_exe or not self.ncdump_exe:
+                self.isOK = False
+
         met_bin_dir = self.config.getdir('MET_BIN_DIR', '')
         self.series_analysis_exe = os.path.join(met_bin_dir,
                                                 'series_analysis')
@@ -587,6 +597,60 @@ class SeriesByLeadWrapper(CommandBuilder):
            its associated variable via calculating the max series_cnt_TOTAL
            value, maximum.
 
+           Args:
+              @param do_fhr_by_range:  Boolean value indicating whether series
+                                analysis was performed on a range of forecast
+                                hours (True) or on a "bucket" of forecast hours
+                                (False).
+              @param nc_var_file:  The netCDF file for a particular variable.
+
+           Returns:
+                 maximum (str): The maximum value of series_cnt_TOTAL
+                 None:          If no max value is found.
+        """
+        if self.use_nco:
+            return self.get_nseries_nco(do_fhr_by_range, nc_var_file)
+
+        min_max = self.read_series_cnt_min_max(nc_var_file, 'TOTAL')
+        if min_max is None:
+            return None
+
+        maximum = min_max[1]
+        if maximum.is_integer():
+            return str(int(maximum))
+
+        return str(maximum)
+
+    def read_series_cnt_min_max(self, nc_file, cur_stat):
+        """! Get the min and max of series_cnt_<cur_stat> from a netCDF file.
+           All of the series_cnt variables are read the first time the file
+           is opened so other statistics do not need to read the file again.
+
+           Args:
+               @param nc_file:  The netCDF file generated by series analysis
+               @param cur_stat:  The statistic of interest, i.e. TOTAL or RMSE
+
+           Returns:
+               tuple (min, max) or None if the values could not be read
+        """
+        try:
+            all_min_max = netcdf_util.get_series_cnt_min_max(nc_file)
+        except (OSError, RuntimeError) as err:
+            self.log_error(f"Could not read netCDF file {nc_file}: {err}")
+            return None
+
+        if cur_stat not in all_min_max:
+            self.log_error(f"Variable {netcdf_util.SERIES_CNT_PREFIX}{cur_stat}"
+                           f" not found in {nc_file}")
+            return None
+
+        return all_min_max[cur_stat]
+
+    def get_nseries_nco(self, do_fhr_by_range, nc_var_file):
+        """! Determine the number of series for this lead time and
+           its associated variable via calculating the max series_cnt_TOTAL
+           value, maximum, using NCO tools ncap2 and ncdump.
+
            Args:
               @param do_fhr_by_range:  Boolean value indicating whether series
                                 analysis was performed on a range of forecast
@@ -688,6 +752,47 @@ class SeriesByLeadWrapper(CommandBuilder):
         """! Determine the min and max for all lead times for each
            statistic and variable pairing.
 
+           Args:
+               @param do_fhr_by_range:  Boolean value indicating whether series
+                                     analysis was performed on a range of
+                                     forecast hours (True) or on a grouping
+                                     of forecast hours (False).
+               @param nc_var_files:  A list of the netCDF files generated
+                                     by the MET series analysis tool that
+                                     correspond to the variable of interest.
+               @param cur_stat:      The current statistic of interest: ie.
+                                     RMSE, MAE, ODEV, FDEV, ME, or TOTAL.
+
+           Returns:
+               tuple (vmin, vmax)
+                   vmin:  The minimum
+                   vmax:  The maximum
+        """
+        if self.use_nco:
+            return self.get_netcdf_min_max_nco(do_fhr_by_range, nc_var_files,
+                                               cur_stat)
+
+        # Initialize the threshold values for min and max.
+        vmin = 999999.
+        vmax = -999999.
+
+        for cur_nc in nc_var_files:
+            min_max = self.read_series_cnt_min_max(cur_nc, cur_stat)
+            if min_max is None:
+                continue
+
+            cur_min, cur_max = min_max
+            if cur_min < vmin:
+                vmin = cur_min
+            if cur_max > vmax:
+                vmax = cur_max
+
+        return vmin, vmax
+
+    def get_netcdf_min_max_nco(self, do_fhr_by_range, nc_var_files, cur_stat):
+        """! Determine the min and max for all lead times for each
+           statistic and variable pairing using NCO tools ncap2 and ncdump.
+
            Args:
                @param do_fhr_by_range:  Boolean value indicating whether series
                                      analysis was performed on a range of
@@ -1362,17 +1467,13 @@ class SeriesByLeadWrapper(CommandBuilder):
                 self.logger.debug(msg)
                 continue
             else:
-                # Now retrieve the files corresponding to these
-                # storm ids that resulted from filtering.
-                sorted_storm_ids = util.get_storm_ids(filter_filename,
-                                                      self.logger)
-
-                # Retrieve the header from filter_filename to be used in
-                # creating the temporary files.
-                with open(filter_filename, 'r') as filter_file:
-                    header = filter_file.readline()
+                # Now read the filter file once and split the rows by
+                # the storm ids that resulted from filtering.
+                header, storm_rows = (
+                    feature_util.get_storm_rows(filter_filename)
+                )
 
-                for cur_storm in sorted_storm_ids:
+                for cur_storm, rows in storm_rows.items():
                     msg = ("Processing storm: " +
                            cur_storm + " for file: " + filter_filename)
                     self.logger.debug(msg)
@@ -1380,22 +1481,15 @@ class SeriesByLeadWrapper(CommandBuilder):
                                                     cur_init, cur_storm)
                     util.mkdir_p(storm_output_dir)
 
-                    tmp_file = "filter_" + cur_init + "_" + cur_storm
-                    tmp_filename = os.path.join(staging_dir, tmp_file)
-                    storm_match_list = util.grep(cur_storm, filter_filename)
-                    with open(tmp_filename, "w") as tmp_file:
-                        tmp_file.write(header)
-                        for storm_match in storm_match_list:
-                            tmp_file.write(storm_match)
-
                     # Create the analysis and forecast files based
-                    # on the storms (defined in the tmp_filename created above)
+                    # on the rows for the storm.
                     # Store the analysis and forecast files in the
                     # series_output_dir.
-                    feature_util.retrieve_and_regrid(tmp_filename, cur_init,
-                                                     cur_storm,
-                                                     series_output_dir,
-                                                     self.config)
+                    feature_util.retrieve_and_regrid_rows(header, rows,
+                                                          cur_init,
+                                                          cur_storm,
+                                                          series_output_dir,
+                                                          self.config)
 
         # Check for any empty files and directories and remove them to avoid
         # any errors or performance degradation when performing
@@ -20,6 +20,7 @@ import itertools
 
 from ..util import met_util as util
 from ..util import do_string_sub
+from ..util import parallel_util
 from . import CommandBuilder
 
 class StatAnalysisWrapper(CommandBuilder):
@@ -141,6 +142,11 @@ class StatAnalysisWrapper(CommandBuilder):
                                                    f'STAT_ANALYSIS_{job_conf}',
                                                    '')
 
+        # number of stat_analysis jobs to run at once
+        c_dict['JOB_WORKERS'] = parallel_util.get_num_workers(
+            self.config, 'STAT_ANALYSIS_JOB_WORKERS', 1
+        )
+
         # read in all lists except field lists, which will be read in afterwards and checked
         all_lists_to_read = self.expected_config_lists + self.list_categories
         non_field_lists = [conf_list for
@@ -1714,28 +1720,113 @@ class StatAnalysisWrapper(CommandBuilder):
 
     def run_stat_analysis_job(self,runtime_settings_dict_list):
         """! Sets environment variables need to run StatAnalysis jobs
-             and calls the tool for each job.
+             and calls the tool for each job. If STAT_ANALYSIS_JOB_WORKERS
+             is greater than 1, jobs are run concurrently in a pool of
+             worker processes. Jobs that write the same output file are
+             run in order by the same worker. Log output from the jobs is
+             added to the METplus log in the same order as running the
+             jobs one after another.
 
              Args:
                  @param runtime_settings_dict_list list of dictionaries
                   containing information needed to run a StatAnalysis job
         """
-        for runtime_settings_dict in runtime_settings_dict_list:
+        # each job starts from a copy of the current environment so
+        # variables set for one job are never seen by another job
+        self.job_base_env = self.env.copy()
+
+        job_groups = self.get_job_groups(runtime_settings_dict_list)
+        num_workers = min(self.c_dict['JOB_WORKERS'], len(job_groups))
+        if num_workers > 1 and not parallel_util.can_fork():
+            self.logger.warning("Running stat_analysis jobs concurrently is "
+                                "not supported on this platform. Running "
+                                "jobs serially")
+            num_workers = 1
+
+        if num_workers <= 1:
+            _run_stat_analysis_jobs(self.config, [self],
+                                    runtime_settings_dict_list)
+            return
 
-            # Set environment variables and run stat_analysis.
-            for name, value in runtime_settings_dict.items():
-                self.add_env_var(name, value)
+        parallel_util.run_times_in_process_pool(self.config, [self],
+                                                job_groups,
+                                                _run_stat_analysis_jobs,
+                                                num_workers,
+                                                'stat_analysis job groups')
 
-            # send environment variables to logger
-            self.set_environment_variables()
+    @staticmethod
+    def get_job_groups(runtime_settings_dict_list):
+        """! Split jobs into groups that can run at the same time. Jobs
+             that write to the same dump_row or out_stat file are put in
+             the same group so they run in order.
 
-            # set lookin dir
-            self.logger.debug(f"Setting -lookindir to {runtime_settings_dict['LOOKIN_DIR']}")
-            self.lookindir = runtime_settings_dict['LOOKIN_DIR']
+             Args:
+                 @param runtime_settings_dict_list list of dictionaries
+                  containing information needed to run a StatAnalysis job
+                 @returns list of lists of runtime settings dictionaries.
+                  Groups are ordered by their first job and the jobs in each
+                  group are in their original order
+        """
+        groups = []
+        group_by_output = {}
+        for job_index, runtime_settings_dict in (
+                enumerate(runtime_settings_dict_list)):
+            output_files = [runtime_settings_dict[key]
+                            for key in ['DUMP_ROW_FILENAME',
+                                        'OUT_STAT_FILENAME']
+                            if runtime_settings_dict.get(key)]
+
+            # merge groups that share an output file with this job
+            found = sorted(set(group_by_output[output_file]
+                               for output_file in output_files
+                               if output_file in group_by_output))
+            if found:
+                group_index = found[0]
+                for other_index in found[1:]:
+                    groups[group_index].extend(groups[other_index])
+                    groups[other_index] = []
+                    for output_file, index in group_by_output.items():
+                        if index == other_index:
+                            group_by_output[output_file] = group_index
+                groups[group_index].append(job_index)
+            else:
+                group_index = len(groups)
+                groups.append([job_index])
 
-            self.build_and_run_command()
+            for output_file in output_files:
+                group_by_output[output_file] = group_index
 
-            self.clear()
+        return [[runtime_settings_dict_list[job_index]
+                 for job_index in sorted(group)]
+                for group in groups if group]
+
+    def run_single_job(self, runtime_settings_dict):
+        """! Set environment variables and run stat_analysis for one job.
+             The environment is reset to the values that were set before
+             the first job so each job uses its own copy.
+
+             Args:
+                 @param runtime_settings_dict dictionary containing
+                  information needed to run a StatAnalysis job
+        """
+        original_env = self.env
+        self.env = self.job_base_env.copy()
+
+        # Set environment variables and run stat_analysis.
+        for name, value in runtime_settings_dict.items():
+            self.add_env_var(name, value)
+
+        # send environment variables to logger
+        self.set_environment_variables()
+
+        # set lookin dir
+        self.logger.debug(f"Setting -lookindir to {runtime_settings_dict['LOOKIN_DIR']}")
+        self.lookindir = runtime_settings_dict['LOOKIN_DIR']
+
+        self.build_and_run_command()
+
+        self.clear()
+        self.env = original_env
 
     def run_all_times(self):
         date_type = self.c_dict['DATE_TYPE']
@@ -1756,3 +1847,15 @@ class StatAnalysisWrapper(CommandBuilder):
         self.c_dict['DATE_BEG'] = run_date
         self.c_dict['DATE_END'] = run_date
         self.run_stat_analysis()
+
+def _run_stat_analysis_jobs(config, processes, runtime_settings_dict_list):
+    """! Run a list of stat_analysis jobs in order
+
+         Args:
+             @param config METplusConfig object
+             @param processes list containing the StatAnalysisWrapper
+             @param runtime_settings_dict_list list of dictionaries
+              containing information needed to run a StatAnalysis job
+    """
+    for runtime_settings_dict in runtime_settings_dict_list:
+        processes[0].run_single_job(runtime_settings_dict)
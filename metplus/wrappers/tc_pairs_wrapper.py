@@ -22,6 +22,7 @@ import glob
 
 from ..util import time_util
 from ..util import met_util as util
+from ..util import parallel_util
 from ..util import do_string_sub
 from ..util import get_tags
 from . import CommandBuilder
@@ -151,6 +152,11 @@ class TCPairsWrapper(CommandBuilder):
         c_dict['GET_ADECK'] = True if c_dict['ADECK_TEMPLATE'] else False
         c_dict['GET_EDECK'] = True if c_dict['EDECK_TEMPLATE'] else False
 
+        # number of tc_pairs commands to run at the same time
+        c_dict['WORKERS'] = parallel_util.get_num_workers(self.config,
+                                                          'TC_PAIRS_WORKERS',
+                                                          1)
+
         return c_dict
 
     def run_all_times(self):
@@ -264,6 +270,8 @@ class TCPairsWrapper(CommandBuilder):
         if self.c_dict['MODEL']:
             model_list = self.c_dict['MODEL']
 
+        # find the input files for each storm, then run tc_pairs for each
+        pairs_tasks = []
         if use_storm_id:
             for storm_id in storm_id_list:
                 # pull out info from storm_id and process
@@ -286,15 +294,95 @@ class TCPairsWrapper(CommandBuilder):
                     self.logger.warning(msg)
                     continue
 
-                self.process_data(basin, cyclone, model_list, time_info)
+                pairs_tasks.extend(self.process_data(basin, cyclone,
+                                                     model_list, time_info))
         else:
             for basin in [basin.lower() for basin in basin_list]:
                 for cyclone in cyclone_list:
-                    self.process_data(basin, cyclone, model_list, time_info)
+                    pairs_tasks.extend(self.process_data(basin, cyclone,
+                                                         model_list,
+                                                         time_info))
 
+        self.run_pairs_tasks(pairs_tasks)
 
         return True
 
+    def run_pairs_tasks(self, pairs_tasks):
+        """!Reformat the deck files if requested and run tc_pairs for each
+            storm. If TC_PAIRS_WORKERS is greater than 1, the storms are
+            processed in a pool of worker processes so that the deck files
+            for a storm are reformatted while tc_pairs is running on other
+            storms.
+            Args:
+                @param pairs_tasks list of dictionaries from process_data
+        """
+        if not pairs_tasks:
+            return
+
+        num_workers = min(self.c_dict['WORKERS'], len(pairs_tasks))
+        if num_workers > 1 and not parallel_util.can_fork():
+            self.logger.warning("Running tc_pairs concurrently is not "
+                                "supported on this platform. Running "
+                                "serially")
+            num_workers = 1
+
+        if num_workers <= 1:
+            for pairs_task in pairs_tasks:
+                _run_pairs_task(self.config, [self], pairs_task)
+            return
+
+        parallel_util.run_times_in_process_pool(self.config, [self],
+                                                pairs_tasks,
+                                                _run_pairs_task,
+                                                num_workers,
+                                                'tc_pairs storms')
+
+    def run_pairs_task(self, pairs_task):
+        """!Reformat the deck files for a storm if requested and run tc_pairs
+            Args:
+                @param pairs_task dictionary from process_data containing
+                 the deck files, basin, cyclone, and time information
+        """
+        time_info = pairs_task['time_info']
+        adeck_list = pairs_task['adeck']
+        bdeck_list = pairs_task['bdeck']
+        edeck_list = pairs_task['edeck']
+
+        # reformat extra tropical cyclone files if necessary
+        if self.c_dict['REFORMAT_DECK']:
+            adeck_list = self.reformat_files(adeck_list, 'A', time_info)
+            bdeck_list = self.reformat_files(bdeck_list, 'B', time_info)
+            edeck_list = self.reformat_files(edeck_list, 'E', time_info)
+
+        self.adeck = adeck_list
+        self.bdeck = bdeck_list
+        self.edeck = edeck_list
+
+        if self.c_dict['OUTPUT_TEMPLATE']:
+            # get output filename from template
+            output_file = do_string_sub(self.c_dict['OUTPUT_TEMPLATE'],
+                                        basin=pairs_task['basin'],
+                                        cyclone=pairs_task['cyclone'],
+                                        **time_info)
+        else:
+            output_file = 'tc_pairs'
+        self.outfile = output_file
+
+        # build command and run tc_pairs
+        cmd = self.get_command()
+        if cmd is None:
+            self.log_error("Could not generate command")
+            return
+
+        output_path = self.get_output_path()+'.tcst'
+        if os.path.isfile(output_path) and self.c_dict['SKIP_OUTPUT'] is True:
+            self.logger.debug('Skip running tc_pairs because '+\
+                              'output file {} already exists'.format(output_path)+\
+                              'Change TC_PAIRS_SKIP_IF_OUTPUT_EXISTS to False to '+\
+                              'overwrite file')
+        else:
+            self.build()
+
     def set_environment_variables(self, time_info):
         """! Set up all the environment variables that are assigned
              in the METplus config file which are to be used by the MET
@@ -449,13 +537,17 @@ class TCPairsWrapper(CommandBuilder):
         super().set_environment_variables(time_info)
 
     def process_data(self, basin, cyclone, model_list, time_info):
-        """!Find requested files and run tc_pairs
+        """!Find requested files to run tc_pairs
             Args:
                 @param basin region of storm from config
                 @param cyclone ID number of cyclone from config
                 @param model_list list of models that be available
                 @param time_info object containing timing information to process
+            @returns list of dictionaries containing the deck files, basin,
+             cyclone, and time information for each BDECK file found
         """
+        pairs_tasks = []
+
         # get bdeck file
         bdeck_files = []
 
@@ -488,7 +580,7 @@ class TCPairsWrapper(CommandBuilder):
             template = self.c_dict['BDECK_TEMPLATE']
             self.log_error(f'No BDECK files found searching for basin {basin} and '
                               f'cyclone {cyclone} using template {template}')
-            return False
+            return pairs_tasks
 
         # find corresponding adeck or edeck files
         for bdeck_file in bdeck_files:
@@ -556,40 +648,15 @@ class TCPairsWrapper(CommandBuilder):
                                   'ADECK or EDECK files')
                 continue
 
-            # reformat extra tropical cyclone files if necessary
-            if self.c_dict['REFORMAT_DECK']:
-                adeck_list = self.reformat_files(adeck_list, 'A', time_info)
-                bdeck_list = self.reformat_files(bdeck_list, 'B', time_info)
-                edeck_list = self.reformat_files(edeck_list, 'E', time_info)
-
-            self.adeck = adeck_list
-            self.bdeck = bdeck_list
-            self.edeck = edeck_list
-
-            if self.c_dict['OUTPUT_TEMPLATE']:
-                # get output filename from template
-                output_file = do_string_sub(self.c_dict['OUTPUT_TEMPLATE'],
-                                            basin=current_basin,
-                                            cyclone=current_cyclone,
-                                            **time_info)
-            else:
-                output_file = 'tc_pairs'
-            self.outfile = output_file
-
-            # build command and run tc_pairs
-            cmd = self.get_command()
-            if cmd is None:
-                self.log_error("Could not generate command")
-                return
+            pairs_tasks.append({'time_info': time_info,
+                                'basin': current_basin,
+                                'cyclone': current_cyclone,
+                                'adeck': adeck_list,
+                                'bdeck': bdeck_list,
+                                'edeck': edeck_list,
+                                })
 
-            output_path = self.get_output_path()+'.tcst'
-            if os.path.isfile(output_path) and self.c_dict['SKIP_OUTPUT'] is True:
-                self.logger.debug('Skip running tc_pairs because '+\
-                                  'output file {} already exists'.format(output_path)+\
-                                  'Change TC_PAIRS_SKIP_IF_OUTPUT_EXISTS to False to '+\
-                                  'overwrite file')
-            else:
-                self.build()
+        return pairs_tasks
 
     def find_deck_files(self, deck, basin, cyclone, model_list, time_info):
         """!Find ADECK or EDECK files that correspond to the BDECk file found
@@ -648,15 +715,23 @@ class TCPairsWrapper(CommandBuilder):
         for deck in file_list:
             outfile = deck.replace(deck_dir,
                                    reformat_dir)
+            reformat_info = _get_reformat_info(deck, storm_month,
+                                              missing_values)
             if os.path.isfile(outfile) and self.c_dict['SKIP_REFORMAT'] is True:
                 self.logger.debug('Skip processing {} because '.format(deck) +\
                                   'reformatted file already exists. Change '+\
                                   'TC_PAIRS_SKIP_IF_REFORMAT_EXISTS to False to '+\
                                   'overwrite file')
+            elif (os.path.isfile(outfile) and
+                  _read_reformat_info(outfile) == reformat_info):
+                self.logger.debug(f'Skip processing {deck} because it has '
+                                  'not changed since it was reformatted to '
+                                  f'{outfile}')
             else:
                 self.logger.debug('Reformatting {} to {}'.format(deck, outfile))
                 self.read_modify_write_file(deck, storm_month,
                                             missing_values, outfile)
+                _write_reformat_info(outfile, reformat_info)
 
             outfiles.append(outfile)
 
@@ -721,45 +796,113 @@ class TCPairsWrapper(CommandBuilder):
         """
         # create output directory if it does not exist
         if not os.path.exists(os.path.dirname(out_csvfile)):
-            os.makedirs(os.path.dirname(out_csvfile))
-
-        # Open the output csv file
-        out_file = open(out_csvfile, "w", newline='')
-
-        # Tell the write to use the line separator
-        # "\n" instead of the DOS "\r\n"
-        writer = csv.writer(out_file, lineterminator="\n")
-
-        with open(in_csvfile, newline='') as csvfile:
-
-            in_file_reader = csv.reader(csvfile)
-
-            for row in in_file_reader:
-                # Create a list for the modified lines
-                row_list = []
-
-                # Replace the second column (storm number) with
-                # the month followed by the storm number
-                # e.g. Replace 0006 with 010006
-                # this is done because this data has many storms per month
-                # and we need to know which storm we are processing if running
-                # over multiple months
-                row[1] = " " + storm_month + (row[1]).strip()
-
-                # Iterate over the items, deleting or modifying the columns
-                for item in row:
-                    # Delete the third column
-                    if item == row[2]:
-                        continue
-                    # Replace MISSING_VAL_TO_REPLACE=missing_values[0] with
-                    # MISSING_VAL=missing_values[1]
-                    elif item.strip() == missing_values[0]:
-                        item = " " + missing_values[1]
-                    # Create a new row to write
-                    row_list.append(item)
-
-                # Write the modified file
-                writer.writerow(row_list)
-
-        csvfile.close()
-        out_file.close()
+            os.makedirs(os.path.dirname(out_csvfile), exist_ok=True)
+
+        # write to a temporary file and rename it when it is complete so
+        # an incomplete file is never read by tc_pairs
+        tmp_csvfile = f'{out_csvfile}.{os.getpid()}.tmp'
+
+        with open(in_csvfile, newline='') as csvfile, \
+                open(tmp_csvfile, "w", newline='') as out_file:
+            # Tell the write to use the line separator
+            # "\n" instead of the DOS "\r\n"
+            writer = csv.writer(out_file, lineterminator="\n")
+            writer.writerows(reformat_deck_rows(csv.reader(csvfile),
+                                                storm_month,
+                                                missing_values))
+
+        os.replace(tmp_csvfile, out_csvfile)
+
+def reformat_deck_rows(rows, storm_month, missing_values):
+    """! Modify each row of a deck file to match the ATCF format. Rows are
+         modified one at a time so the whole file is never read into memory
+          Args:
+            @param rows iterable of lists containing the columns of each row
+            @param storm_month The storm month
+            @param missing_values a tuple where (MISSING_VAL_TO_REPLACE,
+                                                 MISSING_VAL)
+            @returns generator of modified rows
+    """
+    missing_val_to_replace = missing_values[0]
+    missing_val = " " + missing_values[1]
+    for row in rows:
+        # skip blank lines
+        if not row:
+            continue
+
+        # Replace the second column (storm number) with
+        # the month followed by the storm number
+        # e.g. Replace 0006 with 010006
+        # this is done because this data has many storms per month
+        # and we need to know which storm we are processing if running
+        # over multiple months
+        row[1] = " " + storm_month + (row[1]).strip()
+
+        # Delete the third column and replace
+        # MISSING_VAL_TO_REPLACE=missing_values[0] with
+        # MISSING_VAL=missing_values[1]
+        third_column = row[2]
+        yield [missing_val if item.strip() == missing_val_to_replace else item
+               for item in row if item != third_column]
+
+def _get_reformat_info(deck, storm_month, missing_values):
+    """! Get information used to determine if a deck file needs to be
+         reformatted again
+          Args:
+            @param deck path to deck file to reformat
+            @param storm_month The storm month
+            @param missing_values a tuple where (MISSING_VAL_TO_REPLACE,
+                                                 MISSING_VAL)
+            @returns string containing the path, modification time, and size
+             of the deck file and the values used to reformat it
+    """
+    stat = os.stat(deck)
+    return ' '.join([deck, str(stat.st_mtime_ns), str(stat.st_size),
+                     storm_month, missing_values[0], missing_values[1]])
+
+def _get_reformat_info_path(outfile):
+    """! Get path to the file that contains the information about the deck
+         file that was used to create a reformatted file
+          Args:
+            @param outfile path to reformatted deck file
+            @returns path to hidden file in the same directory
+    """
+    return os.path.join(os.path.dirname(outfile),
+                        f'.{os.path.basename(outfile)}.source')
+
+def _read_reformat_info(outfile):
+    """! Read information about the deck file that was used to create a
+         reformatted file
+          Args:
+            @param outfile path to reformatted deck file
+            @returns string from _get_reformat_info or None if not found
+    """
+    try:
+        with open(_get_reformat_info_path(outfile), 'r') as file_handle:
+            return file_handle.read()
+    except OSError:
+        return None
+
+def _write_reformat_info(outfile, reformat_info):
+    """! Write information about the deck file that was used to create a
+         reformatted file
+          Args:
+            @param outfile path to reformatted deck file
+            @param reformat_info string from _get_reformat_info
+    """
+    info_path = _get_reformat_info_path(outfile)
+    tmp_path = f'{info_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as file_handle:
+        file_handle.write(reformat_info)
+    os.replace(tmp_path, info_path)
+
+def _run_pairs_task(config, processes, pairs_task):
+    """! Reformat the deck files and run tc_pairs for a storm using the
+         TCPairsWrapper
+
+         Args:
+             @param config METplusConfig object
+             @param processes list containing the TCPairsWrapper instance
+             @param pairs_task dictionary from TCPairsWrapper.process_data
+    """
+    processes[0].run_pairs_task(pairs_task)
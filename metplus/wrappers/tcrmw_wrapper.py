@@ -345,10 +345,10 @@ class TCRMWWrapper(CommandBuilder):
                 @returns True if field list could be built, False if not.
         """
 
-        field_list = util.parse_var_list(self.config,
-                                         time_info,
-                                         data_type='FCST',
-                                         met_tool=self.app_name)
+        field_list = self.get_field_plan(
+            data_type='FCST',
+            met_tool=self.app_name
+        ).get_var_list(time_info)
         if not field_list:
             self.log_error("Could not get field information from config.")
             return False
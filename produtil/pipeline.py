@@ -16,7 +16,7 @@ class NoMoreProcesses(KeyboardInterrupt):
     """!Raised when the produtil.sigsafety package catches a fatal
     signal.  Indicates to callers that the thread should exit."""
 
-import os, signal, select, logging, sys, io, time, errno, \
+import os, signal, select, selectors, logging, sys, io, time, errno, \
     fcntl, threading, weakref, collections
 import stat,errno,fcntl
 
@@ -188,7 +188,15 @@ def launch(cmd, env=None, stdin=None, stdout=None, stderr=None,
     elif stderr is not ERR2OUT:
         stderrC=stderr
 
-    pid=os.fork()
+    # Hold plock while forking so that another thread cannot be holding
+    # it when the child is created.  Otherwise pclose_all would
+    # deadlock in the child when commands are launched from several
+    # threads, i.e. by produtil.run.JobPool.
+    plock.acquire()
+    try:
+        pid=os.fork()
+    finally:
+        plock.release()
     assert(pid>=0)
     if pid>0:
         # Parent process after successfull fork.
@@ -326,11 +334,35 @@ def kill_all():
 
 ########################################################################
 
+def open_pidfd(pid,logger=None):
+    """!Returns a file descriptor that becomes readable when the
+    specified child process exits, or None if process file
+    descriptors are not available (non-Linux systems, kernels older
+    than 5.3, or Python older than 3.9).
+    @param pid the process id of the child
+    @param logger a logging.Logger for debug messages"""
+    pidfd_open=getattr(os,'pidfd_open',None)
+    if pidfd_open is None:
+        return None
+    try:
+        return pidfd_open(pid)
+    except EnvironmentError as e:
+        if logger is not None:
+            logger.debug("Cannot open pidfd for process %d: %s"
+                         %(pid,str(e)))
+        return None
+
 def manage(proclist,inf=None,outf=None,errf=None,instr=None,logger=None,
            childset=None,sleeptime=None,binary=False):
     """!Watches a list of processes, handles their I/O, returns when
     all processes have exited and all I/O is complete.  
 
+    This function sleeps in a selector (epoll on Linux) until a pipe
+    is ready to read or write, or a child process exits.  Child exit
+    is detected with a pidfd (os.pidfd_open) where available.
+    Otherwise, the children are checked with os.wait4 at increasing
+    intervals, starting at one millisecond.
+
     @warning You should not be calling this function unless you are
       modifying the implementation of Pipeline.  Use the produtil.run
       module instead of calling launch() and manage().
@@ -341,7 +373,9 @@ def manage(proclist,inf=None,outf=None,errf=None,instr=None,logger=None,
     @param errf the error file
     @param instr the input string, instead of an input file
     @param childset the set of child process ids
-    @param sleeptime sleep time between checks of child processes
+    @param sleeptime maximum time to sleep between checks of child
+      processes that cannot be watched with a pidfd, and between
+      checks for a kill_all request
     @param logger Logs to the specified object, at level DEBUG, if a logger is
     specified.  
     @returns a tuple containing the stdout string (or None), the
@@ -355,200 +389,179 @@ def manage(proclist,inf=None,outf=None,errf=None,instr=None,logger=None,
     assert(ms)
 
     bufsize=1048576
-    work=list()
     done=dict() # mapping from pid to wait4 return value
-    outio=None
-    errio=None
-    haveio=False
+    outbufs=dict() # mapping from output fd to list of bytes read
+    running=set(proclist)
+    pidfds=dict() # mapping from pid to pidfd
+    maxwait=sleeptime if sleeptime else 0.2
+    polldelay=0.001
 
     inf=filenoify(inf)
     outf=filenoify(outf)
     errf=filenoify(errf)
 
-    if inf is not None:
-        if instr is None: 
-            instr=""
-        if logger is not None:
-            logger.debug("Will write instr (%d bytes) to %d."
-                         %(len(instr),inf))
-        work.append([0,inf])
-        unblock(inf,logger=logger)
-        haveio=True
+    sel=selectors.DefaultSelector()
 
-    if outf is not None:
-        if logger is not None:
-            logger.debug("Will read outstr from %d."%outf)
-        work.append([1,outf])
-        if binary:
-            outio=io.BytesIO()
-        else:
-            outio=io.StringIO()
-        unblock(outf,logger=logger)
-        haveio=True
+    def close_stream(fd):
+        sel.unregister(fd)
+        pclose(fd)
 
-    if errf is not None:
-        if logger is not None:
-            logger.debug("Will read errstr from %d."%errf)
-        work.append([1,errf])
-        if binary:
-            errio=io.BytesIO()
-        else:
-            errio=io.StringIO()
-        unblock(errf,logger=logger)
-        haveio=True
+    try:
+        if inf is not None:
+            if instr is None: 
+                instr=""
+            if not isinstance(instr,bytes):
+                instr=bytes(instr,encoding='UTF8')
+            if logger is not None:
+                logger.debug("Will write instr (%d bytes) to %d."
+                             %(len(instr),inf))
+            unblock(inf,logger=logger)
+            sel.register(inf,selectors.EVENT_WRITE,'in')
+        nin=0
+
+        for fd in (outf,errf):
+            if fd is None or fd in outbufs:
+                continue
+            if logger is not None:
+                logger.debug("Will read output from %d."%fd)
+            unblock(fd,logger=logger)
+            outbufs[fd]=list()
+            sel.register(fd,selectors.EVENT_READ,'out')
 
-    for proc in proclist:
-        if logger is not None:
-            logger.debug("Monitor process %d."%proc)
-        work.append([2,proc])
-
-    nin=0
-    lastproc=time.time()
-    forceclose=False
-    while work:
-        i=0
-        didproc=False
-        if _kill_all is not None:
+        for proc in proclist:
             if logger is not None:
-                logger.debug("Kill all processes.")
-            for (job,tgt) in work:
-                if job==2:
-                    os.kill(tgt,SIGTERM)
-        while i<len(work):
-            (job,tgt)=work[i]
-            assert(job==0 or job==1 or job==2)
-            if job==0:
+                logger.debug("Monitor process %d."%proc)
+            pidfd=open_pidfd(proc,logger)
+            if pidfd is not None:
+                pidfds[proc]=pidfd
+                sel.register(pidfd,selectors.EVENT_READ,proc)
+
+        lastio=time.time()
+        while True:
+            if _kill_all is not None:
                 if logger is not None:
-                    logger.debug("Attempt a write of %d characters to %d"
-                                 %(len(instr)-nin,tgt))
-                try:
-                    if isinstance(instr,bytes):
-                        n=os.write(tgt,instr[nin:])
-                    else:
-                        n=os.write(tgt,bytes(instr[nin:],encoding='UTF8'))
-                except EnvironmentError as e:
-                    if e.errno==errno.EAGAIN or e.errno==errno.EWOULDBLOCK:
-                        n=None
-                    else:
-                        raise
-                if n: 
-                    if logger is not None:
-                        logger.debug("Wrote %d bytes to %d."%(n,tgt))
-                    nin+=n
-                if nin>=len(instr):
-                    if logger is not None:
-                        logger.debug("Done writing all %d characters; close %d."
-                                     %(nin,tgt))
-                    pclose(tgt)
-                    work.pop(i)
-                    continue # do not increment i
-                if forceclose:
-                    if logger is not None:
-                        logger.debug("Force close of in %d due to timeout."
-                                     %tgt)
-                    pclose(tgt)
-                    work.pop(i)
-                    continue # do not increment i
-            elif job==1:
-                try:
-                    if logger is not None:
-                        logger.debug("Attempt a read from %d"%tgt)
-                    s=os.read(tgt,bufsize)
-                except EnvironmentError as e:
-                    if e.errno==errno.EAGAIN or e.errno==errno.EWOULDBLOCK:
-                        if logger is not None:
-                            logger.debug("Error %s from %d - assume no data"
-                                         %(str(e),tgt))
-                        s=None
-                    else:
-                        raise
-                if s=='':
-                    # end of file
-                    if logger is not None:
-                        logger.debug("eof reading output %d"%tgt)
-                    pclose(tgt)
-                    work.pop(i)
-                    continue # do not increment i
-                if s is not None:
-                    if logger is not None:
-                        logger.debug("Read %d characters from output %d"
-                                     %(len(s),tgt))
-                    # read something
-                    if binary:
-                        outio.write(s)
-                    else:
-                        outio.write(str(s,encoding='UTF8'))
-                if forceclose:
-                    if logger is not None:
-                        logger.debug("Force close of %d due to timeout."
-                                     %tgt)
-                    pclose(tgt)
-                    work.pop(i)
-                    continue # do not increment i
-            elif job==2:
+                    logger.debug("Kill all processes.")
+                for proc in running:
+                    os.kill(proc,signal.SIGTERM)
+
+            # Reap any processes that have exited.
+            for proc in list(running):
+                r=os.wait4(proc,os.WNOHANG)
+                if not r or ( r[0]==0 and r[1]==0 ):
+                    continue
                 if logger is not None:
-                    logger.debug("Check process %d"%tgt)
-                didproc=True
-                r=os.wait4(tgt,os.WNOHANG)
-                if r and ( r[0]!=0 or r[1]!=0 ):
-                    if logger is not None:
-                        logger.debug("Process %d exited"%tgt)
-                    work.pop(i)
+                    logger.debug("Process %d exited"%proc)
+                running.remove(proc)
+                done[proc]=r
+                if not running:
+                    # Measure the two second wait for grandchildren
+                    # from when the last process exited.
+                    lastio=time.time()
+                if proc in pidfds:
+                    close_stream(pidfds.pop(proc))
+                try:
+                    ms.remove(proc)
+                except (ValueError,KeyError,TypeError) as e:
+                    if logger is not None: 
+                        logger.debug(
+                            "Cannot remove pid %d from _manage_set: %s"
+                            %(proc,str(e)),exc_info=True)
+                if childset is not None:
                     try:
-                        ms.remove(tgt)
+                        childset.remove(proc)
                     except (ValueError,KeyError,TypeError) as e:
                         if logger is not None: 
                             logger.debug(
-                                "Cannot remove pid %d from _manage_set: %s"
-                                %(tgt,str(e)),exc_info=True)
-                    if childset is not None:
-                        try:
-                            childset.remove(tgt)
-                        except (ValueError,KeyError,TypeError) as e:
-                            if logger is not None: 
-                                logger.debug(
-                                    "Cannot remove pid %d from childset: %s"
-                                    %(tgt,str(e)),exc_info=True)
-                    done[tgt]=r
-                    continue # do not increment i
-                else:
-                    if logger is not None:
-                        logger.debug("Process %d still running"%tgt)
-            i+=1
-        if didproc:
-            lastproc=time.time()
-        else:
-            now=time.time()
-            if now-lastproc > 2 and work:
-                if logger is not None:
-                    logger.debug(
-                        "No data two seconds after processes exited.  "
-                        "Forcing a close of all streams.")
-                # No data in past two seconds and all processes have
-                # exited.
-                forceclose=True
-                continue
-        if work:
-            if logger is not None:
-                logger.debug("Bottom of loop with work=%s"%repr(work))
-            if sleeptime:
-                time.sleep(sleeptime)
-            elif haveio:
-                time.sleep(0.01)
+                                "Cannot remove pid %d from childset: %s"
+                                %(proc,str(e)),exc_info=True)
+
+            streams=[ key.fd for key in sel.get_map().values()
+                      if key.data=='in' or key.data=='out' ]
+            if not running and not streams:
+                break
+
+            # Decide how long to sleep.  Processes with a pidfd wake
+            # the selector when they exit; others must be polled.
+            if running and len(pidfds)<len(running):
+                timeout=min(polldelay,maxwait)
+                polldelay=min(polldelay*2,0.05)
             else:
-                time.sleep(0.2)
+                timeout=maxwait
+            if not running:
+                # A grandchild may hold a pipe open after all processes
+                # have exited.  Close the streams if no data arrives
+                # for two seconds.
+                idle=time.time()-lastio
+                if idle>=2:
+                    if logger is not None:
+                        logger.debug(
+                            "No data two seconds after processes exited.  "
+                            "Forcing a close of all streams.")
+                    for fd in streams:
+                        close_stream(fd)
+                    continue
+                timeout=min(timeout,2-idle)
+
+            for (key,events) in sel.select(timeout):
+                fd=key.fd
+                if key.data=='in':
+                    try:
+                        n=os.write(fd,instr[nin:nin+bufsize])
+                    except EnvironmentError as e:
+                        if e.errno==errno.EAGAIN or e.errno==errno.EWOULDBLOCK:
+                            continue
+                        if e.errno!=errno.EPIPE:
+                            raise
+                        if logger is not None:
+                            logger.debug("Input %d closed by reader."%fd)
+                        close_stream(fd)
+                        continue
+                    if logger is not None:
+                        logger.debug("Wrote %d bytes to %d."%(n,fd))
+                    nin+=n
+                    if nin>=len(instr):
+                        if logger is not None:
+                            logger.debug(
+                                "Done writing all %d bytes; close %d."
+                                %(nin,fd))
+                        close_stream(fd)
+                elif key.data=='out':
+                    try:
+                        s=os.read(fd,bufsize)
+                    except EnvironmentError as e:
+                        if e.errno==errno.EAGAIN or e.errno==errno.EWOULDBLOCK:
+                            continue
+                        raise
+                    lastio=time.time()
+                    if not s:
+                        if logger is not None:
+                            logger.debug("eof reading output %d"%fd)
+                        close_stream(fd)
+                        continue
+                    if logger is not None:
+                        logger.debug("Read %d bytes from output %d"
+                                     %(len(s),fd))
+                    outbufs[fd].append(s)
+                # else: a process exited.  It is reaped at the top of
+                # the loop.
+    finally:
+        for pidfd in pidfds.values():
+            os.close(pidfd)
+        sel.close()
+
     if logger is not None:
         logger.debug("Done monitoring pipeline.")
 
-    outstr=None
-    if outf is not None:
-        outstr=outio.getvalue()
-        outio.close()
+    def getvalue(fd):
+        if fd is None:
+            return None
+        data=b''.join(outbufs[fd])
+        if binary:
+            return data
+        return str(data,encoding='UTF8')
 
-    errstr=None
-    if errf is not None:
-        errstr=errio.getvalue()
-        errio.close()
+    outstr=getvalue(outf)
+    errstr=getvalue(errf)
 
     if _kill_all is not None:
         raise NoMoreProcesses(
@@ -698,6 +711,15 @@ class Pipeline(object):
         else:
             return -128
 
+    def rusage(self):
+        """!Returns a list of the resource usage of each process in the
+        pipeline, as returned by os.wait4 (resource.struct_rusage
+        objects), or None if the processes have not been waited for
+        yet."""
+        m=self.__managed
+        if not m: return None
+        return [m[p][2] for p in sorted(m)]
+
     def to_string(self):
         """!Calls self.communicate(), and returns the stdout from the
         pipeline (self.outbytes).  The return value will be Null if
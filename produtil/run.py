@@ -154,7 +154,8 @@ only modify the last the command in the pipeline (or the first, for
 operations that change stdin).
 """
 
-import time, logging
+import os, time, logging, threading
+import concurrent.futures
 import produtil.mpi_impl
 import produtil.sigsafety
 import produtil.prog as prog
@@ -168,7 +169,8 @@ from produtil.prog import InvalidRunArgument,ExitStatusException
 ##@var __all__
 # List of symbols exported by "from produtil.run import *"
 __all__=['alias','exe','run','runstr','mpi','mpiserial','mpirun',
-         'runbg','prog','mpiprog','waitprocs','runsync',
+         'runbg','prog','mpiprog','waitprocs','runsync','runrusage',
+         'JobPool','BackgroundJob',
          'InvalidRunArgument','ExitStatusException','checkrun',
          'batchexe','bigexe','openmp','make_mpi']
 
@@ -356,74 +358,305 @@ def make_pipeline(arg,capture,mpiimpl=None,**kwargs):
         logger.debug('Pipeline is %s'%(repr(pl),))
     return pl
 
-def runbg(arg,capture=False,**kwargs):
-    """!Not implemented: background execution
-
-    Runs the specified process in the background.  Specify
+##@var KILL_DELAY
+# Seconds to wait after sending SIGTERM to a background job that is
+# cancelled or exceeds its timeout before sending SIGKILL
+KILL_DELAY=5
+
+class BackgroundJob(object):
+    """!A program that is run in the background by a JobPool.  This
+    is returned by JobPool.submit() and runbg().  The program is
+    started when a slot in the pool is available.  Use poll() or
+    done() to check if it has finished, and wait() or result() to
+    wait for its exit status.  The stdout is available from the out
+    property after completion if capture=True was specified."""
+    def __init__(self,arg,capture=False,timeout=None,logger=None,
+                 sleeptime=None,**kwargs):
+        """!BackgroundJob constructor.  Do not call directly: use
+        JobPool.submit() or runbg() instead.
+        @param arg the produtil.prog.Runner to execute (output of
+          exe(), bigexe() or mpirun()
+        @param capture if True, capture the stdout into a string
+        @param timeout maximum number of seconds the program may run
+          before it is terminated, or None for no limit
+        @param logger a logging.Logger for log messages
+        @param sleeptime time to sleep between checks of child process
+        @param kwargs additional arguments, same as for make_pipeline()"""
+        self.arg=arg
+        self.capture=bool(capture)
+        self.timeout=timeout
+        self.logger=logger
+        self.__sleeptime=sleeptime
+        self.__kwargs=kwargs
+        self.__lock=threading.Lock()
+        self.__pipeline=None
+        self.__cancelled=False
+        self.__timed_out=False
+        self.__wall_seconds=None
+        self.future=None
+    def __repr__(self):
+        """!Return a debug string representation of this BackgroundJob."""
+        return '<BackgroundJob id=0x%x %s>'%(id(self),repr(self.arg))
+    def _submit(self,executor):
+        """!Queues the program to run in the given executor.
+        @param executor a concurrent.futures.Executor"""
+        self.future=executor.submit(self._run)
+        return self.future
+    def _run(self):
+        """!Runs the program and waits for it to exit.  Called in a
+        worker thread of the JobPool.
+        @returns the exit status, same as run(), or None if the job
+          was cancelled before it started"""
+        with self.__lock:
+            if self.__cancelled: return None
+            start=time.perf_counter()
+            pl=make_pipeline(self.arg,self.capture,logger=self.logger,
+                             **self.__kwargs)
+            self.__pipeline=pl
+        timer=None
+        if self.timeout is not None:
+            timer=threading.Timer(self.timeout,self._expire)
+            timer.daemon=True
+            timer.start()
+        try:
+            pl.communicate(sleeptime=self.__sleeptime)
+        finally:
+            if timer is not None: timer.cancel()
+            self.__wall_seconds=time.perf_counter()-start
+        result=pl.poll()
+        if self.logger is not None:
+            self.logger.info('  - exit status %d'%(int(result),))
+        return result
+    def _expire(self):
+        """!Terminates the program because it exceeded its timeout."""
+        if self.done(): return
+        if self.logger is not None:
+            self.logger.warning('%s: exceeded timeout of %s seconds'%(
+                    repr(self.arg),repr(self.timeout)))
+        self.__timed_out=True
+        self._stop()
+    def _stop(self):
+        """!Sends SIGTERM to the running program, and SIGKILL if it is
+        still running KILL_DELAY seconds later."""
+        pl=self.__pipeline
+        if pl is None: return
+        pl.terminate()
+        timer=threading.Timer(KILL_DELAY,self._kill_if_running)
+        timer.daemon=True
+        timer.start()
+    def _kill_if_running(self):
+        """!Sends SIGKILL to the program if it has not exited."""
+        if not self.done() and self.__pipeline is not None:
+            self.__pipeline.kill()
+    def cancel(self):
+        """!Cancels the job.  If it has not started, it will never be
+        run.  If it is running, it is terminated.
+        @returns True if the job was cancelled or terminated, False
+          if it had already finished"""
+        with self.__lock:
+            if self.done(): return False
+            self.__cancelled=True
+            if self.future is not None and self.future.cancel():
+                return True
+            self._stop()
+            return True
+    def done(self):
+        """!Returns True if the job has finished or was cancelled."""
+        return self.future is not None and self.future.done()
+    def poll(self):
+        """!Returns the exit status of the program, same as run(), or
+        None if it has not finished or was cancelled before it
+        started."""
+        if not self.done() or self.future.cancelled(): return None
+        return self.future.result()
+    def wait(self,timeout=None):
+        """!Waits for the job to finish.
+        @param timeout maximum number of seconds to wait, or None to
+          wait until the job finishes
+        @returns the exit status, or None if the job did not finish
+          within the timeout or was cancelled before it started"""
+        concurrent.futures.wait([self.future],timeout=timeout)
+        return self.poll()
+    def result(self,timeout=None):
+        """!Waits for the job to finish and returns its exit status.
+        Raises concurrent.futures.TimeoutError if the job does not
+        finish within the timeout, concurrent.futures.CancelledError
+        if the job was cancelled before it started, or the exception
+        raised when starting the program.
+        @param timeout maximum number of seconds to wait"""
+        return self.future.result(timeout=timeout)
+    @property
+    def cancelled(self):
+        """!True if cancel() was called before the job finished."""
+        return self.__cancelled
+    @property
+    def timed_out(self):
+        """!True if the program was terminated because it ran longer
+        than the timeout."""
+        return self.__timed_out
+    @property
+    def wall_seconds(self):
+        """!Number of seconds the program ran, or None if it has not
+        finished."""
+        return self.__wall_seconds
+    @property
+    def out(self):
+        """!The stdout from the program if capture=True was specified
+        and the program has finished, otherwise None."""
+        if not self.done() or self.__pipeline is None: return None
+        return self.__pipeline.out
+    def rusage(self):
+        """!Returns a list of the resource usage of each process that
+        was started, same as produtil.pipeline.Pipeline.rusage(), or
+        None if the program has not finished."""
+        if not self.done() or self.__pipeline is None: return None
+        return self.__pipeline.rusage()
+
+class JobPool(object):
+    """!Runs programs in the background with at most max_jobs of them
+    running at the same time.  Each program is started and monitored
+    by a thread in the pool.  Programs submitted when all slots are in
+    use are started in order as the running ones finish.  Example:
+    @code
+      with JobPool(4) as pool:
+          jobs=[ pool.submit(exe('gzip')[f]) for f in files ]
+          pool.wait(jobs)
+      statuses=[ job.poll() for job in jobs ]
+    @endcode"""
+    def __init__(self,max_jobs=None,logger=None,sleeptime=None):
+        """!JobPool constructor
+        @param max_jobs maximum number of programs to run at the same
+          time, or None to use the number of CPUs
+        @param logger a logging.Logger for log messages
+        @param sleeptime time to sleep between checks of child process"""
+        if max_jobs is None:
+            max_jobs=os.cpu_count() or 1
+        if max_jobs<1:
+            raise ValueError('In produtil.run.JobPool, max_jobs must be '
+                             'at least 1.  Got: %s'%(repr(max_jobs),))
+        self.max_jobs=max_jobs
+        self.logger=logger
+        self.sleeptime=sleeptime
+        self.__jobs=list()
+        self.__lock=threading.Lock()
+        self.__executor=concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_jobs,thread_name_prefix='produtil-job')
+    def __enter__(self):
+        """!Returns this JobPool for use in a with block."""
+        return self
+    def __exit__(self,etype,value,traceback):
+        """!Waits for all jobs to finish, or cancels them if an
+        exception was raised in the with block."""
+        self.shutdown(wait=True,cancel=etype is not None)
+    def submit(self,arg,capture=False,timeout=None,logger=None,**kwargs):
+        """!Queues a program to run in the background.
+        @param arg the produtil.prog.Runner to execute (output of
+          exe(), bigexe() or mpirun()
+        @param capture if True, capture the stdout into a string
+        @param timeout maximum number of seconds the program may run
+          before it is terminated, or None for no limit
+        @param logger a logging.Logger for log messages, default is
+          the logger of this pool
+        @param kwargs additional arguments, same as for mpirun()
+        @returns a BackgroundJob"""
+        if logger is None: logger=self.logger
+        job=BackgroundJob(arg,capture=capture,timeout=timeout,
+                          logger=logger,sleeptime=self.sleeptime,
+                          **kwargs)
+        with self.__lock:
+            job._submit(self.__executor)
+            self.__jobs=[ j for j in self.__jobs if not j.done() ]
+            self.__jobs.append(job)
+        return job
+    @property
+    def jobs(self):
+        """!List of the jobs that have not finished."""
+        with self.__lock:
+            return [ j for j in self.__jobs if not j.done() ]
+    def wait(self,jobs=None,timeout=None):
+        """!Waits for jobs to finish.
+        @param jobs a BackgroundJob or list of them, or None to wait
+          for all jobs that were submitted to this pool
+        @param timeout maximum number of seconds to wait
+        @returns True if all of the jobs finished, False otherwise"""
+        if jobs is None: jobs=self.jobs
+        return waitprocs(jobs,logger=self.logger,timeout=timeout)
+    def cancel_all(self):
+        """!Cancels all jobs that have not finished."""
+        for job in self.jobs:
+            job.cancel()
+    def shutdown(self,wait=True,cancel=False):
+        """!Stops accepting new jobs.
+        @param wait if True, wait for the jobs to finish
+        @param cancel if True, cancel the jobs that have not finished"""
+        if cancel: self.cancel_all()
+        self.__executor.shutdown(wait=wait)
+
+##@var _default_pool
+# JobPool used by runbg() when no pool is given
+_default_pool=None
+_default_pool_lock=threading.Lock()
+
+def runbg(arg,capture=False,timeout=None,pool=None,**kwargs):
+    """!Runs the specified program in the background.  Specify
     capture=True to capture the command's output.  Returns a
-    produtil.prog.PopenCommand.  Call poll() to determine process
-    completion, and use the stdout_data property to get the output
-    after completion, if capture=True was specified.
-
-    @bug produtil.run.runbg() is not implemented
-
-    @warning this is not implemented
+    BackgroundJob.  Call poll() to determine process completion, and
+    use the out property to get the output after completion, if
+    capture=True was specified.  Use waitprocs() to wait for several
+    jobs.
 
     @param arg the produtil.prog.Runner to execute (output of
       exe(), bigexe() or mpirun()
     @param capture if True, capture output
+    @param timeout maximum number of seconds the program may run
+      before it is terminated, or None for no limit
+    @param pool the JobPool to run the program in.  By default, a
+      shared pool that runs one program per CPU at a time is used.
     @param kwargs same as for mpirun()"""
-    p=make_pipeline(arg,capture,**kwargs)
-    p.background()
-    return p
+    global _default_pool
+    if pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool=JobPool()
+            pool=_default_pool
+    return pool.submit(arg,capture=capture,timeout=timeout,**kwargs)
 
 def waitprocs(procs,logger=None,timeout=None,usleep=1000):
-    """!Not implemented: background process monitoring
-
-    Waits for one or more backgrounded processes to complete.  Logs to
+    """!Waits for one or more background jobs to complete.  Logs to
     the specified logger while doing so.  If a timeout is specified,
-    returns False after the given time if some processes have not
-    returned.  The usleep argument is the number of microseconds to
-    sleep between checks (can be a fraction).  The first argument,
-    procs specifies the processes to check.  It must be a
-    produtil.prog.Pipeline (return value from runbg) or an iterable
-    (list or tuple) of such.
+    returns False after the given time if some jobs have not
+    finished.  The first argument, procs, specifies the jobs to
+    check.  It must be a BackgroundJob (return value from runbg or
+    JobPool.submit) or an iterable (list or tuple) of such.
 
-    @bug produtil.run.waitprocs() is untested
-
-    @warning This is not tested and probably does not work.
-
-    @param procs the processes to watch
+    @param procs the jobs to watch
     @param logger the logging.Logger for log messages
     @param timeout how long to wait before giving up
-    @param usleep sleep time between checks"""
-    p=set()
-    if isinstance(procs,produtil.prog.PopenCommand):
-        p.add(procs)
-    else:
-        for pp in procs:
-            p.add(pp)
-    if logger is not None: logger.info("Wait for: %s",repr(p))
-    while p: # keep looping as long as there are unfinished processes
-        p2=set()
-        for proc in p:
-            ret=proc.poll()
-            if ret is not None:
-                if logger is not None:
-                    logger.info("%s returned %s"%(repr(proc),repr(ret)))
-            elif logger is not None and usleep>4.99999e6:
-                # babble about running processes if the sleep time is long.
-                logger.info("%s is still running"%(repr(proc),))
-                p2.add(proc)
-        p=p2
-
-        if not p: break # done! no need to sleep...
-
-        if usleep>4.99999e6 and logger is not None:
-            # babble about sleeping if the sleep time is 5sec or longer:
-            logger.info("... sleep %f ..."%(float(usleep/1.e6),))
-        time.sleep(usleep/1.e6)
-    return False if(p) else True
+    @param usleep unused.  This function is woken up when each job
+      finishes instead of checking at an interval.
+    @returns True if all of the jobs finished, False otherwise"""
+    if isinstance(procs,BackgroundJob):
+        procs=[procs]
+    pending={ job.future:job for job in procs }
+    if logger is not None: logger.info("Wait for: %s",repr(list(procs)))
+    deadline=None if timeout is None else time.monotonic()+timeout
+    while pending:
+        remaining=None
+        if deadline is not None:
+            remaining=max(0,deadline-time.monotonic())
+        (done,not_done)=concurrent.futures.wait(
+            pending,timeout=remaining,
+            return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            job=pending.pop(future)
+            if logger is not None:
+                logger.info("%s returned %s"%(repr(job),repr(job.poll())))
+        if not done:
+            break # timed out
+    if pending and logger is not None:
+        for job in pending.values():
+            logger.info("%s is still running"%(repr(job),))
+    return False if(pending) else True
 
 def runsync(logger=None,mpiimpl=None):
     """!Runs the "sync" command as an exe()."""
@@ -453,6 +686,25 @@ def run(arg,logger=None,sleeptime=None,**kwargs):
         logger.info('  - exit status %d'%(int(result),))
     return result
 
+def runrusage(arg,logger=None,sleeptime=None,**kwargs):
+    """!Executes the specified program like run() and returns its exit
+    status along with the resources used by each process that was
+    started.
+    @param arg the produtil.prog.Runner to execute (output of
+      exe(), bigexe() or mpirun()
+    @param logger a logging.Logger to log messages
+    @param sleeptime time to sleep between checks of child process
+    @param kwargs ignored
+    @returns a tuple containing the exit status (same as run()) and a
+      list of resource.struct_rusage objects from os.wait4, one for
+      each process in the pipeline"""
+    p=make_pipeline(arg,False,logger=logger)
+    p.communicate(sleeptime=sleeptime)
+    result=p.poll()
+    if logger is not None:
+        logger.info('  - exit status %d'%(int(result),))
+    return (result,p.rusage())
+
 def checkrun(arg,logger=None,**kwargs):
     """!This is a simple wrapper round run that raises
     ExitStatusException if the program exit status is non-zero.  
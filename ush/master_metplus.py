@@ -18,6 +18,11 @@ Developer Note: Please do not use f-strings in this file so that the
 
 import os
 import sys
+import time
+
+# time that the script started, used to report the time spent importing
+# modules if --profile-startup is used
+start_time = time.perf_counter()
 
 # add metplus directory to path so the wrappers and utilities can be found
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
@@ -28,6 +33,7 @@ import produtil.setup
 from metplus.util import metplus_check
 from metplus.util import pre_run_setup, run_metplus, post_run_cleanup
 from metplus.util import get_process_list
+from metplus.util import startup_util
 
 '''!@namespace master_metplus
 Main script the processes all the tasks in the PROCESS_LIST
@@ -38,6 +44,9 @@ def main():
     Master METplus script that invokes the necessary Python scripts
     to perform various activities, such as series analysis."""
 
+    startup_util.start_startup_profile(start_time)
+    startup_util.record_startup_step('Import modules and set up produtil')
+
     config = pre_run_setup(__file__, 'METplus')
 
     # Use config object to get the list of processes to call
@@ -389,8 +389,10 @@ for plot_info in plot_info_list:
             model_stat_file = do_string_sub(model_stat_template,
                                             **string_sub_dict)
             if os.path.exists(model_stat_file):
-                nrow = sum(1 for line in open(model_stat_file))
-                if nrow == 0:
+                model_lead_now_stat_file_data = plot_util.read_stat_file(
+                    logger, model_stat_file, met_version
+                )
+                if model_lead_now_stat_file_data is None:
                     logger.warning("Model "+str(model_num)+" "+model_name+" "
                                    +"with plot name "+model_plot_name+" "
                                    +"file: "+model_stat_file+" empty")
@@ -402,42 +404,12 @@ for plot_info in plot_info_list:
                     logger.debug("Model "+str(model_num)+" "+model_name+" "
                                  +"with plot name "+model_plot_name+" "
                                  +"file: "+model_stat_file+" exists")
-                    model_lead_now_stat_file_data = pd.read_csv(
-                        model_stat_file, sep=" ", skiprows=1,
-                        skipinitialspace=True, header=None
-                    )
-                    model_lead_now_stat_file_data.rename(
-                        columns=dict(zip(
-                            model_lead_now_stat_file_data.columns \
-                            [:len(stat_file_base_columns)],
-                            stat_file_base_columns
-                        )), inplace=True
-                    )
                     line_type = model_lead_now_stat_file_data['LINE_TYPE'][0]
                     stat_file_line_type_columns = (
                         plot_util.get_stat_file_line_type_columns(logger,
                                                                   met_version,
                                                                   line_type)
                     )
-                    model_lead_now_stat_file_data.rename(
-                        columns=dict(zip(
-                            model_lead_now_stat_file_data.columns \
-                            [len(stat_file_base_columns):],
-                            stat_file_line_type_columns
-                        )), inplace=True
-                    )
-                    model_lead_now_stat_file_data_fcstvaliddates = (
-                        model_lead_now_stat_file_data.loc[:] \
-                        ['FCST_VALID_BEG'].values
-                    )
-                    model_lead_now_data = (
-                        pd.DataFrame(np.nan, index=model_lead_now_data_index,
-                                     columns=stat_file_line_type_columns)
-                        )
-                    model_lead_now_stat_file_data.fillna(
-                        {'FCST_UNITS':'NA', 'OBS_UNITS':'NA', 'VX_MASK':'NA'},
-                        inplace=True
-                    )
                     if float(met_version) >= 8.1:
                         model_now_fcst_units = (
                             model_lead_now_stat_file_data \
@@ -451,26 +423,13 @@ for plot_info in plot_info_list:
                             fcst_var_units_list.append(model_now_fcst_units)
                         if model_now_obs_units != 'NA':
                             obs_var_units_list.append(model_now_obs_units)
-                    for expected_date in expected_stat_file_dates:
-                        if expected_date in \
-                                model_lead_now_stat_file_data_fcstvaliddates:
-                            matching_date_idx = (
-                                model_lead_now_stat_file_data_fcstvaliddates \
-                                .tolist().index(expected_date)
-                            )
-                            model_lead_now_stat_file_data_indexed = (
-                                model_lead_now_stat_file_data \
-                                .loc[matching_date_idx][:]
-                            )
-                            for col in stat_file_line_type_columns:
-                                model_lead_now_data.loc[
-                                    (model_plot_name, 
-                                     fcst_lead,
-                                     expected_date)
-                                ][col] = (
-                                   model_lead_now_stat_file_data_indexed \
-                                  .loc[:][col]
-                                )
+                    model_lead_now_data = (
+                        plot_util.get_stat_file_data_by_date(
+                            model_lead_now_stat_file_data,
+                            model_lead_now_data_index,
+                            stat_file_line_type_columns
+                        )
+                    )
             else:
                 logger.warning("Model "+str(model_num)+" "+model_name+" "
                                +"with plot name "+model_plot_name+" "
@@ -9,6 +9,23 @@ import pandas as pd
  @brief Provides utility functions for METplus plotting use case.
 """
 
+# number of random resamples used to compute EMC_MONTE_CARLO
+# confidence intervals
+MONTE_CARLO_NTESTS = 10000
+
+# extension added to a .stat file path to get the path of the binary file
+# that stores the parsed columns of the .stat file
+STAT_FILE_CACHE_EXTENSION = '.cache.npz'
+
+# .stat file path -> tuple of modification time and size of the file
+# and dataframe of the parsed columns, so each file is only parsed once
+_STAT_FILE_CACHE = {}
+
+# maximum number of resamples computed at once for EMC_MONTE_CARLO
+# confidence intervals, limits memory use to roughly
+# 2 * chunk size * number of days * number of columns values
+MONTE_CARLO_CHUNK_SIZE = 1000
+
 def get_date_arrays(date_type, date_beg, date_end,
                     fcst_valid_hour, fcst_init_hour, 
                     obs_valid_hour, obs_init_hour,
@@ -339,6 +356,222 @@ def get_stat_file_line_type_columns(logger, met_version, line_type):
             ]
     return stat_file_line_type_columns
 
+def get_stat_file_cache_path(stat_file):
+    """! Get the path of the binary file that stores the parsed
+         columns of a MET .stat file
+
+             Args:
+                 stat_file       - string of the path to the
+                                   MET .stat file
+
+             Returns:
+                 stat_cache_file - string of the path to the
+                                   binary cache file
+    """
+    return stat_file+STAT_FILE_CACHE_EXTENSION
+
+def read_stat_file_cache(stat_cache_file, file_key):
+    """! Read the parsed columns of a MET .stat file from its
+         binary cache file if it was written for the current
+         version of the .stat file
+
+             Args:
+                 stat_cache_file - string of the path to the
+                                   binary cache file
+                 file_key        - tuple of the modification time
+                                   in nanoseconds and size in
+                                   bytes of the .stat file
+
+             Returns:
+                 stat_file_data  - dataframe of the .stat file
+                                   columns or None if the cache
+                                   file does not exist or is out
+                                   of date
+    """
+    if not os.path.exists(stat_cache_file):
+        return None
+    try:
+        with np.load(stat_cache_file, allow_pickle=False) as cache:
+            if tuple(cache['__file_key__'].tolist()) != file_key:
+                return None
+            columns = cache['__columns__'].tolist()
+            stat_file_data = pd.DataFrame(
+                {column: cache['column'+str(col_idx)]
+                 for col_idx, column in enumerate(columns)},
+                columns=columns
+            )
+    except (OSError, ValueError, KeyError):
+        return None
+    return stat_file_data
+
+def write_stat_file_cache(stat_cache_file, file_key, stat_file_data):
+    """! Write the parsed columns of a MET .stat file to a
+         binary cache file. Numeric columns are stored with their
+         type and all other columns are stored as strings. Nothing
+         is written if the directory is not writable.
+
+             Args:
+                 stat_cache_file - string of the path to the
+                                   binary cache file
+                 file_key        - tuple of the modification time
+                                   in nanoseconds and size in
+                                   bytes of the .stat file
+                 stat_file_data  - dataframe of the .stat file
+                                   columns
+    """
+    cache = {
+        '__file_key__': np.array(file_key, dtype=np.int64),
+        '__columns__': np.array(stat_file_data.columns.tolist(), dtype=str)
+    }
+    for col_idx, column in enumerate(stat_file_data.columns):
+        column_values = stat_file_data[column]
+        if pd.api.types.is_numeric_dtype(column_values):
+            cache['column'+str(col_idx)] = column_values.to_numpy()
+        else:
+            cache['column'+str(col_idx)] = (
+                column_values.to_numpy(dtype=str)
+            )
+    # write to a temporary file and rename so that another plotting
+    # script reading the cache never sees a partially written file
+    tmp_file = stat_cache_file+'.'+str(os.getpid())+'.tmp'
+    try:
+        with open(tmp_file, 'wb') as cache_file:
+            np.savez(cache_file, **cache)
+        os.replace(tmp_file, stat_cache_file)
+    except OSError:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+def read_stat_file(logger, stat_file, met_version, use_cache_file=True):
+    """! Read a MET .stat file from stat_analysis into a dataframe
+         with the standard and line type column names. Each file
+         is only parsed once. The parsed columns are kept in memory
+         and written to a binary cache file next to the .stat file
+         so other plotting scripts can read them without parsing
+         the file again. The cache is not used if the .stat file
+         has been modified since it was written.
+
+             Args:
+                 logger         - logging file
+                 stat_file      - string of the path to the
+                                  MET .stat file
+                 met_version    - string of MET version number
+                                  being used to run stat_analysis
+                 use_cache_file - boolean, read and write the
+                                  binary cache file if True
+
+             Returns:
+                 stat_file_data - dataframe of the .stat file
+                                  columns or None if the file
+                                  does not contain any lines
+                                  after the header
+    """
+    file_stat = os.stat(stat_file)
+    file_key = (file_stat.st_mtime_ns, file_stat.st_size)
+    cached = _STAT_FILE_CACHE.get(stat_file)
+    if cached is not None and cached[0] == file_key:
+        return cached[1]
+    stat_file_data = None
+    stat_cache_file = get_stat_file_cache_path(stat_file)
+    if use_cache_file:
+        stat_file_data = read_stat_file_cache(stat_cache_file, file_key)
+        if stat_file_data is not None:
+            logger.debug("Read parsed columns of "+stat_file+" from "
+                         +stat_cache_file)
+    if stat_file_data is None:
+        stat_file_data = parse_stat_file(logger, stat_file, met_version)
+        if use_cache_file and stat_file_data is not None:
+            write_stat_file_cache(stat_cache_file, file_key, stat_file_data)
+    _STAT_FILE_CACHE[stat_file] = (file_key, stat_file_data)
+    return stat_file_data
+
+def parse_stat_file(logger, stat_file, met_version):
+    """! Parse a MET .stat file from stat_analysis and name the
+         standard and line type columns. Missing values in the
+         text columns are set to NA.
+
+             Args:
+                 logger         - logging file
+                 stat_file      - string of the path to the
+                                  MET .stat file
+                 met_version    - string of MET version number
+                                  being used to run stat_analysis
+
+             Returns:
+                 stat_file_data - dataframe of the .stat file
+                                  columns or None if the file
+                                  does not contain any lines
+                                  after the header
+    """
+    if os.path.getsize(stat_file) == 0:
+        return None
+    try:
+        stat_file_data = pd.read_csv(
+            stat_file, sep=" ", skiprows=1,
+            skipinitialspace=True, header=None
+        )
+    except pd.errors.EmptyDataError:
+        return None
+    stat_file_base_columns = get_stat_file_base_columns(met_version)
+    nbase_columns = len(stat_file_base_columns)
+    line_type = stat_file_data[nbase_columns-1][0]
+    stat_file_line_type_columns = (
+        get_stat_file_line_type_columns(logger, met_version, line_type)
+    )
+    stat_file_data.columns = (
+        (stat_file_base_columns+stat_file_line_type_columns)
+        [:len(stat_file_data.columns)]
+        +stat_file_data.columns[
+            nbase_columns+len(stat_file_line_type_columns):
+        ].tolist()
+    )
+    # units and mask columns are text even if every value is NA
+    text_columns = ['FCST_UNITS', 'OBS_UNITS', 'VX_MASK']
+    for column in stat_file_data.columns:
+        if (column in text_columns
+                or not pd.api.types.is_numeric_dtype(stat_file_data[column])):
+            stat_file_data[column] = (
+                stat_file_data[column].astype(object).fillna('NA').astype(str)
+            )
+    return stat_file_data
+
+def get_stat_file_data_by_date(stat_file_data, data_index,
+                               stat_file_line_type_columns):
+    """! Get the line type columns of a MET .stat file for each
+         date in an index. If a date appears more than once in the
+         file the first line is used. Dates that are not in the
+         file are set to NaN.
+
+             Args:
+                 stat_file_data              - dataframe of the
+                                               .stat file columns
+                 data_index                  - MultiIndex with
+                                               a level named dates
+                                               containing the
+                                               expected
+                                               FCST_VALID_BEG
+                                               values
+                 stat_file_line_type_columns - list of the line
+                                               type columns
+
+             Returns:
+                 model_data                  - dataframe of the
+                                               line type columns
+                                               with data_index
+    """
+    stat_file_data_by_date = (
+        stat_file_data.drop_duplicates('FCST_VALID_BEG')
+        .set_index('FCST_VALID_BEG')
+        .reindex(data_index.get_level_values('dates'))
+    )
+    model_data_values = (
+        stat_file_data_by_date[stat_file_line_type_columns]
+        .apply(pd.to_numeric, errors='coerce')
+        .to_numpy(dtype=float)
+    )
+    return pd.DataFrame(model_data_values, index=data_index,
+                        columns=stat_file_line_type_columns)
+
 def get_clevels(data):
     """! Get contour levels for plotting
   
@@ -408,8 +641,164 @@ def calculate_average(logger, average_method, stat, model_dataframe,
         exit(1)
     return average_array
 
+def get_monte_carlo_swap_mask(randx, ntests, total_days):
+    """! Get which days use model A in the first random sample
+         and model B in the second random sample for each
+         Monte Carlo resample
+
+             Args:
+                 randx      - 2D array of random numbers [0,1)
+                 ntests     - integer of number of resamples
+                 total_days - integer of number of days being
+                              considered, sample size
+
+             Returns:
+                 swap_mask  - 2D boolean array of shape
+                              (ntests, total_days), True where the
+                              first random sample uses model A
+    """
+    return randx[:ntests,:total_days] - 0.5 >= 0
+
+def calculate_monte_carlo_scores(logger, modelB_values, modelA_values,
+                                 total_days, stat, average_method, randx,
+                                 ntests=MONTE_CARLO_NTESTS,
+                                 chunk_size=MONTE_CARLO_CHUNK_SIZE):
+    """! Calculate the average statistic of the two random samples
+         for each Monte Carlo resample. Each random sample takes
+         the values for each day from either model A or model B
+         based on randx. Instead of building each sample separately,
+         a chunk of resamples is stacked into one dataframe indexed by
+         resample number so the statistics and averages of all of the
+         resamples in the chunk are computed in one call.
+
+             Args:
+                 logger         - logging file
+                 modelB_values  - dataframe of model B .stat columns
+                 modelA_values  - dataframe of model A .stat columns
+                 total_days     - integer of number of days being
+                                  considered, sample size
+                 stat           - string of the statistic the
+                                  confidence intervals are being
+                                  calculated for
+                 average_method - string of the method to
+                                  use to calculate the
+                                  average
+                 randx          - 2D array of random numbers [0,1)
+                 ntests         - integer of number of resamples
+                 chunk_size     - integer of the maximum number of
+                                  resamples to compute at once
+
+             Returns:
+                 scores_rand1   - array of the average statistic of
+                                  the first random sample of each
+                                  resample
+                 scores_rand2   - array of the average statistic of
+                                  the second random sample of each
+                                  resample
+    """
+    total_days = int(total_days)
+    columns = modelB_values.columns
+    modelB_array = modelB_values.to_numpy(dtype=float)
+    modelA_array = (
+        modelA_values.reindex(columns=columns).to_numpy(dtype=float)
+    )
+    nrows = modelB_array.shape[0]
+    # index levels after the model name, i.e. the dates, are the same
+    # for each resample
+    if modelB_values.index.nlevels > 1:
+        row_index = modelB_values.index.droplevel(0)
+    else:
+        row_index = pd.RangeIndex(nrows, name='dates')
+    row_levels = [row_index.get_level_values(level)
+                  for level in range(row_index.nlevels)]
+    row_names = list(row_index.names)
+    swap_mask = get_monte_carlo_swap_mask(randx, ntests, total_days)
+    if chunk_size is None or chunk_size < 1:
+        chunk_size = ntests
+    scores_rand1 = np.empty(ntests)
+    scores_rand2 = np.empty(ntests)
+    for chunk_start in range(0, ntests, chunk_size):
+        chunk_end = min(chunk_start+chunk_size, ntests)
+        nchunk = chunk_end - chunk_start
+        chunk_swap = swap_mask[chunk_start:chunk_end,:,np.newaxis]
+        # rows after total_days are not part of the sample
+        rand1_array = np.full((nchunk, nrows, len(columns)), np.nan)
+        rand2_array = np.full((nchunk, nrows, len(columns)), np.nan)
+        rand1_array[:,:total_days,:] = np.where(
+            chunk_swap, modelA_array[:total_days], modelB_array[:total_days]
+        )
+        rand2_array[:,:total_days,:] = np.where(
+            chunk_swap, modelB_array[:total_days], modelA_array[:total_days]
+        )
+        chunk_index = pd.MultiIndex.from_arrays(
+            [np.repeat(np.arange(chunk_start, chunk_end), nrows)]
+            +[np.tile(level, nchunk) for level in row_levels],
+            names=['model_plot_name']+row_names
+        )
+        for rand_array, scores in [(rand1_array, scores_rand1),
+                                   (rand2_array, scores_rand2)]:
+            rand_data = pd.DataFrame(
+                rand_array.reshape(nchunk*nrows, len(columns)),
+                index=chunk_index, columns=columns
+            )
+            scores[chunk_start:chunk_end] = calculate_average_by_sample(
+                logger, average_method, stat, rand_data, nrows
+            )
+    return scores_rand1, scores_rand2
+
+def calculate_average_by_sample(logger, average_method, stat,
+                                sample_dataframe, nrows):
+    """! Calculate the average of the statistic for each sample
+         in a dataframe where the first index level identifies
+         the sample. Gives the same values as calling
+         calculate_average for each sample separately.
+
+             Args:
+                 logger           - logging file
+                 average_method   - string of the method to
+                                    use to calculate the
+                                    average
+                 stat             - string of the statistic the
+                                    average is being taken for
+                 sample_dataframe - dataframe of .stat columns for
+                                    all samples
+                 nrows            - integer of number of rows in
+                                    each sample
+
+             Returns:
+                 average_array    - array of average value of
+                                    each sample
+    """
+    nsamples = len(sample_dataframe.index.get_level_values(0).unique())
+    if average_method == 'MEAN' or average_method == 'MEDIAN':
+        stat_values, stat_values_array, stat_plot_name = (
+            calculate_stat(logger, sample_dataframe, stat)
+        )
+        sample_stat_values = stat_values_array[0].reshape(nsamples, -1)
+        if average_method == 'MEAN':
+            average_array = np.ma.mean(sample_stat_values, axis=1)
+        else:
+            average_array = np.ma.median(sample_stat_values, axis=1)
+    elif average_method == 'AGGREGATION':
+        sample_dataframe_aggsum = (
+            sample_dataframe.groupby('model_plot_name').agg(['sum'])
+        )
+        sample_dataframe_aggsum.columns = (
+            sample_dataframe_aggsum.columns.droplevel(1)
+        )
+        avg_values, avg_array, stat_plot_name = (
+            calculate_stat(logger, sample_dataframe_aggsum/nrows, stat)
+        )
+        average_array = avg_array[0]
+    else:
+        logger.error("Invalid entry for MEAN_METHOD, "
+                     +"use MEAN, MEDIAN, or AGGREGATION")
+        exit(1)
+    return np.ma.filled(np.ma.asarray(average_array, dtype=float), np.nan)
+
 def calculate_ci(logger, ci_method, modelB_values, modelA_values, total_days,
-                 stat, average_method, randx):
+                 stat, average_method, randx,
+                 chunk_size=MONTE_CARLO_CHUNK_SIZE):
     """! Calculate confidence intervals between two sets of data
  
              Args:
@@ -427,6 +816,9 @@ def calculate_ci(logger, ci_method, modelB_values, modelA_values, total_days,
                                   use to calculate the
                                   average
                  randx          - 2D array of random numbers [0,1)
+                 chunk_size     - integer of the maximum number of
+                                  Monte Carlo resamples to compute
+                                  at once, limits memory use
 
              Returns:
                  intvl          - float of the confidence interval
@@ -447,50 +839,12 @@ def calculate_ci(logger, ci_method, modelB_values, modelA_values, total_days,
         elif ndays < 20:
             intvl = 2.228*modelB_modelA_std/np.sqrt(ndays-1)
     elif ci_method == 'EMC_MONTE_CARLO':
-        ntest, ntests = 1, 10000
-        scores_rand1 = np.empty(ntests)
-        scores_rand2 = np.empty(ntests)
-        scores_diff = np.empty(ntests)
-        while ntest <= ntests:
-            rand1_data = pd.DataFrame(
-                np.nan, index=modelB_values.index,
-                columns=modelB_values.columns
-            )
-            replace_level= rand1_data.index.get_level_values(0)[0]
-            rand1_data.rename(index={replace_level: 'rand1'}, inplace=True)
-            rand2_data = pd.DataFrame(
-                np.nan, index=modelB_values.index,
-                columns=modelB_values.columns
-            )
-            replace_level= rand2_data.index.get_level_values(0)[0]
-            rand2_data.rename(index={replace_level: 'rand2'}, inplace=True)
-            nday, ndays = 1, total_days
-            while nday <= ndays:
-                if randx[ntest-1,nday-1] - 0.5 >= 0:
-                    rand1_data.iloc[nday-1,:] = modelA_values.iloc[nday-1,:]
-                    rand2_data.iloc[nday-1,:] = modelB_values.iloc[nday-1,:]
-                else:
-                    rand1_data.iloc[nday-1,:] = modelB_values.iloc[nday-1,:]
-                    rand2_data.iloc[nday-1,:] = modelA_values.iloc[nday-1,:]
-                nday+=1
-            rand1_stat_values, rand1_stat_values_array, stat_plot_name = (
-                calculate_stat(logger, rand1_data, stat)
-            )
-            rand2_stat_values, rand2_stat_values_array, stat_plot_name = (
-                calculate_stat(logger, rand2_data, stat)
-            )
-            rand1_average_array = calculate_average(logger, average_method,
-                                                    stat, rand1_data,
-                                                    rand1_stat_values_array[:,0,:])
-            scores_rand1[ntest-1] = rand1_average_array[0]
-            rand2_average_array = calculate_average(logger, average_method,
-                                                    stat, rand2_data,
-                                                    rand2_stat_values_array[:,0,:])
-            scores_rand2[ntest-1] = rand2_average_array[0]
-            scores_diff[ntest-1] = (
-                rand2_average_array[0] - rand1_average_array[0]
-            )
-            ntest+=1
+        ntests = MONTE_CARLO_NTESTS
+        scores_rand1, scores_rand2 = calculate_monte_carlo_scores(
+            logger, modelB_values, modelA_values, total_days, stat,
+            average_method, randx, ntests, chunk_size
+        )
+        scores_diff = scores_rand2 - scores_rand1
         scores_diff_mean = np.sum(scores_diff)/ntests
         scores_diff_var = np.sum((scores_diff-scores_diff_mean)**2) 
         scores_diff_std = np.sqrt(scores_diff_var/(ntests-1))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+"""
+Program Name: run_metplus_tasks.py
+Contact(s): George McCabe
+Abstract: Runs a group of METplus tasks (run times) on a node that was
+ allocated to the batch job when LOOP_EXECUTOR = distributed
+History Log:  Initial version
+Usage: Started by METplus. Do not run directly.
+       run_metplus_tasks.py <group_file>
+Parameters: group_file - JSON file describing the tasks to run
+Input Files: group file and the METplus configuration it references
+Output Files: log output and results of each task
+Condition codes: 0 if all tasks reported results, 1 if not, 2 on failure
+"""
+
+import os
+import sys
+
+# add metplus directory to path so the wrappers and utilities can be found
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                os.pardir)))
+
+import produtil.setup
+
+from metplus.util import distributed_util
+
+'''!@namespace run_metplus_tasks
+Runs a group of tasks for the distributed loop executor
+'''
+
+def main():
+    """!Run the tasks in the group file passed on the command line"""
+    if len(sys.argv) != 2:
+        print("Usage: run_metplus_tasks.py <group_file>")
+        sys.exit(2)
+
+    sys.exit(distributed_util.run_task_group(sys.argv[1]))
+
+if __name__ == "__main__":
+    try:
+        produtil.setup.setup(send_dbn=False, jobname='run-METplus-tasks')
+        main()
+    except Exception as exc:
+        produtil.log.jlogger.critical(
+            'run_metplus_tasks failed: %s' % (str(exc),), exc_info=True)
+        sys.exit(2)